@@ -10,13 +10,22 @@ import time
 import json
 import logging
 from datetime import datetime
-from collections import deque
 from typing import Dict, List, Optional
-import numpy as np
-import requests
 from web3 import Web3
 from dotenv import load_dotenv
 
+from asset_registry import AssetRegistry
+from async_chain_reader import AsyncPriceReader
+from chain_reader import PriceReading
+from flag_aggregator import FlagAggregator
+from hermes_stream import HermesStreamSource, feed_ids
+from detectors import create_detector, parse_timeframes
+from pipeline import DetectionResult, Pipeline, PriceTick
+from publisher import UpdatePublisher
+from rpc_pool import make_web3, rpc_urls
+from snapshot import DEFAULT_SNAPSHOT_DIR, PeriodicSnapshot, detector_fingerprint, prefixed, unprefixed
+from tx_manager import TransactionManager
+
 # Load environment variables
 load_dotenv()
 
@@ -28,52 +37,6 @@ logging.basicConfig(
 logger = logging.getLogger("SentinelAI")
 
 
-class AnomalyDetector:
-    """Statistical anomaly detector using z-score method"""
-    
-    def __init__(self, window_size: int = 30, threshold: float = 2.5):
-        self.window_size = window_size
-        self.threshold = threshold
-        self.price_history = deque(maxlen=window_size)
-        
-    def add_price(self, price: float) -> None:
-        """Add a new price to the history"""
-        self.price_history.append(price)
-        
-    def calculate_z_score(self, price: float) -> Optional[float]:
-        """Calculate z-score for a given price"""
-        if len(self.price_history) < 10:  # Need minimum samples
-            return None
-            
-        mean = np.mean(self.price_history)
-        std = np.std(self.price_history)
-        
-        if std == 0:
-            return 0
-            
-        z_score = (price - mean) / std
-        return z_score
-        
-    def is_anomaly(self, price: float) -> tuple[bool, Optional[float], str]:
-        """
-        Check if price is anomalous
-        Returns: (is_anomalous, z_score, reason)
-        """
-        z_score = self.calculate_z_score(price)
-        
-        if z_score is None:
-            return False, None, "Insufficient data"
-            
-        is_anomalous = abs(z_score) > self.threshold
-        
-        if is_anomalous:
-            direction = "spike" if z_score > 0 else "drop"
-            reason = f"Z-score {z_score:.2f} (>{self.threshold}σ {direction})"
-            return True, z_score, reason
-        else:
-            return False, z_score, f"Normal (z={z_score:.2f})"
-
-
 class MeTTaReasoner:
     """
     Simple MeTTa-inspired reasoning engine
@@ -113,23 +76,27 @@ class SentinelAgent:
     
     def __init__(self):
         # Load configuration
-        self.rpc_url = os.getenv("ETH_RPC_URL")
+        self.rpc_urls = rpc_urls()  # RPC_URLS, or just ETH_RPC_URL
         self.contract_address = os.getenv("SENTINEL_ORACLE_ADDRESS")
         self.private_key = os.getenv("AGENT_PRIVATE_KEY")
         self.hermes_url = os.getenv("PYTH_HERMES_URL", "https://hermes.pyth.network")
         self.btc_feed_id = os.getenv("BTC_PRICE_FEED_ID")
         self.api_url = os.getenv("API_SERVER_URL", "http://localhost:8080")
+        self.publisher = UpdatePublisher(self.api_url)
         
         # Validate configuration
-        if not all([self.rpc_url, self.contract_address, self.private_key]):
+        if not all([self.rpc_urls, self.contract_address, self.private_key]):
             raise ValueError("Missing required environment variables")
         
-        # Initialize Web3
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # Initialize Web3 over the RPC pool
+        self.w3 = make_web3(self.rpc_urls)
         self.account = self.w3.eth.account.from_key(self.private_key)
         
         logger.info(f"Agent initialized with address: {self.account.address}")
         
+        # Flag/clear transactions are sent without waiting for receipts
+        self.tx_manager = TransactionManager(self.w3, self.account)
+        
         # Load contract ABI (simplified for demo)
         self.contract_abi = self._get_contract_abi()
         self.contract = self.w3.eth.contract(
@@ -137,10 +104,35 @@ class SentinelAgent:
             abi=self.contract_abi
         )
         
+        # Asset ids as listed on the contract, looked up once instead of hashed per call
+        self.registry = AssetRegistry(self.w3, self.contract_address)
+        self.registry.load()
+        
+        # Flags/clears raised within FLAG_BATCH_WINDOW seconds share one transaction
+        self.flags = FlagAggregator(self.tx_manager, self.contract)
+        
+        # PRICE_READS=async: read over AsyncWeb3 with a per-call deadline (RPC_DEADLINE)
+        self.price_reader = None
+        if os.getenv("PRICE_READS", "").lower() == "async":
+            self.price_reader = AsyncPriceReader(self.rpc_urls, self.contract_address,
+                                                 id_of=self.registry.id_of)
+        
+        # PRICE_READS=hermes: stream BTC/USD from Pyth Hermes instead of reading the contract
+        self.hermes = None
+        if os.getenv("PRICE_READS", "").lower() == "hermes":
+            self.hermes = HermesStreamSource(self.hermes_url, {"BTC/USD": feed_ids()["BTC/USD"]})
+        
         # Initialize detector and reasoner
         threshold = float(os.getenv("ANOMALY_THRESHOLD", "2.5"))
         window_size = int(os.getenv("WINDOW_SIZE", "30"))
-        self.detector = AnomalyDetector(window_size, threshold)
+        detector_mode = os.getenv("DETECTOR_MODE", "zscore")
+        half_life = float(os.getenv("EWMA_HALF_LIFE", str(window_size / 2)))
+        timeframes = parse_timeframes(os.getenv("DETECTOR_TIMEFRAMES"))
+        # Seconds one sample stands for: the ewma mode decays by real elapsed time (0 = per sample)
+        sample_interval = float(os.getenv("SAMPLE_INTERVAL", os.getenv("CHECK_INTERVAL", "5"))) or None
+        self.detector = create_detector(detector_mode, window_size, threshold,
+                                        half_life=half_life, timeframes=timeframes,
+                                        sample_interval=sample_interval)
         self.reasoner = MeTTaReasoner()
         
         # State tracking
@@ -148,6 +140,46 @@ class SentinelAgent:
         self.anomaly_cooldown = 30  # seconds
         self.is_anomalous = False
         
+        # Change detection: no read until a new block arrives, and a price whose
+        # on-chain timestamp was already scored is not added to the history again
+        self.last_block: Optional[int] = None
+        self.last_sample_time: Optional[float] = None
+        
+        # Warm restart: window, flag and cooldown are snapshotted periodically
+        snapshot_dir = os.getenv("SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR)
+        self.snapshot_config = detector_fingerprint(detector_mode, window_size, half_life, timeframes)
+        self.snapshot = PeriodicSnapshot(
+            os.path.join(snapshot_dir, "agent.snap") if snapshot_dir else "",
+            float(os.getenv("SNAPSHOT_INTERVAL", "60")),
+            self._collect_state, self._apply_state,
+            max_age=float(os.getenv("SNAPSHOT_MAX_AGE", "3600")),
+        )
+        self.snapshot.restore()
+        
+    def _collect_state(self) -> tuple:
+        """Snapshot metadata and arrays for the detector and on-chain flag state"""
+        meta = {
+            "config": self.snapshot_config,
+            "last_anomaly_flag_time": self.last_anomaly_flag_time,
+            "is_anomalous": self.is_anomalous,
+            "last_sample_time": self.last_sample_time,
+        }
+        return meta, prefixed("detector", self.detector.get_state())
+    
+    def _apply_state(self, meta: Dict, arrays: Dict) -> bool:
+        """Load state from a snapshot taken with the same detector settings"""
+        state = unprefixed("detector", arrays)
+        current = self.detector.get_state()
+        if meta.get("config") != self.snapshot_config or set(state) != set(current) or any(
+                state[name].shape != array.shape for name, array in current.items()):
+            return False
+        
+        self.detector.set_state(state)
+        self.last_anomaly_flag_time = meta["last_anomaly_flag_time"]
+        self.is_anomalous = meta["is_anomalous"]
+        self.last_sample_time = meta.get("last_sample_time")
+        return True
+    
     def _get_contract_abi(self) -> list:
         """Get contract ABI"""
         # Simplified ABI with only needed functions
@@ -171,6 +203,25 @@ class SentinelAgent:
                 "stateMutability": "nonpayable",
                 "type": "function"
             },
+            {
+                "inputs": [
+                    {"internalType": "bytes32[]", "name": "assetIds", "type": "bytes32[]"},
+                    {"internalType": "string[]", "name": "reasons", "type": "string[]"}
+                ],
+                "name": "flagAnomalies",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
+            {
+                "inputs": [
+                    {"internalType": "bytes32[]", "name": "assetIds", "type": "bytes32[]"}
+                ],
+                "name": "clearAnomalies",
+                "outputs": [],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
             {
                 "inputs": [
                     {"internalType": "bytes32", "name": "assetId", "type": "bytes32"}
@@ -186,10 +237,18 @@ class SentinelAgent:
             }
         ]
     
-    def fetch_price_from_contract(self) -> Optional[float]:
-        """Fetch latest price from smart contract"""
+    def fetch_price_from_contract(self) -> Optional[PriceReading]:
+        """Fetch latest price, its on-chain timestamp and flag from smart contract"""
+        if self.price_reader:
+            reading = self.price_reader.read_prices(["BTC/USD"])["BTC/USD"]
+            if reading is None:
+                logger.error("Error fetching price from contract: read failed or timed out")
+                return None
+            logger.info(f"Fetched price from contract: ${reading.price:.2f}")
+            return reading
+        
         try:
-            asset_id = Web3.solidity_keccak(['string'], ['BTC/USD'])
+            asset_id = self.registry.id_of('BTC/USD')
             price_data = self.contract.functions.getLatestPrice(asset_id).call()
             
             price = price_data[0]  # int64 price
@@ -199,185 +258,200 @@ class SentinelAgent:
             price_float = price / 1e8
             
             logger.info(f"Fetched price from contract: ${price_float:.2f}")
-            return price_float
+            return PriceReading(price_float, timestamp, price_data[2])
             
         except Exception as e:
             logger.error(f"Error fetching price from contract: {e}")
             return None
     
     def flag_anomaly_on_chain(self, asset_id: bytes, reason: str) -> bool:
-        """Send transaction to flag anomaly on-chain"""
-        try:
-            # Check cooldown
-            current_time = time.time()
-            if current_time - self.last_anomaly_flag_time < self.anomaly_cooldown:
-                logger.info("Cooldown active, skipping duplicate flag")
-                return False
-            
-            logger.info(f"Flagging anomaly on-chain: {reason}")
-            
-            # Build transaction
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            tx = self.contract.functions.flagAnomaly(
-                asset_id,
-                reason
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gas': 200000,
-                'gasPrice': self.w3.eth.gas_price,
-            })
-            
-            # Sign and send
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            logger.info(f"Transaction sent: {tx_hash.hex()}")
-            
-            # Wait for confirmation
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            
-            if receipt['status'] == 1:
-                logger.info("✅ Anomaly flagged successfully!")
-                self.last_anomaly_flag_time = current_time
-                self.is_anomalous = True
-                return True
-            else:
-                logger.error("❌ Transaction failed")
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error flagging anomaly: {e}")
+        """Submit a transaction to flag an anomaly on-chain (does not wait for the receipt)"""
+        # Check cooldown
+        current_time = time.time()
+        if current_time - self.last_anomaly_flag_time < self.anomaly_cooldown:
+            logger.info("Cooldown active, skipping duplicate flag")
+            return False
+        if self.flags.pending(asset_id, "flag"):
+            logger.info("Flag transaction already pending, skipping duplicate flag")
             return False
+        
+        logger.info(f"Flagging anomaly on-chain: {reason}")
+        
+        def confirmed(receipt: Dict) -> None:
+            logger.info("✅ Anomaly flagged successfully!")
+            self.is_anomalous = True
+        
+        self.flags.flag(asset_id, reason, on_confirmed=confirmed)
+        # Cooldown starts at submission so an in-flight flag is not re-sent
+        self.last_anomaly_flag_time = current_time
+        return True
     
     def clear_anomaly_on_chain(self, asset_id: bytes) -> bool:
-        """Clear anomaly flag on-chain"""
-        try:
-            if not self.is_anomalous:
-                return False
-                
-            logger.info("Clearing anomaly flag on-chain")
-            
-            nonce = self.w3.eth.get_transaction_count(self.account.address)
-            
-            tx = self.contract.functions.clearAnomaly(
-                asset_id
-            ).build_transaction({
-                'from': self.account.address,
-                'nonce': nonce,
-                'gas': 100000,
-                'gasPrice': self.w3.eth.gas_price,
-            })
-            
-            signed_tx = self.w3.eth.account.sign_transaction(tx, self.private_key)
-            tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            
-            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
-            
-            if receipt['status'] == 1:
-                logger.info("✅ Anomaly cleared successfully!")
-                self.is_anomalous = False
-                return True
-            else:
-                return False
-                
-        except Exception as e:
-            logger.error(f"Error clearing anomaly: {e}")
+        """Submit a transaction to clear the anomaly flag on-chain (does not wait for the receipt)"""
+        if not self.is_anomalous:
+            return False
+        if self.flags.pending(asset_id, "clear"):
             return False
+        
+        logger.info("Clearing anomaly flag on-chain")
+        
+        def confirmed(receipt: Dict) -> None:
+            logger.info("✅ Anomaly cleared successfully!")
+            self.is_anomalous = False
+        
+        self.flags.clear(asset_id, on_confirmed=confirmed)
+        return True
     
     def update_api_server(self, price: float, z_score: Optional[float], 
-                         is_anomalous: bool, reason: str) -> None:
-        """Send update to API server for frontend"""
+                         is_anomalous: bool, reason: str,
+                         timeframes: Optional[Dict[int, Optional[float]]] = None) -> None:
+        """Queue an update of the API server for the frontend (sent in the background)"""
+        self.publisher.publish({
+            "status": "running",
+            "price": price,
+            "z_score": z_score,
+            "is_anomalous": is_anomalous,
+            "reason": reason,
+            "timeframe_z_scores": {str(w): z for w, z in (timeframes or {}).items()},
+        })
+    
+    def poll(self) -> List[str]:
+        """Pipeline source: BTC/USD once a new block has arrived (stored prices cannot change otherwise)"""
         try:
-            data = {
-                "status": "running",
-                "price": price,
-                "z_score": z_score,
-                "is_anomalous": is_anomalous,
-                "reason": reason
-            }
-            response = requests.post(f"{self.api_url}/api/update", json=data, timeout=2)
-            if response.status_code == 200:
-                logger.debug("API server updated")
+            block = self.w3.eth.block_number
         except Exception as e:
-            logger.debug(f"Could not update API server: {e}")
+            # Better a redundant read than a missed update
+            logger.debug(f"Could not read the block number: {e}")
+            return ["BTC/USD"]
+        if block == self.last_block:
+            logger.debug(f"No new block since {block}, skipping read")
+            return []
+        self.last_block = block
+        return ["BTC/USD"]
+    
+    def fetch_tick(self, asset: str) -> Optional[PriceTick]:
+        """Pipeline stage: read the latest price"""
+        reading = self.fetch_price_from_contract()
+        if reading is None:
+            logger.warning("⚠️  Could not fetch price, skipping iteration")
+            return None
+        return PriceTick(asset, reading.price, time.time(), timestamp=reading.timestamp)
+    
+    def detect(self, tick: PriceTick) -> Optional[DetectionResult]:
+        """Pipeline stage: add a changed price to the history and score it"""
+        if tick.timestamp is not None and self.last_sample_time is not None \
+                and tick.timestamp <= self.last_sample_time:
+            logger.info(f"⏸️  Price unchanged since {datetime.fromtimestamp(tick.timestamp):%H:%M:%S}, not re-scored")
+            return None
+        elapsed = None
+        if tick.timestamp is not None:
+            if self.last_sample_time is not None:
+                elapsed = tick.timestamp - self.last_sample_time
+            self.last_sample_time = tick.timestamp
+        
+        self.detector.add_price(tick.price, elapsed)
+        is_anomalous, z_score, reason = self.detector.is_anomaly(tick.price)
+        result = DetectionResult(
+            tick.asset, tick.price, z_score, is_anomalous, reason, tick.received,
+            self.detector.timeframe_z_scores(), self.detector.mean, self.detector.std,
+            self.detector.sample_count,
+        )
+        
+        # Same thread as the detector, so the snapshot sees a consistent state
+        self.snapshot.maybe_save()
+        return result
+    
+    def report(self, result: DetectionResult) -> None:
+        """Sink: log the result, with a MeTTa explanation for anomalies"""
+        logger.info(f"\n{'='*60}")
+        logger.info(f"{result.asset} - {datetime.fromtimestamp(result.received).strftime('%Y-%m-%d %H:%M:%S')}")
+        logger.info(f"{'='*60}")
+        logger.info(f"💰 Current Price: ${result.price:.2f}")
+        logger.info(f"📊 Status: {result.reason}")
+        
+        if result.z_score is not None:
+            logger.info(f"📈 History: {result.samples} samples")
+            logger.info(f"📉 Mean: ${result.mean:.2f}")
+            logger.info(f"📊 Std Dev: ${result.std:.2f}")
+        
+        if result.is_anomalous:
+            logger.warning(f"🚨 ANOMALY DETECTED: {result.reason}")
+            
+            # Generate MeTTa explanation
+            explanation = self.reasoner.reason_about_anomaly(
+                result.z_score, result.price, result.mean
+            )
+            logger.info(f"\n{explanation}\n")
+        else:
+            logger.info("✅ Price is normal")
+    
+    def publish(self, result: DetectionResult) -> None:
+        """Sink: update the API server for the frontend"""
+        self.update_api_server(result.price, result.z_score, result.is_anomalous,
+                               result.reason, result.timeframes)
+    
+    def act_on_chain(self, result: DetectionResult) -> None:
+        """Sink: flag anomalies on-chain and clear the flag once the price normalizes"""
+        asset_id = self.registry.id_of(result.asset)
+        
+        if result.is_anomalous:
+            self.flag_anomaly_on_chain(asset_id, result.reason)
+        elif self.is_anomalous and result.z_score is not None and abs(result.z_score) < 1.5:
+            # Price has normalized, clear anomaly
+            logger.info("✅ Price normalized, clearing anomaly flag")
+            self.clear_anomaly_on_chain(asset_id)
+    
+    def build_pipeline(self, check_interval: float) -> Pipeline:
+        """
+        poll -> fetch -> detect -> (report, api, chain)
+        Waiting for the API server no longer delays the next price read, and
+        the chain stage only broadcasts: receipts are tracked by the tx manager.
+        With PRICE_READS=hermes: hermes (streamed updates) -> detect -> ...
+        """
+        pipeline = Pipeline("SentinelAgent", float(os.getenv("PIPELINE_STATS_INTERVAL", "60")))
+        detect = pipeline.stage("detect", self.detect)
+        if self.hermes:
+            pipeline.source("hermes", self.hermes.drain, 0).to(detect)
+        else:
+            source = pipeline.source("poll", self.poll, check_interval)
+            source.to(pipeline.stage("fetch", self.fetch_tick)).to(detect)
+        detect.to(
+            pipeline.stage("report", self.report),
+            pipeline.stage("api", self.publish, drop_when_full=True),
+            pipeline.stage("chain", self.act_on_chain),
+        )
+        return pipeline
     
     def run(self, check_interval: int = 5):
         """Main agent loop"""
         logger.info("🤖 Sentinel AI Agent started!")
-        logger.info(f"📊 Monitoring BTC/USD with {check_interval}s interval")
+        if self.hermes:
+            logger.info(f"📊 Monitoring BTC/USD streamed from {self.hermes.base_url}")
+        else:
+            logger.info(f"📊 Monitoring BTC/USD with {check_interval}s interval")
         logger.info(f"🎯 Anomaly threshold: {self.detector.threshold}σ")
-        logger.info(f"📈 Window size: {self.detector.window_size} samples\n")
-        
-        asset_id = Web3.solidity_keccak(['string'], ['BTC/USD'])
-        
-        iteration = 0
-        
-        while True:
-            try:
-                iteration += 1
-                logger.info(f"\n{'='*60}")
-                logger.info(f"Iteration {iteration} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                logger.info(f"{'='*60}")
-                
-                # Fetch current price
-                price = self.fetch_price_from_contract()
-                
-                if price is None:
-                    logger.warning("⚠️  Could not fetch price, skipping iteration")
-                    time.sleep(check_interval)
-                    continue
-                
-                # Add to history
-                self.detector.add_price(price)
-                
-                # Check for anomaly
-                is_anomalous, z_score, reason = self.detector.is_anomaly(price)
-                
-                logger.info(f"💰 Current Price: ${price:.2f}")
-                logger.info(f"📊 Status: {reason}")
-                
-                if z_score is not None:
-                    logger.info(f"📈 History: {len(self.detector.price_history)} samples")
-                    logger.info(f"📉 Mean: ${np.mean(self.detector.price_history):.2f}")
-                    logger.info(f"📊 Std Dev: ${np.std(self.detector.price_history):.2f}")
-                
-                # Update API server for frontend
-                self.update_api_server(price, z_score, is_anomalous, reason)
-                
-                # Handle anomaly detection
-                if is_anomalous:
-                    logger.warning(f"🚨 ANOMALY DETECTED: {reason}")
-                    
-                    # Generate MeTTa explanation
-                    mean_price = np.mean(self.detector.price_history)
-                    explanation = self.reasoner.reason_about_anomaly(
-                        z_score, price, mean_price
-                    )
-                    
-                    logger.info(f"\n{explanation}\n")
-                    
-                    # Flag on-chain
-                    self.flag_anomaly_on_chain(asset_id, reason)
-                    
-                elif self.is_anomalous and z_score is not None and abs(z_score) < 1.5:
-                    # Price has normalized, clear anomaly
-                    logger.info("✅ Price normalized, clearing anomaly flag")
-                    self.clear_anomaly_on_chain(asset_id)
-                
-                else:
-                    logger.info("✅ Price is normal")
-                
-                # Sleep until next check
-                time.sleep(check_interval)
-                
-            except KeyboardInterrupt:
-                logger.info("\n\n👋 Agent shutting down gracefully...")
-                break
-            except Exception as e:
-                logger.error(f"Error in main loop: {e}", exc_info=True)
-                time.sleep(check_interval)
+        logger.info(f"📈 Window size: {self.detector.window_size} samples")
+        logger.info(f"🧮 Detector: {type(self.detector).__name__}")
+        if self.snapshot.enabled:
+            logger.info(f"💾 Snapshots: {self.snapshot.path} every {self.snapshot.interval:.0f}s")
+        logger.info("")
+        
+        if self.hermes:
+            self.hermes.start()
+        self.publisher.start()
+        self.build_pipeline(check_interval).run_forever()
+        self.publisher.close()
+        self.publisher.log_stats()
+        if self.hermes:
+            self.hermes.stop()
+            self.hermes.log_stats()
+        self.flags.stop()
+        self.tx_manager.stop()
+        if self.price_reader:
+            self.price_reader.close()
+        
+        logger.info("\n\n👋 Agent shutting down gracefully...")
+        self.snapshot.save()
 
 
 def main():
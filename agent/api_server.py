@@ -6,12 +6,19 @@ Provides REST API for frontend to query agent status and interact via chat
 
 import os
 import json
+import math
+import time
+import numbers
 import logging
+import threading
 from datetime import datetime
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
-from collections import deque
+from asset_registry import AssetRegistry
+from rpc_pool import make_web3, rpc_urls
+from timeseries_store import RAW, RESOLUTIONS, TimeSeriesStore, parse_time
+from update_stream import UpdateStream
 
 load_dotenv()
 
@@ -25,25 +32,92 @@ CORS(app)  # Enable CORS for frontend
 
 # Global state (in production, use Redis or similar)
 # Multi-asset state tracking
-supported_assets = ["BTC/USD", "ETH/USD", "SOL/USD", "AVAX/USD", "LINK/USD"]
-
 agent_state = {
     "status": "initializing",
-    "assets": {
-        asset: {
-            "last_price": None,
-            "last_z_score": None,
-            "is_anomalous": False,
-            "last_reason": "No data yet",
-            "last_update": None,
-            "price_history": deque(maxlen=50),
-            "anomaly_count": 0,
-        }
-        for asset in supported_assets
-    },
+    "assets": {},
     "uptime_start": datetime.now().isoformat(),
 }
 
+# Updates for an unknown asset re-check the contract's asset list at most this often
+UNKNOWN_ASSET_REFRESH = 5.0
+
+# Bulk ingestion: NDJSON content types and the most updates one request may carry
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/ndjson")
+BATCH_MAX_ITEMS = int(os.getenv("API_BATCH_MAX_ITEMS", "10000"))
+
+# Updates from concurrent requests are applied one request at a time (re-entrant:
+# newly listed assets are tracked while it is held). Never held across network
+# I/O: the contract's asset list is re-read before taking it.
+_state_lock = threading.RLock()
+
+# /api/status is served from pre-serialized JSON, rebuilt only after the state
+# changed; every change bumps the version, which is also the ETag
+_status_version = 0
+_status_cache = (-1, b"")  # (version, JSON body)
+_status_build_lock = threading.Lock()
+_boot_id = f"{int(time.time()):x}"  # Keeps ETags from a restarted server distinct
+
+# Price history per asset: raw samples plus 1s/1m/1h OHLC rollups
+history = TimeSeriesStore()
+
+# Every applied update is pushed to server-sent event subscribers (STREAM_PORT)
+stream = UpdateStream()
+
+# Most recent prices included in /api/status, and returned by /api/price-history without a range
+STATUS_HISTORY_POINTS = 50
+
+
+def _mark_changed():
+    """Record a state change: the next /api/status rebuilds its snapshot"""
+    global _status_version
+    with _state_lock:
+        _status_version += 1
+
+
+def _track_assets(assets):
+    """Registry subscriber: start tracking newly listed assets"""
+    with _state_lock:
+        for asset in assets:
+            if asset in agent_state["assets"]:
+                continue
+            agent_state["assets"][asset] = {
+                "last_price": None,
+                "last_z_score": None,
+                "is_anomalous": False,
+                "last_reason": "No data yet",
+                "last_update": None,
+                "anomaly_count": 0,
+                "timeframe_z_scores": {},
+            }
+            supported_assets.append(asset)
+            _mark_changed()
+
+
+# Asset list from SentinelOracle when the chain is configured, else the defaults
+_contract_address = os.getenv("SENTINEL_ORACLE_ADDRESS")
+registry = AssetRegistry(make_web3() if rpc_urls() else None, _contract_address)
+supported_assets = []
+registry.subscribe(_track_assets)
+registry.load()
+
+
+def is_supported(asset: str) -> bool:
+    """Whether an asset is tracked, picking up assets listed since startup"""
+    if asset in agent_state["assets"]:
+        return True
+    if time.time() - registry.last_refresh >= UNKNOWN_ASSET_REFRESH:
+        registry.refresh()
+    return asset in agent_state["assets"]
+
+
+def _discover(updates) -> None:
+    """Pick up newly listed assets named in updates, before they are applied under _state_lock"""
+    for data in updates:
+        asset = data.get("asset", "BTC/USD") if isinstance(data, dict) else None
+        if isinstance(asset, str) and asset not in agent_state["assets"]:
+            is_supported(asset)  # At most one contract read per UNKNOWN_ASSET_REFRESH
+            return
+
 
 @app.route("/health", methods=["GET"])
 def health():
@@ -51,14 +125,13 @@ def health():
     return jsonify({
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "agent": agent_state["status"]
+        "agent": agent_state["status"],
+        "stream": stream.stats(),
     })
 
 
-@app.route("/api/status", methods=["GET"])
-def get_status():
-    """Get current agent status for all assets"""
-    # Convert deque objects to lists for JSON serialization
+def _build_status(version: int) -> dict:
+    """Current agent status for all assets (call with the state lock held)"""
     serializable_assets = {}
     for asset, data in agent_state["assets"].items():
         serializable_assets[asset] = {
@@ -67,31 +140,95 @@ def get_status():
             "is_anomalous": data["is_anomalous"],
             "last_reason": data["last_reason"],
             "last_update": data["last_update"],
-            "price_history": list(data["price_history"]),  # Convert deque to list
+            "price_history": _recent_prices(asset),
             "anomaly_count": data["anomaly_count"],
+            "timeframe_z_scores": data["timeframe_z_scores"],
         }
     
-    return jsonify({
+    return {
         "status": agent_state["status"],
         "assets": serializable_assets,
         "uptime_start": agent_state["uptime_start"],
-        "supported_assets": supported_assets
-    })
+        "supported_assets": list(supported_assets),
+        "version": version,
+    }
+
+
+def _status_snapshot():
+    """(version, JSON body) of the current status, rebuilt only if the state changed"""
+    global _status_cache
+    if _status_cache[0] == _status_version:
+        return _status_cache
+    with _status_build_lock:
+        # Pollers arriving during a rebuild wait for it rather than repeat it
+        if _status_cache[0] != _status_version:
+            with _state_lock:
+                version = _status_version
+                status = _build_status(version)
+            _status_cache = (version, json.dumps(status).encode())
+        return _status_cache
+
+
+@app.route("/api/status", methods=["GET"])
+def get_status():
+    """
+    Get current agent status for all assets
+    Send the last ETag in If-None-Match to get 304 Not Modified while nothing changed
+    """
+    version, body = _status_snapshot()
+    response = Response(body, mimetype="application/json")
+    response.set_etag(f"{_boot_id}-{version}")
+    response.headers["Cache-Control"] = "no-cache"  # Browsers revalidate with the ETag
+    return response.make_conditional(request)
+
+
+def _recent_prices(asset: str) -> list:
+    """The newest raw prices as [{"price", "timestamp" (ISO)}], oldest first"""
+    recent = history[asset].latest(STATUS_HISTORY_POINTS)
+    return [{"price": price, "timestamp": datetime.fromtimestamp(ms / 1000).isoformat()}
+            for ms, price in zip(recent["timestamp"].tolist(), recent["price"].tolist())]
 
 
 @app.route("/api/price-history", methods=["GET"])
 def get_price_history():
-    """Get price history for all assets"""
+    """
+    Price history for one asset as columns (timestamps in epoch ms, oldest first)
+    
+    Query parameters:
+        asset       default BTC/USD
+        from, to    epoch seconds or ISO 8601 (default: everything kept)
+        resolution  raw (default: timestamp, price) or 1s / 1m / 1h
+                    (timestamp = bucket start, open, high, low, close, samples)
+        limit       at most this many points, the newest; without from/to/limit
+                    the newest 50 raw prices are returned
+    """
     asset = request.args.get("asset", "BTC/USD")
     
-    if asset not in supported_assets:
+    if not is_supported(asset):
         return jsonify({"error": "Unsupported asset"}), 400
     
-    asset_data = agent_state["assets"][asset]
+    resolution = request.args.get("resolution", RAW)
+    if resolution not in RESOLUTIONS:
+        return jsonify({"error": f"resolution must be one of {', '.join(RESOLUTIONS)}"}), 400
+    try:
+        start = parse_time(request.args.get("from"), 0)
+        end = parse_time(request.args.get("to"), int(time.time() * 1000))
+        limit = request.args.get("limit", type=int)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time: {e}"}), 400
+    if limit is not None and limit < 0:
+        return jsonify({"error": "limit must not be negative"}), 400
+    if limit is None and not {"from", "to"} & set(request.args):
+        limit = STATUS_HISTORY_POINTS
+    
+    columns = history[asset].query(start, end, resolution, limit)
     return jsonify({
         "asset": asset,
-        "prices": list(asset_data["price_history"]),
-        "count": len(asset_data["price_history"])
+        "resolution": resolution,
+        "from": start,
+        "to": end,
+        "count": len(columns["timestamp"]),
+        **{name: column.tolist() for name, column in columns.items()},
     })
 
 
@@ -164,17 +301,46 @@ def chat():
     })
 
 
-@app.route("/api/update", methods=["POST"])
-def update_state():
-    """
-    Internal endpoint for agent to update state for specific asset
-    (Called by the main agent process)
-    """
-    data = request.get_json()
+def _asset_event(asset: str) -> dict:
+    """An asset's state as pushed to stream subscribers"""
+    data = agent_state["assets"][asset]
+    return {
+        "asset": asset,
+        "last_price": data["last_price"],
+        "last_z_score": data["last_z_score"],
+        "is_anomalous": data["is_anomalous"],
+        "last_reason": data["last_reason"],
+        "last_update": data["last_update"],
+        "anomaly_count": data["anomaly_count"],
+        "timeframe_z_scores": data["timeframe_z_scores"],
+        "version": _status_version,
+    }
+
+
+def _is_number(value) -> bool:
+    """A finite int or float: NaN and infinities would make /api/status invalid JSON"""
+    return isinstance(value, numbers.Real) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _apply_update(data, updated_at: datetime) -> dict:
+    """Apply one asset update under _state_lock (after _discover); returns its per-item result"""
+    if not isinstance(data, dict):
+        return {"success": False, "error": "Update must be an object"}
     asset = data.get("asset", "BTC/USD")
+    if not isinstance(asset, str):
+        return {"success": False, "error": "Asset must be a string"}
+    if data.get("price") is not None and not _is_number(data["price"]):
+        return {"success": False, "asset": asset, "error": "Price must be a finite number"}
+    if data.get("z_score") is not None and not _is_number(data["z_score"]):
+        return {"success": False, "asset": asset, "error": "z_score must be a finite number"}
+    timeframes = data.get("timeframe_z_scores")
+    if timeframes is not None and not (isinstance(timeframes, dict) and all(
+            score is None or _is_number(score) for score in timeframes.values())):
+        return {"success": False, "asset": asset,
+                "error": "timeframe_z_scores must map windows to finite numbers"}
     
-    if asset not in supported_assets:
-        return jsonify({"error": "Unsupported asset"}), 400
+    if asset not in agent_state["assets"]:
+        return {"success": False, "asset": asset, "error": "Unsupported asset"}
     
     asset_data = agent_state["assets"][asset]
     
@@ -183,18 +349,76 @@ def update_state():
     asset_data["last_z_score"] = data.get("z_score")
     asset_data["is_anomalous"] = data.get("is_anomalous", False)
     asset_data["last_reason"] = data.get("reason", "")
-    asset_data["last_update"] = datetime.now().isoformat()
+    # Per-horizon z-scores, keyed by window length in samples
+    asset_data["timeframe_z_scores"] = data.get("timeframe_z_scores") or {}
+    asset_data["last_update"] = updated_at.isoformat()
     
     if data.get("price"):
-        asset_data["price_history"].append({
-            "price": data["price"],
-            "timestamp": asset_data["last_update"]
-        })
+        history[asset].append(int(updated_at.timestamp() * 1000), float(data["price"]))
     
     if data.get("is_anomalous"):
         asset_data["anomaly_count"] += 1
     
-    return jsonify({"success": True, "asset": asset})
+    _mark_changed()
+    return {"success": True, "asset": asset}
+
+
+@app.route("/api/update", methods=["POST"])
+def update_state():
+    """
+    Internal endpoint for agent to update state for specific asset
+    (Called by the main agent process)
+    """
+    data = request.get_json()
+    _discover([data])
+    with _state_lock:
+        result = _apply_update(data, datetime.now())
+        if result["success"]:
+            stream.publish([(result["asset"], _asset_event(result["asset"]))])
+    if not result["success"]:
+        return jsonify({"error": result["error"]}), 400
+    return jsonify(result)
+
+
+@app.route("/api/update/batch", methods=["POST"])
+def update_state_batch():
+    """
+    Bulk version of /api/update: a JSON array of updates, or NDJSON (one
+    update per line, Content-Type application/x-ndjson). Updates are applied
+    in order in one pass; the reply has a result per item, and a bad item
+    does not stop the rest.
+    """
+    body = request.get_data()
+    try:
+        if request.mimetype in NDJSON_TYPES:
+            updates = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            updates = json.loads(body)
+    except ValueError as e:
+        return jsonify({"error": f"Invalid JSON: {e}"}), 400
+    if not isinstance(updates, list):
+        return jsonify({"error": "Expected a JSON array of updates"}), 400
+    if len(updates) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {BATCH_MAX_ITEMS} updates per batch"}), 413
+    
+    _discover(updates)
+    updated_at = datetime.now()
+    with _state_lock:
+        results, events = [], []
+        for update in updates:
+            result = _apply_update(update, updated_at)
+            results.append(result)
+            if result["success"]:
+                # Subscribers get every update in order, each with the state it left behind
+                events.append((result["asset"], _asset_event(result["asset"])))
+        stream.publish(events)
+    accepted = sum(result["success"] for result in results)
+    return jsonify({
+        "success": accepted == len(results),
+        "accepted": accepted,
+        "rejected": len(results) - accepted,
+        "results": results,
+    })
 
 
 def main():
@@ -205,6 +429,8 @@ def main():
     logger.info(f"🚀 Starting Sentinel API Server on {host}:{port}")
     
     agent_state["status"] = "running"
+    _mark_changed()
+    stream.start()
     
     app.run(host=host, port=port, debug=False)
 
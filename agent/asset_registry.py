@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Asset Registry for Sentinel Oracle
+The list of monitored assets and their on-chain ids, loaded from SentinelOracle
+
+``load`` reads getSupportedAssets and each id's getAssetSymbol once and
+caches the symbol <-> bytes32 mapping, so callers never hash a symbol again.
+``refresh`` follows AssetAdded logs from where the last read stopped and
+hands newly listed assets to subscribers, so a feed added on-chain is
+monitored without a restart. Without a reachable contract the registry
+falls back to a fixed list (DEFAULT_ASSETS unless given) with locally
+computed ids.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+from eth_abi import decode
+from web3 import Web3
+
+from chain_reader import asset_id
+
+logger = logging.getLogger("AssetRegistry")
+
+DEFAULT_ASSETS = ["BTC/USD", "ETH/USD", "SOL/USD", "AVAX/USD", "LINK/USD"]
+
+REGISTRY_ABI = [
+    {
+        "inputs": [],
+        "name": "getSupportedAssets",
+        "outputs": [{"name": "", "type": "bytes32[]"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "assetId", "type": "bytes32"}],
+        "name": "getAssetSymbol",
+        "outputs": [{"name": "", "type": "string"}],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+ASSET_ADDED_TOPIC = "0x" + bytes(Web3.keccak(text="AssetAdded(bytes32,bytes32,string)")).hex()
+
+
+class AssetRegistry:
+    """
+    Symbol <-> asset id mapping for every asset listed on SentinelOracle
+
+    Subscribers are called with the list of new symbols after each refresh
+    that found some; ``maybe_refresh`` refreshes at most every ``interval``
+    seconds (REGISTRY_REFRESH_INTERVAL). ``defaults`` are the assets used
+    without a contract.
+    """
+
+    def __init__(self, w3: Optional[Web3] = None, contract_address: Optional[str] = None,
+                 interval: Optional[float] = None, defaults: Optional[Sequence[str]] = None):
+        self.w3 = w3
+        self.defaults = list(DEFAULT_ASSETS if defaults is None else defaults)
+        self.contract = None
+        if w3 is not None and contract_address:
+            self.contract = w3.eth.contract(address=Web3.to_checksum_address(contract_address),
+                                            abi=REGISTRY_ABI)
+        self.interval = interval if interval is not None else float(os.getenv("REGISTRY_REFRESH_INTERVAL", "60"))
+
+        self._symbols: List[str] = []
+        self._ids: Dict[str, bytes] = {}
+        self._by_id: Dict[bytes, str] = {}
+        self._hashed: Dict[str, bytes] = {}
+        self._subscribers: List[Callable[[List[str]], None]] = []
+        self._lock = threading.Lock()
+        self.next_block: Optional[int] = None
+        self.last_refresh = 0.0
+
+    @property
+    def symbols(self) -> List[str]:
+        """Listed symbols in listing order"""
+        return list(self._symbols)
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._ids
+
+    def id_of(self, symbol: str) -> bytes:
+        """On-chain id of a symbol (hashed locally, once, for symbols not listed)"""
+        found = self._ids.get(symbol) or self._hashed.get(symbol)
+        if found is None:
+            found = self._hashed[symbol] = bytes(asset_id(symbol))
+        return found
+
+    def symbol_of(self, asset: bytes) -> Optional[str]:
+        return self._by_id.get(bytes(asset))
+
+    def subscribe(self, callback: Callable[[List[str]], None]) -> None:
+        self._subscribers.append(callback)
+
+    def _add(self, pairs: List[tuple]) -> List[str]:
+        """Record (id, symbol) pairs; returns the symbols that were new"""
+        added = []
+        with self._lock:
+            for asset, symbol in pairs:
+                asset = bytes(asset)
+                if not symbol or asset in self._by_id:
+                    continue
+                self._symbols.append(symbol)
+                self._ids[symbol] = asset
+                self._by_id[asset] = symbol
+                added.append(symbol)
+        return added
+
+    def _notify(self, added: List[str]) -> None:
+        for callback in self._subscribers:
+            try:
+                callback(added)
+            except Exception as e:
+                logger.error(f"❌ Asset subscriber failed: {e}")
+
+    def load(self) -> List[str]:
+        """Read the full asset list from the contract (the defaults if that fails)"""
+        self.last_refresh = time.time()
+        if self.contract is not None:
+            try:
+                block = self.w3.eth.block_number
+                ids = self.contract.functions.getSupportedAssets().call()
+                pairs = [(asset, self.contract.functions.getAssetSymbol(asset).call()) for asset in ids]
+                # AssetAdded logs from this block on may repeat assets already read; _add skips them
+                self.next_block = block
+                added = self._add(pairs)
+                logger.info(f"📋 Loaded {len(self._symbols)} assets from SentinelOracle")
+                self._notify(added)
+                return self.symbols
+            except Exception as e:
+                logger.warning(f"⚠️  Could not load assets from the contract ({e}), using defaults")
+
+        added = self._add([(asset_id(symbol), symbol) for symbol in self.defaults])
+        self._notify(added)
+        return self.symbols
+
+    def _asset_added_logs(self, from_block: int, to_block: int) -> List[tuple]:
+        logs = self.w3.eth.get_logs({
+            "address": self.contract.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [ASSET_ADDED_TOPIC],
+        })
+        pairs = []
+        for log in logs:
+            topic = log["topics"][1]
+            data = log["data"]
+            (symbol,) = decode(["string"], Web3.to_bytes(hexstr=data) if isinstance(data, str) else bytes(data))
+            pairs.append((Web3.to_bytes(hexstr=topic) if isinstance(topic, str) else bytes(topic), symbol))
+        return pairs
+
+    def refresh(self) -> List[str]:
+        """Pick up assets listed since the last read; returns the new symbols"""
+        self.last_refresh = time.time()
+        if self.contract is None:
+            return []
+        if self.next_block is None:
+            before = set(self._symbols)
+            return [symbol for symbol in self.load() if symbol not in before]
+
+        try:
+            head = self.w3.eth.block_number
+            if head < self.next_block:
+                return []
+            pairs = self._asset_added_logs(self.next_block, head)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read AssetAdded logs: {e}")
+            return []
+
+        self.next_block = head + 1
+        added = self._add(pairs)
+        if added:
+            logger.info(f"🆕 New assets listed: {', '.join(added)}")
+            self._notify(added)
+        return added
+
+    def maybe_refresh(self) -> List[str]:
+        """refresh() if the refresh interval has passed"""
+        if self.interval <= 0 or time.time() - self.last_refresh < self.interval:
+            return []
+        return self.refresh()
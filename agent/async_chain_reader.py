@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Async Chain Reader for Sentinel Oracle
+Reads every asset's getLatestPrice concurrently over web3's async provider
+
+Coroutines (``fetch_prices``) can be awaited directly from an event loop,
+e.g. the uAgents handlers. Synchronous callers (the monitor and agent
+pipelines) use ``read_prices``, which runs the same coroutine on a private
+event loop thread and blocks until the cycle is done.
+
+With several endpoints (RPC_URLS) each call goes to the fastest healthy one
+in the shared RPCPool, is hedged to the next after the pool's hedge delay,
+and fails over when an endpoint errors; outcomes feed the pool's stats.
+"""
+
+import os
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Union
+from web3 import AsyncHTTPProvider, Web3
+
+from chain_reader import PriceReading, asset_id, decode_price, price_calldata
+from rpc_pool import Endpoint, get_pool
+
+logger = logging.getLogger("AsyncChainReader")
+
+
+class AsyncPriceReader:
+    """
+    Concurrent getLatestPrice reads with a concurrency limit and per-call deadlines
+
+    At most ``concurrency`` calls are in flight at once (RPC_CONCURRENCY);
+    each call gets ``deadline`` seconds (RPC_DEADLINE) once it starts, after
+    which that asset reads as None and the others are unaffected. ``id_of``
+    maps a symbol to its asset id (keccak of the symbol by default).
+    """
+
+    def __init__(self, rpc_url: Union[str, Sequence[str], None], contract_address: str,
+                 concurrency: Optional[int] = None, deadline: Optional[float] = None,
+                 id_of: Optional[Callable[[str], bytes]] = None):
+        self.concurrency = concurrency or int(os.getenv("RPC_CONCURRENCY", "16"))
+        self.deadline = deadline or float(os.getenv("RPC_DEADLINE", "5"))
+        self.pool = get_pool(rpc_url)
+        self.providers = {
+            endpoint.url: AsyncHTTPProvider(endpoint.url, request_kwargs={"timeout": self.deadline})
+            for endpoint in self.pool.endpoints
+        }
+        self.contract_address = Web3.to_checksum_address(contract_address)
+        self.id_of = id_of or asset_id
+        self._calldata: Dict[str, str] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+
+    def _price_calldata(self, asset: str) -> str:
+        if asset not in self._calldata:
+            self._calldata[asset] = price_calldata(self.id_of(asset))
+        return self._calldata[asset]
+
+    async def _attempt(self, endpoint: Endpoint, params: list) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            # Raw eth_call: web3's eth.call adds formatting and an eth_chainId round trip
+            reply = await self.providers[endpoint.url].make_request("eth_call", params)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self.pool.record(endpoint, time.perf_counter() - started, False)
+            raise
+        self.pool.record(endpoint, time.perf_counter() - started, True)
+        return reply
+
+    def _start(self, endpoint: Endpoint, params: list) -> asyncio.Future:
+        task = asyncio.ensure_future(self._attempt(endpoint, params))
+        # A losing attempt's error is never awaited; mark it retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    async def _call(self, params: list) -> Dict[str, Any]:
+        """eth_call on the best endpoint, hedged / failed over to the others"""
+        order = self.pool.ranked()
+        pending = {self._start(order[0], params)}
+        remaining = order[1:]
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                delay = self.pool.hedge_delay(order[0]) if remaining else None
+                done, pending = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if remaining and (not done or not pending):
+                    if not done:
+                        order[0].hedges += 1
+                    pending.add(self._start(remaining.pop(0), params))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _fetch_price(self, asset: str, limit: asyncio.Semaphore) -> Optional[PriceReading]:
+        async with limit:
+            try:
+                reply = await asyncio.wait_for(
+                    self._call([{"to": self.contract_address, "data": self._price_calldata(asset)}, "latest"]),
+                    self.deadline,
+                )
+                if "result" not in reply:
+                    raise ValueError(reply.get("error", "empty reply"))
+                return decode_price(Web3.to_bytes(hexstr=reply["result"]))
+            except asyncio.TimeoutError:
+                logger.debug(f"Price read for {asset} missed its {self.deadline:.1f}s deadline")
+            except Exception as e:
+                logger.debug(f"Could not fetch price for {asset}: {e}")
+            return None
+
+    async def fetch_prices(self, assets: Sequence[str]) -> Dict[str, Optional[PriceReading]]:
+        """Latest stored price per asset, all read concurrently (None where the read failed)"""
+        assets = list(assets)
+        # Semaphores bind to the running loop, so one per call
+        limit = asyncio.Semaphore(self.concurrency)
+        readings = await asyncio.gather(*(self._fetch_price(asset, limit) for asset in assets))
+
+        failed = sum(reading is None for reading in readings)
+        if failed:
+            logger.warning(f"⚠️  {failed}/{len(assets)} price reads failed")
+        return dict(zip(assets, readings))
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="async-reader", daemon=True).start()
+            return self._loop
+
+    def read_prices(self, assets: Sequence[str]) -> Dict[str, Optional[PriceReading]]:
+        """Blocking form of fetch_prices for threads without an event loop"""
+        if not assets:
+            return {}
+        future = asyncio.run_coroutine_threadsafe(self.fetch_prices(assets), self._background_loop())
+        return future.result()
+
+    def close(self) -> None:
+        """Stop the background event loop, if one was started"""
+        with self._loop_lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._loop = None
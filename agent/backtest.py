@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Detector Backtest for Sentinel Oracle
+Replays a historical price file through the anomaly detectors and scores a
+grid of (window, threshold) settings in one pass
+
+Usage:
+    python backtest.py prices.csv --windows 10,30,100 --thresholds 2,2.5,3
+    python backtest.py prices.parquet --mode robust --inject 20 --output results.json
+
+Input formats:
+    CSV / Parquet  wide (one price column per asset, optional "timestamp" and
+                   "<asset>_label" columns) or long ("asset", "price" and
+                   optional "timestamp"/"label" columns)
+    NPY            1-D (one asset) or 2-D (ticks x assets) price array
+
+Labels mark ticks that are known anomalies (1) or normal (0). Without labels
+only flag counts are reported, unless --inject adds synthetic spikes.
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from detectors import DETECTOR_MODES, create_detector
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("Backtest")
+
+# Matches the warm-up of detectors.AnomalyDetector
+DEFAULT_MIN_SAMPLES = 10
+
+
+def load_prices(path: str, assets: Optional[List[str]] = None) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Load a price file into (prices, labels) frames indexed by tick
+    Each column is one asset; labels is None when the file has none
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".npy":
+        data = np.load(path, mmap_mode="r")
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 1:
+            data = data[:, None]
+        names = assets or [f"ASSET{i}" for i in range(data.shape[1])]
+        return pd.DataFrame(data, columns=names), None
+
+    if ext in (".parquet", ".pq"):
+        frame = pd.read_parquet(path)
+    elif ext == ".csv":
+        frame = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unsupported price file type: {ext or path}")
+
+    if {"asset", "price"}.issubset(frame.columns):
+        # Long format: one row per (tick, asset)
+        index = "timestamp" if "timestamp" in frame.columns else frame.groupby("asset").cumcount()
+        prices = frame.pivot_table(index=index, columns="asset", values="price", aggfunc="last")
+        labels = None
+        if "label" in frame.columns:
+            labels = frame.pivot_table(index=index, columns="asset", values="label", aggfunc="max")
+            labels = labels.reindex_like(prices).fillna(0)
+        prices = prices.reset_index(drop=True)
+        labels = labels.reset_index(drop=True) if labels is not None else None
+    else:
+        frame = frame.drop(columns=[c for c in ("timestamp",) if c in frame.columns])
+        label_cols = [c for c in frame.columns if str(c).endswith("_label")]
+        prices = frame.drop(columns=label_cols)
+        labels = None
+        if label_cols:
+            labels = frame[label_cols].rename(columns=lambda c: c[:-len("_label")])
+            labels = labels.reindex(columns=prices.columns).fillna(0)
+
+    if assets:
+        prices = prices[assets]
+        labels = labels[assets] if labels is not None else None
+
+    return prices.astype(np.float64), labels
+
+
+def inject_spikes(prices: pd.DataFrame, count: int, size: float,
+                  seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Add ``count`` single-tick spikes of relative ``size`` per asset; returns (prices, labels)"""
+    rng = np.random.default_rng(seed)
+    values = prices.to_numpy(copy=True)
+    labels = np.zeros_like(values)
+    ticks = values.shape[0]
+
+    # Keep spikes clear of the warm-up period
+    start = min(ticks - 1, DEFAULT_MIN_SAMPLES * 3)
+    for col in range(values.shape[1]):
+        at = rng.choice(np.arange(start, ticks), size=min(count, ticks - start), replace=False)
+        signs = rng.choice([-1.0, 1.0], size=at.size)
+        values[at, col] *= 1.0 + signs * size
+        labels[at, col] = 1
+
+    return (pd.DataFrame(values, columns=prices.columns),
+            pd.DataFrame(labels, columns=prices.columns))
+
+
+def zscore_series(prices: np.ndarray, window: int, min_samples: int = DEFAULT_MIN_SAMPLES,
+                  ddof: int = 0) -> np.ndarray:
+    """
+    Vectorized z-scores matching AnomalyDetector (price is part of its window)
+    NaN marks ticks still warming up
+    """
+    series = pd.Series(prices)
+    rolling = series.rolling(window, min_periods=min_samples)
+    mean = rolling.mean().to_numpy()
+    std = rolling.std(ddof=ddof).to_numpy()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (prices - mean) / std
+    z[std == 0] = 0.0
+    return z
+
+
+def streamed_series(prices: np.ndarray, mode: str, window: int,
+                    min_samples: int = DEFAULT_MIN_SAMPLES) -> np.ndarray:
+    """Score ticks one at a time through a live detector implementation"""
+    detector = create_detector(mode, window, threshold=np.inf, min_samples=min_samples)
+    z = np.full(prices.shape[0], np.nan)
+    for t, price in enumerate(prices.tolist()):
+        if price != price:  # NaN: no price this tick
+            continue
+        detector.add_price(price)
+        score = detector.calculate_z_score(price)
+        if score is not None:
+            z[t] = score
+    return z
+
+
+def event_starts(labels: np.ndarray) -> np.ndarray:
+    """Tick indices where a labelled anomaly run begins"""
+    positive = labels > 0
+    return np.flatnonzero(positive & ~np.concatenate(([False], positive[:-1])))
+
+
+def score_thresholds(z: np.ndarray, thresholds: np.ndarray, labels: Optional[np.ndarray],
+                     max_latency: int) -> List[Dict]:
+    """Evaluate every threshold against one z-score series in one broadcast"""
+    abs_z = np.abs(np.nan_to_num(z, nan=0.0))
+    flags = abs_z[None, :] > thresholds[:, None]          # thresholds x ticks
+    flag_counts = flags.sum(axis=1)
+    scored = int(np.count_nonzero(~np.isnan(z)))
+
+    results = []
+    if labels is None:
+        for i, threshold in enumerate(thresholds):
+            results.append({
+                "threshold": float(threshold),
+                "flags": int(flag_counts[i]),
+                "flag_rate": float(flag_counts[i] / scored) if scored else 0.0,
+            })
+        return results
+
+    positive = labels > 0
+    negatives = int(np.count_nonzero(~positive & ~np.isnan(z)))
+    false_positives = (flags & ~positive[None, :]).sum(axis=1)
+    true_positives = (flags & positive[None, :]).sum(axis=1)
+    starts = event_starts(labels)
+
+    for i, threshold in enumerate(thresholds):
+        # First flag at or after each event start
+        flagged_at = np.flatnonzero(flags[i])
+        if flagged_at.size:
+            pos = np.searchsorted(flagged_at, starts)
+            first = flagged_at[np.minimum(pos, flagged_at.size - 1)]
+            latency = np.where(pos < flagged_at.size, first - starts, np.iinfo(np.int64).max)
+        else:
+            latency = np.full(starts.size, np.iinfo(np.int64).max)
+        detected = latency <= max_latency
+
+        results.append({
+            "threshold": float(threshold),
+            "flags": int(flag_counts[i]),
+            "flag_rate": float(flag_counts[i] / scored) if scored else 0.0,
+            "events": int(starts.size),
+            "events_detected": int(detected.sum()),
+            "recall": float(detected.mean()) if starts.size else None,
+            "mean_latency_ticks": float(latency[detected].mean()) if detected.any() else None,
+            "true_positive_flags": int(true_positives[i]),
+            "false_positives": int(false_positives[i]),
+            "false_positive_rate": float(false_positives[i] / negatives) if negatives else 0.0,
+        })
+    return results
+
+
+def run_backtest(prices: pd.DataFrame, labels: Optional[pd.DataFrame], windows: Sequence[int],
+                 thresholds: Sequence[float], mode: str = "zscore", max_latency: int = 5,
+                 min_samples: int = DEFAULT_MIN_SAMPLES) -> List[Dict]:
+    """
+    Score every (window, threshold) configuration for every asset
+    Threshold sweeps are free: each window's z-scores are computed once
+    """
+    thresholds = np.asarray(sorted(thresholds), dtype=np.float64)
+    rows = []
+
+    for window in windows:
+        for asset in prices.columns:
+            series = prices[asset].to_numpy(dtype=np.float64)
+            asset_labels = labels[asset].to_numpy() if labels is not None else None
+
+            if mode == "zscore":
+                valid = ~np.isnan(series)
+                z = np.full(series.shape[0], np.nan)
+                z[valid] = zscore_series(series[valid], window, min_samples)
+            else:
+                z = streamed_series(series, mode, window, min_samples)
+
+            for result in score_thresholds(z, thresholds, asset_labels, max_latency):
+                rows.append({"asset": str(asset), "mode": mode, "window": int(window), **result})
+
+    return rows
+
+
+def summarize(rows: List[Dict]) -> pd.DataFrame:
+    """Aggregate per-asset results into one row per (window, threshold)"""
+    frame = pd.DataFrame(rows)
+    sums = [c for c in ("flags", "events", "events_detected", "true_positive_flags",
+                        "false_positives") if c in frame.columns]
+    means = [c for c in ("flag_rate", "recall", "mean_latency_ticks",
+                         "false_positive_rate") if c in frame.columns]
+    grouped = frame.groupby(["mode", "window", "threshold"])
+    return pd.concat([grouped[sums].sum(), grouped[means].mean()], axis=1).reset_index()
+
+
+def parse_list(value: str, cast) -> List:
+    return [cast(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    """Run a backtest from the command line"""
+    parser = argparse.ArgumentParser(description="Backtest Sentinel anomaly detectors on historical prices")
+    parser.add_argument("path", help="CSV, Parquet or NPY price file")
+    parser.add_argument("--mode", default=os.getenv("DETECTOR_MODE", "zscore"), choices=DETECTOR_MODES)
+    parser.add_argument("--windows", default=os.getenv("WINDOW_SIZE", "30"),
+                        help="Comma-separated window sizes (samples)")
+    parser.add_argument("--thresholds", default=os.getenv("ANOMALY_THRESHOLD", "2.5"),
+                        help="Comma-separated z-score thresholds")
+    parser.add_argument("--assets", help="Comma-separated subset / names of asset columns")
+    parser.add_argument("--min-samples", type=int, default=DEFAULT_MIN_SAMPLES)
+    parser.add_argument("--max-latency", type=int, default=5,
+                        help="Ticks after an event start within which a flag counts as a detection")
+    parser.add_argument("--inject", type=int, default=0, help="Synthetic spikes to inject per asset")
+    parser.add_argument("--inject-size", type=float, default=0.05, help="Relative size of injected spikes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write per-asset results to this JSON file")
+    args = parser.parse_args()
+
+    assets = parse_list(args.assets, str) if args.assets else None
+    prices, labels = load_prices(args.path, assets)
+    if args.inject:
+        prices, labels = inject_spikes(prices, args.inject, args.inject_size, args.seed)
+
+    windows = parse_list(args.windows, int)
+    thresholds = parse_list(args.thresholds, float)
+    logger.info(f"📂 {prices.shape[0]} ticks x {prices.shape[1]} assets from {args.path}")
+    logger.info(f"🧮 Mode {args.mode}: {len(windows)} windows x {len(thresholds)} thresholds")
+
+    started = time.perf_counter()
+    rows = run_backtest(prices, labels, windows, thresholds, args.mode,
+                        args.max_latency, args.min_samples)
+    elapsed = time.perf_counter() - started
+
+    ticks = prices.size * len(windows)
+    logger.info(f"⏱️  Scored {ticks} ticks in {elapsed:.2f}s ({ticks / max(elapsed, 1e-9):,.0f} ticks/s)")
+
+    with pd.option_context("display.max_rows", None, "display.width", 160):
+        print(summarize(rows).to_string(index=False))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"path": args.path, "mode": args.mode, "elapsed_s": elapsed,
+                       "results": rows}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
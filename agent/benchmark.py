@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Detector Benchmark Suite for Sentinel Oracle
+Measures throughput, per-tick latency and memory per tracked series for every
+detector engine on synthetic price streams (no network needed)
+
+Usage:
+    python benchmark.py                              # window and asset scaling curves
+    python benchmark.py --engines matrix,anomaly_detector --output bench.json
+    python benchmark.py --compare bench.json         # flag regressions vs. a saved run
+
+Every result is keyed by (engine, window, assets) so runs from different
+commits can be diffed with --compare. Windows are filled before timing, so the
+largest windows dominate the run time (the robust engine at 100k samples takes
+several minutes); use --engines/--windows to narrow a run.
+"""
+
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import logging
+import subprocess
+import tracemalloc
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+import numpy as np
+
+from detectors import create_detector
+from matrix_detector import CorrelationBreakDetector, MatrixAnomalyDetector, VectorEWMADetector
+from multi_asset_monitor import MultiAssetAnomalyDetector
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("Benchmark")
+
+DEFAULT_WINDOWS = [30, 300, 3000, 30000, 100000]
+DEFAULT_ASSET_COUNTS = [5, 50, 500, 5000, 10000]
+
+# A tick function consumes one cycle of prices (one per asset)
+TickFn = Callable[[np.ndarray], None]
+
+
+def _timeframes(window: int) -> List[int]:
+    return sorted({max(2, window // 100), max(2, window // 10), window})
+
+
+def _per_series(mode: str) -> Callable[[List[str], int], TickFn]:
+    """One single-series detector object per asset, scored in a Python loop"""
+    def build(assets: List[str], window: int) -> TickFn:
+        detectors = [create_detector(mode, window, half_life=window / 2,
+                                     timeframes=_timeframes(window)) for _ in assets]
+
+        def tick(prices: np.ndarray) -> None:
+            for detector, price in zip(detectors, prices.tolist()):
+                detector.add_price(price)
+                detector.is_anomaly(price)
+        return tick
+    return build
+
+
+def _multi_asset(assets: List[str], window: int) -> TickFn:
+    detector = MultiAssetAnomalyDetector(window, assets=assets)
+
+    def tick(prices: np.ndarray) -> None:
+        detector.evaluate(dict(zip(assets, prices.tolist())))
+    return tick
+
+
+def _matrix(assets: List[str], window: int) -> TickFn:
+    return MatrixAnomalyDetector(assets, window).ingest
+
+
+def _vector_ewma(assets: List[str], window: int) -> TickFn:
+    return VectorEWMADetector(assets, window / 2).ingest
+
+
+def _correlation(assets: List[str], window: int) -> TickFn:
+    return CorrelationBreakDetector(assets, half_life=window).ingest
+
+
+# name -> (builder, rough bytes per stored sample for the memory guard,
+#          whether memory grows with the window, extra bytes per asset pair)
+ENGINES: Dict[str, tuple] = {
+    "anomaly_detector": (_per_series("zscore"), 40, True, 0),
+    "robust": (_per_series("robust"), 250, True, 0),
+    "ewma": (_per_series("ewma"), 40, False, 0),
+    "multiframe": (_per_series("multiframe"), 24, True, 0),
+    "multi_asset": (_multi_asset, 40, True, 0),
+    "matrix": (_matrix, 8, True, 0),
+    "vector_ewma": (_vector_ewma, 8, False, 0),
+    "correlation": (_correlation, 8, False, 24),
+}
+
+
+def estimated_bytes(engine: str, assets: int, window: int) -> int:
+    _, per_sample, windowed, per_pair = ENGINES[engine]
+    return assets * (window if windowed else 4) * per_sample + assets * assets * per_pair
+
+
+def warmup_cycles(engine: str, window: int) -> int:
+    """Cycles needed before the engine is in its steady state"""
+    return window if ENGINES[engine][2] else min(window, 200)
+
+
+class PriceStream:
+    """Synthetic geometric random walk, one price per asset per cycle"""
+
+    def __init__(self, assets: int, seed: int = 0):
+        self.rng = np.random.default_rng(seed)
+        self.prices = self.rng.uniform(1.0, 100000.0, size=assets)
+
+    def next(self) -> np.ndarray:
+        self.prices *= np.exp(self.rng.normal(0.0, 0.001, size=self.prices.shape))
+        return self.prices.copy()
+
+
+def warm(tick: TickFn, stream: PriceStream, cycles: int) -> None:
+    for _ in range(cycles):
+        tick(stream.next())
+
+
+def run_case(engine: str, window: int, asset_count: int, cycles: int,
+             max_seconds: float, with_memory: bool) -> Dict:
+    """Benchmark one (engine, window, assets) configuration"""
+    builder = ENGINES[engine][0]
+    assets = [f"ASSET{i}" for i in range(asset_count)]
+    warm_cycles = warmup_cycles(engine, window)
+
+    # Memory is traced while building and filling the windows, then tracing
+    # stops so it does not slow down the timed cycles
+    stream = PriceStream(asset_count)
+    if with_memory:
+        tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        tick = builder(assets, window)
+        warm(tick, stream, warm_cycles)
+        held = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    # Pre-generate inputs so only the engine is timed
+    inputs = [stream.next() for _ in range(cycles)]
+    latencies = []
+    started = time.perf_counter()
+    for prices in inputs:
+        t0 = time.perf_counter_ns()
+        tick(prices)
+        latencies.append(time.perf_counter_ns() - t0)
+        if time.perf_counter() - started > max_seconds and len(latencies) >= 10:
+            break
+    elapsed = time.perf_counter() - started
+
+    lat = np.asarray(latencies, dtype=np.float64) / 1e3  # microseconds per cycle
+    result = {
+        "engine": engine,
+        "window": window,
+        "assets": asset_count,
+        "cycles": len(latencies),
+        "ticks_per_sec": asset_count * len(latencies) / elapsed,
+        "cycle_latency_us": {
+            "p50": float(np.percentile(lat, 50)),
+            "p90": float(np.percentile(lat, 90)),
+            "p99": float(np.percentile(lat, 99)),
+            "max": float(lat.max()),
+        },
+        "tick_latency_us_p50": float(np.percentile(lat, 50)) / asset_count,
+    }
+
+    if with_memory:
+        result["memory_bytes"] = held
+        result["memory_bytes_per_series"] = held / asset_count
+
+    return result
+
+
+def plan_cases(engines: List[str], windows: List[int], asset_counts: List[int],
+               grid: str) -> List[tuple]:
+    """(engine, window, assets) triples: two scaling curves, or the full grid"""
+    if grid == "full":
+        return [(e, w, a) for e in engines for w in windows for a in asset_counts]
+
+    cases = []
+    for engine in engines:
+        cases += [(engine, w, asset_counts[0]) for w in windows]
+        cases += [(engine, windows[0], a) for a in asset_counts if a != asset_counts[0]]
+    return cases
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> int:
+    """
+    Report speed changes against a saved run; returns the regression count
+    Uses median cycle latency, which is far less noisy than mean throughput
+    """
+    with open(baseline_path) as f:
+        baseline = {(r["engine"], r["window"], r["assets"]): r for r in json.load(f)["results"]}
+
+    regressions = 0
+    for result in results:
+        key = (result["engine"], result["window"], result["assets"])
+        if key not in baseline:
+            continue
+        ratio = baseline[key]["cycle_latency_us"]["p50"] / result["cycle_latency_us"]["p50"]
+        marker = ""
+        if ratio < 1.0 - tolerance:
+            marker = "  ⚠️  REGRESSION"
+            regressions += 1
+        print(f"{key[0]:>16} w={key[1]:<7} n={key[2]:<6} {ratio:6.2f}x{marker}")
+    return regressions
+
+
+def parse_list(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    """Run the benchmark suite"""
+    parser = argparse.ArgumentParser(description="Benchmark Sentinel anomaly detector engines")
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help=f"Comma-separated subset of: {', '.join(ENGINES)}")
+    parser.add_argument("--windows", default=",".join(map(str, DEFAULT_WINDOWS)))
+    parser.add_argument("--assets", default=",".join(map(str, DEFAULT_ASSET_COUNTS)))
+    parser.add_argument("--grid", choices=("curves", "full"), default="curves",
+                        help="curves: sweep windows at the smallest asset count and assets at the "
+                             "smallest window; full: every combination")
+    parser.add_argument("--cycles", type=int, default=200, help="Timed cycles per case")
+    parser.add_argument("--max-seconds", type=float, default=2.0, help="Time budget per case")
+    parser.add_argument("--max-memory-mb", type=float, default=1024,
+                        help="Skip cases whose estimated footprint exceeds this")
+    parser.add_argument("--max-warmup-ticks", type=float, default=5e6,
+                        help="Skip cases needing more asset-ticks than this to fill their windows")
+    parser.add_argument("--no-memory", action="store_true", help="Do not trace allocations while warming up")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON from an earlier run")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative speed drop treated as a regression by --compare")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"Unknown engines: {', '.join(unknown)}")
+
+    windows = sorted(parse_list(args.windows))
+    asset_counts = sorted(parse_list(args.assets))
+    cases = plan_cases(engines, windows, asset_counts, args.grid)
+
+    logger.info(f"🏁 Running {len(cases)} benchmark cases")
+    results, skipped = [], []
+    for engine, window, assets in cases:
+        if estimated_bytes(engine, assets, window) > args.max_memory_mb * 1024 * 1024:
+            skipped.append({"engine": engine, "window": window, "assets": assets,
+                            "reason": "estimated memory above --max-memory-mb"})
+            continue
+        if assets * warmup_cycles(engine, window) > args.max_warmup_ticks:
+            skipped.append({"engine": engine, "window": window, "assets": assets,
+                            "reason": "warm-up above --max-warmup-ticks"})
+            continue
+
+        result = run_case(engine, window, assets, args.cycles, args.max_seconds,
+                          not args.no_memory)
+        results.append(result)
+
+        memory = result.get("memory_bytes_per_series")
+        memory_str = f"{memory:,.0f} B/series" if memory is not None else "-"
+        logger.info(f"{engine:>16} w={window:<7} n={assets:<6} "
+                    f"{result['ticks_per_sec']:>14,.0f} ticks/s  "
+                    f"p50 {result['cycle_latency_us']['p50']:>10,.1f} µs  "
+                    f"p99 {result['cycle_latency_us']['p99']:>10,.1f} µs  {memory_str}")
+
+    for case in skipped:
+        logger.info(f"⏭️  Skipped {case['engine']} w={case['window']} n={case['assets']}: {case['reason']}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "commit": git_commit(),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+        "skipped": skipped,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+API Ingestion Benchmark for Sentinel Oracle
+Measures updates/sec into the API server for one /api/update request per
+asset versus one /api/update/batch request per cycle (JSON array or NDJSON),
+as the number of assets grows
+
+Usage:
+    python benchmark_api.py                           # default asset counts
+    python benchmark_api.py --assets 10,1000 --cycles 20 --clients 8
+    python benchmark_api.py --output api.json
+
+The API server runs in-process on a free local port (threaded werkzeug, as
+``python api_server.py`` runs it); clients keep one pooled session each.
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List
+import requests
+from werkzeug.serving import make_server
+
+# In-process server: no chain, assets registered directly below
+os.environ.pop("ETH_RPC_URL", None)
+os.environ.pop("RPC_URLS", None)
+import api_server  # noqa: E402
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("APIBenchmark")
+logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+
+def updates_for(assets: List[str], cycle: int) -> List[Dict]:
+    return [{"asset": asset, "price": 100.0 + cycle + i * 0.01, "z_score": 0.5, "is_anomalous": False,
+             "reason": "Normal", "timeframe_z_scores": {"10": 0.4, "30": 0.5}}
+            for i, asset in enumerate(assets)]
+
+
+def send_single(session: requests.Session, url: str, updates: List[Dict], clients: int) -> int:
+    """One request per update, ``clients`` in flight at once"""
+    def post(update):
+        return session.post(f"{url}/api/update", json=update, timeout=10).status_code == 200
+    if clients <= 1:
+        return sum(post(update) for update in updates)
+    with ThreadPoolExecutor(clients) as pool:
+        return sum(pool.map(post, updates))
+
+
+def send_batch(session: requests.Session, url: str, updates: List[Dict], clients: int) -> int:
+    reply = session.post(f"{url}/api/update/batch", json=updates, timeout=30).json()
+    return reply["accepted"]
+
+
+def send_ndjson(session: requests.Session, url: str, updates: List[Dict], clients: int) -> int:
+    body = "\n".join(json.dumps(update) for update in updates)
+    reply = session.post(f"{url}/api/update/batch", data=body, timeout=30,
+                         headers={"Content-Type": "application/x-ndjson"}).json()
+    return reply["accepted"]
+
+
+def time_mode(send: Callable, url: str, assets: List[str], cycles: int, clients: int,
+              max_seconds: float) -> Dict:
+    """Updates/sec when every cycle updates every asset once"""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(clients, 1))
+    session.mount("http://", adapter)
+    send(session, url, updates_for(assets, 0), clients)  # Connection setup
+
+    accepted, sent, cycle_times = 0, 0, []
+    started = time.perf_counter()
+    for cycle in range(cycles):
+        updates = updates_for(assets, cycle + 1)
+        t = time.perf_counter()
+        accepted += send(session, url, updates, clients)
+        cycle_times.append(time.perf_counter() - t)
+        sent += len(updates)
+        if time.perf_counter() - started > max_seconds:
+            break
+    elapsed = time.perf_counter() - started
+    session.close()
+    return {
+        "updates": sent,
+        "accepted": accepted,
+        "updates_per_sec": sent / elapsed,
+        "cycle_ms_mean": 1000 * sum(cycle_times) / len(cycle_times),
+    }
+
+
+def main():
+    """Run the ingestion benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark single vs batched API ingestion")
+    parser.add_argument("--assets", default="5,50,500", help="Comma-separated asset counts")
+    parser.add_argument("--cycles", type=int, default=10, help="Cycles per case")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent requests for single updates")
+    parser.add_argument("--max-seconds", type=float, default=20.0, help="Time budget per case")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    server = make_server("127.0.0.1", 0, api_server.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    modes = {"single": send_single, "batch": send_batch, "ndjson": send_ndjson}
+    results = []
+    for count in [int(x) for x in args.assets.split(",") if x.strip()]:
+        assets = [f"BENCH{i}/USD" for i in range(count)]
+        api_server._track_assets(assets)
+        baseline = None
+        for name, send in modes.items():
+            result = time_mode(send, url, assets, args.cycles, args.clients, args.max_seconds)
+            baseline = baseline or result["updates_per_sec"]
+            result.update({"mode": name, "assets": count, "speedup_vs_single": result["updates_per_sec"] / baseline})
+            results.append(result)
+            logger.info(f"{name:>7} n={count:<6} {result['updates_per_sec']:>10,.0f} updates/s  "
+                        f"cycle {result['cycle_ms_mean']:>9,.1f} ms  x{result['speedup_vs_single']:<6.1f} "
+                        f"accepted {result['accepted']}/{result['updates']}")
+
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Update Stream Fan-out Benchmark for Sentinel Oracle
+Connects many server-sent event subscribers to the API server's update
+stream, posts batch updates and measures how long each batch takes to reach
+every subscriber
+
+Usage:
+    python benchmark_fanout.py                        # default subscriber counts
+    python benchmark_fanout.py --subscribers 100,5000 --assets 50 --interval 0.5
+    python benchmark_fanout.py --filtered             # each subscriber follows one asset
+    python benchmark_fanout.py --output fanout.json
+
+The API server (threaded werkzeug plus the stream's event loop) runs in its
+own process; subscribers are sockets on one asyncio loop in this one. A
+batch's delivery latency runs from posting it to /api/update/batch until a
+subscriber has read all of its events.
+"""
+
+import os
+import json
+import time
+import asyncio
+import argparse
+import logging
+import resource
+import multiprocessing
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+import requests
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("FanoutBenchmark")
+
+
+def raise_fd_limit() -> int:
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    return hard
+
+
+def serve(api_port: int, stream_port: int, assets: List[str], ready) -> None:
+    """Server process: the API app with its update stream"""
+    raise_fd_limit()
+    os.environ.pop("ETH_RPC_URL", None)
+    os.environ.pop("RPC_URLS", None)
+    os.environ.update(STREAM_PORT=str(stream_port), STREAM_HOST="127.0.0.1")
+    import api_server
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    api_server._track_assets(assets)
+    api_server.stream.start()
+    server = make_server("127.0.0.1", api_port, api_server.app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+class Subscriber:
+    """Counts update events; records when each batch has fully arrived"""
+
+    def __init__(self, per_batch: int):
+        self.per_batch = per_batch
+        self.events = 0
+        self.arrivals: List[float] = []   # Index k: when batch k+1 was complete
+
+    async def run(self, port: int, query: str) -> None:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /api/stream{query} HTTP/1.1\r\nHost: localhost\r\nAccept: text/event-stream\r\n\r\n".encode())
+        tail = b""
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                data = tail + data
+                self.events += data.count(b"event: update\n")
+                tail = data[-13:]  # Shorter than a marker: one split across reads is counted once
+                while self.events >= (len(self.arrivals) + 1) * self.per_batch:
+                    self.arrivals.append(time.perf_counter())
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+async def run_case(count: int, args: argparse.Namespace, assets: List[str]) -> Dict:
+    per_batch = 1 if args.filtered else len(assets)
+    subscribers = [Subscriber(per_batch) for _ in range(count)]
+    tasks = []
+    for i, subscriber in enumerate(subscribers):
+        query = f"?assets={assets[i % len(assets)]}" if args.filtered else ""
+        tasks.append(asyncio.create_task(subscriber.run(args.stream_port, query)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)  # Spread the connects over the accept backlog
+    await asyncio.sleep(1.0)
+
+    session = requests.Session()
+    api = f"http://127.0.0.1:{args.api_port}/api/update/batch"
+    sent_at: List[float] = []
+    started = time.perf_counter()
+    step = 0
+    while time.perf_counter() - started < args.seconds:
+        step += 1
+        updates = [{"asset": asset, "price": 100.0 + step % 13, "z_score": 0.1, "is_anomalous": False,
+                    "reason": "Normal"} for asset in assets]
+        sent_at.append(time.perf_counter())
+        await asyncio.to_thread(session.post, api, json=updates, timeout=30)
+        await asyncio.sleep(max(0.0, sent_at[-1] + args.interval - time.perf_counter()))
+    await asyncio.sleep(2.0)  # Let the last batch drain
+    elapsed = time.perf_counter() - started
+
+    health = session.get(f"http://127.0.0.1:{args.api_port}/health", timeout=10).json()["stream"]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    session.close()
+
+    latencies = np.array([arrival - sent_at[k] for s in subscribers
+                          for k, arrival in enumerate(s.arrivals[:len(sent_at)])]) * 1000
+    complete = sum(len(s.arrivals) >= len(sent_at) for s in subscribers)
+    return {
+        "subscribers": count,
+        "batches": len(sent_at),
+        "events_per_sec": sum(s.events for s in subscribers) / elapsed,
+        "complete": complete,
+        "evicted": health["evicted"],
+        "latency_ms_p50": float(np.percentile(latencies, 50)) if len(latencies) else None,
+        "latency_ms_p99": float(np.percentile(latencies, 99)) if len(latencies) else None,
+        "latency_ms_max": float(latencies.max()) if len(latencies) else None,
+    }
+
+
+def main():
+    """Run the fan-out benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark update stream fan-out to many subscribers")
+    parser.add_argument("--subscribers", default="100,1000,5000", help="Comma-separated subscriber counts")
+    parser.add_argument("--assets", type=int, default=20, help="Assets updated per batch")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between batches")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Posting duration per case")
+    parser.add_argument("--filtered", action="store_true", help="Each subscriber follows one asset")
+    parser.add_argument("--api-port", type=int, default=8096)
+    parser.add_argument("--stream-port", type=int, default=8097)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    limit = raise_fd_limit()
+    counts = [int(x) for x in args.subscribers.split(",") if x.strip()]
+    if max(counts) + 100 > limit:
+        parser.error(f"open file limit is {limit}: too low for {max(counts)} subscribers")
+
+    assets = [f"BENCH{i}/USD" for i in range(args.assets)]
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.api_port, args.stream_port, assets, ready), daemon=True)
+    server.start()
+    if not ready.wait(30):
+        raise RuntimeError("API server did not start")
+
+    results = []
+    for count in counts:
+        result = asyncio.run(run_case(count, args, assets))
+        results.append(result)
+        fmt = lambda v: f"{v:8.1f}" if v is not None else "       -"
+        logger.info(f"subscribers={count:<6} {result['events_per_sec']:>10,.0f} events/s  "
+                    f"batch delivery p50 {fmt(result['latency_ms_p50'])} ms  p99 {fmt(result['latency_ms_p99'])} ms  "
+                    f"complete {result['complete']}/{count}  evicted {result['evicted']}")
+
+    server.terminate()
+    server.join()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "assets": args.assets,
+                       "filtered": args.filtered, "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
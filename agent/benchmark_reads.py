@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Chain Read Benchmark for Sentinel Oracle
+Compares the time to read every asset's price once (one monitor cycle) for
+each read strategy, against a local stub RPC server with simulated latency
+
+Usage:
+    python benchmark_reads.py                         # default asset counts and latencies
+    python benchmark_reads.py --assets 10,100 --latency 20 --concurrency 8,32
+    python benchmark_reads.py --output reads.json
+
+Readers:
+    sequential   one blocking getLatestPrice call per asset
+    async        concurrent calls over AsyncWeb3, one per --concurrency value
+    rpc_batch    one JSON-RPC batch request per RPC_BATCH_SIZE assets
+    view         the getLatestPrices view, one eth_call per RPC_BATCH_SIZE assets
+"""
+
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+from web3 import Web3
+
+from async_chain_reader import AsyncPriceReader
+from chain_reader import PRICE_READER_ABI, PRICE_SCALE, BatchPriceReader, PriceReading, asset_id
+from rpc_pool import make_web3
+from stub_rpc import serve_in_background, server_url
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("ReadBenchmark")
+
+# The stub answers for any address
+CONTRACT_ADDRESS = "0x" + "5e" * 20
+
+ReadFn = Callable[[Sequence[str]], Dict[str, Optional[PriceReading]]]
+
+
+def sequential_reader(rpc_url: str) -> ReadFn:
+    """The monitor's original loop: one blocking call per asset"""
+    w3 = make_web3(rpc_url)
+    contract = w3.eth.contract(address=Web3.to_checksum_address(CONTRACT_ADDRESS), abi=PRICE_READER_ABI)
+
+    def read(assets: Sequence[str]) -> Dict[str, Optional[PriceReading]]:
+        readings = {}
+        for asset in assets:
+            price, timestamp, flag = contract.functions.getLatestPrice(asset_id(asset)).call()
+            readings[asset] = PriceReading(price / PRICE_SCALE, timestamp, flag)
+        return readings
+    return read
+
+
+def batch_reader(rpc_url: str, strategy: str) -> ReadFn:
+    reader = BatchPriceReader(make_web3(rpc_url), CONTRACT_ADDRESS, rpc_url)
+    reader.strategy = strategy
+    return reader.read_prices
+
+
+def time_cycles(read: ReadFn, assets: List[str], cycles: int, max_seconds: float) -> Dict:
+    """Cycle time percentiles for reading every asset once per cycle"""
+    read(assets)  # connection setup, caches
+    durations, failed = [], 0
+    started = time.perf_counter()
+    for _ in range(cycles):
+        t = time.perf_counter()
+        readings = read(assets)
+        durations.append(time.perf_counter() - t)
+        failed += sum(reading is None for reading in readings.values())
+        if time.perf_counter() - started > max_seconds:
+            break
+
+    durations = np.asarray(durations) * 1000
+    return {
+        "cycles": len(durations),
+        "cycle_ms": {
+            "p50": float(np.percentile(durations, 50)),
+            "p99": float(np.percentile(durations, 99)),
+            "mean": float(durations.mean()),
+        },
+        "failed_reads": failed,
+    }
+
+
+def main():
+    """Run the read benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark chain read strategies against a stub RPC")
+    parser.add_argument("--assets", default="5,20,100", help="Comma-separated asset counts")
+    parser.add_argument("--latency", default="20,50", help="Comma-separated per-request latencies (ms)")
+    parser.add_argument("--concurrency", default="8,32", help="Concurrency limits for the async reader")
+    parser.add_argument("--cycles", type=int, default=10, help="Timed cycles per case")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="Time budget per case")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    asset_counts = [int(x) for x in args.assets.split(",") if x.strip()]
+    latencies = [float(x) for x in args.latency.split(",") if x.strip()]
+    concurrencies = [int(x) for x in args.concurrency.split(",") if x.strip()]
+
+    results = []
+    for latency in latencies:
+        server = serve_in_background(latency_ms=latency)
+        rpc_url = server_url(server)
+        readers = {"sequential": sequential_reader(rpc_url)}
+        async_readers = []
+        for concurrency in concurrencies:
+            reader = AsyncPriceReader(rpc_url, CONTRACT_ADDRESS, concurrency=concurrency)
+            async_readers.append(reader)
+            readers[f"async(c={concurrency})"] = reader.read_prices
+        readers["rpc_batch"] = batch_reader(rpc_url, BatchPriceReader.RPC_BATCH)
+        readers["view"] = batch_reader(rpc_url, BatchPriceReader.VIEW)
+
+        for count in asset_counts:
+            assets = [f"ASSET{i}/USD" for i in range(count)]
+            baseline = None
+            for name, read in readers.items():
+                result = time_cycles(read, assets, args.cycles, args.max_seconds)
+                result.update({"reader": name, "assets": count, "latency_ms": latency})
+                baseline = baseline or result["cycle_ms"]["p50"]
+                result["speedup_vs_sequential"] = baseline / result["cycle_ms"]["p50"]
+                results.append(result)
+                logger.info(f"{name:>14} n={count:<5} latency={latency:<5.0f} "
+                            f"p50 {result['cycle_ms']['p50']:>9,.1f} ms  "
+                            f"p99 {result['cycle_ms']['p99']:>9,.1f} ms  "
+                            f"x{result['speedup_vs_sequential']:<7.1f} failed {result['failed_reads']}")
+
+        for reader in async_readers:
+            reader.close()
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
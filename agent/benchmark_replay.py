@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Replay Load Test for Sentinel Oracle
+Plays a price recording through the full MultiAssetMonitor pipeline (detect,
+report, API publish) without a network, and checks that two runs flag
+exactly the same anomalies
+
+Usage:
+    python benchmark_replay.py prices.rec                    # as fast as possible
+    python benchmark_replay.py prices.rec --speed 100
+    python benchmark_replay.py --synthetic 200 --cycles 500  # generated recording
+    python benchmark_replay.py prices.rec --backend matrix --output replay.json
+
+Record a live session with PRICE_RECORD=prices.rec python multi_asset_monitor.py.
+A replay reads no chain: the assets come from the recording. Unless --api-url
+is given the API server is a closed local port, so nothing leaves the machine
+and every API update fails fast (and is retried, then dropped, by the publisher).
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+import tempfile
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+
+from pipeline import PriceTick
+from price_source import PriceRecorder
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("ReplayBenchmark")
+
+# Nothing listens here: API posts fail fast
+CLOSED_PORT_URL = "http://127.0.0.1:9"
+
+
+def synthetic_recording(path: str, assets: int, cycles: int, spike_rate: float = 0.002) -> None:
+    """A random-walk recording with occasional spikes, one tick per asset per 10s cycle"""
+    rng = np.random.default_rng(7)
+    symbols = [f"ASSET{i}/USD" for i in range(assets)]
+    prices = rng.uniform(1, 1000, assets)
+    recorder = PriceRecorder(path, chunk_size=1 << 16)
+    started = time.time() - cycles * 10
+    for cycle in range(cycles):
+        prices *= 1 + rng.normal(0, 0.001, assets)
+        observed = prices * np.where(rng.random(assets) < spike_rate, 1.05, 1.0)
+        received = started + cycle * 10
+        recorder.write([PriceTick(symbol, float(price), received, timestamp=received - 1)
+                        for symbol, price in zip(symbols, observed)])
+    recorder.close()
+
+
+def drained(stats: Dict, ticks: int) -> bool:
+    """Every tick scored and every detection reported: stages count items once handed on"""
+    detect, report = stats["detect"], stats["report"]
+    return (detect["received"] >= ticks and report["received"] == detect["emitted"]
+            and all(stage.get("queue_depth", 0) == 0 for stage in stats.values()))
+
+
+def replay(path: str, speed: str, backend: str, timeout: float) -> Dict:
+    """One full-pipeline replay; returns throughput and the anomalies it flagged"""
+    os.environ.update(PRICE_READS="replay", PRICE_REPLAY_FILE=path, PRICE_REPLAY_SPEED=speed,
+                      DETECTOR_BACKEND=backend)
+    import multi_asset_monitor
+    logging.getLogger("MultiAssetMonitor").setLevel(logging.WARNING)
+
+    monitor = multi_asset_monitor.MultiAssetMonitor()
+    anomalies: List[tuple] = []
+    report = monitor.report
+
+    def collect(result):
+        if result.is_anomalous:
+            anomalies.append((result.asset, round(result.price, 8), round(result.z_score or 0.0, 6)))
+        report(result)
+    monitor.report = collect
+
+    source = monitor.price_source
+    pipeline = monitor.build_pipeline(10)
+    started = time.perf_counter()
+    source.start()
+    pipeline.start()
+    while time.perf_counter() - started < timeout:
+        if source.finished and drained(pipeline.stats(), len(source.rows)):
+            break
+        time.sleep(0.01)
+    elapsed = time.perf_counter() - started
+    pipeline.stop()
+    monitor.publisher.close(timeout=1.0)
+
+    stats = pipeline.stats()
+    return {
+        "ticks": int(stats["detect"]["received"]),
+        "seconds": elapsed,
+        "ticks_per_sec": stats["detect"]["received"] / elapsed,
+        "detect_p99_ms": stats["detect"]["latency_ms_p99"],
+        "api_dropped": stats["api"]["dropped"] + monitor.publisher.dropped,
+        "api_sent": monitor.publisher.sent,
+        "anomalies": anomalies,
+    }
+
+
+def main():
+    """Run the replay load test"""
+    parser = argparse.ArgumentParser(description="Replay a price recording through the monitor pipeline")
+    parser.add_argument("recording", nargs="?", help="Recording made with PRICE_RECORD")
+    parser.add_argument("--synthetic", type=int, help="Generate a recording for this many assets instead")
+    parser.add_argument("--cycles", type=int, default=200, help="Cycles in a generated recording")
+    parser.add_argument("--speed", default="max", help="Replay speed: 1, 100, ... or max")
+    parser.add_argument("--backend", default="dict", help="DETECTOR_BACKEND for the monitor")
+    parser.add_argument("--runs", type=int, default=2, help="Replays to compare for determinism")
+    parser.add_argument("--api-url", default=CLOSED_PORT_URL, help="API server to publish to (default: none)")
+    parser.add_argument("--timeout", type=float, default=600.0, help="Give up on a replay after this long")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.update(API_SERVER_URL=args.api_url, SNAPSHOT_DIR="")
+    os.environ.pop("PRICE_RECORD", None)
+
+    path = args.recording
+    if args.synthetic:
+        path = os.path.join(tempfile.mkdtemp(), "synthetic.rec")
+        synthetic_recording(path, args.synthetic, args.cycles)
+        logger.info(f"🧪 Generated {args.synthetic} assets x {args.cycles} cycles in {path}")
+    if not path:
+        parser.error("give a recording or --synthetic")
+
+    runs = [replay(path, args.speed, args.backend, args.timeout) for _ in range(args.runs)]
+    for i, run in enumerate(runs):
+        logger.info(f"run {i + 1}: {run['ticks']:,} ticks in {run['seconds']:.2f}s "
+                    f"({run['ticks_per_sec']:,.0f}/s), detect p99 {run['detect_p99_ms'] or 0:.2f} ms, "
+                    f"{len(run['anomalies'])} anomalies, {run['api_sent']} API updates sent, "
+                    f"{run['api_dropped']} dropped")
+    identical = all(run["anomalies"] == runs[0]["anomalies"] for run in runs)
+    logger.info(f"{'✅' if identical else '❌'} Anomalies {'identical' if identical else 'differ'} across runs")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "recording": path, "speed": args.speed,
+                       "backend": args.backend, "identical": identical,
+                       "runs": [{k: v for k, v in run.items() if k != "anomalies"} for run in runs]}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+RPC Pool Benchmark for Sentinel Oracle
+Reads one price per call against local stub RPC servers with injected faults
+and compares a single endpoint with the pool, with and without hedging
+
+Usage:
+    python benchmark_rpc_pool.py                      # default fault profile
+    python benchmark_rpc_pool.py --calls 2000 --error-rate 0.3 --slow-rate 0.04
+    python benchmark_rpc_pool.py --output pool.json
+
+Endpoints:
+    flaky    --latency ms, but --error-rate of requests fail with HTTP 503
+    tail     --latency ms, but --slow-rate of requests take --slow-latency ms
+    steady   2 x --latency ms, no faults
+"""
+
+import json
+import time
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+
+from chain_reader import asset_id, decode_price, price_calldata
+from rpc_pool import RPCPool
+from stub_rpc import serve_in_background, server_url
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("PoolBenchmark")
+
+# The stub answers for any address
+CONTRACT_ADDRESS = "0x" + "5e" * 20
+
+
+def time_calls(pool: RPCPool, calls: int, max_seconds: float) -> Dict:
+    """Latency percentiles and failures for single getLatestPrice calls"""
+    params = [{"to": CONTRACT_ADDRESS, "data": price_calldata(asset_id("BTC/USD"))}, "latest"]
+    durations, failed = [], 0
+    started = time.perf_counter()
+    for _ in range(calls):
+        t = time.perf_counter()
+        try:
+            decode_price(bytes.fromhex(pool.request("eth_call", params)["result"][2:]))
+        except Exception:
+            failed += 1
+        durations.append(time.perf_counter() - t)
+        if time.perf_counter() - started > max_seconds:
+            break
+
+    durations = np.asarray(durations) * 1000
+    return {
+        "calls": len(durations),
+        "failed": failed,
+        "latency_ms": {
+            "p50": float(np.percentile(durations, 50)),
+            "p99": float(np.percentile(durations, 99)),
+            "max": float(durations.max()),
+        },
+        "endpoints": pool.stats(),
+    }
+
+
+def main():
+    """Run the pool benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark the RPC pool against faulty stub endpoints")
+    parser.add_argument("--calls", type=int, default=1000, help="Calls per case")
+    parser.add_argument("--latency", type=float, default=5.0, help="Base per-request latency (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.2, help="Failure rate of the flaky endpoint")
+    parser.add_argument("--slow-rate", type=float, default=0.02, help="Slow-request rate of the tail endpoint")
+    parser.add_argument("--slow-latency", type=float, default=250.0, help="Latency of slow requests (ms)")
+    parser.add_argument("--max-seconds", type=float, default=30.0, help="Time budget per case")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    servers = {
+        "flaky": serve_in_background(latency_ms=args.latency, error_rate=args.error_rate),
+        "tail": serve_in_background(latency_ms=args.latency, slow_rate=args.slow_rate,
+                                    slow_latency_ms=args.slow_latency),
+        "steady": serve_in_background(latency_ms=2 * args.latency),
+    }
+    urls = {name: server_url(server) for name, server in servers.items()}
+
+    cases = {
+        "single: flaky": RPCPool([urls["flaky"]], cooldown=0),
+        "single: tail": RPCPool([urls["tail"]]),
+        "pool, no hedging": RPCPool(list(urls.values()), hedge=False),
+        "pool, hedged": RPCPool(list(urls.values()), hedge=True),
+    }
+
+    results: List[Dict] = []
+    for name, pool in cases.items():
+        result = time_calls(pool, args.calls, args.max_seconds)
+        result["case"] = name
+        results.append(result)
+        logger.info(f"{name:>17}: p50 {result['latency_ms']['p50']:7.1f} ms  "
+                    f"p99 {result['latency_ms']['p99']:7.1f} ms  "
+                    f"max {result['latency_ms']['max']:7.1f} ms  "
+                    f"failed {result['failed']}/{result['calls']}")
+        for url, summary in result["endpoints"].items():
+            label = next(n for n, u in urls.items() if u == url)
+            logger.info(f"{'':>19}{label:>7}: {summary['requests']} requests, "
+                        f"error rate {summary['error_rate']:.2f}, hedged {summary['hedges']}")
+        pool.close()
+
+    for server in servers.values():
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
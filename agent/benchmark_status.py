@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Status Polling Benchmark for Sentinel Oracle
+Measures /api/status requests/sec under many concurrent pollers while a
+monitor keeps publishing updates
+
+Usage:
+    python benchmark_status.py                        # default poller counts
+    python benchmark_status.py --pollers 1,64 --assets 200 --seconds 10
+    python benchmark_status.py --output status.json
+
+Three ways of answering a poll are compared:
+    rebuild      the status dict rebuilt and serialized on every request (as
+                 before the snapshot cache)
+    cached       the pre-serialized snapshot, full body every time
+    conditional  the snapshot with If-None-Match: 304 until the state changes
+
+The API server runs in a separate process (threaded werkzeug, as
+``python api_server.py`` runs it) so the pollers do not share its GIL. A
+writer posts one batch update for every asset each --update-interval seconds.
+"""
+
+import os
+import json
+import time
+import argparse
+import logging
+import threading
+import multiprocessing
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+import requests
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("StatusBenchmark")
+
+
+def serve(port: int, assets: List[str], ready) -> None:
+    """Server process: the API app plus the old per-request status route"""
+    os.environ.pop("ETH_RPC_URL", None)
+    os.environ.pop("RPC_URLS", None)
+    import api_server
+    from flask import jsonify
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    def rebuild_status():
+        with api_server._state_lock:
+            return jsonify(api_server._build_status(api_server._status_version))
+    api_server.app.add_url_rule("/bench/status-rebuild", "status_rebuild", rebuild_status)
+
+    api_server._track_assets(assets)
+    server = make_server("127.0.0.1", port, api_server.app, threaded=True)
+    ready.set()
+    server.serve_forever()
+
+
+def batch(assets: List[str], step: int) -> List[Dict]:
+    return [{"asset": asset, "price": 100.0 + (step + i) % 17, "z_score": 0.3, "is_anomalous": False,
+             "reason": "Normal", "timeframe_z_scores": {"10": 0.2, "30": 0.3}}
+            for i, asset in enumerate(assets)]
+
+
+def poll(url: str, conditional: bool, stop: threading.Event, out: Dict) -> None:
+    session = requests.Session()
+    etag = None
+    latencies, not_modified, payload = [], 0, 0
+    while not stop.is_set():
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        t = time.perf_counter()
+        response = session.get(url, headers=headers, timeout=10)
+        latencies.append(time.perf_counter() - t)
+        payload += len(response.content)
+        if response.status_code == 304:
+            not_modified += 1
+        etag = response.headers.get("ETag", etag)
+    session.close()
+    out.update(latencies=latencies, not_modified=not_modified, payload=payload)
+
+
+def run_case(base_url: str, mode: str, pollers: int, args: argparse.Namespace, assets: List[str]) -> Dict:
+    """``pollers`` threads poll for --seconds while the writer keeps updating"""
+    url = f"{base_url}/bench/status-rebuild" if mode == "rebuild" else f"{base_url}/api/status"
+    stop = threading.Event()
+    results = [{} for _ in range(pollers)]
+    threads = [threading.Thread(target=poll, args=(url, mode == "conditional", stop, out), daemon=True)
+               for out in results]
+
+    def write():
+        session = requests.Session()
+        step = 0
+        while not stop.wait(args.update_interval):
+            step += 1
+            session.post(f"{base_url}/api/update/batch", json=batch(assets, step), timeout=10)
+    writer = threading.Thread(target=write, daemon=True)
+
+    started = time.perf_counter()
+    for thread in threads + [writer]:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads + [writer]:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = np.concatenate([out["latencies"] for out in results]) * 1000
+    total = len(latencies)
+    return {
+        "mode": mode,
+        "pollers": pollers,
+        "requests": total,
+        "requests_per_sec": total / elapsed,
+        "not_modified": sum(out["not_modified"] for out in results) / max(total, 1),
+        "mb_per_sec": sum(out["payload"] for out in results) / elapsed / 1e6,
+        "latency_ms_p50": float(np.percentile(latencies, 50)) if total else None,
+        "latency_ms_p99": float(np.percentile(latencies, 99)) if total else None,
+    }
+
+
+def main():
+    """Run the status polling benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark /api/status under concurrent pollers")
+    parser.add_argument("--pollers", default="1,16,64", help="Comma-separated concurrent poller counts")
+    parser.add_argument("--assets", type=int, default=50, help="Assets tracked by the server")
+    parser.add_argument("--history", type=int, default=50, help="Prices per asset loaded before polling")
+    parser.add_argument("--update-interval", type=float, default=1.0, help="Seconds between update batches")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration per case")
+    parser.add_argument("--modes", default="rebuild,cached,conditional", help="Comma-separated modes")
+    parser.add_argument("--port", type=int, default=8098)
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    assets = [f"BENCH{i}/USD" for i in range(args.assets)]
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=serve, args=(args.port, assets, ready), daemon=True)
+    server.start()
+    if not ready.wait(30):
+        raise RuntimeError("API server did not start")
+    base_url = f"http://127.0.0.1:{args.port}"
+    for step in range(args.history):
+        requests.post(f"{base_url}/api/update/batch", json=batch(assets, step), timeout=30)
+    size = len(requests.get(f"{base_url}/api/status", timeout=30).content)
+    logger.info(f"📦 {args.assets} assets, status body {size / 1024:.0f} KiB, "
+                f"updates every {args.update_interval:g}s")
+
+    results = []
+    for pollers in [int(x) for x in args.pollers.split(",") if x.strip()]:
+        for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+            result = run_case(base_url, mode, pollers, args, assets)
+            results.append(result)
+            logger.info(f"{mode:>11} pollers={pollers:<4} {result['requests_per_sec']:>8,.0f} req/s  "
+                        f"p50 {result['latency_ms_p50'] or 0:>7.2f} ms  p99 {result['latency_ms_p99'] or 0:>7.2f} ms  "
+                        f"{result['mb_per_sec']:>7.1f} MB/s  304s {100 * result['not_modified']:.0f}%")
+
+    server.terminate()
+    server.join()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "assets": args.assets,
+                       "status_bytes": size, "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Stream Detection Benchmark for Sentinel Oracle
+Streams prices for many feeds from a local stub Hermes server, scores every
+update as it arrives and measures how long an injected price spike takes to
+be flagged, from the moment the server sends it
+
+Usage:
+    python benchmark_stream.py                        # default feed counts
+    python benchmark_stream.py --feeds 5,500 --interval 100 --spikes 20
+    python benchmark_stream.py --drop-after 25        # reconnect every 25 messages
+    python benchmark_stream.py --output stream.json
+
+For comparison, polling the contract flags a spike only after it has been
+pushed on-chain and the next CHECK_INTERVAL read comes round: on average
+half the interval plus the push delay.
+"""
+
+import json
+import time
+import random
+import argparse
+import logging
+from datetime import datetime
+from typing import Dict, List
+import numpy as np
+
+from hermes_stream import HermesStreamSource
+from matrix_detector import MatrixAnomalyDetector
+from stub_hermes import serve_in_background, server_url
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("StreamBenchmark")
+logging.getLogger("HermesStream").setLevel(logging.WARNING)
+
+
+def run_case(feed_count: int, args: argparse.Namespace) -> Dict:
+    """Stream ``feed_count`` feeds, inject spikes and time their detection"""
+    server = serve_in_background(interval_ms=args.interval, drop_after=args.drop_after)
+    feeds = server.RequestHandlerClass.feeds
+    symbols = {f"FEED{i}/USD": f"{random.getrandbits(256):064x}" for i in range(feed_count)}
+    source = HermesStreamSource(server_url(server), symbols)
+    detector = MatrixAnomalyDetector(list(symbols), args.window, args.threshold)
+
+    pending = set()   # (symbol, slot) of spikes not scored yet
+    latencies: List[float] = []
+    missed = 0
+    started = time.time()
+    warmup = started + (args.window + 5) * args.interval / 1000
+    next_spike = warmup
+    source.start()
+    while time.time() - started < args.seconds:
+        ticks = source.drain(wait=0.1)
+        if ticks:
+            latest = {tick.asset: tick for tick in ticks}
+            results = detector.evaluate({asset: tick.price for asset, tick in latest.items()})
+            now = time.time()
+            for symbol, slot in list(pending):
+                sent = feeds.sent_at.get(slot)
+                if sent is None or symbol not in latest or latest[symbol].received < sent:
+                    continue
+                pending.discard((symbol, slot))
+                if results[symbol][0]:
+                    latencies.append(now - sent)
+                else:
+                    missed += 1
+
+        if time.time() >= next_spike and len(latencies) + missed + len(pending) < args.spikes:
+            symbol = random.choice(list(symbols))
+            pending.add((symbol, feeds.spike(symbols[symbol], args.spike)))
+            next_spike = time.time() + 2 * args.interval / 1000
+    source.stop()
+    server.shutdown()
+
+    elapsed = time.time() - started
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "feeds": feed_count,
+        "updates_per_sec": source.updates / elapsed,
+        "connects": source.connects,
+        "replayed": source.replayed,
+        "spikes_detected": len(latencies),
+        "spikes_missed": missed,
+        "detection_ms": {
+            "p50": float(np.percentile(latencies_ms, 50)) if latencies else None,
+            "p99": float(np.percentile(latencies_ms, 99)) if latencies else None,
+            "max": float(latencies_ms.max()) if latencies else None,
+        },
+    }
+
+
+def main():
+    """Run the stream benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark streamed detection against a stub Hermes server")
+    parser.add_argument("--feeds", default="5,100,500", help="Comma-separated feed counts")
+    parser.add_argument("--interval", type=float, default=400.0, help="Stub slot time (ms)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duration per case")
+    parser.add_argument("--spikes", type=int, default=10, help="Spikes injected per case")
+    parser.add_argument("--spike", type=float, default=1.05, help="Price factor of a spike")
+    parser.add_argument("--window", type=int, default=20, help="Detector window (samples)")
+    parser.add_argument("--threshold", type=float, default=2.5, help="Z-score threshold")
+    parser.add_argument("--drop-after", type=int, default=0, help="Stub closes each stream after this many messages")
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    args = parser.parse_args()
+
+    results = []
+    for count in [int(x) for x in args.feeds.split(",") if x.strip()]:
+        result = run_case(count, args)
+        results.append(result)
+        latency = result["detection_ms"]
+        fmt = lambda v: f"{v:7.1f}" if v is not None else "      -"
+        logger.info(f"feeds={count:<5} {result['updates_per_sec']:>9,.0f} updates/s  "
+                    f"detection p50 {fmt(latency['p50'])} ms  p99 {fmt(latency['p99'])} ms  "
+                    f"spikes {result['spikes_detected']}/{result['spikes_detected'] + result['spikes_missed']}  "
+                    f"connects {result['connects']}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.now().isoformat(), "results": results}, f, indent=2)
+        logger.info(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Chain Reader for Sentinel Oracle
+Reads every asset's stored price from SentinelOracle in one round trip
+"""
+
+import os
+import logging
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+import requests
+from web3 import Web3
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError, MethodUnavailable
+
+logger = logging.getLogger("ChainReader")
+
+# getLatestPrice plus the batched getLatestPrices view
+PRICE_READER_ABI = [
+    {
+        "inputs": [{"name": "assetId", "type": "bytes32"}],
+        "name": "getLatestPrice",
+        "outputs": [
+            {"name": "price", "type": "int64"},
+            {"name": "timestamp", "type": "uint64"},
+            {"name": "isAnomalous", "type": "bool"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"name": "assetIds", "type": "bytes32[]"}],
+        "name": "getLatestPrices",
+        "outputs": [
+            {"name": "priceValues", "type": "int64[]"},
+            {"name": "timestamps", "type": "uint64[]"},
+            {"name": "anomalous", "type": "bool[]"}
+        ],
+        "stateMutability": "view",
+        "type": "function"
+    }
+]
+
+# Prices are stored on-chain scaled by 1e8
+PRICE_SCALE = 1e8
+
+
+def _unsupported(error: Exception) -> bool:
+    """
+    Whether a failed read shows the call itself is unsupported (a JSON-RPC
+    error object, a revert, no return data, a rejected batch) rather than an
+    unhealthy endpoint (no connection, timeout, HTTP 429/5xx, RPCPoolError),
+    which says nothing about which read strategy works
+    """
+    if isinstance(error, requests.exceptions.HTTPError):
+        status = error.response.status_code if error.response is not None else 0
+        return 400 <= status < 500 and status != 429
+    if isinstance(error, requests.exceptions.RequestException):
+        return False
+    return isinstance(error, (ValueError, MethodUnavailable, ContractLogicError, BadFunctionCallOutput))
+
+
+class PriceReading(NamedTuple):
+    """One asset's stored price"""
+    price: float
+    timestamp: int
+    is_anomalous: bool
+
+
+_GET_LATEST_PRICE_SELECTOR = bytes(Web3.keccak(text="getLatestPrice(bytes32)")[:4]).hex()
+
+
+def decode_price(data: bytes) -> PriceReading:
+    """Decode getLatestPrice's (int64, uint64, bool) return words"""
+    if len(data) < 96:
+        raise ValueError(f"short getLatestPrice result ({len(data)} bytes)")
+    price = int.from_bytes(data[0:32], "big", signed=True)
+    timestamp = int.from_bytes(data[32:64], "big")
+    return PriceReading(price / PRICE_SCALE, timestamp, data[95] != 0)
+
+
+def asset_id(asset: str) -> bytes:
+    """On-chain asset identifier, keccak256 of the symbol"""
+    return Web3.solidity_keccak(['string'], [asset])
+
+
+def price_calldata(asset: bytes) -> str:
+    """getLatestPrice(assetId) call data for an asset id, built by hand (web3's encoder is ~1ms a call)"""
+    return "0x" + _GET_LATEST_PRICE_SELECTOR + bytes(asset).hex()
+
+
+class BatchPriceReader:
+    """
+    Reads many assets' getLatestPrice in one round trip
+
+    Uses the contract's getLatestPrices view when it exists. Contracts
+    deployed before that view was added fall back to a JSON-RPC batch of
+    getLatestPrice eth_calls (one HTTP request for the whole list), and
+    endpoints that reject batches fall back to one call per asset. The
+    working strategy is remembered; it only changes when a reply shows the
+    call is unsupported, never because an endpoint was briefly down. ``id_of`` maps a
+    symbol to its asset id (e.g. AssetRegistry.id_of; keccak of the symbol
+    by default). JSON-RPC batches go through ``w3``'s RPCPool when it was
+    built with rpc_pool.make_web3, else straight to ``rpc_url``.
+    """
+
+    VIEW, RPC_BATCH, SEQUENTIAL = "view", "rpc_batch", "sequential"
+
+    def __init__(self, w3: Web3, contract_address: str, rpc_url: Optional[str] = None,
+                 batch_size: Optional[int] = None, timeout: float = 10.0,
+                 id_of: Optional[Callable[[str], bytes]] = None):
+        self.w3 = w3
+        self.id_of = id_of or asset_id
+        self.rpc_url = rpc_url
+        self.batch_size = batch_size or int(os.getenv("RPC_BATCH_SIZE", "100"))
+        self.timeout = timeout
+        self.contract = w3.eth.contract(
+            address=Web3.to_checksum_address(contract_address),
+            abi=PRICE_READER_ABI
+        )
+        self.session = requests.Session()
+        self.pool = getattr(w3.provider, "pool", None)
+        self.strategy = self.VIEW
+        self._ids: Dict[str, bytes] = {}
+        self._calldata: Dict[str, str] = {}
+
+    def _id(self, asset: str) -> bytes:
+        if asset not in self._ids:
+            self._ids[asset] = self.id_of(asset)
+        return self._ids[asset]
+
+    def _price_calldata(self, asset: str) -> str:
+        if asset not in self._calldata:
+            self._calldata[asset] = price_calldata(self._id(asset))
+        return self._calldata[asset]
+
+    def read_prices(self, assets: Sequence[str]) -> Dict[str, Optional[PriceReading]]:
+        """Latest stored price per asset (None where the read failed)"""
+        assets = list(assets)
+        if not assets:
+            return {}
+
+        try:
+            return self._read(assets)
+        except Exception as e:
+            # The endpoint failed this cycle: keep the strategy and try again next cycle
+            logger.warning(f"⚠️  Price read failed: {e}")
+            return {asset: None for asset in assets}
+
+    def close(self) -> None:
+        self.session.close()
+
+    def _read(self, assets: List[str]) -> Dict[str, Optional[PriceReading]]:
+        if self.strategy == self.VIEW:
+            try:
+                return self._read_view(assets)
+            except Exception as e:
+                if not _unsupported(e):
+                    raise
+                logger.info(f"getLatestPrices unavailable ({e}), using JSON-RPC batches")
+                self.strategy = self.RPC_BATCH if self.rpc_url or self.pool else self.SEQUENTIAL
+
+        if self.strategy == self.RPC_BATCH:
+            try:
+                return self._read_rpc_batch(assets)
+            except Exception as e:
+                if not _unsupported(e):
+                    raise
+                logger.info(f"JSON-RPC batch failed ({e}), using one call per asset")
+                self.strategy = self.SEQUENTIAL
+
+        return self._read_sequential(assets)
+
+    def _read_view(self, assets: List[str]) -> Dict[str, Optional[PriceReading]]:
+        readings = {}
+        for start in range(0, len(assets), self.batch_size):
+            chunk = assets[start:start + self.batch_size]
+            prices, timestamps, anomalous = self.contract.functions.getLatestPrices(
+                [self._id(asset) for asset in chunk]
+            ).call()
+            if len(prices) != len(chunk):
+                raise ValueError(f"expected {len(chunk)} prices, got {len(prices)}")
+            for asset, price, timestamp, flag in zip(chunk, prices, timestamps, anomalous):
+                readings[asset] = PriceReading(price / PRICE_SCALE, timestamp, flag)
+        return readings
+
+    def _read_rpc_batch(self, assets: List[str]) -> Dict[str, Optional[PriceReading]]:
+        address = self.contract.address
+        readings = {}
+        for start in range(0, len(assets), self.batch_size):
+            chunk = assets[start:start + self.batch_size]
+            payload = [
+                {
+                    "jsonrpc": "2.0",
+                    "id": i,
+                    "method": "eth_call",
+                    "params": [{
+                        "to": address,
+                        "data": self._price_calldata(asset),
+                    }, "latest"],
+                }
+                for i, asset in enumerate(chunk)
+            ]
+            if self.pool:
+                replies = self.pool.post(payload)
+            else:
+                response = self.session.post(self.rpc_url, json=payload, timeout=self.timeout)
+                response.raise_for_status()
+                replies = response.json()
+            if not isinstance(replies, list):
+                raise ValueError(replies.get("error", "endpoint does not support batches"))
+
+            by_id = {reply.get("id"): reply for reply in replies}
+            for i, asset in enumerate(chunk):
+                reply = by_id.get(i, {})
+                try:
+                    readings[asset] = decode_price(Web3.to_bytes(hexstr=reply["result"]))
+                except Exception as e:
+                    logger.debug(f"Could not fetch price for {asset}: {reply.get('error') or e}")
+                    readings[asset] = None
+        return readings
+
+    def _read_sequential(self, assets: List[str]) -> Dict[str, Optional[PriceReading]]:
+        readings = {}
+        for asset in assets:
+            try:
+                price, timestamp, flag = self.contract.functions.getLatestPrice(self._id(asset)).call()
+                readings[asset] = PriceReading(price / PRICE_SCALE, timestamp, flag)
+            except Exception as e:
+                logger.debug(f"Could not fetch price for {asset}: {e}")
+                readings[asset] = None
+        return readings
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Anomaly Detectors for Sentinel Oracle
+Single-series detectors shared by the agent and the multi-asset monitor
+"""
+
+from typing import Dict, Optional, Sequence
+import numpy as np
+
+from rolling_stats import EWMoments, MultiWindowMoments, RollingMedian, RollingMoments, elapsed_to_weight
+
+# Values accepted by the DETECTOR_MODE environment variable
+DETECTOR_MODES = ("zscore", "robust", "ewma", "multiframe")
+
+# Default horizons (in samples) for the multiframe mode
+DEFAULT_TIMEFRAMES = (30, 300, 3600)
+
+# Scales the MAD so it estimates the standard deviation of normal data
+MAD_TO_STD = 1.4826
+
+
+class BaseAnomalyDetector:
+    """
+    Common anomaly classification on top of a per-detector score
+
+    ``add_price`` takes the seconds since the previous sample where known.
+    Window detectors count samples and ignore it; the EWMA detector decays
+    by elapsed time when given a ``sample_interval``.
+    """
+
+    score_label = "Z-score"
+
+    def __init__(self, window_size: int, threshold: float, min_samples: int):
+        self.window_size = window_size
+        self.threshold = threshold
+        self.min_samples = min_samples
+
+    def add_price(self, price: float, elapsed: Optional[float] = None) -> None:
+        """Add a new price to the history"""
+        raise NotImplementedError
+
+    def calculate_z_score(self, price: float) -> Optional[float]:
+        """Score a price against the history (None while warming up)"""
+        raise NotImplementedError
+
+    @property
+    def sample_count(self) -> int:
+        """Number of prices currently in the window"""
+        raise NotImplementedError
+
+    @property
+    def mean(self) -> float:
+        """Centre of the current window"""
+        raise NotImplementedError
+
+    @property
+    def std(self) -> float:
+        """Spread of the current window"""
+        raise NotImplementedError
+
+    def timeframe_z_scores(self) -> Dict[int, Optional[float]]:
+        """Z-score per horizon from the last scoring (empty for single-window detectors)"""
+        return {}
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Detector state as fixed-shape arrays (see snapshot.py)"""
+        return self.stats.get_state()
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore state saved by get_state from a detector with the same settings"""
+        self.stats.set_state(state)
+
+    def is_anomaly(self, price: float) -> tuple[bool, Optional[float], str]:
+        """
+        Check if price is anomalous
+        Returns: (is_anomalous, z_score, reason)
+        """
+        z_score = self.calculate_z_score(price)
+
+        if z_score is None:
+            return False, None, "Insufficient data"
+
+        is_anomalous = abs(z_score) > self.threshold
+
+        if is_anomalous:
+            direction = "spike" if z_score > 0 else "drop"
+            reason = f"{self.score_label} {z_score:.2f} (>{self.threshold}σ {direction})"
+            return True, z_score, reason
+        else:
+            return False, z_score, f"Normal (z={z_score:.2f})"
+
+
+class AnomalyDetector(BaseAnomalyDetector):
+    """Statistical anomaly detector using z-score method"""
+
+    def __init__(self, window_size: int = 30, threshold: float = 2.5,
+                 min_samples: int = 10, ddof: int = 0):
+        super().__init__(window_size, threshold, min_samples)
+        self.ddof = ddof
+        self.stats = RollingMoments(window_size)
+        self.price_history = self.stats.values
+
+    def add_price(self, price: float, elapsed: Optional[float] = None) -> None:
+        """Add a new price to the history"""
+        self.stats.push(price)
+
+    @property
+    def sample_count(self) -> int:
+        """Number of prices currently in the window"""
+        return self.stats.count
+
+    @property
+    def mean(self) -> float:
+        """Cached mean of the current window"""
+        return self.stats.mean
+
+    @property
+    def std(self) -> float:
+        """Cached standard deviation of the current window"""
+        return self.stats.std(self.ddof)
+
+    def calculate_z_score(self, price: float) -> Optional[float]:
+        """Calculate z-score for a given price"""
+        if self.stats.count < self.min_samples:  # Need minimum samples
+            return None
+
+        mean = self.stats.mean
+        std = self.stats.std(self.ddof)
+
+        if std == 0:
+            return 0
+
+        z_score = (price - mean) / std
+        return z_score
+
+
+class RobustAnomalyDetector(BaseAnomalyDetector):
+    """
+    Outlier-resistant detector using the rolling median and MAD
+
+    Scores are modified z-scores, (price - median) / (1.4826 * MAD), so a
+    single spike barely moves the centre or the spread it is judged against.
+    """
+
+    score_label = "Robust z-score"
+
+    def __init__(self, window_size: int = 30, threshold: float = 2.5,
+                 min_samples: int = 10):
+        super().__init__(window_size, threshold, min_samples)
+        self.stats = RollingMedian(window_size)
+        self.price_history = self.stats.values
+
+    def add_price(self, price: float, elapsed: Optional[float] = None) -> None:
+        """Add a new price to the history"""
+        self.stats.push(price)
+
+    @property
+    def sample_count(self) -> int:
+        """Number of prices currently in the window"""
+        return self.stats.count
+
+    @property
+    def mean(self) -> float:
+        """Rolling median of the current window"""
+        return self.stats.median()
+
+    @property
+    def std(self) -> float:
+        """MAD scaled to be comparable with a standard deviation"""
+        return MAD_TO_STD * self.stats.mad()
+
+    def calculate_z_score(self, price: float) -> Optional[float]:
+        """Calculate the modified z-score for a given price"""
+        if self.stats.count < self.min_samples:
+            return None
+
+        scale = self.std
+        if scale == 0:
+            return 0
+
+        return (price - self.stats.median()) / scale
+
+
+class EWMAAnomalyDetector(BaseAnomalyDetector):
+    """
+    Z-score detector on exponentially weighted mean/variance
+
+    Keeps a handful of floats instead of a window, and reacts to a regime
+    change within a few half-lives rather than a full window. The latest
+    price is scored against the moments from before it was folded in, since
+    with a short half-life a spike would otherwise drag the mean and variance
+    far enough to hide itself. ``window_size`` reports the effective window,
+    twice the half-life.
+
+    With a ``sample_interval`` (seconds one sample nominally stands for) a
+    price decays the history by the time elapsed since the previous one, so
+    the half-life is ``half_life * sample_interval`` seconds however
+    irregularly prices arrive.
+    """
+
+    def __init__(self, half_life: float = 15.0, threshold: float = 2.5,
+                 min_samples: int = 10, sample_interval: Optional[float] = None):
+        super().__init__(int(round(2 * half_life)), threshold, min_samples)
+        self.half_life = half_life
+        self.sample_interval = sample_interval
+        self.stats = EWMoments(half_life)
+        self._prior_mean = 0.0
+        self._prior_std = 0.0
+
+    def add_price(self, price: float, elapsed: Optional[float] = None) -> None:
+        """Fold a new price into the weighted moments"""
+        self._prior_mean = self.stats.mean
+        self._prior_std = self.stats.std()
+        weight = 1.0 if elapsed is None else float(elapsed_to_weight(elapsed, self.sample_interval, self.half_life))
+        self.stats.push(price, weight)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Weighted moments plus the moments the latest price was judged against"""
+        return {**self.stats.get_state(), "prior": np.array([self._prior_mean, self._prior_std])}
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore state saved by get_state"""
+        self.stats.set_state(state)
+        self._prior_mean, self._prior_std = (float(v) for v in state["prior"])
+
+    @property
+    def sample_count(self) -> int:
+        """Number of prices seen so far"""
+        return self.stats.count
+
+    @property
+    def mean(self) -> float:
+        """Exponentially weighted mean the latest price is judged against"""
+        return self._prior_mean
+
+    @property
+    def std(self) -> float:
+        """Exponentially weighted standard deviation the latest price is judged against"""
+        return self._prior_std
+
+    def calculate_z_score(self, price: float) -> Optional[float]:
+        """Calculate z-score against the weighted moments"""
+        if self.stats.count < self.min_samples:
+            return None
+
+        if self._prior_std == 0:
+            return 0
+
+        return (price - self._prior_mean) / self._prior_std
+
+
+class MultiTimeframeDetector(BaseAnomalyDetector):
+    """
+    Z-score detector that scores every tick against several horizons
+
+    All timeframes share one MultiWindowMoments buffer, so the cost per tick
+    is O(number of timeframes) whatever their lengths. The reported score is
+    the one with the largest magnitude; a horizon only takes part once it has
+    a full window (the shortest one once ``min_samples`` are in).
+    """
+
+    def __init__(self, timeframes: Sequence[int] = DEFAULT_TIMEFRAMES, threshold: float = 2.5,
+                 min_samples: int = 10, ddof: int = 0):
+        self.stats = MultiWindowMoments(timeframes)
+        super().__init__(self.stats.capacity, threshold, min_samples)
+        self.timeframes = self.stats.windows
+        self.ddof = ddof
+        self.last_scores: Dict[int, Optional[float]] = {w: None for w in self.timeframes}
+        self.fired_timeframe: Optional[int] = None
+
+    def add_price(self, price: float, elapsed: Optional[float] = None) -> None:
+        """Add a new price to the shared buffer"""
+        self.stats.push(price)
+
+    @property
+    def sample_count(self) -> int:
+        """Number of prices currently buffered"""
+        return len(self.stats)
+
+    @property
+    def mean(self) -> float:
+        """Mean over the horizon that produced the last score"""
+        return self.stats.moments(self.fired_timeframe or self.timeframes[0], self.ddof)[1]
+
+    @property
+    def std(self) -> float:
+        """Standard deviation over the horizon that produced the last score"""
+        return self.stats.moments(self.fired_timeframe or self.timeframes[0], self.ddof)[2]
+
+    def timeframe_z_scores(self) -> Dict[int, Optional[float]]:
+        """Z-score per horizon from the last scoring (None while a horizon warms up)"""
+        return dict(self.last_scores)
+
+    def calculate_z_score(self, price: float) -> Optional[float]:
+        """Score against every ready horizon and return the most extreme z-score"""
+        total = self.stats.total
+        best = None
+        self.fired_timeframe = None
+
+        for window in self.timeframes:
+            ready = total >= self.min_samples if window == self.timeframes[0] else total >= window
+            if not ready:
+                self.last_scores[window] = None
+                continue
+
+            _, mean, std = self.stats.moments(window, self.ddof)
+            z_score = 0 if std == 0 else (price - mean) / std
+            self.last_scores[window] = z_score
+            if best is None or abs(z_score) > abs(best):
+                best, self.fired_timeframe = z_score, window
+
+        return best
+
+    def is_anomaly(self, price: float) -> tuple[bool, Optional[float], str]:
+        """Check if price is anomalous on any horizon; the reason names the horizon"""
+        is_anomalous, z_score, reason = super().is_anomaly(price)
+        if is_anomalous:
+            direction = "spike" if z_score > 0 else "drop"
+            reason = (f"{self.score_label} {z_score:.2f} (>{self.threshold}σ {direction}, "
+                      f"{self.fired_timeframe}-sample window)")
+        return is_anomalous, z_score, reason
+
+
+def parse_timeframes(value: Optional[str]) -> Sequence[int]:
+    """Parse a comma-separated DETECTOR_TIMEFRAMES value, e.g. 30,300,3600"""
+    if not value:
+        return DEFAULT_TIMEFRAMES
+    return tuple(int(part) for part in value.split(",") if part.strip())
+
+
+def create_detector(mode: str = "zscore", window_size: int = 30, threshold: float = 2.5,
+                    min_samples: int = 10, ddof: int = 0,
+                    half_life: Optional[float] = None,
+                    timeframes: Optional[Sequence[int]] = None,
+                    sample_interval: Optional[float] = None) -> BaseAnomalyDetector:
+    """
+    Build a single-series detector for a DETECTOR_MODE value
+    ``sample_interval`` makes the ewma mode decay by elapsed time (see EWMAAnomalyDetector).
+    """
+    mode = (mode or "zscore").lower()
+
+    if mode == "zscore":
+        return AnomalyDetector(window_size, threshold, min_samples, ddof)
+    if mode == "robust":
+        return RobustAnomalyDetector(window_size, threshold, min_samples)
+    if mode == "ewma":
+        # Default half-life gives roughly the same memory as the window
+        return EWMAAnomalyDetector(half_life or window_size / 2, threshold, min_samples, sample_interval)
+    if mode == "multiframe":
+        return MultiTimeframeDetector(timeframes or DEFAULT_TIMEFRAMES, threshold, min_samples, ddof)
+
+    raise ValueError(f"Unknown detector mode '{mode}' (expected one of {', '.join(DETECTOR_MODES)})")
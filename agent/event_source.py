@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Event Log Source for Sentinel Oracle
+Follows SentinelOracle's PriceUpdated / AnomalyFlagged / AnomalyCleared logs
+instead of polling getLatestPrice
+
+Each poll asks for the chain head and fetches logs up to ``head -
+confirmations`` with chunked eth_getLogs, so blocks that may still be
+reorganised are never read. Every event carries its (block, log index)
+position; consumers track the last position they applied and persist it
+with their own state, then ``seek`` back to it on restart and skip anything
+at or before it. That keeps each price applied exactly once across restarts.
+"""
+
+import os
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from eth_abi import decode
+from web3 import Web3
+
+from chain_reader import PRICE_SCALE
+
+logger = logging.getLogger("EventLogSource")
+
+PRICE_UPDATED = "PriceUpdated"
+ANOMALY_FLAGGED = "AnomalyFlagged"
+ANOMALY_CLEARED = "AnomalyCleared"
+
+# topic0 -> (event name, ABI types of the non-indexed data)
+_EVENTS = {
+    bytes(Web3.keccak(text="PriceUpdated(bytes32,int64,uint64,uint64)")): (PRICE_UPDATED, ["int64", "uint64", "uint64"]),
+    bytes(Web3.keccak(text="AnomalyFlagged(bytes32,int64,uint64,string)")): (ANOMALY_FLAGGED, ["int64", "uint64", "string"]),
+    bytes(Web3.keccak(text="AnomalyCleared(bytes32,uint64)")): (ANOMALY_CLEARED, ["uint64"]),
+}
+
+# Position of a log in the chain: (block number, log index)
+LogPosition = Tuple[int, int]
+
+
+class ChainEvent(NamedTuple):
+    """One decoded SentinelOracle log"""
+    name: str
+    asset_id: bytes
+    block: int
+    log_index: int
+    timestamp: int
+    price: Optional[float] = None  # PriceUpdated / AnomalyFlagged
+    reason: str = ""               # AnomalyFlagged
+
+    @property
+    def position(self) -> LogPosition:
+        return (self.block, self.log_index)
+
+
+def decode_log(log: Dict) -> Optional[ChainEvent]:
+    """Decode a raw log into a ChainEvent (None for events we do not follow)"""
+    topics = [bytes(Web3.to_bytes(hexstr=t) if isinstance(t, str) else t) for t in log["topics"]]
+    if len(topics) < 2 or topics[0] not in _EVENTS:
+        return None
+
+    name, types = _EVENTS[topics[0]]
+    data = log["data"]
+    values = decode(types, Web3.to_bytes(hexstr=data) if isinstance(data, str) else bytes(data))
+    block = int(log["blockNumber"], 16) if isinstance(log["blockNumber"], str) else log["blockNumber"]
+    index = int(log["logIndex"], 16) if isinstance(log["logIndex"], str) else log["logIndex"]
+
+    if name == ANOMALY_CLEARED:
+        return ChainEvent(name, topics[1], block, index, values[0])
+    if name == ANOMALY_FLAGGED:
+        return ChainEvent(name, topics[1], block, index, values[1], values[0] / PRICE_SCALE, values[2])
+    return ChainEvent(name, topics[1], block, index, values[1], values[0] / PRICE_SCALE)
+
+
+class EventLogSource:
+    """
+    Reads new SentinelOracle logs from confirmed blocks
+
+    ``confirmations`` (LOG_CONFIRMATIONS) blocks below the head are left
+    unread; ranges are fetched ``chunk_size`` (LOG_CHUNK_SIZE) blocks at a
+    time and the chunk is halved when the endpoint rejects a range as too
+    large. Without a cursor the first poll starts ``lookback``
+    (LOG_LOOKBACK_BLOCKS) blocks back, so detectors warm up from history.
+    """
+
+    def __init__(self, w3: Web3, contract_address: str, confirmations: Optional[int] = None,
+                 chunk_size: Optional[int] = None, lookback: Optional[int] = None):
+        self.w3 = w3
+        self.address = Web3.to_checksum_address(contract_address)
+        self.confirmations = confirmations if confirmations is not None else int(os.getenv("LOG_CONFIRMATIONS", "3"))
+        self.chunk_size = chunk_size or int(os.getenv("LOG_CHUNK_SIZE", "2000"))
+        self.lookback = lookback if lookback is not None else int(os.getenv("LOG_LOOKBACK_BLOCKS", "1000"))
+        self.next_block: Optional[int] = None
+        self.topics = [["0x" + topic.hex() for topic in _EVENTS]]
+
+    def seek(self, block: int) -> None:
+        """Resume reading from ``block`` (inclusive)"""
+        self.next_block = block
+
+    def _get_logs(self, from_block: int, to_block: int) -> List[Dict]:
+        return self.w3.eth.get_logs({
+            "address": self.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": self.topics,
+        })
+
+    def poll(self) -> List[ChainEvent]:
+        """Decoded events from newly confirmed blocks, in chain order"""
+        safe_head = self.w3.eth.block_number - self.confirmations
+        if self.next_block is None:
+            self.next_block = max(0, safe_head - self.lookback + 1)
+
+        events: List[ChainEvent] = []
+        while self.next_block <= safe_head:
+            to_block = min(safe_head, self.next_block + self.chunk_size - 1)
+            try:
+                logs = self._get_logs(self.next_block, to_block)
+            except Exception as e:
+                # Range or result-size limits surface as JSON-RPC errors (ValueError)
+                if isinstance(e, ValueError) and to_block > self.next_block:
+                    self.chunk_size = max(1, (to_block - self.next_block + 1) // 2)
+                    logger.info(f"eth_getLogs rejected a {to_block - self.next_block + 1}-block range "
+                                f"({e}), using {self.chunk_size}-block chunks")
+                    continue
+                if not events:
+                    raise
+                # Hand over what was read; the cursor stays at the failed chunk
+                logger.warning(f"⚠️  eth_getLogs failed at block {self.next_block}: {e}")
+                break
+
+            for log in logs:
+                event = decode_log(log)
+                if event is not None:
+                    events.append(event)
+            self.next_block = to_block + 1
+
+        events.sort(key=lambda event: event.position)
+        return events
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Flag Aggregator for Sentinel Oracle
+Collects anomaly flags and clears for a short window and sends each kind as
+one flagAnomalies / clearAnomalies transaction
+
+A market-wide move flags many assets within the same few seconds; batching
+them pays the transaction base cost once and needs one receipt instead of
+one per asset. A window holding a single asset uses flagAnomaly /
+clearAnomaly, which also works on contracts deployed before the batch
+functions existed.
+"""
+
+import os
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+from web3 import Web3
+
+from tx_manager import TransactionManager
+
+logger = logging.getLogger("FlagAggregator")
+
+# Gas limits; unused gas is not charged
+FLAG_GAS_BASE = 60000
+FLAG_GAS_PER_ASSET = 40000
+CLEAR_GAS_BASE = 40000
+CLEAR_GAS_PER_ASSET = 20000
+
+Callback = Callable[[Dict], None]
+
+
+class FlagAggregator:
+    """
+    Batches flag/clear requests over ``window`` seconds (FLAG_BATCH_WINDOW)
+
+    At most ``max_batch`` (FLAG_BATCH_MAX) assets go into one transaction.
+    A flag and a clear for the same asset within one window cancel out to
+    whichever came last. Per-asset callbacks run when the batch confirms.
+    """
+
+    def __init__(self, tx_manager: TransactionManager, contract, window: Optional[float] = None,
+                 max_batch: Optional[int] = None):
+        self.tx_manager = tx_manager
+        self.contract = contract
+        self.window = window if window is not None else float(os.getenv("FLAG_BATCH_WINDOW", "2"))
+        self.max_batch = max_batch or int(os.getenv("FLAG_BATCH_MAX", "100"))
+
+        # asset id -> (action, reason, callback), in arrival order
+        self._queued: Dict[bytes, Tuple[str, str, Optional[Callback]]] = {}
+        self._in_flight: Dict[bytes, str] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def flag(self, asset_id: bytes, reason: str, on_confirmed: Optional[Callback] = None) -> None:
+        self._enqueue(bytes(asset_id), "flag", reason, on_confirmed)
+
+    def clear(self, asset_id: bytes, on_confirmed: Optional[Callback] = None) -> None:
+        self._enqueue(bytes(asset_id), "clear", "", on_confirmed)
+
+    def pending(self, asset_id: bytes, action: Optional[str] = None) -> bool:
+        """Whether a flag/clear for this asset is queued or waiting for its receipt"""
+        asset_id = bytes(asset_id)
+        with self._lock:
+            queued = self._queued.get(asset_id)
+            in_flight = self._in_flight.get(asset_id)
+        if action is None:
+            return queued is not None or in_flight is not None
+        return (queued is not None and queued[0] == action) or in_flight == action
+
+    def _enqueue(self, asset_id: bytes, action: str, reason: str, callback: Optional[Callback]) -> None:
+        if self.window <= 0:
+            self._send(action, [(asset_id, reason, callback)])
+            return
+
+        with self._lock:
+            self._queued.pop(asset_id, None)
+            self._queued[asset_id] = (action, reason, callback)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="flag-aggregator", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def flush(self) -> None:
+        """Send everything queued now"""
+        with self._lock:
+            queued, self._queued = self._queued, {}
+
+        for action in ("flag", "clear"):
+            items = [(asset_id, reason, callback)
+                     for asset_id, (kind, reason, callback) in queued.items() if kind == action]
+            for start in range(0, len(items), self.max_batch):
+                self._send(action, items[start:start + self.max_batch])
+
+    def _send(self, action: str, items: List[Tuple[bytes, str, Optional[Callback]]]) -> None:
+        asset_ids = [asset_id for asset_id, _, _ in items]
+        callbacks = [callback for _, _, callback in items if callback]
+
+        if len(items) == 1 and action == "flag":
+            function = self.contract.functions.flagAnomaly(asset_ids[0], items[0][1])
+            gas = FLAG_GAS_BASE + FLAG_GAS_PER_ASSET
+        elif len(items) == 1:
+            function = self.contract.functions.clearAnomaly(asset_ids[0])
+            gas = CLEAR_GAS_BASE + CLEAR_GAS_PER_ASSET
+        elif action == "flag":
+            function = self.contract.functions.flagAnomalies(asset_ids, [reason for _, reason, _ in items])
+            gas = FLAG_GAS_BASE + FLAG_GAS_PER_ASSET * len(items)
+        else:
+            function = self.contract.functions.clearAnomalies(asset_ids)
+            gas = CLEAR_GAS_BASE + CLEAR_GAS_PER_ASSET * len(items)
+
+        def settled(receipt: Optional[Dict]) -> None:
+            with self._lock:
+                for asset_id in asset_ids:
+                    if self._in_flight.get(asset_id) == action:
+                        del self._in_flight[asset_id]
+
+        def confirmed(receipt: Dict) -> None:
+            settled(receipt)
+            for callback in callbacks:
+                callback(receipt)
+
+        with self._lock:
+            for asset_id in asset_ids:
+                self._in_flight[asset_id] = action
+
+        if len(items) > 1:
+            logger.info(f"📦 Batching {len(items)} {action}s into one transaction")
+            label = f"{action} x{len(items)}"
+        else:
+            label = f"{action} {Web3.to_hex(asset_ids[0])[:10]}"
+        self.tx_manager.submit(function, gas, label, on_confirmed=confirmed, on_failed=settled)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            # Let the rest of the burst arrive, then send it as one batch
+            self._stop.wait(self.window)
+            self.flush()
+
+    def stop(self) -> None:
+        """Send anything still queued and stop the aggregator thread"""
+        self._stop.set()
+        self._wake.set()
+        self.flush()
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Pyth Hermes Stream Source for Sentinel Oracle
+Reads prices straight from Hermes' server-sent-events stream instead of the
+contract, so detection does not wait for someone to call updatePriceFeeds
+
+One connection to /v2/updates/price/stream carries every subscribed feed.
+The response is parsed as it arrives (SSEParser), each update becomes a
+PriceTick and lands in a queue that a pipeline source drains. When the
+stream drops or goes quiet for HERMES_IDLE_TIMEOUT seconds the source
+reconnects with backoff, sending Last-Event-ID when the server gave event
+ids; updates older than, or identical to, the last one delivered for a
+feed (replays after a reconnect) are dropped.
+
+Feeds map symbols to Pyth price feed ids: DEFAULT_FEED_IDS, overridden by
+PYTH_FEED_IDS ("BTC/USD=0xe62d...,ETH/USD=0xff61...") and BTC_PRICE_FEED_ID.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import threading
+from typing import Dict, List, NamedTuple, Optional
+import requests
+
+from pipeline import PriceTick
+from price_source import PriceSource
+
+logger = logging.getLogger("HermesStream")
+
+DEFAULT_HERMES_URL = "https://hermes.pyth.network"
+
+# Pyth price feed ids for the default asset list
+DEFAULT_FEED_IDS = {
+    "BTC/USD": "e62df6c8b4a85fe1a67db44dc12de5db330f7ac66b72dc658afedf0f4a415b43",
+    "ETH/USD": "ff61491a931112ddf1bd8147cd1b641375f79f5825126d665480874634fd0ace",
+    "SOL/USD": "ef0d8b6fda2ceba41da15d4095d1da392a0d2f8ed0c6c7bc0f4cfac8c280b56d",
+    "AVAX/USD": "93da3352f9f1d105fdfe4971cfa80e9dd777bfc5d0f683ebb6e1294b92137bb7",
+    "LINK/USD": "8ac0c70fff57e9aefdf5edf44b51d62c2d433653cbb2cf5cc06bb115af04d221",
+}
+
+
+def normalize_feed_id(feed_id: str) -> str:
+    """Hermes reports ids as lowercase hex without 0x"""
+    feed_id = feed_id.strip().lower()
+    return feed_id[2:] if feed_id.startswith("0x") else feed_id
+
+
+def feed_ids(value: Optional[str] = None) -> Dict[str, str]:
+    """Symbol -> feed id from DEFAULT_FEED_IDS, PYTH_FEED_IDS and BTC_PRICE_FEED_ID"""
+    feeds = dict(DEFAULT_FEED_IDS)
+    value = os.getenv("PYTH_FEED_IDS", "") if value is None else value
+    for entry in value.split(","):
+        if "=" in entry:
+            symbol, feed_id = entry.split("=", 1)
+            feeds[symbol.strip()] = feed_id
+    if os.getenv("BTC_PRICE_FEED_ID"):
+        feeds["BTC/USD"] = os.getenv("BTC_PRICE_FEED_ID")
+    return {symbol: normalize_feed_id(feed_id) for symbol, feed_id in feeds.items()}
+
+
+class SSEEvent(NamedTuple):
+    """One dispatched server-sent event"""
+    event: str
+    data: str
+    id: Optional[str]
+
+
+class SSEParser:
+    """
+    Incremental text/event-stream parser
+
+    ``feed`` takes raw bytes in whatever chunks the socket delivers and
+    returns the events completed by them; partial lines wait for the next
+    chunk. ``last_event_id`` and ``retry`` (milliseconds) follow the stream.
+    """
+
+    def __init__(self):
+        self._buffer = b""
+        self._event = ""
+        self._data: List[str] = []
+        self.last_event_id: Optional[str] = None
+        self.retry: Optional[int] = None
+
+    def feed(self, chunk: bytes) -> List[SSEEvent]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        events = []
+        for raw in lines:
+            line = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+            if not line:
+                # Blank line: dispatch
+                if self._data:
+                    events.append(SSEEvent(self._event or "message", "\n".join(self._data), self.last_event_id))
+                self._event, self._data = "", []
+                continue
+            if line.startswith(":"):
+                continue  # Comment / keep-alive
+            field, _, value = line.partition(":")
+            if value.startswith(" "):
+                value = value[1:]
+            if field == "data":
+                self._data.append(value)
+            elif field == "event":
+                self._event = value
+            elif field == "id" and "\0" not in value:
+                self.last_event_id = value
+            elif field == "retry" and value.isdigit():
+                self.retry = int(value)
+        return events
+
+
+class HermesStreamSource(PriceSource):
+    """
+    Streams Pyth price updates for many feeds over one Hermes connection
+
+    ``feeds`` maps symbols to feed ids (default: feed_ids()). ``start``
+    runs the connection on a background thread; ``poll`` (``drain``) is the
+    pipeline source and returns whatever ticks arrived, waiting up to
+    ``wait`` seconds for the first one. Ticks are stamped with their arrival time: Hermes
+    publish times have one-second resolution and several updates can share one.
+    """
+
+    name = "hermes"
+
+    def __init__(self, base_url: Optional[str] = None, feeds: Optional[Dict[str, str]] = None,
+                 idle_timeout: Optional[float] = None, max_backoff: Optional[float] = None,
+                 queue_size: Optional[int] = None):
+        self.base_url = (base_url or os.getenv("PYTH_HERMES_URL", DEFAULT_HERMES_URL)).rstrip("/")
+        self.feeds: Dict[str, str] = {}
+        self._symbols: Dict[str, str] = {}  # feed id -> symbol
+        self._response: Optional[requests.Response] = None
+        self._resubscribe = False
+        self.add_feeds(feeds if feeds is not None else feed_ids())
+        self.idle_timeout = idle_timeout or float(os.getenv("HERMES_IDLE_TIMEOUT", "30"))
+        self.max_backoff = max_backoff or float(os.getenv("HERMES_MAX_BACKOFF", "30"))
+
+        self.ticks: queue.Queue = queue.Queue(maxsize=queue_size or int(os.getenv("HERMES_QUEUE_SIZE", "10000")))
+        self.last_publish: Dict[str, tuple] = {}  # feed id -> (publish time, raw price) last delivered
+        self.last_event_id: Optional[str] = None
+        self._retry_ms: Optional[int] = None
+        self.session = requests.Session()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.connects = 0
+        self.updates = 0
+        self.replayed = 0
+        self.dropped = 0
+
+    def add_feeds(self, feeds: Dict[str, str]) -> List[str]:
+        """Subscribe to more symbol -> feed id pairs; reconnects if the stream is open"""
+        added = []
+        for symbol, feed_id in feeds.items():
+            feed_id = normalize_feed_id(feed_id)
+            if self.feeds.get(symbol) == feed_id:
+                continue
+            self.feeds[symbol] = feed_id
+            self._symbols[feed_id] = symbol
+            added.append(symbol)
+        if added and self._response is not None:
+            # The feed list is part of the URL: reopen the stream with it
+            self._resubscribe = True
+            self._response.close()
+        return added
+
+    def stream_url(self) -> str:
+        return f"{self.base_url}/v2/updates/price/stream"
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="hermes-stream", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._response is not None:
+            self._response.close()
+        if self._thread:
+            self._thread.join(timeout)
+        self.session.close()
+
+    def drain(self, wait: float = 0.5) -> List[PriceTick]:
+        """Ticks received so far, waiting up to ``wait`` seconds if there are none"""
+        try:
+            ticks = [self.ticks.get(timeout=wait)]
+        except queue.Empty:
+            return []
+        while True:
+            try:
+                ticks.append(self.ticks.get_nowait())
+            except queue.Empty:
+                return ticks
+
+    poll = drain
+
+    def _run(self) -> None:
+        backoff = 1.0
+        while not self._stop.is_set():
+            if not self._symbols:
+                self._stop.wait(1.0)
+                continue
+            updates = self.updates
+            try:
+                self._consume()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                logger.warning(f"⚠️  Hermes stream failed: {e}")
+            if self._stop.is_set():
+                break
+
+            if self._resubscribe:
+                self._resubscribe = False
+                continue
+            if self.updates > updates:
+                # The stream was working: resume right away (servers end long-lived streams)
+                backoff = 1.0
+                delay = (self._retry_ms or 0) / 1000
+            else:
+                delay = max(backoff, (self._retry_ms or 0) / 1000)
+                backoff = min(self.max_backoff, backoff * 2)
+            logger.info(f"🔌 Hermes stream closed, reconnecting in {delay:.1f}s")
+            self._stop.wait(delay)
+
+    def _consume(self) -> None:
+        """One connection: subscribe to every feed and parse until the stream ends"""
+        params = [("ids[]", feed_id) for feed_id in list(self._symbols)] + [("parsed", "true")]
+        headers = {"Accept": "text/event-stream"}
+        if self.last_event_id is not None:
+            headers["Last-Event-ID"] = self.last_event_id
+
+        response = self.session.get(self.stream_url(), params=params, headers=headers, stream=True,
+                                    timeout=(10, self.idle_timeout))
+        self._response = response
+        try:
+            response.raise_for_status()
+            self.connects += 1
+            logger.info(f"📡 Hermes stream open for {len(self._symbols)} feeds")
+            parser = SSEParser()
+            for chunk in response.iter_content(chunk_size=None):
+                for event in parser.feed(chunk):
+                    self._handle(event)
+                self.last_event_id = parser.last_event_id or self.last_event_id
+                self._retry_ms = parser.retry or self._retry_ms
+                if self._stop.is_set():
+                    return
+        finally:
+            self._response = None
+            response.close()
+
+    def _handle(self, event: SSEEvent) -> None:
+        """Queue a tick for every new update in one message"""
+        try:
+            message = json.loads(event.data)
+        except ValueError:
+            logger.debug(f"Skipping non-JSON Hermes message: {event.data[:80]}")
+            return
+
+        received = time.time()
+        for update in message.get("parsed") or []:
+            symbol = self._symbols.get(normalize_feed_id(update.get("id", "")))
+            if symbol is None:
+                continue
+            price = update["price"]
+            latest = (int(price["publish_time"]), price["price"])
+            feed_id = self.feeds[symbol]
+            last = self.last_publish.get(feed_id)
+            if last is not None and (latest[0] < last[0] or latest == last):
+                # Replayed after a reconnect; already delivered
+                self.replayed += 1
+                continue
+            self.last_publish[feed_id] = latest
+            self.updates += 1
+
+            tick = PriceTick(symbol, int(price["price"]) * 10.0 ** int(price["expo"]), received,
+                             timestamp=received)
+            try:
+                self.ticks.put_nowait(tick)
+            except queue.Full:
+                self.dropped += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"connects": self.connects, "updates": self.updates, "replayed": self.replayed,
+                "dropped": self.dropped, "queued": self.ticks.qsize()}
+
+    def log_stats(self) -> None:
+        logger.info(f"📡 Hermes stream: {self.stats()}")
+
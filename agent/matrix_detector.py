@@ -0,0 +1,475 @@
+#!/usr/bin/env python3
+"""
+Matrix Anomaly Detector for Sentinel Oracle
+Vectorized anomaly detection for many assets at once
+"""
+
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from rolling_stats import StreamingCovariance, elapsed_to_weight, half_life_to_alpha
+
+
+class BatchAnomalyDetector:
+    """
+    Shared bookkeeping for detectors that score a whole cycle at once
+
+    Subclasses fold a vector of prices (aligned with ``self.assets``, NaN =
+    no price this cycle) into their state and return z-scores via
+    ``_update``; this class turns them into flags, reasons and per-asset
+    results.
+    """
+
+    # Per-asset array attributes saved in snapshots (first axis = asset)
+    state_fields = ("last_price", "last_z_score", "is_anomalous", "anomaly_count")
+    # Fields whose empty rows are NaN rather than zero
+    nan_fields = ("last_price", "last_z_score")
+
+    def __init__(self, assets: List[str], threshold: float, min_samples: int):
+        self.assets = list(assets)
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        self.threshold = threshold
+        self.min_samples = min_samples
+
+        # Latest per-asset results
+        n = len(self.assets)
+        self.last_price = np.full(n, np.nan)
+        self.last_z_score = np.full(n, np.nan)
+        self.is_anomalous = np.zeros(n, dtype=bool)
+        self.anomaly_count = np.zeros(n, dtype=np.int64)
+
+    def timeframe_z_scores(self, asset: str) -> Dict[int, Optional[float]]:
+        """Batched detectors score a single horizon"""
+        return {}
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Per-asset state arrays, rows aligned with ``self.assets``"""
+        return {name: getattr(self, name) for name in self.state_fields}
+
+    def set_state(self, state: Dict[str, np.ndarray], assets: List[str]) -> bool:
+        """
+        Restore rows saved by get_state for the assets present in both
+        ``assets`` (the saved order) and this detector; False if the saved
+        arrays do not fit this detector's settings
+        """
+        current = self.get_state()
+        if set(state) != set(current) or any(
+                state[name].shape != (len(assets),) + array.shape[1:]
+                for name, array in current.items()):
+            return False
+
+        if list(assets) == self.assets:
+            # Same layout: adopt the (copy-on-write mapped) arrays without copying
+            for name, array in current.items():
+                setattr(self, name, np.asarray(state[name], dtype=array.dtype))
+            return True
+
+        saved_index = {asset: i for i, asset in enumerate(assets)}
+        rows = [i for i, asset in enumerate(self.assets) if asset in saved_index]
+        saved_rows = [saved_index[self.assets[i]] for i in rows]
+        for name, array in current.items():
+            array[rows] = state[name][saved_rows]
+        return True
+
+    def add_assets(self, assets: List[str]) -> List[str]:
+        """Append empty rows for assets not tracked yet; returns the ones added"""
+        added = [asset for asset in dict.fromkeys(assets) if asset not in self.asset_index]
+        if not added:
+            return []
+
+        for name in self.state_fields:
+            array = getattr(self, name)
+            fill = np.nan if name in self.nan_fields else 0
+            rows = np.full((len(added),) + array.shape[1:], fill, dtype=array.dtype)
+            setattr(self, name, np.concatenate([array, rows]))
+        for asset in added:
+            self.asset_index[asset] = len(self.assets)
+            self.assets.append(asset)
+        return added
+
+    def _update(self, rows: np.ndarray, new: np.ndarray,
+                elapsed: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Fold ``new`` prices into the state of ``rows``; return z-scores for all assets
+        ``elapsed`` holds the seconds since each row's previous price (NaN = unknown);
+        detectors that count samples ignore it.
+        """
+        raise NotImplementedError
+
+    def ingest(self, prices: np.ndarray,
+               elapsed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Add one cycle of prices (aligned with ``self.assets``) and score them
+        Returns: (z_scores, anomaly_flags, reasons); z is NaN while warming up
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.shape != (len(self.assets),):
+            raise ValueError(f"Expected {len(self.assets)} prices, got shape {prices.shape}")
+
+        rows = np.flatnonzero(~np.isnan(prices))
+        new = prices[rows]
+
+        z_scores = self._update(rows, new, None if elapsed is None else np.asarray(elapsed)[rows])
+        flags = np.abs(np.nan_to_num(z_scores)) > self.threshold
+
+        self.last_price[rows] = new
+        self.last_z_score[rows] = z_scores[rows]
+        self.is_anomalous[rows] = flags[rows]
+        self.anomaly_count += flags
+
+        return z_scores, flags, self._reasons(z_scores, flags, rows)
+
+    def evaluate(self, prices: Dict[str, Optional[float]],
+                 elapsed: Optional[Dict[str, float]] = None) -> Dict[str, Tuple[bool, Optional[float], str]]:
+        """
+        Score a cycle given as {asset: price}, with optional {asset: seconds
+        since its previous price}; returns {asset: (is_anomalous, z_score, reason)}
+        """
+        vector = np.full(len(self.assets), np.nan)
+        for asset, price in prices.items():
+            idx = self.asset_index.get(asset)
+            if idx is not None and price is not None:
+                vector[idx] = price
+
+        gaps = None
+        if elapsed:
+            gaps = np.full(len(self.assets), np.nan)
+            for asset, seconds in elapsed.items():
+                idx = self.asset_index.get(asset)
+                if idx is not None and seconds is not None:
+                    gaps[idx] = seconds
+
+        z_scores, flags, reasons = self.ingest(vector, gaps)
+
+        results = {}
+        for asset, price in prices.items():
+            idx = self.asset_index.get(asset)
+            if idx is None or price is None:
+                continue
+            z = z_scores[idx]
+            results[asset] = (bool(flags[idx]), None if np.isnan(z) else float(z), reasons[idx])
+        return results
+
+    def _reasons(self, z_scores: np.ndarray, flags: np.ndarray, rows: np.ndarray) -> List[str]:
+        reasons = ["No data yet"] * len(self.assets)
+        threshold = self.threshold
+        for i, z, flagged in zip(rows.tolist(), z_scores[rows].tolist(), flags[rows].tolist()):
+            if z != z:  # NaN: still warming up
+                reasons[i] = "Insufficient data"
+            elif flagged:
+                direction = "spike" if z > 0 else "drop"
+                reasons[i] = f"Z-score {z:.2f} (>{threshold}σ {direction})"
+            else:
+                reasons[i] = f"Normal (z={z:.2f})"
+        return reasons
+
+
+class MatrixAnomalyDetector(BatchAnomalyDetector):
+    """
+    Batched z-score detector backed by one preallocated ring-buffer matrix
+
+    All assets share an (assets x window) float64 matrix. Each cycle's prices
+    arrive as one vector (NaN = no price this cycle) and every asset's window,
+    running sums and z-score are updated with a handful of NumPy operations,
+    so the per-cycle cost is O(assets) rather than O(assets x window) Python
+    work. Semantics match MultiAssetAnomalyDetector: the current price is
+    part of the window it is scored against and the sample stdev is used.
+    """
+
+    state_fields = BatchAnomalyDetector.state_fields + (
+        "window", "head", "count", "shift", "sum1", "sum2")
+    nan_fields = BatchAnomalyDetector.nan_fields + ("window",)
+
+    def __init__(self, assets: List[str], window_size: int = 30, threshold: float = 2.5,
+                 min_samples: int = 5, ddof: int = 1,
+                 recenter_every: Optional[int] = None):
+        super().__init__(assets, threshold, max(min_samples, ddof + 1))
+        self.window_size = window_size
+        self.ddof = ddof
+        self.recenter_every = recenter_every or window_size
+
+        n = len(self.assets)
+        self.window = np.full((n, window_size), np.nan)
+        self.head = np.zeros(n, dtype=np.int64)    # Next write column per asset
+        self.count = np.zeros(n, dtype=np.int64)   # Samples held per asset
+
+        # Sums of (price - shift) and (price - shift)² over each window.
+        # Shifting by a recent mean keeps the sums well conditioned.
+        self.shift = np.zeros(n)
+        self.sum1 = np.zeros(n)
+        self.sum2 = np.zeros(n)
+        self._cycles_since_recenter = 0
+
+    def _update(self, rows: np.ndarray, new: np.ndarray,
+                elapsed: Optional[np.ndarray] = None) -> np.ndarray:
+        # First sample for an asset fixes its shift
+        fresh = self.count[rows] == 0
+        self.shift[rows[fresh]] = new[fresh]
+
+        cols = self.head[rows]
+        old = self.window[rows, cols]
+        full = self.count[rows] == self.window_size
+
+        d_new = new - self.shift[rows]
+        d_old = np.where(full, old - self.shift[rows], 0.0)
+        self.sum1[rows] += d_new - d_old
+        self.sum2[rows] += d_new * d_new - d_old * d_old
+
+        self.window[rows, cols] = new
+        self.head[rows] = (cols + 1) % self.window_size
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.window_size)
+
+        self._cycles_since_recenter += 1
+        if self._cycles_since_recenter >= self.recenter_every:
+            self.recenter()
+
+        return self._score(rows, new)
+
+    def recenter(self) -> None:
+        """Recompute shifts and running sums exactly from the window matrix"""
+        self._cycles_since_recenter = 0
+        has_data = self.count > 0
+        if not has_data.any():
+            return
+
+        window = self.window[has_data]
+        shift = np.nanmean(window, axis=1)
+        centered = window - shift[:, None]
+        self.shift[has_data] = shift
+        self.sum1[has_data] = np.nansum(centered, axis=1)
+        self.sum2[has_data] = np.nansum(centered * centered, axis=1)
+
+    def mean(self) -> np.ndarray:
+        """Per-asset window means (NaN for assets without data)"""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, self.shift + self.sum1 / self.count, np.nan)
+
+    def std(self) -> np.ndarray:
+        """Per-asset window standard deviations"""
+        n = self.count.astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            m2 = self.sum2 - self.sum1 * self.sum1 / n
+            floor = 1e-14 * n * np.square(self.shift + self.sum1 / n)
+            m2 = np.where(m2 <= floor, 0.0, m2)
+            return np.where(n > self.ddof, np.sqrt(m2 / (n - self.ddof)), np.nan)
+
+    def _score(self, rows: np.ndarray, new: np.ndarray) -> np.ndarray:
+        z_scores = np.full(len(self.assets), np.nan)
+        ready = self.count[rows] >= self.min_samples
+        rows, new = rows[ready], new[ready]
+        if rows.size == 0:
+            return z_scores
+
+        mean = self.mean()[rows]
+        std = self.std()[rows]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z_scores[rows] = np.where(std == 0, 0.0, (new - mean) / std)
+        return z_scores
+
+
+class VectorEWMADetector(BatchAnomalyDetector):
+    """
+    Batched exponentially weighted z-score detector
+
+    Stores three numbers per asset (weighted mean, weighted variance, sample
+    count) in flat arrays, so millions of series fit where a few thousand
+    windows would. Like EWMAAnomalyDetector, each price is scored against
+    the moments from before it was folded in, and with a ``sample_interval``
+    decays each asset's history by the time since its previous price.
+    """
+
+    state_fields = BatchAnomalyDetector.state_fields + ("ew_mean", "ew_var", "count")
+
+    def __init__(self, assets: List[str], half_life: float = 15.0, threshold: float = 2.5,
+                 min_samples: int = 5, sample_interval: Optional[float] = None):
+        super().__init__(assets, threshold, min_samples)
+        self.half_life = half_life
+        self.sample_interval = sample_interval
+        self.window_size = int(round(2 * half_life))
+        self.alpha = half_life_to_alpha(half_life)
+
+        n = len(self.assets)
+        self.ew_mean = np.zeros(n)
+        self.ew_var = np.zeros(n)
+        self.count = np.zeros(n, dtype=np.int64)
+
+    def _update(self, rows: np.ndarray, new: np.ndarray,
+                elapsed: Optional[np.ndarray] = None) -> np.ndarray:
+        alpha = self.alpha
+        if elapsed is not None and self.sample_interval:
+            weight = np.where(np.isnan(elapsed), 1.0,
+                              elapsed_to_weight(np.nan_to_num(elapsed), self.sample_interval, self.half_life))
+            alpha = 1.0 - (1.0 - alpha) ** weight
+        mean = self.ew_mean[rows]
+        var = self.ew_var[rows]
+        count = self.count[rows]
+
+        # Score against the moments before this price is folded in
+        z_scores = np.full(len(self.assets), np.nan)
+        std = np.sqrt(np.where(var <= 1e-14 * mean * mean, 0.0, var))
+        ready = count + 1 >= self.min_samples
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = np.where(std == 0, 0.0, (new - mean) / std)
+        z_scores[rows[ready]] = z[ready]
+
+        first = count == 0
+        delta = np.where(first, 0.0, new - mean)
+        self.ew_mean[rows] = np.where(first, new, mean + alpha * delta)
+        self.ew_var[rows] = np.where(first, 0.0, (1.0 - alpha) * (var + alpha * delta * delta))
+        self.count[rows] = count + 1
+
+        return z_scores
+
+    def mean(self) -> np.ndarray:
+        """Per-asset weighted means (NaN for assets without data)"""
+        return np.where(self.count > 0, self.ew_mean, np.nan)
+
+    def std(self) -> np.ndarray:
+        """Per-asset weighted standard deviations"""
+        return np.where(self.count > 0, np.sqrt(self.ew_var), np.nan)
+
+
+def chi2_critical(dof: int, z: float) -> float:
+    """Chi-square quantile matching a one-sided normal z (Wilson-Hilferty)"""
+    k = 2.0 / (9.0 * dof)
+    return dof * (1.0 - k + z * np.sqrt(k)) ** 3
+
+
+class CorrelationBreakDetector:
+    """
+    Cross-asset detector for a feed decoupling from the rest of the market
+
+    Tracks the exponentially weighted covariance of the assets' log-return
+    vector (O(n²) per round via StreamingCovariance). A round completes once
+    every asset has a new price, however the prices were batched, and its
+    returns (each asset's last price versus the previous round's) are scored
+    against the model from before the round: the squared Mahalanobis
+    distance says whether the joint move is unusual, and each asset's
+    conditional z-score (its return versus what the other assets imply) says
+    which feed broke away. The most decoupled asset is flagged when both
+    exceed the threshold, the distance via the matching chi-square quantile;
+    flagging only the top asset keeps the false-positive rate flat as the
+    asset count grows. A feed that stops updating pauses the check.
+
+    With a ``sample_interval`` (seconds one round nominally spans) the model
+    decays by the time between rounds and returns are scaled to that
+    interval, so the half-life is ``half_life * sample_interval`` seconds.
+    The covariance needs a memory well beyond the asset count to be
+    estimable, so the default half-life scales with it (4 rounds per asset,
+    at least 60) and scoring starts after two half-lives' worth of rounds.
+    """
+
+    def __init__(self, assets: List[str], threshold: float = 2.5,
+                 half_life: Optional[float] = None, min_samples: Optional[int] = None,
+                 sample_interval: Optional[float] = None):
+        self.assets = list(assets)
+        self.asset_index = {asset: i for i, asset in enumerate(self.assets)}
+        self.threshold = threshold
+        self.half_life = half_life or max(60.0, 4.0 * len(self.assets))
+        self.min_samples = min_samples or int(2 * self.half_life)
+        self.sample_interval = sample_interval
+
+        n = len(self.assets)
+        self.model = StreamingCovariance(n, self.half_life)
+        self.critical_distance = chi2_critical(n, threshold)
+        self.last_prices = np.full(n, np.nan)
+        self.last_round_time: Optional[float] = None
+        # The round being collected: latest price per asset (NaN = none yet)
+        self.pending = np.full(n, np.nan)
+        self.pending_time: Optional[float] = None
+        # Breaks found for assets without a price in the call that completed the round
+        self.unreported: Dict[str, str] = {}
+
+        self.last_distance: Optional[float] = None
+        self.last_conditional_z = np.full(n, np.nan)
+
+    def ingest(self, prices: np.ndarray, elapsed: Optional[float] = None
+               ) -> Tuple[Optional[float], np.ndarray, np.ndarray]:
+        """
+        Add one complete round of prices (aligned with ``self.assets``),
+        ``elapsed`` seconds after the previous round
+        Returns: (squared Mahalanobis distance or None while warming up,
+                  conditional z-scores, correlation-break flags)
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        n = len(self.assets)
+        flags = np.zeros(n, dtype=bool)
+
+        valid = ~np.isnan(prices) & (prices > 0)
+        seen = valid & ~np.isnan(self.last_prices)
+        returns = np.zeros(n)
+        returns[seen] = np.log(prices[seen] / self.last_prices[seen])
+        first_round = np.isnan(self.last_prices).all()
+        self.last_prices[valid] = prices[valid]
+
+        if first_round:
+            return None, np.full(n, np.nan), flags
+
+        weight = 1.0
+        if elapsed is not None and self.sample_interval and elapsed > 0:
+            # Return variance grows with the gap: score every round on one time scale
+            returns /= np.sqrt(elapsed / self.sample_interval)
+            weight = float(elapsed_to_weight(elapsed, self.sample_interval, self.half_life))
+
+        distance = None
+        conditional = np.full(n, np.nan)
+        if self.model.count >= self.min_samples:
+            distance, conditional = self.model.mahalanobis(returns)
+            top = int(np.argmax(np.abs(conditional)))
+            if (distance > self.critical_distance and abs(conditional[top]) > self.threshold
+                    and seen[top]):
+                flags[top] = True
+
+        self.model.update(returns, weight)
+        self.last_distance = distance
+        self.last_conditional_z = conditional
+        return distance, conditional, flags
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Covariance model, last round's prices and the round being collected"""
+        times = [np.nan if t is None else t for t in (self.last_round_time, self.pending_time)]
+        return {**self.model.get_state(), "last_prices": self.last_prices.copy(),
+                "pending": self.pending.copy(), "round_times": np.array(times)}
+
+    def set_state(self, state: Dict[str, np.ndarray], assets: List[str]) -> bool:
+        """Restore state saved by get_state; the asset list must be unchanged"""
+        if list(assets) != self.assets:
+            return False
+        self.model.set_state(state)
+        self.last_prices = np.array(state["last_prices"], dtype=np.float64)
+        if "pending" in state:
+            self.pending = np.array(state["pending"], dtype=np.float64)
+            self.last_round_time, self.pending_time = (
+                None if np.isnan(t) else float(t) for t in state["round_times"])
+        return True
+
+    def evaluate(self, prices: Dict[str, Optional[float]], when: Optional[float] = None) -> Dict[str, str]:
+        """
+        Add prices given as {asset: price}, observed at ``when`` (seconds);
+        scores the round once every asset has a new price. Returns {asset: reason}
+        for flagged assets among ``prices``; a break on an asset not among them
+        is returned the next time it has a price.
+        """
+        for asset, price in prices.items():
+            idx = self.asset_index.get(asset)
+            if idx is not None and price is not None:
+                self.pending[idx] = price
+        if when is not None:
+            self.pending_time = when if self.pending_time is None else max(self.pending_time, when)
+
+        if not np.isnan(self.pending).any():
+            elapsed = None
+            if self.pending_time is not None and self.last_round_time is not None:
+                elapsed = self.pending_time - self.last_round_time
+            distance, conditional, flags = self.ingest(self.pending, elapsed)
+            self.last_round_time = self.pending_time
+            self.pending = np.full(len(self.assets), np.nan)
+            self.pending_time = None
+
+            for i in np.flatnonzero(flags).tolist():
+                z = float(conditional[i])
+                self.unreported[self.assets[i]] = (f"Correlation break (conditional z={z:.2f}, "
+                                                   f"D²={distance:.1f} > {self.critical_distance:.1f})")
+
+        return {asset: self.unreported.pop(asset) for asset in list(self.unreported)
+                if prices.get(asset) is not None}
@@ -8,14 +8,26 @@ import os
 import time
 import json
 import logging
-import requests
+import threading
 from datetime import datetime
-from collections import deque
 from typing import Dict, List, Optional
-import statistics
+import numpy as np
 from web3 import Web3
 from dotenv import load_dotenv
 
+from asset_registry import DEFAULT_ASSETS, AssetRegistry
+from async_chain_reader import AsyncPriceReader
+from chain_reader import BatchPriceReader, PriceReading
+from detectors import create_detector, parse_timeframes
+from event_source import ANOMALY_FLAGGED, PRICE_UPDATED, EventLogSource
+from hermes_stream import HermesStreamSource, feed_ids
+from matrix_detector import CorrelationBreakDetector, MatrixAnomalyDetector, VectorEWMADetector
+from pipeline import DetectionResult, Pipeline, PriceTick
+from publisher import UpdatePublisher
+from price_source import PriceRecorder, PriceSource, ReplaySource, replay_speed
+from rpc_pool import make_web3, rpc_urls
+from snapshot import DEFAULT_SNAPSHOT_DIR, PeriodicSnapshot, detector_fingerprint, prefixed, unprefixed
+
 # Load environment variables
 load_dotenv()
 
@@ -26,21 +38,36 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MultiAssetMonitor")
 
-# Supported assets
-SUPPORTED_ASSETS = ["BTC/USD", "ETH/USD", "SOL/USD", "AVAX/USD", "LINK/USD"]
-
 class MultiAssetAnomalyDetector:
     """Multi-asset anomaly detector using z-score method"""
     
-    def __init__(self, window_size: int = 30, threshold: float = 2.5):
+    def __init__(self, window_size: int = 30, threshold: float = 2.5,
+                 assets: Optional[List[str]] = None, mode: str = "zscore",
+                 half_life: Optional[float] = None, timeframes: Optional[List[int]] = None,
+                 sample_interval: Optional[float] = None):
         self.window_size = window_size
         self.threshold = threshold
+        self.mode = mode
+        self.half_life = half_life
+        self.timeframes = timeframes
+        self.sample_interval = sample_interval
         self.asset_detectors = {}
         
         # Initialize detector for each asset
-        for asset in SUPPORTED_ASSETS:
+        self.add_assets(assets or DEFAULT_ASSETS)
+    
+    def add_assets(self, assets: List[str]) -> List[str]:
+        """Start tracking assets not tracked yet; returns the ones added"""
+        added = []
+        for asset in assets:
+            if asset in self.asset_detectors:
+                continue
+            # Need minimum samples (reduced from 10), sample stdev
+            detector = create_detector(self.mode, self.window_size, self.threshold, min_samples=5, ddof=1,
+                                       half_life=self.half_life, timeframes=self.timeframes,
+                                       sample_interval=self.sample_interval)
             self.asset_detectors[asset] = {
-                'price_history': deque(maxlen=window_size),
+                'detector': detector,
                 'last_price': None,
                 'last_z_score': None,
                 'is_anomalous': False,
@@ -48,14 +75,16 @@ class MultiAssetAnomalyDetector:
                 'last_update': None,
                 'anomaly_count': 0,
             }
+            added.append(asset)
+        return added
         
-    def add_price(self, asset: str, price: float) -> None:
-        """Add a new price to the history for a specific asset"""
+    def add_price(self, asset: str, price: float, elapsed: Optional[float] = None) -> None:
+        """Add a new price (``elapsed`` seconds after the previous one) to an asset's history"""
         if asset not in self.asset_detectors:
             return
             
         detector = self.asset_detectors[asset]
-        detector['price_history'].append(price)
+        detector['detector'].add_price(price, elapsed)
         detector['last_price'] = price
         detector['last_update'] = datetime.now().isoformat()
         
@@ -64,59 +93,264 @@ class MultiAssetAnomalyDetector:
         if asset not in self.asset_detectors:
             return None
             
-        detector = self.asset_detectors[asset]
-        price_history = detector['price_history']
-        
-        if len(price_history) < 5:  # Need minimum samples (reduced from 10)
-            return None
-            
-        mean = statistics.mean(price_history)
-        std = statistics.stdev(price_history) if len(price_history) > 1 else 0
-        
-        if std == 0:
-            return 0
-            
-        z_score = (price - mean) / std
-        return z_score
+        return self.asset_detectors[asset]['detector'].calculate_z_score(price)
         
     def is_anomaly(self, asset: str, price: float) -> tuple[bool, Optional[float], str]:
         """Check if price is anomalous for a specific asset"""
-        z_score = self.calculate_z_score(asset, price)
-        
-        if z_score is None:
+        if asset not in self.asset_detectors:
             return False, None, "Insufficient data"
             
-        is_anomalous = abs(z_score) > self.threshold
+        return self.asset_detectors[asset]['detector'].is_anomaly(price)
+    
+    def timeframe_z_scores(self, asset: str) -> Dict[int, Optional[float]]:
+        """Per-horizon z-scores from the last scoring of an asset"""
+        if asset not in self.asset_detectors:
+            return {}
+            
+        return self.asset_detectors[asset]['detector'].timeframe_z_scores()
+    
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Every asset's detector state stacked into arrays (first axis = asset)"""
+        entries = list(self.asset_detectors.values())
+        states = [entry['detector'].get_state() for entry in entries]
+        arrays = {name: np.stack([state[name] for state in states]) for name in states[0]}
+        arrays['last_price'] = np.array([np.nan if entry['last_price'] is None else entry['last_price']
+                                         for entry in entries])
+        return arrays
+    
+    def set_state(self, state: Dict[str, np.ndarray], assets: List[str]) -> bool:
+        """
+        Restore state saved by get_state for the assets present in both
+        ``assets`` (the saved order) and this detector; False if the saved
+        arrays do not fit this detector's settings
+        """
+        template = next(iter(self.asset_detectors.values()))['detector'].get_state()
+        if set(state) != set(template) | {'last_price'} or any(
+                state[name].shape != (len(assets),) + array.shape for name, array in template.items()):
+            return False
         
-        if is_anomalous:
-            direction = "spike" if z_score > 0 else "drop"
-            reason = f"Z-score {z_score:.2f} (>{self.threshold}σ {direction})"
-            return True, z_score, reason
-        else:
-            return False, z_score, f"Normal (z={z_score:.2f})"
+        # Plain in-memory copies: row access on a memory map is much slower
+        state = {name: np.array(array) for name, array in state.items()}
+        for i, asset in enumerate(assets):
+            entry = self.asset_detectors.get(asset)
+            if entry is None:
+                continue
+            entry['detector'].set_state({name: state[name][i] for name in template})
+            price = float(state['last_price'][i])
+            entry['last_price'] = None if np.isnan(price) else price
+        return True
+    
+    def evaluate(self, prices: Dict[str, Optional[float]],
+                 elapsed: Optional[Dict[str, float]] = None) -> Dict[str, tuple]:
+        """
+        Add and score one cycle of prices, with optional seconds since each
+        asset's previous price; returns {asset: (is_anomalous, z_score, reason)}
+        """
+        elapsed = elapsed or {}
+        results = {}
+        for asset, price in prices.items():
+            if price is None or asset not in self.asset_detectors:
+                continue
+            self.add_price(asset, price, elapsed.get(asset))
+            results[asset] = self.is_anomaly(asset, price)
+        return results
 
 class MultiAssetMonitor:
     """Multi-asset price monitor"""
     
     def __init__(self):
         # Load configuration
-        self.rpc_url = os.getenv("ETH_RPC_URL")
+        self.rpc_urls = rpc_urls()
         self.contract_address = os.getenv("SENTINEL_ORACLE_ADDRESS")
         self.api_url = os.getenv("API_SERVER_URL", "http://localhost:8080")
+        # Coalesced, batched API updates over one connection, off the detection path
+        self.publisher = UpdatePublisher(self.api_url)
         
-        # Initialize Web3
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # PRICE_READS: batch (one round trip per cycle), async (concurrent
+        # calls, one per asset), sequential (one blocking call per asset) or
+        # events (follow PriceUpdated logs instead of polling), hermes (stream
+        # prices from Pyth Hermes, bypassing the contract) or replay (play back
+        # PRICE_REPLAY_FILE at PRICE_REPLAY_SPEED, no network needed)
+        self.price_reads = os.getenv("PRICE_READS", "batch").lower()
+        self.price_source: Optional[PriceSource] = None
+        if self.price_reads == "replay":
+            self.price_source = ReplaySource(os.getenv("PRICE_REPLAY_FILE", "prices.rec"),
+                                             replay_speed(os.getenv("PRICE_REPLAY_SPEED")))
         
-        # Load contract ABI (simplified for demo)
-        self.contract_abi = self._get_contract_abi()
-        self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(self.contract_address),
-            abi=self.contract_abi
-        )
+        # A replay needs no chain: no RPC pool, contract or registry reads
+        self.w3 = None
+        self.contract = None
+        if self.price_reads != "replay":
+            # Initialize Web3 over the RPC pool (RPC_URLS, or just ETH_RPC_URL)
+            self.w3 = make_web3(self.rpc_urls)
+            
+            # Load contract ABI (simplified for demo)
+            self.contract_abi = self._get_contract_abi()
+            self.contract = self.w3.eth.contract(
+                address=Web3.to_checksum_address(self.contract_address),
+                abi=self.contract_abi
+            )
+        
+        # Assets and their ids come from the contract (a replay: the recording);
+        # feeds listed later are picked up from AssetAdded logs and handed to
+        # the detect stage
+        if self.price_reads == "replay":
+            self.registry = AssetRegistry(interval=0, defaults=[a for a in self.price_source.assets if a])
+        else:
+            self.registry = AssetRegistry(self.w3, self.contract_address)
+        self._new_assets: List[str] = []
+        self._new_assets_lock = threading.Lock()
+        self.registry.subscribe(self._queue_new_assets)
+        self.registry.load()
+        self.detector_assets = self.registry.symbols
+        self._detect_stage = None
+        
+        self.price_reader = None
+        if self.price_reads == "async":
+            self.price_reader = AsyncPriceReader(self.rpc_urls, self.contract_address,
+                                                 id_of=self.registry.id_of)
+        elif self.price_reads != "replay":
+            self.price_reader = BatchPriceReader(self.w3, self.contract_address,
+                                                 id_of=self.registry.id_of)
+        
+        # Event mode: last applied (block, log index), saved with the detector state
+        self.event_source = None
+        if self.price_reads == "events":
+            self.event_source = EventLogSource(self.w3, self.contract_address)
+        self.applied_position: Optional[tuple] = None
+        
+        # Pushed sources: Hermes streams every listed asset that has a Pyth
+        # feed id (a replay was opened above)
+        if self.price_reads == "hermes":
+            self.price_source = HermesStreamSource(feeds={})
+            self.feed_ids = feed_ids()
+            self._subscribe_feeds(self.registry.symbols)
+            self.registry.subscribe(self._subscribe_feeds)
+        
+        # PRICE_RECORD: append every tick scored to this file, for replay later
+        self.recorder = PriceRecorder(os.getenv("PRICE_RECORD")) if os.getenv("PRICE_RECORD") else None
+        
+        # Change detection: no reads until a new block arrives, and a price whose
+        # on-chain timestamp was already scored is not scored again.
+        # SIMULATE_PRICE_NOISE=true jitters every read instead (demo without a live feed)
+        self.simulate_noise = os.getenv("SIMULATE_PRICE_NOISE", "false").lower() == "true"
+        self.last_block: Optional[int] = None
+        self._gated_asset_count = 0
+        self.last_sample_time: Dict[str, float] = {}
+        self.last_sample_price: Dict[str, float] = {}
+        self.skipped_reads = 0
+        self.unchanged_samples = 0
         
         # Initialize detector
-        self.detector = MultiAssetAnomalyDetector()
+        threshold = float(os.getenv("ANOMALY_THRESHOLD", "2.5"))
+        window_size = int(os.getenv("WINDOW_SIZE", "30"))
+        detector_mode = os.getenv("DETECTOR_MODE", "zscore").lower()
+        half_life = float(os.getenv("EWMA_HALF_LIFE", str(window_size / 2)))
+        timeframes = parse_timeframes(os.getenv("DETECTOR_TIMEFRAMES"))
+        # Seconds one sample stands for: EWMA detectors decay by real elapsed time (0 = per sample)
+        sample_interval = float(os.getenv("SAMPLE_INTERVAL", "10")) or None
+        self.detector_backend = os.getenv("DETECTOR_BACKEND", "dict").lower()
+        self.threshold = threshold
+        self.sample_interval = sample_interval
+        
+        if self.detector_backend == "matrix" and detector_mode not in ("zscore", "ewma"):
+            logger.warning(f"Matrix backend does not support {detector_mode} mode, using per-asset detectors")
+            self.detector_backend = "dict"
+        
+        if self.detector_backend == "matrix" and detector_mode == "ewma":
+            # Three floats per asset, scored in a single batched call
+            self.detector = VectorEWMADetector(self.detector_assets, half_life, threshold,
+                                               sample_interval=sample_interval)
+        elif self.detector_backend == "matrix":
+            # One ring-buffer matrix for all assets, scored in a single batched call
+            self.detector = MatrixAnomalyDetector(self.detector_assets, window_size, threshold)
+        else:
+            self.detector = MultiAssetAnomalyDetector(window_size, threshold, self.detector_assets,
+                                                      mode=detector_mode, half_life=half_life,
+                                                      timeframes=timeframes,
+                                                      sample_interval=sample_interval)
+        
+        # Cross-asset check for a single feed decoupling from the market
+        self.correlation_detector = None
+        if os.getenv("CORRELATION_CHECK", "true").lower() == "true":
+            self.correlation_detector = CorrelationBreakDetector(self.detector_assets, threshold,
+                                                                 sample_interval=sample_interval)
+        
+        # Warm restart: detector state is snapshotted periodically and on shutdown
+        # (not for replays, which must start from the same state every time)
+        snapshot_dir = os.getenv("SNAPSHOT_DIR", DEFAULT_SNAPSHOT_DIR) if self.price_reads != "replay" else ""
+        self.snapshot_config = detector_fingerprint(detector_mode, window_size, half_life, timeframes,
+                                                    backend=self.detector_backend)
+        self.snapshot = PeriodicSnapshot(
+            os.path.join(snapshot_dir, "monitor.snap") if snapshot_dir else "",
+            float(os.getenv("SNAPSHOT_INTERVAL", "60")),
+            self._collect_state, self._apply_state,
+            max_age=float(os.getenv("SNAPSHOT_MAX_AGE", "3600")),
+        )
+        self.snapshot.restore()
+        if self.event_source and self.applied_position:
+            # Re-read the block of the last applied log; detect() skips what was applied
+            self.event_source.seek(self.applied_position[0])
+        
+    def _collect_state(self) -> tuple:
+        """Snapshot metadata and arrays for the detectors"""
+        arrays = prefixed("detector", self.detector.get_state())
+        if self.correlation_detector:
+            arrays.update(prefixed("correlation", self.correlation_detector.get_state()))
+        meta = {"config": self.snapshot_config, "assets": list(self.detector_assets)}
+        if self.applied_position:
+            meta["event_position"] = list(self.applied_position)
+        meta["sample_times"] = self.last_sample_time
+        meta["sample_prices"] = self.last_sample_price
+        return meta, arrays
+    
+    def _apply_state(self, meta: Dict, arrays: Dict[str, np.ndarray]) -> bool:
+        """Load detector state from a snapshot taken with the same settings"""
+        if meta.get("config") != self.snapshot_config:
+            return False
+        if not self.detector.set_state(unprefixed("detector", arrays), meta["assets"]):
+            return False
         
+        correlation = unprefixed("correlation", arrays)
+        if self.correlation_detector and correlation:
+            self.correlation_detector.set_state(correlation, meta["assets"])
+        
+        position = meta.get("event_position")
+        self.applied_position = tuple(position) if position else None
+        self.last_sample_time = dict(meta.get("sample_times", {}))
+        self.last_sample_price = dict(meta.get("sample_prices", {}))
+        return True
+    
+    def _queue_new_assets(self, assets: List[str]) -> None:
+        """Registry subscriber: hand newly listed assets to the detect stage"""
+        with self._new_assets_lock:
+            self._new_assets.extend(assets)
+    
+    def _subscribe_feeds(self, assets: List[str]) -> None:
+        """Registry subscriber (hermes mode): stream the assets' Pyth feeds"""
+        self.price_source.add_feeds({asset: self.feed_ids[asset] for asset in assets if asset in self.feed_ids})
+        missing = [asset for asset in assets if asset not in self.feed_ids]
+        if missing:
+            logger.warning(f"⚠️  No Pyth feed id for {', '.join(missing)} (set PYTH_FEED_IDS), not monitored")
+    
+    def _add_new_assets(self) -> None:
+        """Start detectors for newly listed assets (detect thread only)"""
+        with self._new_assets_lock:
+            assets, self._new_assets = self._new_assets, []
+        added = [asset for asset in dict.fromkeys(assets) if asset not in self.detector_assets]
+        if not added:
+            return
+        
+        self.detector.add_assets(added)
+        self.detector_assets = self.detector_assets + added
+        if self.correlation_detector:
+            # The covariance model is sized by the asset count; re-warm it
+            self.correlation_detector = CorrelationBreakDetector(self.detector_assets, self.threshold,
+                                                                 sample_interval=self.sample_interval)
+        if self._detect_stage:
+            self._detect_stage.batch_size = len(self.detector_assets)
+        logger.info(f"🆕 Now monitoring {len(self.detector_assets)} assets (added {', '.join(added)})")
+    
     def _get_contract_abi(self) -> list:
         """Get contract ABI"""
         return [
@@ -144,104 +378,320 @@ class MultiAssetMonitor:
             }
         ]
     
-    def fetch_price_from_contract(self, asset: str) -> Optional[float]:
-        """Fetch current price from contract for a specific asset"""
+    def _simulate_variation(self, base_price: float) -> float:
+        """
+        Add some variation for testing z-score calculation
+        This simulates real market price fluctuations
+        """
+        import random
+        variation = base_price * 0.01  # 1% variation
+        return base_price + (random.random() - 0.5) * variation
+    
+    def _read_latest(self, asset: str) -> Optional[PriceReading]:
+        """Latest (price, timestamp, flag) stored for one asset"""
         try:
-            asset_id = self.w3.keccak(text=asset)
+            asset_id = self.registry.id_of(asset)
             price_data = self.contract.functions.getLatestPrice(asset_id).call()
             
-            if price_data and len(price_data) >= 1:
-                base_price = price_data[0] / 1e8  # Convert from scaled format
-                
-                # Add some variation for testing z-score calculation
-                # This simulates real market price fluctuations
-                import random
-                variation = base_price * 0.01  # 1% variation
-                price = base_price + (random.random() - 0.5) * variation
-                
-                return price
+            if price_data and len(price_data) >= 3:
+                # Convert from scaled format
+                return PriceReading(price_data[0] / 1e8, price_data[1], price_data[2])
                 
         except Exception as e:
             logger.debug(f"Could not fetch price for {asset}: {e}")
             
         return None
     
-    def update_api_server(self, asset: str, price: float, z_score: Optional[float], 
-                         is_anomalous: bool, reason: str) -> None:
-        """Update API server with asset data"""
+    def _to_tick(self, asset: str, reading: PriceReading, received: float) -> PriceTick:
+        """Tick for a reading; with simulated noise every read is a new sample"""
+        if self.simulate_noise:
+            return PriceTick(asset, self._simulate_variation(reading.price), received, timestamp=received)
+        return PriceTick(asset, reading.price, received, timestamp=reading.timestamp)
+    
+    def fetch_price_from_contract(self, asset: str) -> Optional[float]:
+        """Fetch current price from contract for a specific asset"""
+        reading = self._read_latest(asset)
+        if reading is None:
+            return None
+        return self._simulate_variation(reading.price) if self.simulate_noise else reading.price
+    
+    def fetch_prices_from_contract(self, assets: List[str]) -> Dict[str, Optional[PriceReading]]:
+        """Fetch current readings for many assets in one batched or concurrent read"""
+        return self.price_reader.read_prices(assets)
+    
+    def new_block(self) -> bool:
+        """
+        True if a block arrived since the last read (or newly listed assets
+        still need their first read); stored prices cannot change otherwise
+        """
+        if self.simulate_noise:
+            return True
         try:
-            data = {
-                "asset": asset,
-                "price": price,
-                "z_score": z_score,
-                "is_anomalous": is_anomalous,
-                "reason": reason
-            }
-            
-            response = requests.post(f"{self.api_url}/api/update", json=data, timeout=5)
-            if response.status_code == 200:
-                logger.debug(f"Updated API server for {asset}")
-            else:
-                logger.debug(f"API server update failed for {asset}: {response.status_code}")
-                
+            block = self.w3.eth.block_number
         except Exception as e:
-            logger.debug(f"Could not update API server for {asset}: {e}")
+            # Better a redundant read than a missed update
+            logger.debug(f"Could not read the block number: {e}")
+            return True
+        if block == self.last_block and len(self.registry) == self._gated_asset_count:
+            self.skipped_reads += 1
+            return False
+        self.last_block = block
+        self._gated_asset_count = len(self.registry)
+        return True
     
-    def monitor_asset(self, asset: str) -> None:
-        """Monitor a single asset"""
-        try:
-            # Fetch current price
-            price = self.fetch_price_from_contract(asset)
-            
-            if price is None:
+    def update_api_server(self, asset: str, price: float, z_score: Optional[float], 
+                         is_anomalous: bool, reason: str,
+                         timeframes: Optional[Dict[int, Optional[float]]] = None) -> None:
+        """Queue an update of the API server with asset data (sent in the background)"""
+        self.publisher.publish({
+            "asset": asset,
+            "price": price,
+            "z_score": z_score,
+            "is_anomalous": is_anomalous,
+            "reason": reason,
+            "timeframe_z_scores": {str(w): z for w, z in (timeframes or {}).items()},
+        })
+    
+    def score_cycle(self, prices: Dict[str, Optional[float]],
+                    elapsed: Optional[Dict[str, float]] = None, when: Optional[float] = None) -> Dict[str, tuple]:
+        """
+        Score a set of prices (observed at ``when``) at once;
+        returns {asset: (is_anomalous, z_score, reason)}
+        """
+        results = self.detector.evaluate(prices, elapsed)
+        breaks = self.correlation_detector.evaluate(prices, when) if self.correlation_detector else {}
+        
+        for asset, break_reason in breaks.items():
+            if asset not in results:
+                continue
+            is_anomalous, z_score, reason = results[asset]
+            reason = f"{reason}; {break_reason}" if is_anomalous else break_reason
+            results[asset] = (True, z_score, reason)
+        return results
+    
+    def fetch_tick(self, asset: str) -> Optional[PriceTick]:
+        """Pipeline stage: read one asset's latest price"""
+        reading = self._read_latest(asset)
+        if reading is None:
+            logger.warning(f"⚠️  Could not fetch price for {asset}")
+            return None
+        return self._to_tick(asset, reading, time.time())
+    
+    def fetch_ticks(self) -> List[PriceTick]:
+        """Pipeline source: read every asset's price in one batched or concurrent read"""
+        self.registry.maybe_refresh()
+        if not self.new_block():
+            return []
+        received = time.time()
+        ticks = []
+        for asset, reading in self.fetch_prices_from_contract(self.registry.symbols).items():
+            if reading is None:
                 logger.warning(f"⚠️  Could not fetch price for {asset}")
-                return
-            
-            # Add to history
-            self.detector.add_price(asset, price)
-            
-            # Check for anomaly
-            is_anomalous, z_score, reason = self.detector.is_anomaly(asset, price)
-            
-            z_score_str = f"{z_score:.2f}" if z_score is not None else "N/A"
-            logger.info(f"💰 {asset}: ${price:.2f} | Z-Score: {z_score_str} | {reason}")
-            
-            # Update API server
-            self.update_api_server(asset, price, z_score, is_anomalous, reason)
-            
-        except Exception as e:
-            logger.error(f"Error monitoring {asset}: {e}")
+                continue
+            ticks.append(self._to_tick(asset, reading, received))
+        return ticks
+    
+    def fetch_events(self) -> List[PriceTick]:
+        """Pipeline source: prices from PriceUpdated logs in newly confirmed blocks"""
+        self.registry.maybe_refresh()
+        received = time.time()
+        ticks = []
+        for event in self.event_source.poll():
+            asset = self.registry.symbol_of(event.asset_id)
+            if asset is None and event.name == PRICE_UPDATED:
+                # A feed listed since the last refresh: look for its AssetAdded log now
+                self.registry.refresh()
+                asset = self.registry.symbol_of(event.asset_id)
+            if asset is None:
+                continue
+            if event.name == PRICE_UPDATED:
+                ticks.append(PriceTick(asset, event.price, received, event.position, event.timestamp))
+            elif event.name == ANOMALY_FLAGGED:
+                logger.info(f"⛓️  {asset} flagged on-chain at block {event.block}: {event.reason}")
+            else:
+                logger.info(f"⛓️  {asset} flag cleared on-chain at block {event.block}")
+        return ticks
+    
+    def fetch_stream(self) -> List[PriceTick]:
+        """Pipeline source: ticks pushed by the Hermes stream or a replay since the last call"""
+        if self.price_reads == "hermes":
+            self.registry.maybe_refresh()
+        return self.price_source.poll()
+    
+    def poll_assets(self) -> List[str]:
+        """Pipeline source (sequential reads): the assets to fetch this cycle"""
+        self.registry.maybe_refresh()
+        return self.registry.symbols if self.new_block() else []
+    
+    def detect(self, ticks: List[PriceTick]) -> List[DetectionResult]:
+        """Pipeline stage: score a batch of ticks (normally one cycle) together"""
+        self._add_new_assets()
+        if self.applied_position:
+            # Logs re-read after a restart were already applied before the snapshot
+            ticks = [tick for tick in ticks if tick.position is None or tick.position > self.applied_position]
+        ticks = self._changed(ticks)
+        if self.recorder:
+            # Only what is scored, so replaying a recording scores the same ticks
+            self.recorder.write(ticks)
+        
+        # Every tick is scored once, in order: an asset with several ticks in
+        # the batch (e.g. several PriceUpdated logs) spans several rounds
+        rounds: List[Dict[str, PriceTick]] = []
+        for tick in ticks:
+            for batch in rounds:
+                if tick.asset not in batch:
+                    batch[tick.asset] = tick
+                    break
+            else:
+                rounds.append({tick.asset: tick})
+        
+        detections = []
+        for batch in rounds:
+            elapsed = {}
+            for asset, tick in batch.items():
+                previous = self.last_sample_time.get(asset)
+                if tick.timestamp is not None:
+                    if previous is not None:
+                        elapsed[asset] = tick.timestamp - previous
+                    self.last_sample_time[asset] = tick.timestamp
+                    self.last_sample_price[asset] = tick.price
+            when = max(tick.received if tick.timestamp is None else tick.timestamp for tick in batch.values())
+            results = self.score_cycle({asset: tick.price for asset, tick in batch.items()}, elapsed, when)
+            detections.extend(
+                DetectionResult(asset, batch[asset].price, z_score, is_anomalous, reason,
+                                batch[asset].received, self.detector.timeframe_z_scores(asset))
+                for asset, (is_anomalous, z_score, reason) in results.items()
+            )
+        
+        positions = [tick.position for tick in ticks if tick.position is not None]
+        if positions:
+            self.applied_position = max(positions)
+        
+        # Same thread as the detectors, so the snapshot sees a consistent state
+        self.snapshot.maybe_save()
+        return detections
+    
+    def _changed(self, ticks: List[PriceTick]) -> List[PriceTick]:
+        """
+        Drop re-reads of prices already scored: an unchanged on-chain timestamp
+        is the same sample. Logs are distinct updates even within one timestamp,
+        unless one re-emits the price last scored at that timestamp.
+        """
+        latest = dict(self.last_sample_time)
+        latest_price = dict(self.last_sample_price)
+        changed = []
+        for tick in ticks:
+            last = latest.get(tick.asset)
+            if tick.timestamp is None or last is None or tick.timestamp > last or (
+                    tick.position is not None and tick.timestamp == last
+                    and tick.price != latest_price.get(tick.asset)):
+                changed.append(tick)
+                if tick.timestamp is not None:
+                    latest[tick.asset] = tick.timestamp
+                    latest_price[tick.asset] = tick.price
+            else:
+                self.unchanged_samples += 1
+        return changed
+    
+    def report(self, result: DetectionResult) -> None:
+        """Sink: log one asset's result"""
+        z_score_str = f"{result.z_score:.2f}" if result.z_score is not None else "N/A"
+        logger.info(f"💰 {result.asset}: ${result.price:.2f} | Z-Score: {z_score_str} | {result.reason}")
+    
+    def publish(self, result: DetectionResult) -> None:
+        """Sink: update the API server with one asset's result"""
+        self.update_api_server(result.asset, result.price, result.z_score, result.is_anomalous,
+                               result.reason, result.timeframes)
+    
+    def build_pipeline(self, check_interval: float) -> Pipeline:
+        """
+        read (all assets at once) -> detect (batched per cycle) -> (report, api)
+        With PRICE_READS=sequential: poll -> fetch (FETCH_WORKERS threads, one
+        call per asset) -> detect ..., where a slow read only delays its own asset:
+        the detect stage scores whatever arrived within the batch timeout and
+        picks up the rest in the next batch.
+        With PRICE_READS=events: events (logs from newly confirmed blocks) -> detect ...
+        With PRICE_READS=hermes / replay: hermes / replay (pushed ticks, as they arrive) -> detect ...
+        """
+        fetch_workers = int(os.getenv("FETCH_WORKERS", "4"))
+        
+        pipeline = Pipeline("MultiAssetMonitor", float(os.getenv("PIPELINE_STATS_INTERVAL", "60")))
+        # At least one slot per queue even before any asset is listed
+        asset_count = max(1, len(self.registry))
+        # Streamed updates arrive a few at a time: score them almost immediately
+        batch_timeout = 0.05 if self.price_source else min(1.0, check_interval / 2)
+        # detect always takes a list, even when one asset makes batches of one
+        detect = pipeline.stage("detect", self.detect, batch_size=asset_count, batched=True,
+                                batch_timeout=batch_timeout, queue_size=4 * asset_count)
+        self._detect_stage = detect
+        if self.price_source:
+            pipeline.source(self.price_source.name, self.fetch_stream, 0).to(detect)
+        elif self.event_source:
+            pipeline.source("events", self.fetch_events, check_interval).to(detect)
+        elif self.price_reads != "sequential":
+            pipeline.source("read", self.fetch_ticks, check_interval).to(detect)
+        else:
+            source = pipeline.source("poll", self.poll_assets, check_interval)
+            fetch = pipeline.stage("fetch", self.fetch_tick, workers=fetch_workers,
+                                   queue_size=4 * asset_count)
+            source.to(fetch).to(detect)
+        detect.to(
+            pipeline.stage("report", self.report, queue_size=4 * asset_count),
+            # Only queues: the publisher sends in the background
+            pipeline.stage("api", self.publish, queue_size=4 * asset_count, drop_when_full=True),
+        )
+        return pipeline
     
     def run(self, check_interval: int = 10):
         """Main monitoring loop"""
         logger.info("🤖 Multi-Asset Monitor started!")
-        logger.info(f"📊 Monitoring {len(SUPPORTED_ASSETS)} assets: {', '.join(SUPPORTED_ASSETS)}")
+        logger.info(f"📊 Monitoring {len(self.registry)} assets: {', '.join(self.registry.symbols)}")
         logger.info(f"🎯 Anomaly threshold: {self.detector.threshold}σ")
         logger.info(f"📈 Window size: {self.detector.window_size} samples")
+        logger.info(f"🧮 Detector backend: {self.detector_backend}")
+        logger.info(f"🔗 Correlation check: {'on' if self.correlation_detector else 'off'}")
+        if self.price_reads == "hermes":
+            logger.info(f"📡 Price reads: hermes stream from {self.price_source.base_url} "
+                        f"({len(self.price_source.feeds)} feeds)")
+        elif self.price_reads == "replay":
+            speed = f"{self.price_source.speed:g}x" if self.price_source.speed > 0 else "max speed"
+            logger.info(f"📼 Price reads: replay of {self.price_source.path} at {speed} "
+                        f"({len(self.price_source.rows)} ticks over {self.price_source.duration:.0f}s)")
+        else:
+            logger.info(f"📡 Price reads: {self.price_reads} via {', '.join(self.rpc_urls)}")
+        if self.simulate_noise:
+            logger.info("🎲 Simulated price noise on: every read is scored as a new sample")
+        if self.event_source:
+            start = self.event_source.next_block or f"{self.event_source.lookback} blocks back"
+            logger.info(f"⛓️  Following logs from {start}, {self.event_source.confirmations} blocks behind head")
+        if self.snapshot.enabled:
+            logger.info(f"💾 Snapshots: {self.snapshot.path} every {self.snapshot.interval:.0f}s")
+        if self.registry.interval > 0:
+            logger.info(f"📋 Asset list refreshed every {self.registry.interval:.0f}s")
         logger.info(f"⏱️  Check interval: {check_interval}s\n")
         
-        iteration = 0
+        if self.recorder:
+            logger.info(f"💾 Recording prices to {self.recorder.path}")
+        if self.price_source:
+            self.price_source.start()
+        self.publisher.start()
+        self.build_pipeline(check_interval).run_forever()
+        if self.price_reader:
+            self.price_reader.close()
+        self.publisher.close()
+        self.publisher.log_stats()
+        if self.price_source:
+            self.price_source.stop()
+            self.price_source.log_stats()
+        if self.recorder:
+            self.recorder.close()
+        if self.w3:
+            self.w3.provider.pool.log_stats()
+        logger.info(f"♻️  Skipped {self.skipped_reads} reads without a new block, "
+                    f"{self.unchanged_samples} unchanged prices")
         
-        while True:
-            try:
-                iteration += 1
-                logger.info(f"\n{'='*60}")
-                logger.info(f"Iteration {iteration} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-                logger.info(f"{'='*60}")
-                
-                # Monitor all assets
-                for asset in SUPPORTED_ASSETS:
-                    self.monitor_asset(asset)
-                
-                logger.info(f"\n✅ Completed monitoring cycle for all assets")
-                time.sleep(check_interval)
-                
-            except KeyboardInterrupt:
-                logger.info("🛑 Multi-Asset Monitor stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"❌ Error in monitoring loop: {e}")
-                time.sleep(check_interval)
+        logger.info("🛑 Multi-Asset Monitor stopped by user")
+        self.snapshot.save()
 
 def main():
     """Run the multi-asset monitor"""
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Monitoring Pipeline for Sentinel Oracle
+Source -> stage -> sink pipeline connected by bounded queues
+
+Each stage runs its own worker threads, so a slow RPC read or API call only
+holds up the stage it happens in. Queues are bounded: when a downstream
+stage falls behind, ``put`` blocks and the pressure propagates back to the
+source (or, for best-effort sinks created with ``drop_when_full``, the item
+is dropped and counted). Every stage keeps throughput and latency counters.
+"""
+
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("Pipeline")
+
+
+class PriceTick(NamedTuple):
+    """One price observation flowing from a source to the detectors"""
+    asset: str
+    price: float
+    received: float  # time.time() when the price was read
+    position: Optional[Tuple[int, int]] = None  # (block, log index) for event-sourced ticks
+    timestamp: Optional[float] = None  # On-chain publish time; the same value means the same sample
+
+
+class DetectionResult(NamedTuple):
+    """A scored price flowing from the detectors to the sinks"""
+    asset: str
+    price: float
+    z_score: Optional[float]
+    is_anomalous: bool
+    reason: str
+    received: float
+    timeframes: Dict[int, Optional[float]] = {}
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    samples: Optional[int] = None
+
+
+class StageStats:
+    """Thread-safe counters for one stage"""
+
+    def __init__(self, recent: int = 1024):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.received = 0
+        self.emitted = 0
+        self.errors = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.latencies = deque(maxlen=recent)  # seconds per call, most recent calls
+
+    def record(self, items: int, emitted: int, seconds: float, failed: bool = False) -> None:
+        with self._lock:
+            self.received += items
+            self.emitted += emitted
+            self.busy_seconds += seconds
+            self.latencies.append(seconds)
+            if failed:
+                self.errors += 1
+
+    def record_drop(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            latencies = np.asarray(self.latencies) * 1000
+            return {
+                "received": self.received,
+                "emitted": self.emitted,
+                "errors": self.errors,
+                "dropped": self.dropped,
+                "throughput_per_sec": self.received / elapsed,
+                "busy_seconds": self.busy_seconds,
+                "latency_ms_p50": float(np.percentile(latencies, 50)) if latencies.size else None,
+                "latency_ms_p99": float(np.percentile(latencies, 99)) if latencies.size else None,
+            }
+
+
+class Stage:
+    """
+    A processing step with its own workers and bounded input queue(s)
+
+    ``func`` maps one item to an output item (None emits nothing). With
+    ``batched`` (implied by ``batch_size`` > 1) it instead receives a list of
+    up to ``batch_size`` items, collected for at most ``batch_timeout``
+    seconds, and returns a list of outputs. With ``key`` each worker gets its own queue and items
+    with the same key always go to the same worker, preserving their order.
+    """
+
+    def __init__(self, name: str, func: Callable, workers: int = 1, queue_size: int = 100,
+                 key: Optional[Callable[[Any], Hashable]] = None, batch_size: int = 1,
+                 batch_timeout: float = 0.5, drop_when_full: bool = False, batched: bool = False):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1 (0 would be unbounded)")
+
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.key = key
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.batched = batched or batch_size > 1
+        self.drop_when_full = drop_when_full
+        self.downstream: List["Stage"] = []
+        self.stats = StageStats()
+
+        queue_count = workers if key else 1
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in range(queue_count)]
+        self._threads: List[threading.Thread] = []
+
+    def to(self, *stages: "Stage") -> "Stage":
+        """Send this stage's outputs to every given stage; returns the last one for chaining"""
+        self.downstream.extend(stages)
+        return stages[-1]
+
+    def put(self, item: Any, stop: threading.Event) -> None:
+        """Enqueue an item, blocking while the queue is full (unless dropping)"""
+        q = self.queues[hash(self.key(item)) % len(self.queues)] if self.key else self.queues[0]
+        if self.drop_when_full:
+            try:
+                q.put_nowait(item)
+            except queue.Full:
+                self.stats.record_drop()
+            return
+
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self.queues)
+
+    def start(self, stop: threading.Event) -> None:
+        for i in range(self.workers):
+            q = self.queues[i % len(self.queues)]
+            thread = threading.Thread(target=self._work, args=(q, stop),
+                                      name=f"{self.name}-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _next(self, q: queue.Queue, stop: threading.Event) -> Optional[List[Any]]:
+        """Wait for the next item, or batch of items"""
+        try:
+            first = q.get(timeout=0.2)
+        except queue.Empty:
+            return None
+
+        items = [first]
+        if self.batch_size > 1:
+            deadline = time.monotonic() + self.batch_timeout
+            while len(items) < self.batch_size and not stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        return items
+
+    def _work(self, q: queue.Queue, stop: threading.Event) -> None:
+        while not stop.is_set():
+            items = self._next(q, stop)
+            if items is None:
+                continue
+
+            started = time.perf_counter()
+            try:
+                if self.batched:
+                    outputs = [out for out in (self.func(items) or []) if out is not None]
+                else:
+                    result = self.func(items[0])
+                    outputs = [] if result is None else [result]
+            except Exception as e:
+                self.stats.record(len(items), 0, time.perf_counter() - started, failed=True)
+                logger.error(f"❌ Stage {self.name} failed: {e}", exc_info=True)
+                continue
+
+            elapsed = time.perf_counter() - started
+            for output in outputs:
+                for stage in self.downstream:
+                    stage.put(output, stop)
+            # Counted once handed on, so downstream ``received`` catching up with
+            # ``emitted`` means everything emitted so far has been processed
+            self.stats.record(len(items), len(outputs), elapsed)
+
+
+class Source:
+    """Polls ``poll()`` every ``interval`` seconds and feeds its items downstream"""
+
+    def __init__(self, name: str, poll: Callable[[], Iterable[Any]], interval: float):
+        self.name = name
+        self.poll = poll
+        self.interval = interval
+        self.downstream: List[Stage] = []
+        self.stats = StageStats()
+        self._thread: Optional[threading.Thread] = None
+
+    def to(self, *stages: Stage) -> Stage:
+        self.downstream.extend(stages)
+        return stages[-1]
+
+    def start(self, stop: threading.Event) -> None:
+        self._thread = threading.Thread(target=self._run, args=(stop,), name=self.name, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                items = list(self.poll())
+            except Exception as e:
+                elapsed = time.perf_counter() - started
+                self.stats.record(0, 0, elapsed, failed=True)
+                logger.error(f"❌ Source {self.name} failed: {e}")
+                stop.wait(max(0.0, self.interval - elapsed))
+                continue
+
+            for item in items:
+                for stage in self.downstream:
+                    stage.put(item, stop)
+            elapsed = time.perf_counter() - started
+            self.stats.record(len(items), len(items), elapsed)
+
+            # Fixed-rate schedule: time spent waiting on backpressure counts
+            stop.wait(max(0.0, self.interval - elapsed))
+
+
+class Pipeline:
+    """A set of sources and stages started and stopped together"""
+
+    def __init__(self, name: str, stats_interval: float = 60.0):
+        self.name = name
+        self.stats_interval = stats_interval
+        self.sources: List[Source] = []
+        self.stages: List[Stage] = []
+        self.stop_event = threading.Event()
+
+    def source(self, name: str, poll: Callable[[], Iterable[Any]], interval: float) -> Source:
+        source = Source(name, poll, interval)
+        self.sources.append(source)
+        return source
+
+    def stage(self, name: str, func: Callable, **options) -> Stage:
+        stage = Stage(name, func, **options)
+        self.stages.append(stage)
+        return stage
+
+    def start(self) -> None:
+        self.stop_event.clear()
+        # Consumers first, so nothing is produced before there is a reader
+        for stage in reversed(self.stages):
+            stage.start(self.stop_event)
+        for source in self.sources:
+            source.start(self.stop_event)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self.stop_event.set()
+        for component in self.sources + self.stages:
+            component.join(timeout)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Counters per source and stage, plus current queue depths"""
+        report = {source.name: source.stats.summary() for source in self.sources}
+        for stage in self.stages:
+            report[stage.name] = {**stage.stats.summary(), "queue_depth": stage.queue_depth()}
+        return report
+
+    def log_stats(self) -> None:
+        for name, s in self.stats().items():
+            p50 = f"{s['latency_ms_p50']:.1f}ms" if s["latency_ms_p50"] is not None else "-"
+            p99 = f"{s['latency_ms_p99']:.1f}ms" if s["latency_ms_p99"] is not None else "-"
+            logger.info(f"📊 {name}: in {s['received']} out {s['emitted']} err {s['errors']} "
+                        f"drop {s['dropped']} | {s['throughput_per_sec']:.2f}/s | "
+                        f"p50 {p50} p99 {p99} | queue {s.get('queue_depth', 0)}")
+
+    def run_forever(self) -> None:
+        """Start the pipeline and block until Ctrl+C, logging stats periodically"""
+        self.start()
+        try:
+            while not self.stop_event.wait(self.stats_interval):
+                self.log_stats()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            self.log_stats()
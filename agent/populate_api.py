@@ -4,20 +4,23 @@ Simple script to populate API with price data from contract
 """
 
 import os
-import requests
 import json
 from web3 import Web3
 from dotenv import load_dotenv
 
+from asset_registry import AssetRegistry
+from chain_reader import BatchPriceReader
+from publisher import UpdatePublisher
+from rpc_pool import make_web3
+
 load_dotenv()
 
 # Configuration
-RPC_URL = os.getenv("ETH_RPC_URL")
 CONTRACT_ADDRESS = os.getenv("SENTINEL_ORACLE_ADDRESS")
 API_URL = "http://localhost:8080"
 
-# Initialize Web3
-w3 = Web3(Web3.HTTPProvider(RPC_URL))
+# Initialize Web3 (RPC_URLS, or just ETH_RPC_URL)
+w3 = make_web3()
 
 # Contract ABI (simplified)
 CONTRACT_ABI = [
@@ -34,22 +37,41 @@ CONTRACT_ABI = [
     }
 ]
 
-# Supported assets
-ASSETS = ["BTC/USD", "ETH/USD", "SOL/USD", "AVAX/USD", "LINK/USD"]
+_contract = None
+_price_reader = None
+_registry = None
+_publisher = None
+
+def get_registry():
+    """Get the asset registry, loaded from the contract once"""
+    global _registry
+    if _registry is None:
+        _registry = AssetRegistry(w3, CONTRACT_ADDRESS)
+        _registry.load()
+    return _registry
 
 def get_contract():
-    """Get contract instance"""
-    contract = w3.eth.contract(
-        address=Web3.to_checksum_address(CONTRACT_ADDRESS),
-        abi=CONTRACT_ABI
-    )
-    return contract
+    """Get contract instance (built once and reused)"""
+    global _contract
+    if _contract is None:
+        _contract = w3.eth.contract(
+            address=Web3.to_checksum_address(CONTRACT_ADDRESS),
+            abi=CONTRACT_ABI
+        )
+    return _contract
+
+def get_price_reader():
+    """Get the batched price reader (built once and reused)"""
+    global _price_reader
+    if _price_reader is None:
+        _price_reader = BatchPriceReader(w3, CONTRACT_ADDRESS, id_of=get_registry().id_of)
+    return _price_reader
 
 def fetch_price_from_contract(asset):
     """Fetch price from contract"""
     try:
         contract = get_contract()
-        asset_id = w3.keccak(text=asset)
+        asset_id = get_registry().id_of(asset)
         price_data = contract.functions.getLatestPrice(asset_id).call()
         
         if price_data and len(price_data) >= 1:
@@ -62,33 +84,40 @@ def fetch_price_from_contract(asset):
     
     return None, None, None
 
+def get_publisher():
+    """Get the API update publisher (one pooled connection, batched sends)"""
+    global _publisher
+    if _publisher is None:
+        _publisher = UpdatePublisher(API_URL)
+    return _publisher
+
 def update_api_server(asset, price, z_score=None, is_anomalous=False, reason="Normal"):
-    """Update API server with asset data"""
-    try:
-        data = {
-            "asset": asset,
-            "price": price,
-            "z_score": z_score,
-            "is_anomalous": is_anomalous,
-            "reason": reason
-        }
-        
-        response = requests.post(f"{API_URL}/api/update", json=data, timeout=5)
-        if response.status_code == 200:
-            print(f"✅ Updated API server for {asset}: ${price:.2f}")
-        else:
-            print(f"❌ API server update failed for {asset}: {response.status_code}")
-            
-    except Exception as e:
-        print(f"❌ Could not update API server for {asset}: {e}")
+    """Queue an update of the API server with asset data"""
+    data = {
+        "asset": asset,
+        "price": price,
+        "z_score": z_score,
+        "is_anomalous": is_anomalous,
+        "reason": reason
+    }
+    
+    if get_publisher().publish(data):
+        print(f"📮 Queued API update for {asset}: ${price:.2f}")
+    else:
+        print(f"❌ API update queue full, dropped {asset}")
 
 def main():
     """Main function"""
     print("🔄 Fetching prices from contract and updating API...")
     
-    for asset in ASSETS:
-        print(f"\n📊 Fetching {asset}...")
-        price, timestamp, is_anomalous = fetch_price_from_contract(asset)
+    # Every listed asset, read in one round trip
+    assets = get_registry().symbols
+    readings = get_price_reader().read_prices(assets)
+    
+    for asset in assets:
+        print(f"\n📊 {asset}")
+        reading = readings.get(asset)
+        price, timestamp, is_anomalous = reading if reading else (None, None, None)
         
         if price is not None:
             print(f"💰 {asset}: ${price:.2f}")
@@ -99,6 +128,16 @@ def main():
             update_api_server(asset, price, 0.0, is_anomalous, "Normal")
         else:
             print(f"❌ No price data for {asset}")
+    
+    # Everything queued goes out in one batch request
+    publisher = get_publisher()
+    delivered = publisher.close(timeout=10)
+    stats = publisher.stats()
+    if delivered and stats["rejected"] == 0:
+        print(f"\n✅ Updated API server for {stats['sent']} assets in {stats['requests']} request(s)")
+    else:
+        print(f"\n❌ API server update incomplete: {stats['sent']} sent, {stats['rejected']} rejected, "
+              f"{stats['failures']} failed requests")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Price Sources for Sentinel Oracle
+The interface pushed price sources implement, plus a recorder and a replayer
+for deterministic load tests and incident reproduction
+
+A PriceSource is started before the pipeline, polled from its source thread
+(``poll`` waits briefly and returns whatever ticks arrived) and stopped after.
+PriceRecorder appends every tick a monitor scores - decoded getLatestPrice
+readings, PriceUpdated logs or Hermes updates - to a compact binary file;
+ReplaySource plays a recording back at its recorded pace, ``speed`` times
+faster, or as fast as the pipeline takes it (speed 0).
+
+File layout (little-endian), appended as the monitor runs:
+    8 bytes   magic (SNTLREC1)
+    records   b"A" uint16 asset index, uint16 length, UTF-8 symbol
+              b"C" uint32 count, then count TICK_DTYPE rows (38 bytes each)
+
+Usage:
+    PRICE_RECORD=prices.rec python multi_asset_monitor.py
+    PRICE_READS=replay PRICE_REPLAY_FILE=prices.rec PRICE_REPLAY_SPEED=100 python multi_asset_monitor.py
+    python price_source.py prices.rec                # summary of a recording
+"""
+
+import os
+import sys
+import time
+import struct
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from pipeline import PriceTick
+
+logger = logging.getLogger("PriceSource")
+
+MAGIC = b"SNTLREC1"
+
+# One recorded tick; NaN timestamp / -1 block when the source had none
+TICK_DTYPE = np.dtype([
+    ("asset", "<u2"),
+    ("price", "<f8"),
+    ("received", "<f8"),
+    ("timestamp", "<f8"),
+    ("block", "<i8"),
+    ("log_index", "<i4"),
+])
+
+
+class PriceSource:
+    """A source that pushes ticks (a stream or a replay) rather than being read on a schedule"""
+
+    name = "source"
+
+    def start(self) -> None:
+        pass
+
+    def poll(self) -> List[PriceTick]:
+        """Ticks that arrived since the last call, waiting briefly for the first"""
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+    def log_stats(self) -> None:
+        pass
+
+
+class PriceRecorder:
+    """
+    Appends ticks to a recording
+
+    Rows are buffered and written as one chunk every ``flush_interval``
+    seconds or ``chunk_size`` rows, so a crash loses at most that much. An
+    existing file is appended to, after cutting off any record a crash left
+    half-written.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, chunk_size: int = 4096):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.chunk_size = chunk_size
+        self.assets: Dict[str, int] = {}
+        self.count = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            assets, _, end = read_recording(path)
+            self.assets = {symbol: i for i, symbol in enumerate(assets)}
+            self._file = open(path, "r+b")
+            self._file.truncate(end)
+            self._file.seek(end)
+        else:
+            self._file = open(path, "wb")
+            self._file.write(MAGIC)
+
+        self._rows: List[tuple] = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+
+    def _asset_index(self, symbol: str) -> int:
+        index = self.assets.get(symbol)
+        if index is None:
+            index = self.assets[symbol] = len(self.assets)
+            encoded = symbol.encode()
+            self._file.write(b"A" + struct.pack("<HH", index, len(encoded)) + encoded)
+        return index
+
+    def write(self, ticks: List[PriceTick]) -> None:
+        with self._lock:
+            for tick in ticks:
+                block, log_index = tick.position if tick.position else (-1, -1)
+                self._rows.append((self._asset_index(tick.asset), tick.price, tick.received,
+                                   np.nan if tick.timestamp is None else tick.timestamp, block, log_index))
+            if len(self._rows) >= self.chunk_size or time.time() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._rows:
+            rows = np.array(self._rows, dtype=TICK_DTYPE)
+            self._file.write(b"C" + struct.pack("<I", len(rows)) + rows.tobytes())
+            self.count += len(rows)
+            self._rows = []
+        self._file.flush()
+        self._last_flush = time.time()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            self._file.close()
+        logger.info(f"💾 Recorded {self.count} ticks for {len(self.assets)} assets to {self.path}")
+
+
+def read_recording(path: str) -> Tuple[List[str], np.ndarray, int]:
+    """
+    (asset symbols by index, TICK_DTYPE rows in recorded order, end of the
+    last complete record); a truncated last record is ignored
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a Sentinel price recording")
+
+    assets: List[str] = []
+    chunks = []
+    offset = len(MAGIC)
+    while offset < len(data):
+        kind = data[offset:offset + 1]
+        try:
+            if kind == b"A":
+                index, length = struct.unpack_from("<HH", data, offset + 1)
+                symbol = data[offset + 5:offset + 5 + length]
+                if len(symbol) < length:
+                    break
+                assets.extend([""] * (index + 1 - len(assets)))
+                assets[index] = symbol.decode()
+                offset += 5 + length
+            elif kind == b"C":
+                (count,) = struct.unpack_from("<I", data, offset + 1)
+                start = offset + 5
+                end = start + count * TICK_DTYPE.itemsize
+                if end > len(data):
+                    break
+                chunks.append(np.frombuffer(data, dtype=TICK_DTYPE, count=count, offset=start))
+                offset = end
+            else:
+                raise ValueError(f"{path}: unknown record {kind!r} at byte {offset}")
+        except struct.error:
+            break  # Cut off mid-header by a crash
+
+    rows = np.concatenate(chunks) if chunks else np.zeros(0, dtype=TICK_DTYPE)
+    return assets, rows, offset
+
+
+class ReplaySource(PriceSource):
+    """
+    Plays a recording back as live ticks
+
+    With ``speed`` 1 ticks come out at the recorded pace, with 100 a hundred
+    times faster, and with 0 as fast as the pipeline accepts them (``batch``
+    per poll). Replayed ticks keep their price, on-chain timestamp and log
+    position and are stamped with the replay time as received.
+    """
+
+    name = "replay"
+
+    def __init__(self, path: str, speed: float = 1.0, batch: int = 1000):
+        self.path = path
+        self.speed = speed
+        self.batch = batch
+        self.assets, self.rows, _ = read_recording(path)
+        self.position = 0
+        self.finished = False
+        self._started: Optional[float] = None
+        # Replay clock per tick: recorded order wins over out-of-order receive times
+        self._due = np.maximum.accumulate(self.rows["received"]) if len(self.rows) else self.rows["received"]
+        self._origin = float(self._due[0]) if len(self.rows) else 0.0
+
+    @property
+    def duration(self) -> float:
+        """Recorded wall time covered by the recording"""
+        return float(self._due[-1]) - self._origin if len(self.rows) else 0.0
+
+    def start(self) -> None:
+        self._started = time.time()
+        self.position = 0
+        self.finished = False
+
+    def _tick(self, row, received: float) -> PriceTick:
+        position = (int(row["block"]), int(row["log_index"])) if row["block"] >= 0 else None
+        timestamp = None if np.isnan(row["timestamp"]) else float(row["timestamp"])
+        return PriceTick(self.assets[row["asset"]], float(row["price"]), received, position, timestamp)
+
+    def poll(self, wait: float = 0.5) -> List[PriceTick]:
+        if self._started is None:
+            self.start()
+        if self.position >= len(self.rows):
+            if not self.finished:
+                self.finished = True
+                logger.info(f"⏹️  Replay of {self.path} finished ({len(self.rows)} ticks)")
+            time.sleep(wait)
+            return []
+
+        if self.speed <= 0:
+            end = min(len(self.rows), self.position + self.batch)
+            # Keep a recorded cycle (ticks read together) in one poll
+            end = int(np.searchsorted(self._due, self._due[end - 1], side="right"))
+        else:
+            # Everything recorded up to the replay clock, sleeping until the next tick is due
+            clock = self._origin + (time.time() - self._started) * self.speed
+            due = (float(self._due[self.position]) - clock) / self.speed
+            if due > 0:
+                time.sleep(min(due, wait))
+                clock = self._origin + (time.time() - self._started) * self.speed
+            end = int(np.searchsorted(self._due, clock, side="right"))
+            end = max(end, self.position)
+
+        received = time.time()
+        ticks = [self._tick(row, received) for row in self.rows[self.position:end]]
+        self.position = end
+        return ticks
+
+    def log_stats(self) -> None:
+        logger.info(f"⏯️  Replay: {self.position}/{len(self.rows)} ticks of {self.path}")
+
+
+def replay_speed(value: Optional[str]) -> float:
+    """PRICE_REPLAY_SPEED: a multiplier, or "max" / 0 for as fast as possible"""
+    value = (value or "1").strip().lower()
+    return 0.0 if value in ("max", "0") else float(value.rstrip("x"))
+
+
+def main():
+    """Summarize a recording"""
+    if len(sys.argv) != 2:
+        print("Usage: python price_source.py <recording>")
+        return 1
+    assets, rows, _ = read_recording(sys.argv[1])
+    print(f"📼 {sys.argv[1]}: {len(rows)} ticks, {len(assets)} assets, "
+          f"{(rows['received'][-1] - rows['received'][0]) if len(rows) else 0:.1f}s recorded")
+    for index, symbol in enumerate(assets):
+        prices = rows["price"][rows["asset"] == index]
+        if len(prices):
+            print(f"   {symbol:>12}: {len(prices):>8} ticks  ${prices.min():,.4f} - ${prices.max():,.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,17 @@ Price Variation Generator for Testing Z-Scores
 This script will generate varying prices to demonstrate Z-Score calculation
 """
 
-import requests
 import time
 import random
 from datetime import datetime
 
-# API endpoint
-API_URL = "http://localhost:8080/api/update"
+from publisher import UpdatePublisher
+
+# API server
+API_URL = "http://localhost:8080"
+
+# Updates are sent in the background, batched, over one connection
+publisher = UpdatePublisher(API_URL)
 
 # Base prices for each asset
 BASE_PRICES = {
@@ -28,27 +32,21 @@ def generate_varying_price(base_price, variation_percent=2):
     return base_price + random_change
 
 def update_asset_price(asset, price, z_score=None, is_anomalous=False, reason="Test variation"):
-    """Update asset price via API"""
-    try:
-        data = {
-            "asset": asset,
-            "price": price,
-            "z_score": z_score,
-            "is_anomalous": is_anomalous,
-            "reason": reason
-        }
-        
-        response = requests.post(API_URL, json=data, timeout=5)
-        if response.status_code == 200:
-            print(f"✅ Updated {asset}: ${price:.2f} (Z-Score: {z_score:.2f if z_score is not None else 'N/A'})")
-            return True
-        else:
-            print(f"❌ Failed to update {asset}: {response.status_code}")
-            return False
-            
-    except Exception as e:
-        print(f"❌ Error updating {asset}: {e}")
-        return False
+    """Queue an asset price update for the API"""
+    data = {
+        "asset": asset,
+        "price": price,
+        "z_score": z_score,
+        "is_anomalous": is_anomalous,
+        "reason": reason
+    }
+    
+    z_score_str = f"{z_score:.2f}" if z_score is not None else "N/A"
+    if publisher.publish(data):
+        print(f"📮 Queued {asset}: ${price:.2f} (Z-Score: {z_score_str})")
+        return True
+    print(f"❌ Failed to update {asset}: update queue full")
+    return False
 
 def main():
     """Generate price variations to test Z-Score calculation"""
@@ -95,6 +93,9 @@ def main():
             
         except KeyboardInterrupt:
             print("\n🛑 Price variation generator stopped by user")
+            publisher.close()
+            stats = publisher.stats()
+            print(f"📮 {stats['sent']} updates sent in {stats['requests']} requests, {stats['dropped']} dropped")
             break
         except Exception as e:
             print(f"❌ Error in main loop: {e}")
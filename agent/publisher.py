@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+API Update Publisher for Sentinel Oracle
+Sends detection results to the API server from a background thread, so a
+slow or unreachable API server never holds up detection
+
+``publish`` only queues an update and returns. Pending updates are coalesced
+per asset - a newer update replaces one not sent yet - except anomalous
+updates, which are always delivered so the server's anomaly count stays
+right. A worker drains the queue over one keep-alive session, up to
+API_BATCH_SIZE updates per POST /api/update/batch (falling back to one
+/api/update per item against servers without the batch endpoint). Batches
+that could not be delivered (connection errors, 502/503/504) are put back and
+retried with exponential backoff. Updates the server refuses are not: a 4xx
+reply rejects the batch, and after any other 5xx the batch is resent one
+update at a time, so a single bad update is dropped instead of blocking the
+queue. ``sent`` counts updates the server accepted, ``rejected`` the ones it
+refused.
+
+The queue holds at most API_QUEUE_SIZE updates. When it is full,
+API_DROP_POLICY decides what goes: "oldest" (the default) drops the update
+that has waited longest - an anomaly only if nothing else is queued -
+"newest" drops the incoming one.
+
+Usage:
+    publisher = UpdatePublisher("http://localhost:8080")
+    publisher.publish({"asset": "BTC/USD", "price": 110000.0, ...})
+    publisher.close()                    # flushes what is pending, then stops
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("Publisher")
+
+DROP_POLICIES = ("oldest", "newest")
+
+# Updates without an "asset" are BTC/USD, as on the server
+DEFAULT_ASSET = "BTC/USD"
+
+# Replies meaning the server could not take the update right now: retried
+RETRY_STATUSES = (502, 503, 504)
+
+
+class UpdatePublisher:
+    """Coalescing, batching background publisher for /api/update"""
+
+    def __init__(self, api_url: Optional[str] = None, batch_size: Optional[int] = None,
+                 linger: Optional[float] = None, queue_size: Optional[int] = None,
+                 drop_policy: Optional[str] = None, timeout: Optional[float] = None,
+                 max_backoff: Optional[float] = None):
+        self.api_url = (api_url or os.getenv("API_SERVER_URL", "http://localhost:8080")).rstrip("/")
+        self.batch_size = batch_size or int(os.getenv("API_BATCH_SIZE", "500"))
+        # How long the worker waits for a batch to fill before sending what it has
+        self.linger = float(os.getenv("API_LINGER", "0.02")) if linger is None else linger
+        self.queue_size = queue_size or int(os.getenv("API_QUEUE_SIZE", "10000"))
+        self.drop_policy = (drop_policy or os.getenv("API_DROP_POLICY", "oldest")).lower()
+        if self.drop_policy not in DROP_POLICIES:
+            raise ValueError(f"API_DROP_POLICY must be one of {', '.join(DROP_POLICIES)}")
+        self.timeout = timeout or float(os.getenv("API_TIMEOUT", "5"))
+        self.max_backoff = max_backoff or float(os.getenv("API_MAX_BACKOFF", "30"))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.batch_supported = True
+
+        # key -> update, oldest first; the key is the asset, or (asset, n) for anomalies
+        self._pending: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._in_flight = 0
+        self._sequence = 0
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.published = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.sent = 0
+        self.rejected = 0
+        self.requests = 0
+        self.failures = 0
+
+    def start(self) -> None:
+        with self._cond:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="publisher", daemon=True)
+            self._thread.start()
+
+    def publish(self, update: Dict[str, Any]) -> bool:
+        """Queue an update; False if the drop policy discarded it"""
+        if self._thread is None:
+            self.start()
+        asset = update.get("asset", DEFAULT_ASSET)
+        with self._cond:
+            self.published += 1
+            if update.get("is_anomalous"):
+                self._sequence += 1
+                key: Hashable = (asset, self._sequence)
+            else:
+                key = asset
+                if self._pending.pop(key, None) is not None:
+                    self.coalesced += 1
+            if len(self._pending) >= self.queue_size:
+                self.dropped += 1
+                if self.drop_policy == "newest":
+                    return False
+                self._evict()
+            # Re-inserted at the end, so an asset's updates keep their order
+            self._pending[key] = update
+            self._cond.notify()
+        return True
+
+    def _evict(self) -> None:
+        """Drop the oldest pending update, sparing anomalies while there is anything else"""
+        for key in self._pending:
+            if not isinstance(key, tuple):
+                del self._pending[key]
+                return
+        self._pending.popitem(last=False)
+
+    @property
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _take(self) -> Optional[List[Tuple[Hashable, Dict[str, Any]]]]:
+        """Wait for updates and take up to a batch of them; None once stopped and drained"""
+        with self._cond:
+            while not self._pending:
+                if self._stopping:
+                    return None
+                self._cond.wait(1.0)
+            if len(self._pending) < self.batch_size and self.linger > 0 and not self._stopping:
+                self._cond.wait(self.linger)
+            batch = []
+            while self._pending and len(batch) < self.batch_size:
+                batch.append(self._pending.popitem(last=False))
+            self._in_flight = len(batch)
+            return batch
+
+    def _requeue(self, batch: List[Tuple[Hashable, Dict[str, Any]]]) -> None:
+        """Put a failed batch back in front, unless a newer update for the asset came in meanwhile"""
+        with self._cond:
+            newer = self._pending
+            self._pending = OrderedDict((key, update) for key, update in batch if key not in newer)
+            self.coalesced += len(batch) - len(self._pending)
+            self._pending.update(newer)
+            while len(self._pending) > self.queue_size:
+                self._evict()
+                self.dropped += 1
+
+    def _send(self, batch: List[Tuple[Hashable, Dict[str, Any]]]) -> None:
+        """POST one batch; raises when it should be retried, leaving in ``batch`` what was not sent"""
+        if self.batch_supported:
+            updates = [update for _, update in batch]
+            self.requests += 1
+            response = self.session.post(f"{self.api_url}/api/update/batch", json=updates, timeout=self.timeout)
+            status = response.status_code
+            if status in (404, 405):
+                logger.info("📮 API server has no /api/update/batch, sending updates one by one")
+                self.batch_supported = False
+            elif status in RETRY_STATUSES:
+                response.raise_for_status()
+            elif 400 <= status < 500 and status != 413:
+                self.rejected += len(updates)
+                batch.clear()
+                logger.warning(f"⚠️ API server rejected a batch of {len(updates)} updates (HTTP {status})")
+                return
+            elif status >= 400:
+                # Possibly one update the server chokes on: find it by sending them singly
+                logger.debug(f"Batch update failed (HTTP {status}), resending one by one")
+            else:
+                reply = response.json()
+                rejected = reply.get("rejected", 0)
+                for result in reply.get("results", []):
+                    if not result.get("success"):
+                        logger.debug(f"API server rejected update for {result.get('asset')}: {result.get('error')}")
+                self.rejected += rejected
+                self.sent += len(updates) - rejected
+                return
+        while batch:
+            update = batch[0][1]
+            self.requests += 1
+            response = self.session.post(f"{self.api_url}/api/update", json=update, timeout=self.timeout)
+            if response.status_code in RETRY_STATUSES:
+                response.raise_for_status()
+            if response.status_code >= 400:
+                self.rejected += 1
+                logger.debug(f"API server rejected update for {update.get('asset', DEFAULT_ASSET)} "
+                             f"(HTTP {response.status_code})")
+            else:
+                self.sent += 1
+            batch.pop(0)
+
+    def _run(self) -> None:
+        backoff = 0.0
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                self._send(batch)
+                backoff = 0.0
+            except Exception as e:
+                self.failures += 1
+                self._requeue(batch)
+                backoff = min(self.max_backoff, backoff * 2 or 0.5)
+                logger.debug(f"Could not update API server ({e}), retrying in {backoff:.1f}s")
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+            if backoff:
+                with self._cond:
+                    if self._stopping:
+                        return
+                    self._cond.wait(backoff)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until everything queued has been sent (or given up on); False on timeout"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._pending or self._in_flight:
+                remaining = deadline - time.time()
+                if remaining <= 0 or not (self._thread and self._thread.is_alive()):
+                    return False
+                self._cond.wait(min(remaining, 0.1))
+        return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """Flush for up to ``timeout`` seconds, then stop the worker; False if updates were left unsent"""
+        flushed = self._thread is None or self.flush(timeout)
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.timeout, 1.0))
+        self.session.close()
+        return flushed
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "published": self.published,
+                "sent": self.sent,
+                "coalesced": self.coalesced,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "pending": len(self._pending),
+                "requests": self.requests,
+                "failures": self.failures,
+            }
+
+    def log_stats(self) -> None:
+        s = self.stats()
+        logger.info(f"📮 API updates: {s['sent']}/{s['published']} sent in {s['requests']} requests, "
+                    f"{s['coalesced']} coalesced, {s['dropped']} dropped, {s['rejected']} rejected, "
+                    f"{s['pending']} pending, {s['failures']} failed requests")
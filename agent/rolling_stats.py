@@ -0,0 +1,608 @@
+#!/usr/bin/env python3
+"""
+Rolling Statistics for Sentinel Oracle
+Incremental streaming statistics used by the anomaly detectors
+"""
+
+import math
+import random
+from array import array
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Variances below this fraction of mean² are treated as exactly zero so that
+# rounding residue left by the incremental updates never turns a flat window
+# into a huge z-score.
+_RELATIVE_VARIANCE_FLOOR = 1e-14
+
+# An eviction whose update term dwarfs the remaining sum of squares has lost
+# most of its significant digits to cancellation; recompute instead.
+_CANCELLATION_RATIO = 1e-8
+
+
+def _window_state(values: deque, window_size: int) -> Dict[str, np.ndarray]:
+    padded = np.full(window_size, np.nan)
+    padded[:len(values)] = np.fromiter(values, dtype=np.float64, count=len(values))
+    return {"values": padded, "count": np.array(len(values))}
+
+
+class RollingMoments:
+    """
+    Sliding-window mean and variance with O(1) append and eviction
+
+    Uses Welford's update for appends and its inverse for evictions, so the
+    cost per sample does not depend on the window size. Every
+    ``recenter_every`` updates the moments are recomputed from the window to
+    discard accumulated floating point error (amortised O(1)).
+    """
+
+    def __init__(self, window_size: int, recenter_every: Optional[int] = None):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+        self.window_size = window_size
+        self.recenter_every = recenter_every or window_size
+        self.values = deque(maxlen=window_size)
+
+        self._mean = 0.0
+        self._m2 = 0.0  # Sum of squared deviations from the mean
+        self._updates_since_recenter = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        """Append a value, evicting the oldest one once the window is full"""
+        value = float(value)
+        n = len(self.values)
+
+        if n == self.window_size:
+            # Replace the oldest sample in a single step
+            old = self.values[0]
+            self.values.append(value)
+            old_mean = self._mean
+            self._mean += (value - old) / n
+            increment = (value - old) * (value - self._mean + old - old_mean)
+            self._m2 += increment
+            if self._m2 < _CANCELLATION_RATIO * abs(increment):
+                self.recenter()
+                return
+        else:
+            self.values.append(value)
+            delta = value - self._mean
+            self._mean += delta / (n + 1)
+            self._m2 += delta * (value - self._mean)
+
+        if self._m2 < 0:
+            self._m2 = 0.0
+
+        self._updates_since_recenter += 1
+        if self._updates_since_recenter >= self.recenter_every:
+            self.recenter()
+
+    def recenter(self) -> None:
+        """Recompute the moments exactly from the current window"""
+        n = len(self.values)
+        self._updates_since_recenter = 0
+
+        if n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+
+        mean = math.fsum(self.values) / n
+        self._mean = mean
+        self._m2 = math.fsum((v - mean) ** 2 for v in self.values)
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        self.values.clear()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates_since_recenter = 0
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Window contents, oldest first and NaN-padded to the window size"""
+        return _window_state(self.values, self.window_size)
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore a window saved by get_state; the moments are recomputed exactly"""
+        self.values.clear()
+        self.values.extend(state["values"][:int(state["count"])].tolist())
+        self.recenter()
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self.values else 0.0
+
+    def variance(self, ddof: int = 0) -> float:
+        """Window variance (ddof=0 matches np.var, ddof=1 statistics.variance)"""
+        n = len(self.values)
+        if n - ddof <= 0:
+            return 0.0
+        if self._m2 <= _RELATIVE_VARIANCE_FLOOR * n * self._mean * self._mean:
+            return 0.0
+        return self._m2 / (n - ddof)
+
+    def std(self, ddof: int = 0) -> float:
+        """Window standard deviation"""
+        return math.sqrt(self.variance(ddof))
+
+
+class MultiWindowMoments:
+    """
+    Mean and variance over several trailing windows from one shared buffer
+
+    Keeps ring buffers of the last ``max(windows)`` values and of the prefix
+    sums of x and x², so the moments of any trailing window are two
+    subtractions away: O(1) per window per tick, with one buffer for every
+    timeframe instead of one deque each. Values are stored relative to a
+    shift, and both shift and prefix sums are rebuilt once per buffer
+    length (amortised O(1)) to keep the sums well conditioned.
+    """
+
+    def __init__(self, windows):
+        self.windows = tuple(sorted(set(int(w) for w in windows)))
+        if not self.windows or self.windows[0] < 1:
+            raise ValueError("windows must be positive sample counts")
+
+        self.capacity = self.windows[-1]
+        self.total = 0  # Samples seen since the last clear
+        self.shift = 0.0
+
+        # values[t % capacity] holds sample t; prefix*[t % (capacity + 1)]
+        # holds the sums of the first t (shifted) samples.
+        self._values = array("d", bytes(8 * self.capacity))
+        self._prefix1 = array("d", bytes(8 * (self.capacity + 1)))
+        self._prefix2 = array("d", bytes(8 * (self.capacity + 1)))
+        self._since_rebase = 0
+
+    def __len__(self) -> int:
+        return min(self.total, self.capacity)
+
+    def push(self, value: float) -> None:
+        """Append a value to the shared buffer"""
+        value = float(value)
+        if self.total == 0:
+            self.shift = value
+
+        t = self.total
+        slots = self.capacity + 1
+        d = value - self.shift
+        self._values[t % self.capacity] = value
+        self._prefix1[(t + 1) % slots] = self._prefix1[t % slots] + d
+        self._prefix2[(t + 1) % slots] = self._prefix2[t % slots] + d * d
+        self.total = t + 1
+
+        self._since_rebase += 1
+        if self._since_rebase >= self.capacity:
+            self.rebase()
+
+    def rebase(self) -> None:
+        """Re-shift to the current mean and rebuild the prefix sums"""
+        self._since_rebase = 0
+        n = len(self)
+        if n == 0:
+            return
+
+        start = self.total - n
+        held = [self._values[t % self.capacity] for t in range(start, self.total)]
+        self.shift = math.fsum(held) / n
+
+        slots = self.capacity + 1
+        s1 = s2 = 0.0
+        self._prefix1[start % slots] = 0.0
+        self._prefix2[start % slots] = 0.0
+        for offset, value in enumerate(held, start=1):
+            d = value - self.shift
+            s1 += d
+            s2 += d * d
+            self._prefix1[(start + offset) % slots] = s1
+            self._prefix2[(start + offset) % slots] = s2
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        self.total = 0
+        self.shift = 0.0
+        self._since_rebase = 0
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Ring buffers and counters as arrays"""
+        return {
+            "values": np.frombuffer(self._values, dtype=np.float64).copy(),
+            "prefix1": np.frombuffer(self._prefix1, dtype=np.float64).copy(),
+            "prefix2": np.frombuffer(self._prefix2, dtype=np.float64).copy(),
+            "counters": np.array([self.total, self._since_rebase], dtype=np.int64),
+            "shift": np.array(self.shift),
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore buffers saved by get_state (same windows)"""
+        self._values = array("d", np.asarray(state["values"], dtype=np.float64).tobytes())
+        self._prefix1 = array("d", np.asarray(state["prefix1"], dtype=np.float64).tobytes())
+        self._prefix2 = array("d", np.asarray(state["prefix2"], dtype=np.float64).tobytes())
+        self.total, self._since_rebase = (int(v) for v in state["counters"])
+        self.shift = float(state["shift"])
+
+    def count(self, window: int) -> int:
+        """Samples currently covered by a trailing window"""
+        return min(self.total, window, self.capacity)
+
+    def moments(self, window: int, ddof: int = 0) -> Tuple[int, float, float]:
+        """(count, mean, std) of the trailing ``window`` samples"""
+        n = self.count(window)
+        if n == 0:
+            return 0, 0.0, 0.0
+
+        slots = self.capacity + 1
+        end, begin = self.total % slots, (self.total - n) % slots
+        s1 = self._prefix1[end] - self._prefix1[begin]
+        s2 = self._prefix2[end] - self._prefix2[begin]
+
+        mean_offset = s1 / n
+        mean = self.shift + mean_offset
+        if n - ddof <= 0:
+            return n, mean, 0.0
+
+        m2 = s2 - s1 * mean_offset
+        if m2 <= _RELATIVE_VARIANCE_FLOOR * n * mean * mean:
+            return n, mean, 0.0
+        return n, mean, math.sqrt(m2 / (n - ddof))
+
+
+def half_life_to_alpha(half_life: float) -> float:
+    """Smoothing factor whose weights halve every ``half_life`` samples"""
+    if half_life <= 0:
+        raise ValueError("half_life must be positive")
+    return 1.0 - 0.5 ** (1.0 / half_life)
+
+
+def elapsed_to_weight(elapsed, sample_interval: Optional[float], half_life: float):
+    """
+    Samples' worth of decay for a gap of ``elapsed`` seconds (scalar or array)
+    when one sample nominally stands for ``sample_interval`` seconds
+
+    Capped at one half-life: a long gap forgets at most half the history, so
+    the variance never collapses onto a single sample.
+    """
+    if not sample_interval:
+        return 1.0
+    return np.clip(np.asarray(elapsed, dtype=np.float64) / sample_interval, 0.0, half_life)
+
+
+class EWMoments:
+    """
+    Exponentially weighted mean and variance in constant memory
+
+    Only three numbers are kept per series, so memory does not depend on
+    how much history influences the estimate. Older samples fade with the
+    configured half-life (in samples); a sample pushed with ``weight`` w
+    counts as w samples' worth of decay, for irregularly spaced samples.
+    """
+
+    __slots__ = ("alpha", "mean", "var", "count")
+
+    def __init__(self, half_life: float):
+        self.alpha = half_life_to_alpha(half_life)
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def push(self, value: float, weight: float = 1.0) -> None:
+        """Fold a value into the weighted moments"""
+        value = float(value)
+        if self.count == 0:
+            self.mean = value
+            self.var = 0.0
+        else:
+            alpha = self.alpha if weight == 1.0 else 1.0 - (1.0 - self.alpha) ** weight
+            delta = value - self.mean
+            self.mean += alpha * delta
+            self.var = (1.0 - alpha) * (self.var + alpha * delta * delta)
+        self.count += 1
+
+    def clear(self) -> None:
+        """Forget all samples"""
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {"moments": np.array([self.mean, self.var]), "count": np.array(self.count)}
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.mean, self.var = (float(v) for v in state["moments"])
+        self.count = int(state["count"])
+
+    def std(self) -> float:
+        if self.var <= _RELATIVE_VARIANCE_FLOOR * self.mean * self.mean:
+            return 0.0
+        return math.sqrt(self.var)
+
+
+class _SkiplistNode:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value: float, levels: int):
+        self.value = value
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkiplist:
+    """
+    Sorted multiset with O(log n) insert, remove and positional lookup
+
+    Each link stores how many elements it skips, so ``skiplist[i]`` walks
+    down the levels instead of scanning (Hettinger's indexable skiplist).
+    Values must be finite floats; +inf is reserved for the tail sentinel.
+    """
+
+    def __init__(self, expected_size: int = 100):
+        self.size = 0
+        self.max_levels = int(1 + math.log(max(expected_size, 2), 2))
+        self._tail = _SkiplistNode(math.inf, 0)
+        self.head = _SkiplistNode(-math.inf, self.max_levels)
+        self.head.next = [self._tail] * self.max_levels
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __getitem__(self, index: int) -> float:
+        if not 0 <= index < self.size:
+            raise IndexError("skiplist index out of range")
+
+        node = self.head
+        index += 1
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= index:
+                index -= node.width[level]
+                node = node.next[level]
+        return node.value
+
+    def insert(self, value: float) -> None:
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self.head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value <= value:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.max_levels, 1 - int(math.log(1.0 - random.random(), 2.0)))
+        new_node = _SkiplistNode(value, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, value: float) -> None:
+        chain = [None] * self.max_levels
+        node = self.head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].value < value:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target.value != value:
+            raise KeyError(f"{value} not in skiplist")
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+
+class RollingMedian:
+    """
+    Sliding-window median and median absolute deviation (MAD)
+
+    Samples are kept in an indexable skiplist, so each append/eviction and
+    the median cost O(log w). The MAD is the k-th smallest element of two
+    sorted distance sequences (left and right of the median) and is found
+    by binary search over skiplist lookups in O(log² w), never re-sorting.
+    """
+
+    def __init__(self, window_size: int):
+        if window_size < 1:
+            raise ValueError("window_size must be at least 1")
+
+        self.window_size = window_size
+        self.values = deque(maxlen=window_size)
+        self.sorted = IndexableSkiplist(window_size)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def count(self) -> int:
+        return len(self.values)
+
+    def push(self, value: float) -> None:
+        """Append a value, evicting the oldest one once the window is full"""
+        value = float(value)
+        if not math.isfinite(value):
+            raise ValueError("RollingMedian only accepts finite values")
+
+        if len(self.values) == self.window_size:
+            self.sorted.remove(self.values[0])
+        self.values.append(value)
+        self.sorted.insert(value)
+
+    def clear(self) -> None:
+        """Drop all samples"""
+        self.values.clear()
+        self.sorted = IndexableSkiplist(self.window_size)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        """Window contents, oldest first and NaN-padded to the window size"""
+        return _window_state(self.values, self.window_size)
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        """Restore a window saved by get_state, rebuilding the sorted index"""
+        self.clear()
+        for value in state["values"][:int(state["count"])].tolist():
+            self.push(value)
+
+    def median(self) -> float:
+        n = len(self.values)
+        if n == 0:
+            return 0.0
+        half = n // 2
+        if n % 2:
+            return self.sorted[half]
+        return (self.sorted[half - 1] + self.sorted[half]) / 2
+
+    def mad(self) -> float:
+        """Median of |x - median| over the window"""
+        n = len(self.values)
+        if n == 0:
+            return 0.0
+
+        median = self.median()
+        half = n // 2
+        s = self.sorted
+
+        # Distances below the median (ascending) and above it (ascending)
+        def below(i: int) -> float:
+            return median - s[half - 1 - i]
+
+        def above(j: int) -> float:
+            return s[half + j] - median
+
+        if n % 2:
+            return _kth_of_two(below, half, above, n - half, half)
+        return (_kth_of_two(below, half, above, n - half, half - 1) +
+                _kth_of_two(below, half, above, n - half, half)) / 2
+
+
+def _kth_of_two(a, a_len: int, b, b_len: int, k: int) -> float:
+    """k-th smallest (0-based) of two ascending sequences given as accessors"""
+    # Binary search for how many of the k+1 smallest come from ``a``
+    lo, hi = max(0, k + 1 - b_len), min(a_len, k + 1)
+    while lo < hi:
+        i = (lo + hi) // 2
+        if a(i) < b(k - i):
+            lo = i + 1
+        else:
+            hi = i
+
+    taken_b = k + 1 - lo
+    if lo == 0:
+        return b(taken_b - 1)
+    if taken_b == 0:
+        return a(lo - 1)
+    return max(a(lo - 1), b(taken_b - 1))
+
+
+class StreamingCovariance:
+    """
+    Exponentially weighted mean, covariance and precision of a vector stream
+
+    Each update folds one observation into the mean and covariance with a
+    rank-one step and keeps the inverse (precision) matrix current with the
+    Sherman-Morrison identity, so an update costs O(n²) with no recompute
+    from history. Every ``refresh_every`` updates the precision is rebuilt
+    exactly after adding a small ridge to the covariance, which bounds both
+    rounding drift and the conditioning of the estimate (amortised O(n²)
+    when ``refresh_every`` >= n).
+    """
+
+    def __init__(self, dimension: int, half_life: float = 60.0, prior_variance: float = 1e-6,
+                 ridge: float = 1e-3, refresh_every: Optional[int] = None):
+        self.dimension = dimension
+        self.alpha = half_life_to_alpha(half_life)
+        self.prior_variance = prior_variance
+        self.ridge = ridge
+        self.refresh_every = refresh_every or max(dimension, 50)
+
+        self.mean = np.zeros(dimension)
+        self.cov = np.eye(dimension) * prior_variance
+        self.precision = np.eye(dimension) / prior_variance
+        self.count = 0
+        self._since_refresh = 0
+
+    def mahalanobis(self, x: np.ndarray) -> Tuple[float, np.ndarray]:
+        """
+        Score an observation against the current model
+        Returns: (squared Mahalanobis distance, per-component conditional z-scores)
+
+        The conditional z-score of component i is its deviation from what the
+        other components predict, in units of its conditional std.
+        """
+        d = x - self.mean
+        v = self.precision @ d
+        distance = float(d @ v)
+        conditional = v / np.sqrt(np.maximum(np.diag(self.precision), 1e-300))
+        return distance, conditional
+
+    def update(self, x: np.ndarray, weight: float = 1.0) -> None:
+        """Fold one observation, worth ``weight`` samples of decay, into mean, covariance and precision"""
+        alpha = self.alpha if weight == 1.0 else 1.0 - (1.0 - self.alpha) ** weight
+        d = x - self.mean
+        self.mean += alpha * d
+
+        if self.count == 0:
+            self.count = 1
+            return
+
+        # Σ' = (1 - α)(Σ + α d dᵀ); invert the bracket with Sherman-Morrison
+        pd = self.precision @ d
+        denom = 1.0 + alpha * float(d @ pd)
+        self.cov += alpha * np.outer(d, d)
+        self.cov *= 1.0 - alpha
+        self.precision -= (alpha / denom) * np.outer(pd, pd)
+        self.precision /= 1.0 - alpha
+
+        self.count += 1
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self.refresh()
+
+    def refresh(self) -> None:
+        """Regularise the covariance and recompute the precision exactly"""
+        self._since_refresh = 0
+        scale = max(float(np.trace(self.cov)) / self.dimension, self.prior_variance * 1e-6)
+        self.cov[np.diag_indices_from(self.cov)] += self.ridge * scale
+        self.cov = (self.cov + self.cov.T) / 2
+        self.precision = np.linalg.inv(self.cov)
+
+    def get_state(self) -> Dict[str, np.ndarray]:
+        return {
+            "mean": self.mean.copy(),
+            "cov": self.cov.copy(),
+            "precision": self.precision.copy(),
+            "counters": np.array([self.count, self._since_refresh], dtype=np.int64),
+        }
+
+    def set_state(self, state: Dict[str, np.ndarray]) -> None:
+        self.mean = np.array(state["mean"], dtype=np.float64)
+        self.cov = np.array(state["cov"], dtype=np.float64)
+        self.precision = np.array(state["precision"], dtype=np.float64)
+        self.count, self._since_refresh = (int(v) for v in state["counters"])
+
+    def correlation(self) -> np.ndarray:
+        """Current correlation matrix"""
+        std = np.sqrt(np.diag(self.cov))
+        return self.cov / np.outer(std, std)
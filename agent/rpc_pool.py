@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+RPC Pool for Sentinel Oracle
+Spreads JSON-RPC traffic over several endpoints with failover and hedged reads
+
+Endpoints come from RPC_URLS (comma-separated), falling back to ETH_RPC_URL.
+Each endpoint keeps a persistent keep-alive session and a rolling record of
+its latency and errors. Requests go to the fastest healthy endpoint; a read
+that has not answered after that endpoint's RPC_HEDGE_PERCENTILE latency is
+re-issued to the next endpoint and the first answer wins. Endpoints that fail
+RPC_MAX_FAILURES times in a row sit out RPC_COOLDOWN seconds.
+
+JSON-RPC error replies (reverts, range limits, "nonce too low") are answers,
+not endpoint failures, and are returned to the caller unchanged. HTTP 429
+and 5xx replies are endpoint failures: they fail over like a lost
+connection, and surface as RPCPoolError once every endpoint has failed.
+Writes are never hedged and only fail over when the node did not take the
+request (no connection, 429 or 5xx).
+
+Usage:
+    w3 = make_web3()                     # Web3 over the shared pool
+    pool = get_pool(); pool.stats()      # per-endpoint latency / error rates
+"""
+
+import os
+import json
+import itertools
+import time
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Union
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+logger = logging.getLogger("RPCPool")
+
+# Never hedged; a timed-out send may still have reached the node
+WRITE_METHODS = {"eth_sendRawTransaction", "eth_sendTransaction"}
+
+# Latency samples an endpoint needs before its percentile is trusted for hedging
+MIN_HEDGE_SAMPLES = 10
+
+
+class RPCPoolError(requests.exceptions.ConnectionError):
+    """Every endpoint failed the request"""
+
+
+class EndpointUnavailable(RPCPoolError):
+    """An endpoint answered HTTP 429 or 5xx: it is unhealthy, whatever the request was"""
+
+
+def rpc_urls(urls: Union[str, Sequence[str], None] = None) -> List[str]:
+    """Endpoint list from ``urls`` (list or comma-separated), else RPC_URLS / ETH_RPC_URL"""
+    if urls is None:
+        urls = os.getenv("RPC_URLS") or os.getenv("ETH_RPC_URL") or ""
+    if isinstance(urls, str):
+        urls = urls.split(",")
+    return [url.strip() for url in urls if url and url.strip()]
+
+
+class Endpoint:
+    """One RPC URL with its session and rolling latency / error record"""
+
+    def __init__(self, url: str, window: int, pool_size: int):
+        self.url = url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.latencies: deque = deque(maxlen=window)   # Seconds, successful requests only
+        self.outcomes: deque = deque(maxlen=window)    # True = answered
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool, max_failures: int, cooldown: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(seconds)
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= max_failures and time.time() >= self.down_until:
+                self.down_until = time.time() + cooldown
+                logger.warning(f"⚠️  {self.url} failed {self.consecutive_failures} times in a row, "
+                               f"sitting out {cooldown:.0f}s")
+
+    def healthy(self) -> bool:
+        return time.time() >= self.down_until
+
+    def error_rate(self) -> float:
+        outcomes = list(self.outcomes)
+        return outcomes.count(False) / len(outcomes) if outcomes else 0.0
+
+    def latency(self, percentile: float = 50) -> Optional[float]:
+        samples = list(self.latencies)
+        return float(np.percentile(samples, percentile)) if samples else None
+
+    def score(self) -> float:
+        """Expected cost of a request here: median latency, inflated by the error rate"""
+        median = self.latency()
+        # Unmeasured endpoints rank first so they get probed
+        return 0.0 if median is None else median * (1 + 4 * self.error_rate())
+
+    def summary(self) -> Dict[str, Any]:
+        p50, p99 = self.latency(50), self.latency(99)
+        return {
+            "healthy": self.healthy(),
+            "requests": self.requests,
+            "error_rate": round(self.error_rate(), 4),
+            "p50_ms": None if p50 is None else round(p50 * 1000, 2),
+            "p99_ms": None if p99 is None else round(p99 * 1000, 2),
+            "hedges": self.hedges,
+        }
+
+
+class RPCPool:
+    """
+    Latency-aware routing over several JSON-RPC endpoints
+
+    ``timeout`` (RPC_TIMEOUT) bounds each attempt. Hedging needs at least two
+    endpoints and MIN_HEDGE_SAMPLES latencies on the primary; the delay is its
+    ``hedge_percentile`` (RPC_HEDGE_PERCENTILE) latency, at least
+    ``hedge_min_delay`` (RPC_HEDGE_MIN_MS). RPC_HEDGE=false turns it off.
+    """
+
+    def __init__(self, urls: Union[str, Sequence[str], None] = None, timeout: Optional[float] = None,
+                 hedge: Optional[bool] = None, hedge_percentile: Optional[float] = None,
+                 hedge_min_delay: Optional[float] = None, max_failures: Optional[int] = None,
+                 cooldown: Optional[float] = None, window: Optional[int] = None):
+        self.urls = rpc_urls(urls)
+        if not self.urls:
+            raise ValueError("No RPC endpoints configured (set RPC_URLS or ETH_RPC_URL)")
+        self.timeout = timeout or float(os.getenv("RPC_TIMEOUT", "10"))
+        self.hedge = hedge if hedge is not None else os.getenv("RPC_HEDGE", "true").lower() == "true"
+        self.hedge_percentile = hedge_percentile or float(os.getenv("RPC_HEDGE_PERCENTILE", "95"))
+        self.hedge_min_delay = (hedge_min_delay if hedge_min_delay is not None
+                                else float(os.getenv("RPC_HEDGE_MIN_MS", "20")) / 1000)
+        self.max_failures = max_failures or int(os.getenv("RPC_MAX_FAILURES", "3"))
+        self.cooldown = cooldown if cooldown is not None else float(os.getenv("RPC_COOLDOWN", "30"))
+
+        pool_size = int(os.getenv("RPC_POOL_SIZE", "32"))
+        self.endpoints = [Endpoint(url, window or int(os.getenv("RPC_STATS_WINDOW", "200")), pool_size)
+                          for url in self.urls]
+        # Attempts run here so a hedge can start while the first is in flight
+        self._executor = ThreadPoolExecutor(max_workers=pool_size * len(self.endpoints),
+                                            thread_name_prefix="rpc-pool")
+        self._ids = itertools.count(1)
+
+    def ranked(self) -> List[Endpoint]:
+        """Healthy endpoints fastest first, then endpoints cooling down (last resort)"""
+        healthy = sorted((e for e in self.endpoints if e.healthy()), key=Endpoint.score)
+        cooling = sorted((e for e in self.endpoints if not e.healthy()), key=lambda e: e.down_until)
+        return healthy + cooling
+
+    def hedge_delay(self, endpoint: Endpoint) -> Optional[float]:
+        """Seconds to wait on ``endpoint`` before re-issuing elsewhere (None = never)"""
+        if not self.hedge or len(self.endpoints) < 2 or len(endpoint.latencies) < MIN_HEDGE_SAMPLES:
+            return None
+        return max(self.hedge_min_delay, endpoint.latency(self.hedge_percentile))
+
+    def record(self, endpoint: Endpoint, seconds: float, ok: bool) -> None:
+        endpoint.record(seconds, ok, self.max_failures, self.cooldown)
+
+    def _attempt(self, endpoint: Endpoint, data: bytes) -> Any:
+        started = time.perf_counter()
+        try:
+            response = endpoint.session.post(endpoint.url, data=data, timeout=self.timeout,
+                                             headers={"Content-Type": "application/json"})
+            # Rate limits and server errors say nothing about the request itself
+            if response.status_code == 429 or response.status_code >= 500:
+                raise EndpointUnavailable(f"HTTP {response.status_code} from {endpoint.url}", response=response)
+            response.raise_for_status()
+            reply = response.json()
+        except Exception:
+            self.record(endpoint, time.perf_counter() - started, False)
+            raise
+        self.record(endpoint, time.perf_counter() - started, True)
+        return reply
+
+    def post(self, payload: Union[bytes, Dict, List], hedge: bool = True) -> Any:
+        """
+        Send a JSON-RPC request or batch; returns the decoded reply
+
+        Raises RPCPoolError (a requests ConnectionError) when no endpoint answered.
+        """
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        order = self.ranked()
+        if not hedge or len(order) == 1:
+            return self._post_unhedged(order, data)
+
+        pending: Dict[Future, Endpoint] = {self._executor.submit(self._attempt, order[0], data): order[0]}
+        remaining = order[1:]
+        errors = []
+        while pending:
+            delay = self.hedge_delay(order[0]) if remaining else None
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            for future in done:
+                endpoint = pending.pop(future)
+                if future.exception() is None:
+                    # Losing attempts finish in the background and still update their stats
+                    return future.result()
+                errors.append(f"{endpoint.url}: {future.exception()}")
+            if remaining and (not done or not pending):
+                # Primary is slow (hedge) or every attempt so far failed (failover)
+                endpoint = remaining.pop(0)
+                if not done:
+                    order[0].hedges += 1
+                pending[self._executor.submit(self._attempt, endpoint, data)] = endpoint
+        raise RPCPoolError(f"All RPC endpoints failed: {'; '.join(errors)}")
+
+    def _post_unhedged(self, order: List[Endpoint], data: bytes) -> Any:
+        errors = []
+        for endpoint in order:
+            try:
+                return self._attempt(endpoint, data)
+            except requests.exceptions.ConnectionError as e:
+                # The request never reached this node, or it refused it; safe to send elsewhere
+                errors.append(f"{endpoint.url}: {e}")
+        raise RPCPoolError(f"All RPC endpoints failed: {'; '.join(errors)}")
+
+    def request(self, method: str, params: Any) -> Dict[str, Any]:
+        """One JSON-RPC call; the reply may carry an ``error`` instead of a ``result``"""
+        payload = {"jsonrpc": "2.0", "method": method, "params": params or [], "id": next(self._ids)}
+        return self.post(payload, hedge=method not in WRITE_METHODS)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {endpoint.url: endpoint.summary() for endpoint in self.endpoints}
+
+    def log_stats(self) -> None:
+        for url, summary in self.stats().items():
+            logger.info(f"📡 {url}: {summary}")
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+        for endpoint in self.endpoints:
+            endpoint.session.close()
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """web3 provider that sends every request through an RPCPool"""
+
+    def __init__(self, pool: RPCPool):
+        super().__init__()
+        self.pool = pool
+
+    def make_request(self, method, params) -> Dict[str, Any]:
+        data = self.encode_rpc_request(method, params)
+        return self.pool.post(data, hedge=method not in WRITE_METHODS)
+
+    def __str__(self) -> str:
+        return f"RPC pool {', '.join(self.pool.urls)}"
+
+
+_pools: Dict[tuple, RPCPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(urls: Union[str, Sequence[str], None] = None) -> RPCPool:
+    """Process-wide pool for these endpoints, so every client shares sessions and stats"""
+    key = tuple(rpc_urls(urls))
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = RPCPool(list(key))
+            if len(key) > 1:
+                logger.info(f"📡 RPC pool over {len(key)} endpoints: {', '.join(key)}")
+        return _pools[key]
+
+
+def make_web3(urls: Union[str, Sequence[str], None] = None) -> Web3:
+    """Web3 instance backed by the shared pool for ``urls`` (RPC_URLS / ETH_RPC_URL by default)"""
+    return Web3(PooledHTTPProvider(get_pool(urls)))
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Detector State Snapshots for Sentinel Oracle
+Binary snapshots of detector state so a restarted agent resumes detection
+without re-warming its windows
+
+File layout:
+    8 bytes   magic (SNTLSNP1)
+    8 bytes   header length (little-endian uint64)
+    N bytes   JSON header: metadata plus dtype/shape/offset of every array
+    padding   to a 64-byte boundary, then each array's raw bytes, each
+              starting on a 64-byte boundary (offsets relative to this point)
+
+Snapshots are written to a temporary file and renamed into place, so readers
+only ever see a complete file. Loading memory-maps the file copy-on-write:
+arrays are usable immediately and only the pages that are touched are read.
+"""
+
+import os
+import json
+import time
+import struct
+import logging
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger("Snapshot")
+
+MAGIC = b"SNTLSNP1"
+ALIGNMENT = 64
+
+# Default location for snapshot files (one file per component)
+DEFAULT_SNAPSHOT_DIR = "snapshots"
+
+# (metadata, {name: array})
+SnapshotState = Tuple[Dict, Dict[str, np.ndarray]]
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def save_snapshot(path: str, meta: Dict, arrays: Dict[str, np.ndarray]) -> int:
+    """Atomically write a snapshot; returns its size in bytes"""
+    arrays = {name: np.require(array, requirements="C") for name, array in arrays.items()}
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        offset = _aligned(offset)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+
+    header = json.dumps({"version": 1, "created": time.time(), "meta": meta,
+                         "arrays": layout}).encode()
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b"\0" * (data_start + layout[name]["offset"] - f.tell()))
+            f.write(array.reshape(-1).view(np.uint8).data)
+        size = f.tell()
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, path)
+    return size
+
+
+def load_snapshot(path: str) -> Tuple[Dict, Dict[str, np.ndarray], float]:
+    """
+    Memory-map a snapshot
+    Returns: (metadata, {name: array}, creation time); arrays are writable
+    copy-on-write views, so changing them never touches the file
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a Sentinel snapshot")
+        (header_len,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(header_len))
+
+    if header.get("version") != 1:
+        raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+
+    data_start = _aligned(len(MAGIC) + 8 + header_len)
+    size = os.path.getsize(path)
+    buffer = np.memmap(path, dtype=np.uint8, mode="c") if size > data_start else None
+
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        start = data_start + spec["offset"]
+        if start + nbytes > size:
+            raise ValueError(f"Snapshot {path} is truncated (array {name})")
+        if nbytes == 0:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = buffer[start:start + nbytes].view(dtype).reshape(shape)
+
+    return header["meta"], arrays, header["created"]
+
+
+def prefixed(prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Namespace a component's arrays inside a snapshot"""
+    return {f"{prefix}/{name}": array for name, array in arrays.items()}
+
+
+def unprefixed(prefix: str, arrays: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Select one component's arrays from a snapshot"""
+    start = f"{prefix}/"
+    return {name[len(start):]: array for name, array in arrays.items() if name.startswith(start)}
+
+
+def detector_fingerprint(mode: str, window_size: int, half_life: Optional[float] = None,
+                         timeframes=None, **extra) -> Dict:
+    """Settings a snapshot's detector state is only valid for"""
+    mode = (mode or "zscore").lower()
+    fingerprint = {"mode": mode, "window_size": window_size, **extra}
+    if mode == "ewma":
+        fingerprint["half_life"] = half_life
+    if mode == "multiframe":
+        fingerprint["timeframes"] = [int(w) for w in timeframes]
+    return fingerprint
+
+
+class PeriodicSnapshot:
+    """
+    Writes a component's state every ``interval`` seconds and restores it on start
+
+    ``collect`` returns (metadata, arrays) for the current state; ``apply``
+    receives the same from a snapshot and returns False when the snapshot
+    does not fit the running configuration.
+    """
+
+    def __init__(self, path: str, interval: float, collect: Callable[[], SnapshotState],
+                 apply: Callable[[Dict, Dict[str, np.ndarray]], bool],
+                 max_age: Optional[float] = None):
+        self.path = path
+        self.interval = interval
+        self.collect = collect
+        self.apply = apply
+        self.max_age = max_age
+        self.last_saved = time.time()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.interval > 0
+
+    def restore(self) -> bool:
+        """Load the snapshot if there is a usable one"""
+        if not self.enabled or not os.path.exists(self.path):
+            return False
+
+        try:
+            started = time.perf_counter()
+            meta, arrays, created = load_snapshot(self.path)
+            age = time.time() - created
+            if self.max_age and age > self.max_age:
+                logger.info(f"⏭️  Ignoring snapshot {self.path}: {age:.0f}s old (max {self.max_age:.0f}s)")
+                return False
+            if not self.apply(meta, arrays):
+                logger.warning(f"⚠️  Snapshot {self.path} does not match the current configuration, starting cold")
+                return False
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info(f"♻️  Restored state from {self.path} ({age:.0f}s old) in {elapsed:.1f}ms")
+            return True
+        except Exception as e:
+            logger.warning(f"⚠️  Could not restore snapshot {self.path}: {e}")
+            return False
+
+    def save(self) -> None:
+        """Write the current state now"""
+        if not self.enabled:
+            return
+        try:
+            started = time.perf_counter()
+            meta, arrays = self.collect()
+            size = save_snapshot(self.path, meta, arrays)
+            self.last_saved = time.time()
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.debug(f"Snapshot written to {self.path} ({size} bytes, {elapsed:.1f}ms)")
+        except Exception as e:
+            logger.error(f"Error writing snapshot {self.path}: {e}")
+
+    def maybe_save(self) -> None:
+        """Write the state if the interval has elapsed"""
+        if self.enabled and time.time() - self.last_saved >= self.interval:
+            self.save()
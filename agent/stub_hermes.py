@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Stub Hermes Server for Sentinel Oracle
+Serves Pyth-style price update streams with synthetic prices, so the Hermes
+stream source can be developed and benchmarked offline
+
+Usage:
+    python stub_hermes.py --port 8787 --interval 400
+    PRICE_READS=hermes PYTH_HERMES_URL=http://localhost:8787 python multi_asset_monitor.py
+
+GET /v2/updates/price/stream?ids[]=<feed id>&ids[]=...&parsed=true answers
+with a text/event-stream carrying one message per slot (--interval ms) with
+a parsed update for every requested feed, in Hermes' JSON layout. Any 32-byte
+hex id is a feed. Each message has an ``id:`` (the slot); a client that
+reconnects with Last-Event-ID gets the slots it missed (up to --replay
+slots) first. --drop-after closes every stream after that many messages so
+reconnects can be exercised.
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("StubHermes")
+
+EXPO = -8
+
+
+class StubFeeds:
+    """Synthetic Pyth prices: a slow wave plus noise per feed id, one update per slot"""
+
+    def __init__(self, interval: float = 0.4):
+        self.interval = interval
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.spikes: Dict[tuple, float] = {}   # (feed id, slot) -> price factor
+        self.sent_at: Dict[int, float] = {}    # slot -> time its first message was sent
+
+    def slot(self, at: Optional[float] = None) -> int:
+        return int(((time.time() if at is None else at) - self.started) / self.interval)
+
+    def slot_time(self, slot: int) -> float:
+        return self.started + slot * self.interval
+
+    def spike(self, feed_id: str, factor: float = 1.2) -> int:
+        """Multiply the feed's price in the next slot by ``factor``; returns that slot"""
+        slot = self.slot() + 1
+        with self._lock:
+            self.spikes[(feed_id, slot)] = factor
+        return slot
+
+    def price(self, feed_id: str, slot: int) -> int:
+        """Price scaled by 10**-EXPO"""
+        seed = int(feed_id[:8], 16)
+        base = 10 + seed % 100000
+        noise = random.Random(seed * 1_000_003 + slot).gauss(0, 0.0005)
+        price = base * (1 + 0.002 * math.sin(slot / 50 + seed) + noise)
+        return int(price * self.spikes.get((feed_id, slot), 1.0) * 10 ** -EXPO)
+
+    def update(self, feed_id: str, slot: int) -> Dict[str, Any]:
+        """One entry of a message's ``parsed`` list"""
+        price = self.price(feed_id, slot)
+        publish_time = int(self.slot_time(slot))
+        entry = {"price": str(price), "conf": str(price // 2000), "expo": EXPO, "publish_time": publish_time}
+        return {
+            "id": feed_id,
+            "price": entry,
+            "ema_price": dict(entry),
+            "metadata": {"slot": slot, "proof_available_time": publish_time,
+                         "prev_publish_time": int(self.slot_time(slot - 1))},
+        }
+
+    def message(self, feed_ids: List[str], slot: int) -> bytes:
+        payload = {"binary": {"encoding": "hex", "data": []},
+                   "parsed": [self.update(feed_id, slot) for feed_id in feed_ids]}
+        return f"id: {slot}\ndata: {json.dumps(payload)}\n\n".encode()
+
+
+class StubHermesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    feeds: StubFeeds
+    replay: int = 100
+    drop_after: int = 0
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client closed the stream (resubscribe, shutdown)
+            pass
+
+    def _reply(self, status: int, message: str) -> None:
+        data = json.dumps({"message": message}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/v2/updates/price/stream":
+            self._reply(404, f"{url.path} not found")
+            return
+        feed_ids = []
+        for feed_id in parse_qs(url.query).get("ids[]", []):
+            feed_id = feed_id.lower()[2:] if feed_id.lower().startswith("0x") else feed_id.lower()
+            try:
+                if len(bytes.fromhex(feed_id)) != 32:
+                    raise ValueError
+            except ValueError:
+                self._reply(400, f"Invalid price id {feed_id}")
+                return
+            feed_ids.append(feed_id)
+        if not feed_ids:
+            self._reply(400, "At least one ids[] is required")
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")  # As Hermes does: one chunk per message
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        slot = self.feeds.slot()
+        last_id = self.headers.get("Last-Event-ID")
+        if last_id and last_id.isdigit():
+            # Resume: the slots missed since the client's last message
+            slot = max(int(last_id) + 1, slot - self.replay)
+
+        sent = 0
+        while not self.drop_after or sent < self.drop_after:
+            wait = self.feeds.slot_time(slot) - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            message = self.feeds.message(feed_ids, slot)
+            self.feeds.sent_at.setdefault(slot, time.time())
+            self.wfile.write(f"{len(message):x}\r\n".encode() + message + b"\r\n")
+            self.wfile.flush()
+            slot += 1
+            sent += 1
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def make_server(port: int = 0, interval_ms: float = 400.0, replay: int = 100,
+                drop_after: int = 0) -> ThreadingHTTPServer:
+    """Build a stub server (port 0 picks a free port); its feeds are server.RequestHandlerClass.feeds"""
+    handler = type("Handler", (StubHermesHandler,), {
+        "feeds": StubFeeds(interval_ms / 1000),
+        "replay": replay,
+        "drop_after": drop_after,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_background(port: int = 0, interval_ms: float = 400.0, **options) -> ThreadingHTTPServer:
+    """Start a stub server on a daemon thread; its URL is server_url(server)"""
+    server = make_server(port, interval_ms, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main():
+    """Run the stub server"""
+    parser = argparse.ArgumentParser(description="Stub Pyth Hermes price stream")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--interval", type=float, default=400.0, help="Milliseconds per slot (one message)")
+    parser.add_argument("--replay", type=int, default=100, help="Most slots replayed on Last-Event-ID")
+    parser.add_argument("--drop-after", type=int, default=0, help="Close each stream after this many messages")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.interval, args.replay, args.drop_after)
+    logger.info(f"🧪 Stub Hermes listening on {server_url(server)} (slot {args.interval:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Stub Hermes stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Stub JSON-RPC Server for Sentinel Oracle
+Answers the SentinelOracle read calls with synthetic prices, so readers can
+be developed and benchmarked without a node
+
+Usage:
+    python stub_rpc.py --port 8545 --latency 50
+    ETH_RPC_URL=http://localhost:8545 python multi_asset_monitor.py
+
+Supports single and batched requests for eth_call (getLatestPrice,
+getLatestPrices, getSupportedAssets and getAssetSymbol), eth_getLogs (one
+PriceUpdated log per asset per block, AssetAdded when an asset is listed),
+eth_chainId and eth_blockNumber, plus a small mempool for legacy
+transactions (eth_sendRawTransaction, eth_getTransactionReceipt,
+eth_getTransactionCount, eth_gasPrice). A transaction is mined one block
+time after it is sent, if it pays at least the current gas price. Every HTTP
+request sleeps for --latency milliseconds to imitate a remote endpoint;
+--slow-rate of them sleep --slow-latency instead (a latency tail) and
+--error-rate of them are answered with HTTP 503 (a flaky endpoint).
+"""
+
+import json
+import math
+import time
+import random
+import argparse
+import logging
+import threading
+import rlp
+from eth_account import Account
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from eth_abi import decode, encode
+from web3 import Web3
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger("StubRPC")
+
+GET_LATEST_PRICE = bytes(Web3.keccak(text="getLatestPrice(bytes32)")[:4])
+GET_LATEST_PRICES = bytes(Web3.keccak(text="getLatestPrices(bytes32[])")[:4])
+GET_SUPPORTED_ASSETS = bytes(Web3.keccak(text="getSupportedAssets()")[:4])
+GET_ASSET_SYMBOL = bytes(Web3.keccak(text="getAssetSymbol(bytes32)")[:4])
+PRICE_UPDATED_TOPIC = "0x" + bytes(Web3.keccak(text="PriceUpdated(bytes32,int64,uint64,uint64)")).hex()
+ASSET_ADDED_TOPIC = "0x" + bytes(Web3.keccak(text="AssetAdded(bytes32,bytes32,string)")).hex()
+
+CHAIN_ID = 31337
+
+# Assets whose price is "updated" (PriceUpdated emitted) in every block
+DEFAULT_ASSETS = ["BTC/USD", "ETH/USD", "SOL/USD", "AVAX/USD", "LINK/USD"]
+
+
+class RPCError(Exception):
+    """Returned to the client as a JSON-RPC error"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class StubChain:
+    """Synthetic on-chain state: a slowly moving price per asset id"""
+
+    def __init__(self, support_batch_view: bool = True, block_time: float = 2.0,
+                 start_block: int = 1, assets: Optional[List[str]] = None,
+                 max_log_range: Optional[int] = None):
+        self.support_batch_view = support_batch_view
+        self.block_time = block_time
+        self.start_block = start_block
+        self.max_log_range = max_log_range
+        self.started = time.time()
+
+        # Listed assets: id -> symbol, and the block each was listed in
+        self.asset_ids: List[bytes] = []
+        self.symbols: Dict[bytes, str] = {}
+        self.listed_at: Dict[bytes, int] = {}
+        for symbol in assets or DEFAULT_ASSETS:
+            self.add_asset(symbol, block=1)
+
+        # Mempool: transactions below gas_price stay pending until replaced
+        self.gas_price = Web3.to_wei(1, "gwei")
+        self._lock = threading.Lock()
+        self._pending: Dict[tuple, Dict[str, Any]] = {}   # (sender, nonce) -> tx
+        self._receipts: Dict[str, Dict[str, Any]] = {}   # tx hash -> receipt
+        self._mined_nonce: Dict[str, int] = {}           # sender -> next nonce to mine
+
+    def block_number(self) -> int:
+        return self.start_block + int((time.time() - self.started) / self.block_time)
+
+    def add_asset(self, symbol: str, block: Optional[int] = None) -> bytes:
+        """List an asset (as addSupportedAsset would) from ``block``, default the current one"""
+        asset = bytes(Web3.solidity_keccak(["string"], [symbol]))
+        if asset not in self.symbols:
+            self.listed_at[asset] = self.block_number() if block is None else block
+            self.symbols[asset] = symbol
+            self.asset_ids.append(asset)
+        return asset
+
+    def block_timestamp(self, block: int) -> int:
+        return int(self.started + (block - self.start_block) * self.block_time)
+
+    def price(self, asset_id: bytes, block: Optional[int] = None) -> tuple:
+        """(price scaled by 1e8, timestamp, isAnomalous) for an asset id"""
+        seed = int.from_bytes(asset_id[:4], "big")
+        base = 10 + seed % 100000
+        block = self.block_number() if block is None else block
+        price = base * (1 + 0.01 * math.sin(block / 10 + seed))
+        return int(price * 1e8), self.block_timestamp(block), False
+
+    def _block_param(self, value: Any) -> int:
+        if value in (None, "latest", "safe", "finalized", "pending"):
+            return self.block_number()
+        if value == "earliest":
+            return 0
+        return int(value, 16) if isinstance(value, str) else int(value)
+
+    def get_logs(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """AssetAdded and PriceUpdated logs for every listed asset in every block of the range"""
+        from_block = self._block_param(query.get("fromBlock"))
+        to_block = min(self._block_param(query.get("toBlock")), self.block_number())
+        if self.max_log_range and to_block - from_block + 1 > self.max_log_range:
+            raise RPCError(-32005, f"block range too large, max {self.max_log_range} blocks")
+
+        topics = query.get("topics") or []
+        wanted = topics[0] if topics else None
+        if isinstance(wanted, str):
+            wanted = [wanted]
+        wanted = {t.lower() for t in wanted} if wanted is not None else {PRICE_UPDATED_TOPIC, ASSET_ADDED_TOPIC}
+
+        address = query.get("address") or "0x" + "00" * 20
+        if isinstance(address, list):
+            address = address[0]
+
+        logs = []
+        for block in range(max(from_block, 1), to_block + 1):
+            block_hash = "0x" + Web3.keccak(block.to_bytes(8, "big")).hex()[2:]
+            listed = [asset for asset in self.asset_ids if self.listed_at[asset] <= block]
+            for index, asset_id in enumerate(listed):
+                tx_hash = "0x" + Web3.keccak(block.to_bytes(8, "big") + asset_id).hex()[2:]
+                if ASSET_ADDED_TOPIC in wanted and self.listed_at[asset_id] == block:
+                    logs.append({
+                        "address": address,
+                        "topics": [ASSET_ADDED_TOPIC, "0x" + asset_id.hex(), "0x" + asset_id.hex()],
+                        "data": "0x" + encode(["string"], [self.symbols[asset_id]]).hex(),
+                        "blockNumber": hex(block),
+                        "blockHash": block_hash,
+                        "transactionHash": tx_hash,
+                        "transactionIndex": hex(index),
+                        "logIndex": hex(len(listed) + index),
+                        "removed": False,
+                    })
+                if PRICE_UPDATED_TOPIC not in wanted:
+                    continue
+                price, timestamp, _ = self.price(asset_id, block)
+                logs.append({
+                    "address": address,
+                    "topics": [PRICE_UPDATED_TOPIC, "0x" + asset_id.hex()],
+                    "data": "0x" + encode(["int64", "uint64", "uint64"], [price, timestamp, 0]).hex(),
+                    "blockNumber": hex(block),
+                    "blockHash": block_hash,
+                    "transactionHash": tx_hash,
+                    "transactionIndex": hex(index),
+                    "logIndex": hex(index),
+                    "removed": False,
+                })
+        return logs
+
+    def send_raw_transaction(self, raw_hex: str) -> str:
+        raw = Web3.to_bytes(hexstr=raw_hex)
+        nonce, gas_price = (int.from_bytes(field, "big") for field in rlp.decode(raw)[:2])
+        sender = Account.recover_transaction(raw)
+        tx_hash = "0x" + bytes(Web3.keccak(raw)).hex()
+
+        with self._lock:
+            self._mine()
+            if nonce < self._mined_nonce.get(sender, 0):
+                raise RPCError(-32000, "nonce too low")
+            current = self._pending.get((sender, nonce))
+            if current and current["hash"] == tx_hash:
+                raise RPCError(-32000, "already known")
+            if current and gas_price < current["gas_price"] * 1.1:
+                raise RPCError(-32000, "replacement transaction underpriced")
+            self._pending[(sender, nonce)] = {
+                "hash": tx_hash, "sender": sender, "nonce": nonce,
+                "gas_price": gas_price, "sent": time.time(),
+            }
+        return tx_hash
+
+    def _mine(self) -> None:
+        """Mine, in nonce order, every transaction that has waited a block and pays enough"""
+        now = time.time()
+        for sender in {tx["sender"] for tx in self._pending.values()}:
+            while True:
+                nonce = self._mined_nonce.get(sender, 0)
+                tx = self._pending.get((sender, nonce))
+                if tx is None or tx["gas_price"] < self.gas_price or now - tx["sent"] < self.block_time:
+                    break
+                del self._pending[(sender, nonce)]
+                self._mined_nonce[sender] = nonce + 1
+                block = self.block_number()
+                self._receipts[tx["hash"]] = {
+                    "transactionHash": tx["hash"],
+                    "transactionIndex": "0x0",
+                    "blockHash": "0x" + bytes(Web3.keccak(block.to_bytes(8, "big"))).hex(),
+                    "blockNumber": hex(block),
+                    "from": sender,
+                    "to": None,
+                    "cumulativeGasUsed": hex(50000),
+                    "gasUsed": hex(50000),
+                    "effectiveGasPrice": hex(tx["gas_price"]),
+                    "contractAddress": None,
+                    "logs": [],
+                    "logsBloom": "0x" + "00" * 256,
+                    "status": "0x1",
+                    "type": "0x0",
+                }
+
+    def transaction_receipt(self, tx_hash: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._mine()
+            return self._receipts.get(tx_hash.lower())
+
+    def transaction_count(self, address: str, tag: str = "latest") -> int:
+        with self._lock:
+            self._mine()
+            sender = Web3.to_checksum_address(address)
+            nonce = self._mined_nonce.get(sender, 0)
+            if tag == "pending":
+                while (sender, nonce) in self._pending:
+                    nonce += 1
+            return nonce
+
+    def call(self, data: bytes) -> bytes:
+        selector, args = data[:4], data[4:]
+        if selector == GET_LATEST_PRICE:
+            (asset_id,) = decode(["bytes32"], args)
+            return encode(["int64", "uint64", "bool"], list(self.price(asset_id)))
+        if selector == GET_LATEST_PRICES and self.support_batch_view:
+            (asset_ids,) = decode(["bytes32[]"], args)
+            rows = [self.price(asset_id) for asset_id in asset_ids]
+            return encode(["int64[]", "uint64[]", "bool[]"],
+                          [[r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]])
+        if selector == GET_SUPPORTED_ASSETS:
+            return encode(["bytes32[]"], [list(self.asset_ids)])
+        if selector == GET_ASSET_SYMBOL:
+            (asset_id,) = decode(["bytes32"], args)
+            return encode(["string"], [self.symbols.get(bytes(asset_id), "")])
+        # Unknown selector: the contract's empty fallback returns no data
+        return b""
+
+
+class StubRPCHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like a real node
+    disable_nagle_algorithm = True
+    chain: StubChain
+    latency: float = 0.0
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+    error_rate: float = 0.0
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def handle(self):
+        try:
+            super().handle()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on the connection (deadline, a hedge that lost)
+            pass
+
+    def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        method, params = request.get("method"), request.get("params", [])
+        reply = {"jsonrpc": "2.0", "id": request.get("id")}
+        try:
+            if method == "eth_call":
+                data = Web3.to_bytes(hexstr=params[0].get("data") or params[0].get("input"))
+                reply["result"] = "0x" + self.chain.call(data).hex()
+            elif method == "eth_getLogs":
+                reply["result"] = self.chain.get_logs(params[0])
+            elif method == "eth_sendRawTransaction":
+                reply["result"] = self.chain.send_raw_transaction(params[0])
+            elif method == "eth_getTransactionReceipt":
+                reply["result"] = self.chain.transaction_receipt(params[0])
+            elif method == "eth_getTransactionCount":
+                reply["result"] = hex(self.chain.transaction_count(*params[:2]))
+            elif method == "eth_gasPrice":
+                reply["result"] = hex(self.chain.gas_price)
+            elif method == "eth_chainId":
+                reply["result"] = hex(CHAIN_ID)
+            elif method == "eth_blockNumber":
+                reply["result"] = hex(self.chain.block_number())
+            else:
+                reply["error"] = {"code": -32601, "message": f"Method {method} not supported"}
+        except RPCError as e:
+            reply["error"] = {"code": e.code, "message": str(e)}
+        except Exception as e:
+            reply["error"] = {"code": -32000, "message": str(e)}
+        return reply
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        slow = self.slow_rate and random.random() < self.slow_rate
+        delay = self.slow_latency if slow else self.latency
+        if delay:
+            time.sleep(delay)
+
+        if self.error_rate and random.random() < self.error_rate:
+            self.send_error(503, "Injected failure")
+            return
+
+        if isinstance(body, list):
+            payload = [self._answer(request) for request in body]
+        else:
+            payload = self._answer(body)
+
+        data = json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up waiting (e.g. a per-call deadline)
+            self.close_connection = True
+
+
+def make_server(port: int = 0, latency_ms: float = 0.0, support_batch_view: bool = True,
+                slow_rate: float = 0.0, slow_latency_ms: float = 0.0, error_rate: float = 0.0,
+                **chain_options) -> ThreadingHTTPServer:
+    """
+    Build a stub server (port 0 picks a free port); call serve_forever() to run it
+    The fault settings can be changed later on server.RequestHandlerClass.
+    """
+    handler = type("Handler", (StubRPCHandler,), {
+        "chain": StubChain(support_batch_view, **chain_options),
+        "latency": latency_ms / 1000,
+        "slow_rate": slow_rate,
+        "slow_latency": slow_latency_ms / 1000,
+        "error_rate": error_rate,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_in_background(port: int = 0, latency_ms: float = 0.0, support_batch_view: bool = True,
+                        **options) -> ThreadingHTTPServer:
+    """Start a stub server on a daemon thread; its URL is server_url(server)"""
+    server = make_server(port, latency_ms, support_batch_view, **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def server_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}"
+
+
+def main():
+    """Run the stub server"""
+    parser = argparse.ArgumentParser(description="Stub JSON-RPC server for SentinelOracle reads")
+    parser.add_argument("--port", type=int, default=8545)
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per HTTP request (ms)")
+    parser.add_argument("--no-batch-view", action="store_true",
+                        help="Behave like a contract deployed without getLatestPrices")
+    parser.add_argument("--block-time", type=float, default=2.0, help="Seconds per block")
+    parser.add_argument("--start-block", type=int, default=1, help="Block number at startup")
+    parser.add_argument("--max-log-range", type=int, help="Reject eth_getLogs ranges wider than this")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="Fraction of requests delayed by --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=0.0, help="Delay for slow requests (ms)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with HTTP 503")
+    args = parser.parse_args()
+
+    server = make_server(args.port, args.latency, not args.no_batch_view, slow_rate=args.slow_rate,
+                         slow_latency_ms=args.slow_latency, error_rate=args.error_rate,
+                         block_time=args.block_time, start_block=args.start_block,
+                         max_log_range=args.max_log_range)
+    logger.info(f"🧪 Stub RPC listening on {server_url(server)} (latency {args.latency:.0f}ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("🛑 Stub RPC stopped")
+
+
+if __name__ == "__main__":
+    main()
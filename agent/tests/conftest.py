@@ -0,0 +1,6 @@
+"""Agent modules import each other by bare name, as when run from agent/"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
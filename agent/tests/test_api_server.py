@@ -0,0 +1,138 @@
+"""API endpoints: per-item batch results, price history queries, conditional status"""
+
+import json
+import os
+
+import pytest
+
+# No chain: the server tracks the default assets (empty values also win over a .env)
+os.environ["RPC_URLS"] = ""
+os.environ["ETH_RPC_URL"] = ""
+
+import api_server  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return api_server.app.test_client()
+
+
+@pytest.fixture
+def events(monkeypatch):
+    published = []
+    monkeypatch.setattr(api_server.stream, "publish", lambda changes: published.extend(changes))
+    return published
+
+
+def post(client, updates):
+    response = client.post("/api/update/batch", json=updates)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_bad_items_are_rejected_individually(client, events):
+    reply = post(client, [
+        {"asset": "BTC/USD", "price": 110_000.0},
+        {"asset": ["BTC/USD"], "price": 1.0},
+        {"asset": {"symbol": "BTC/USD"}},
+        {"asset": "ETH/USD", "price": True},
+        {"asset": "ETH/USD", "price": "4000"},
+        {"asset": "NOT/LISTED", "price": 1.0},
+        "not an update",
+        {"asset": "ETH/USD", "price": 4_000.0},
+    ])
+
+    assert [result["success"] for result in reply["results"]] == [True, False, False, False, False, False, False, True]
+    assert reply["accepted"] == 2
+    assert reply["rejected"] == 6
+    assert reply["success"] is False
+    assert reply["results"][1]["error"] == "Asset must be a string"
+    assert reply["results"][3]["error"] == "Price must be a finite number"
+    assert reply["results"][5]["error"] == "Unsupported asset"
+    assert [asset for asset, _ in events] == ["BTC/USD", "ETH/USD"]
+    assert api_server.agent_state["assets"]["ETH/USD"]["last_price"] == 4_000.0
+
+
+@pytest.mark.parametrize("update", [
+    {"asset": "BTC/USD", "price": float("nan")},
+    {"asset": "BTC/USD", "price": float("inf")},
+    {"asset": "BTC/USD", "price": 1.0, "z_score": float("-inf")},
+    {"asset": "BTC/USD", "price": 1.0, "timeframe_z_scores": 5},
+    {"asset": "BTC/USD", "price": 1.0, "timeframe_z_scores": {"30": float("nan")}},
+])
+def test_non_finite_and_malformed_scores_are_rejected(client, events, update):
+    before = client.get("/api/status").get_data()
+    # NaN / Infinity are what Python's json module writes for non-finite floats
+    response = client.post("/api/update/batch", data=json.dumps([update]), content_type="application/json")
+    assert response.get_json()["results"][0]["success"] is False
+    assert events == []
+    status = client.get("/api/status").get_data()
+    assert status == before
+    json.loads(status, parse_constant=lambda name: pytest.fail(f"{name} in /api/status"))
+
+
+def test_timeframe_scores_with_warming_horizons_are_accepted(client, events):
+    reply = post(client, [{"asset": "BTC/USD", "price": 1.0, "timeframe_z_scores": {"30": 0.5, "300": None}}])
+    assert reply["accepted"] == 1
+
+
+def test_ndjson_body(client, events):
+    body = b'{"asset": "LINK/USD", "price": 20.5}\n\n{"asset": "AVAX/USD", "price": 30}\n'
+    reply = client.post("/api/update/batch", data=body, content_type="application/x-ndjson").get_json()
+    assert reply["accepted"] == 2
+
+
+@pytest.mark.parametrize("body, status", [
+    (b"[{", 400),
+    (b'{"asset": "BTC/USD"}', 400),
+])
+def test_malformed_body(client, body, status):
+    response = client.post("/api/update/batch", data=body, content_type="application/json")
+    assert response.status_code == status
+
+
+def test_too_many_items(client, monkeypatch):
+    monkeypatch.setattr(api_server, "BATCH_MAX_ITEMS", 2)
+    response = client.post("/api/update/batch", json=[{"asset": "BTC/USD", "price": 1.0}] * 3)
+    assert response.status_code == 413
+
+
+def test_price_history_range_and_rollup(client, events):
+    post(client, [{"asset": "AVAX/USD", "price": price} for price in (30.0, 31.0, 29.0)])
+    raw = client.get("/api/price-history?asset=AVAX/USD&from=0").get_json()
+    assert raw["price"][-3:] == [30.0, 31.0, 29.0]
+
+    (bucket,) = client.get("/api/price-history?asset=AVAX/USD&resolution=1h&limit=1").get_json()["close"]
+    assert bucket == 29.0
+
+
+@pytest.mark.parametrize("query", ["from=inf", "to=-inf", "from=nan", "from=soon", "limit=-1", "resolution=2h"])
+def test_price_history_rejects_bad_parameters(client, query):
+    response = client.get(f"/api/price-history?asset=BTC/USD&{query}")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_status_revalidates_with_its_etag(client, events):
+    first = client.get("/api/status")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+
+    unchanged = client.get("/api/status", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.get_data() == b""
+
+    post(client, [{"asset": "LINK/USD", "price": 20.0}])
+    changed = client.get("/api/status", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert changed.get_json()["assets"]["LINK/USD"]["last_price"] == 20.0
+
+
+def test_status_body_is_rebuilt_only_after_a_change(client, events):
+    client.get("/api/status")
+    cached = api_server._status_cache
+    client.get("/api/status")
+    assert api_server._status_cache is cached
+
+    post(client, [{"asset": "LINK/USD", "price": 21.0}])
+    client.get("/api/status")
+    assert api_server._status_cache[0] > cached[0]
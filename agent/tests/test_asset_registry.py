@@ -0,0 +1,78 @@
+"""Asset registry: loading from the contract, AssetAdded refreshes and the offline fallback"""
+
+import time
+
+import pytest
+from web3 import Web3
+
+from asset_registry import DEFAULT_ASSETS, AssetRegistry
+from chain_reader import asset_id
+from stub_rpc import serve_in_background, server_url
+
+CONTRACT = "0x" + "11" * 20
+
+
+@pytest.fixture
+def node():
+    server = serve_in_background(block_time=0.05, assets=["BTC/USD", "ETH/USD"])
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def registry_for(node, **options):
+    return AssetRegistry(Web3(Web3.HTTPProvider(server_url(node))), CONTRACT, **options)
+
+
+def test_load_reads_the_listed_assets(node):
+    registry = registry_for(node, interval=0)
+    seen = []
+    registry.subscribe(seen.append)
+    assert registry.load() == ["BTC/USD", "ETH/USD"]
+    assert seen == [["BTC/USD", "ETH/USD"]]
+    assert registry.id_of("ETH/USD") == bytes(asset_id("ETH/USD"))
+    assert registry.symbol_of(asset_id("BTC/USD")) == "BTC/USD"
+    assert "SOL/USD" not in registry and registry.symbol_of(asset_id("SOL/USD")) is None
+
+
+def test_refresh_picks_up_newly_listed_assets(node):
+    chain = node.RequestHandlerClass.chain
+    registry = registry_for(node, interval=0)
+    registry.load()
+    seen = []
+    registry.subscribe(seen.append)
+    time.sleep(0.1)
+    assert registry.refresh() == []
+
+    # Listed by a transaction in the next block
+    chain.add_asset("SOL/USD", block=chain.block_number() + 1)
+    time.sleep(0.1)
+    assert registry.refresh() == ["SOL/USD"]
+    assert registry.refresh() == []
+    assert registry.symbols == ["BTC/USD", "ETH/USD", "SOL/USD"]
+    assert seen == [["SOL/USD"]]
+
+
+def test_maybe_refresh_waits_for_the_interval(node):
+    chain = node.RequestHandlerClass.chain
+    registry = registry_for(node, interval=60)
+    registry.load()
+    chain.add_asset("SOL/USD", block=chain.block_number() + 1)
+    time.sleep(0.1)
+    assert registry.maybe_refresh() == []
+    registry.last_refresh -= 61
+    assert registry.maybe_refresh() == ["SOL/USD"]
+    assert registry_for(node, interval=0).maybe_refresh() == []
+
+
+def test_unreachable_contract_falls_back_to_defaults():
+    registry = AssetRegistry(Web3(Web3.HTTPProvider("http://127.0.0.1:9")), CONTRACT, interval=0)
+    assert registry.load() == DEFAULT_ASSETS
+    assert registry.refresh() == []
+    assert registry.id_of("BTC/USD") == bytes(asset_id("BTC/USD"))
+
+
+def test_no_contract_uses_the_given_defaults():
+    registry = AssetRegistry(interval=0, defaults=["XAU/USD"])
+    assert registry.load() == ["XAU/USD"]
+    assert registry.refresh() == []
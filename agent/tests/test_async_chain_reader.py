@@ -0,0 +1,70 @@
+"""Concurrent reads against the stub node: values, deadlines and failover"""
+
+import asyncio
+
+import pytest
+
+from async_chain_reader import AsyncPriceReader
+from chain_reader import PriceReading, asset_id
+from stub_rpc import DEFAULT_ASSETS, serve_in_background, server_url
+
+CONTRACT = "0x" + "11" * 20
+
+
+@pytest.fixture
+def node():
+    servers = []
+
+    def start(**options):
+        server = serve_in_background(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def expected(server, assets):
+    chain = server.RequestHandlerClass.chain
+    return {asset: PriceReading(chain.price(asset_id(asset))[0] / 1e8, *chain.price(asset_id(asset))[1:])
+            for asset in assets}
+
+
+def test_reads_every_asset(node):
+    server = node(block_time=60)
+    reader = AsyncPriceReader(server_url(server), CONTRACT, concurrency=2)
+    try:
+        assert reader.read_prices(DEFAULT_ASSETS) == expected(server, DEFAULT_ASSETS)
+        assert reader.read_prices([]) == {}
+    finally:
+        reader.close()
+
+
+def test_coroutine_can_be_awaited_directly(node):
+    server = node(block_time=60)
+    reader = AsyncPriceReader(server_url(server), CONTRACT)
+    assert asyncio.run(reader.fetch_prices(["BTC/USD"])) == expected(server, ["BTC/USD"])
+
+
+def test_missed_deadline_reads_as_none(node):
+    server = node(block_time=60, slow_rate=1.0, slow_latency_ms=1000)
+    reader = AsyncPriceReader(server_url(server), CONTRACT, deadline=0.1)
+    try:
+        assert reader.read_prices(["BTC/USD", "ETH/USD"]) == {"BTC/USD": None, "ETH/USD": None}
+    finally:
+        reader.close()
+
+
+def test_failing_endpoint_fails_over(node):
+    healthy = node(block_time=60)
+    failing = node(block_time=60, error_rate=1.0)
+    reader = AsyncPriceReader([server_url(failing), server_url(healthy)], CONTRACT)
+    try:
+        assert reader.read_prices(DEFAULT_ASSETS) == expected(healthy, DEFAULT_ASSETS)
+        stats = reader.pool.stats()
+        assert stats[server_url(failing)]["error_rate"] > 0
+        assert stats[server_url(healthy)]["error_rate"] == 0
+    finally:
+        reader.close()
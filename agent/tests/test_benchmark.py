@@ -0,0 +1,30 @@
+"""Benchmark suite plumbing: every engine runs, cases are planned, regressions are caught"""
+
+import json
+
+import pytest
+
+from benchmark import ENGINES, compare, plan_cases, run_case
+
+
+@pytest.mark.parametrize("engine", sorted(ENGINES))
+def test_every_engine_runs_a_small_case(engine):
+    result = run_case(engine, window=20, asset_count=3, cycles=15, max_seconds=5, with_memory=True)
+    assert (result["engine"], result["window"], result["assets"], result["cycles"]) == (engine, 20, 3, 15)
+    assert result["ticks_per_sec"] > 0 and result["memory_bytes_per_series"] > 0
+    assert result["cycle_latency_us"]["p50"] <= result["cycle_latency_us"]["max"]
+
+
+def test_curves_share_the_smallest_asset_count_and_window():
+    cases = plan_cases(["matrix"], [30, 300], [5, 50], "curves")
+    assert cases == [("matrix", 30, 5), ("matrix", 300, 5), ("matrix", 30, 50)]
+    assert len(plan_cases(["matrix", "ewma"], [30, 300], [5, 50], "full")) == 8
+
+
+def test_compare_counts_slowdowns_beyond_the_tolerance(tmp_path):
+    def result(engine, p50):
+        return {"engine": engine, "window": 30, "assets": 5, "cycle_latency_us": {"p50": p50}}
+
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps({"results": [result("matrix", 10.0), result("ewma", 10.0)]}))
+    assert compare([result("matrix", 11.0), result("ewma", 20.0), result("robust", 99.0)], str(path), 0.2) == 1
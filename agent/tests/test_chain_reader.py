@@ -0,0 +1,90 @@
+"""Batch price reads against the stub node: strategy fallback, and no fallback on transient failures"""
+
+import pytest
+
+from chain_reader import BatchPriceReader, PriceReading, asset_id
+from rpc_pool import RPCPool, PooledHTTPProvider
+from stub_rpc import DEFAULT_ASSETS, serve_in_background, server_url
+from web3 import Web3
+
+CONTRACT = "0x" + "11" * 20
+
+
+@pytest.fixture
+def node():
+    servers = []
+
+    def start(**options):
+        server = serve_in_background(**options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def reader_for(server, pooled=True, **options) -> BatchPriceReader:
+    url = server_url(server)
+    if pooled:
+        w3 = Web3(PooledHTTPProvider(RPCPool([url], hedge=False, max_failures=1000)))
+        return BatchPriceReader(w3, CONTRACT, **options)
+    return BatchPriceReader(Web3(Web3.HTTPProvider(url)), CONTRACT, rpc_url=url, **options)
+
+
+def expected(server, assets):
+    chain = server.RequestHandlerClass.chain
+    return {asset: PriceReading(chain.price(asset_id(asset))[0] / 1e8, *chain.price(asset_id(asset))[1:])
+            for asset in assets}
+
+
+def test_view_reads_every_asset(node):
+    server = node(block_time=1000)
+    reader = reader_for(server)
+    assert reader.read_prices(DEFAULT_ASSETS) == expected(server, DEFAULT_ASSETS)
+    assert reader.strategy == BatchPriceReader.VIEW
+
+
+@pytest.mark.parametrize("pooled", [True, False])
+def test_missing_view_falls_back_to_rpc_batches(node, pooled):
+    server = node(support_batch_view=False, block_time=1000)
+    reader = reader_for(server, pooled)
+    assert reader.read_prices(DEFAULT_ASSETS) == expected(server, DEFAULT_ASSETS)
+    assert reader.strategy == BatchPriceReader.RPC_BATCH
+
+
+def test_without_batch_support_reads_one_by_one(node):
+    server = node(support_batch_view=False, block_time=1000)
+    reader = BatchPriceReader(Web3(Web3.HTTPProvider(server_url(server))), CONTRACT)
+    assert reader.read_prices(DEFAULT_ASSETS) == expected(server, DEFAULT_ASSETS)
+    assert reader.strategy == BatchPriceReader.SEQUENTIAL
+
+
+@pytest.mark.parametrize("pooled", [True, False])
+def test_single_503_keeps_the_view_strategy(node, pooled):
+    server = node(block_time=1000)
+    reader = reader_for(server, pooled)
+    server.RequestHandlerClass.error_rate = 1.0
+    assert reader.read_prices(DEFAULT_ASSETS) == {asset: None for asset in DEFAULT_ASSETS}
+    assert reader.strategy == BatchPriceReader.VIEW
+
+    server.RequestHandlerClass.error_rate = 0.0
+    assert reader.read_prices(DEFAULT_ASSETS) == expected(server, DEFAULT_ASSETS)
+    assert reader.strategy == BatchPriceReader.VIEW
+
+
+def test_failure_during_rpc_batches_keeps_that_strategy(node):
+    server = node(support_batch_view=False, block_time=1000)
+    reader = reader_for(server)
+    reader.read_prices(DEFAULT_ASSETS)
+    server.RequestHandlerClass.error_rate = 1.0
+    assert set(reader.read_prices(DEFAULT_ASSETS).values()) == {None}
+    assert reader.strategy == BatchPriceReader.RPC_BATCH
+
+
+def test_unknown_asset_reads_as_none(node):
+    server = node(support_batch_view=False, block_time=1000)
+    reader = reader_for(server)
+    readings = reader.read_prices(["BTC/USD", "NOT/LISTED"])
+    assert readings["BTC/USD"] is not None
@@ -0,0 +1,128 @@
+"""Single-series detectors: scores against explicit numpy computations"""
+
+import numpy as np
+import pytest
+
+from detectors import MAD_TO_STD, create_detector
+
+
+def prices(n: int = 200, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100_000.0 + np.cumsum(rng.normal(0, 50, n))
+
+
+def test_robust_score_is_modified_z_score():
+    values = prices()
+    detector = create_detector("robust", window_size=25, threshold=3.5, min_samples=10)
+    for i, value in enumerate(values):
+        detector.add_price(value)
+        window = values[max(0, i - 24):i + 1]
+        score = detector.calculate_z_score(value)
+        if len(window) < 10:
+            assert score is None
+            continue
+        median = np.median(window)
+        mad = np.median(np.abs(window - median))
+        assert score == pytest.approx((value - median) / (MAD_TO_STD * mad), rel=1e-9)
+
+
+def test_robust_scale_ignores_a_spike():
+    detector = create_detector("robust", window_size=30, threshold=3.5)
+    for value in prices(29):
+        detector.add_price(value)
+    scale = detector.std
+    detector.add_price(1e9)
+    assert detector.std == pytest.approx(scale, rel=0.2)
+    flagged, score, reason = detector.is_anomaly(1e9)
+    assert flagged and score > 1000 and reason.startswith("Robust z-score")
+
+
+def test_robust_flat_window_scores_zero():
+    detector = create_detector("robust", window_size=10, min_samples=3)
+    for _ in range(5):
+        detector.add_price(42.0)
+    assert detector.is_anomaly(42.0) == (False, 0, "Normal (z=0.00)")
+
+
+def test_ewma_scores_against_moments_before_the_price():
+    half_life = 10.0
+    alpha = 1 - 0.5 ** (1 / half_life)
+    detector = create_detector("ewma", half_life=half_life, min_samples=5)
+    mean = var = None
+    for i, value in enumerate(prices(100)):
+        prior = (mean, var)
+        detector.add_price(value)
+        mean, var = (value, 0.0) if mean is None else (
+            mean + alpha * (value - mean), (1 - alpha) * (var + alpha * (value - mean) ** 2))
+        score = detector.calculate_z_score(value)
+        if i + 1 < 5:
+            assert score is None
+        elif prior[1] > 0:
+            assert score == pytest.approx((value - prior[0]) / np.sqrt(prior[1]), rel=1e-9)
+
+
+def test_ewma_spike_is_not_hidden_by_itself():
+    detector = create_detector("ewma", half_life=2.0, threshold=3.0, min_samples=5)
+    for value in prices(50):
+        detector.add_price(value)
+    detector.add_price(200_000.0)
+    assert detector.is_anomaly(200_000.0)[0]
+
+
+def test_ewma_decays_by_elapsed_time():
+    timed = create_detector("ewma", half_life=5.0, sample_interval=10.0)
+    counted = create_detector("ewma", half_life=5.0)
+    for value in prices(20):
+        timed.add_price(value, elapsed=30.0)
+        counted.stats.push(value, weight=3.0)
+    assert (timed.stats.mean, timed.stats.var) == (counted.stats.mean, counted.stats.var)
+
+
+def test_ewma_state_round_trip():
+    detector = create_detector("ewma", half_life=5.0)
+    for value in prices(30):
+        detector.add_price(value)
+    restored = create_detector("ewma", half_life=5.0)
+    restored.set_state(detector.get_state())
+    assert restored.calculate_z_score(100_500.0) == detector.calculate_z_score(100_500.0)
+    assert (restored.mean, restored.std, restored.sample_count) == (detector.mean, detector.std, 30)
+
+
+def test_multiframe_scores_every_horizon_from_one_buffer():
+    timeframes = (5, 20, 60)
+    values = prices(150)
+    detector = create_detector("multiframe", timeframes=timeframes, min_samples=3)
+    for i, value in enumerate(values):
+        detector.add_price(value)
+        best = detector.calculate_z_score(value)
+        scores = detector.timeframe_z_scores()
+        for window in timeframes:
+            ready = i + 1 >= (3 if window == 5 else window)
+            if not ready:
+                assert scores[window] is None
+                continue
+            held = values[max(0, i + 1 - window):i + 1]
+            std = held.std()
+            expected = 0 if std == 0 else (value - held.mean()) / std
+            assert scores[window] == pytest.approx(expected, rel=1e-6, abs=1e-9)
+        ready_scores = [z for z in scores.values() if z is not None]
+        assert best == (max(ready_scores, key=abs) if ready_scores else None)
+
+
+def test_multiframe_reason_names_the_horizon():
+    detector = create_detector("multiframe", timeframes=(10, 40), threshold=3.0)
+    for value in prices(40):
+        detector.add_price(value)
+    detector.add_price(150_000.0)
+    flagged, _, reason = detector.is_anomaly(150_000.0)
+    assert flagged and reason.endswith(f"{detector.fired_timeframe}-sample window)")
+
+
+def test_multiframe_state_round_trip():
+    detector = create_detector("multiframe", timeframes=(5, 30))
+    for value in prices(70):
+        detector.add_price(value)
+    restored = create_detector("multiframe", timeframes=(5, 30))
+    restored.set_state(detector.get_state())
+    assert restored.calculate_z_score(100_000.0) == detector.calculate_z_score(100_000.0)
+    assert restored.timeframe_z_scores() == detector.timeframe_z_scores()
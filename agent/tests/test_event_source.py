@@ -0,0 +1,65 @@
+"""Event log source against the stub node: confirmed ranges, chunking and seeking"""
+
+import pytest
+from web3 import Web3
+
+from chain_reader import asset_id
+from event_source import PRICE_UPDATED, EventLogSource
+from stub_rpc import DEFAULT_ASSETS, serve_in_background, server_url
+
+CONTRACT = "0x" + "11" * 20
+
+
+@pytest.fixture
+def node():
+    servers = []
+
+    def start(**options):
+        # Blocks never advance during a test: the head stays at start_block
+        server = serve_in_background(block_time=3600, start_block=50, **options)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def source_for(server, **options):
+    return EventLogSource(Web3(Web3.HTTPProvider(server_url(server))), CONTRACT, **options)
+
+
+def test_reads_confirmed_blocks_once_in_chain_order(node):
+    server = node()
+    chain = server.RequestHandlerClass.chain
+    source = source_for(server, confirmations=3, lookback=10)
+    events = source.poll()
+
+    assert {event.block for event in events} == set(range(38, 48))
+    assert len(events) == 10 * len(DEFAULT_ASSETS)
+    assert [event.position for event in events] == sorted(event.position for event in events)
+    assert all(event.name == PRICE_UPDATED for event in events)
+    event = events[0]
+    price, timestamp, _ = chain.price(event.asset_id, event.block)
+    assert (event.price, event.timestamp) == (price / 1e8, timestamp)
+    assert source.poll() == []
+
+
+def test_too_large_ranges_are_split(node):
+    server = node(max_log_range=4)
+    source = source_for(server, confirmations=0, lookback=20, chunk_size=100)
+    events = source.poll()
+    assert source.chunk_size <= 4
+    assert {event.block for event in events} == set(range(31, 51))
+
+
+def test_seek_rereads_from_a_block(node):
+    server = node()
+    source = source_for(server, confirmations=0, lookback=5)
+    first = source.poll()
+    source.seek(48)
+    again = source.poll()
+    assert {event.block for event in again} == {48, 49, 50}
+    assert again == [event for event in first if event.block >= 48]
+    assert {event.asset_id for event in again} == {bytes(asset_id(symbol)) for symbol in DEFAULT_ASSETS}
@@ -0,0 +1,100 @@
+"""Flag aggregator: bursts become one batch transaction, single assets use the per-asset calls"""
+
+import time
+
+from web3 import Web3
+
+from flag_aggregator import CLEAR_GAS_BASE, CLEAR_GAS_PER_ASSET, FLAG_GAS_BASE, FLAG_GAS_PER_ASSET, FlagAggregator
+
+
+def function_abi(name, *inputs):
+    return {"type": "function", "name": name, "stateMutability": "nonpayable", "outputs": [],
+            "inputs": [{"name": f"arg{i}", "type": kind} for i, kind in enumerate(inputs)]}
+
+
+ABI = [
+    function_abi("flagAnomaly", "bytes32", "string"),
+    function_abi("clearAnomaly", "bytes32"),
+    function_abi("flagAnomalies", "bytes32[]", "string[]"),
+    function_abi("clearAnomalies", "bytes32[]"),
+]
+CONTRACT = Web3().eth.contract(address="0x" + "11" * 20, abi=ABI)
+
+
+class RecordingTxManager:
+    """Records submissions; the test settles them by calling the callbacks"""
+
+    def __init__(self):
+        self.sent = []
+
+    def submit(self, function, gas, label, on_confirmed=None, on_failed=None):
+        self.sent.append((function.fn_name, function.args, gas, on_confirmed, on_failed))
+        return "0x" + "ab" * 32
+
+
+def asset(n):
+    return bytes([n]) * 32
+
+
+def test_burst_is_sent_as_one_batch_per_action():
+    txs = RecordingTxManager()
+    flags = FlagAggregator(txs, CONTRACT, window=0.05)
+    for n in range(3):
+        flags.flag(asset(n), f"spike {n}")
+    flags.clear(asset(7))
+    flags.clear(asset(8))
+    deadline = time.time() + 2
+    while len(txs.sent) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    flags.stop()
+
+    (flag_name, flag_args, flag_gas, _, _), (clear_name, clear_args, clear_gas, _, _) = txs.sent
+    assert flag_name == "flagAnomalies"
+    assert flag_args == ([asset(0), asset(1), asset(2)], ["spike 0", "spike 1", "spike 2"])
+    assert flag_gas == FLAG_GAS_BASE + 3 * FLAG_GAS_PER_ASSET
+    assert (clear_name, clear_args) == ("clearAnomalies", ([asset(7), asset(8)],))
+    assert clear_gas == CLEAR_GAS_BASE + 2 * CLEAR_GAS_PER_ASSET
+
+
+def test_single_asset_uses_the_per_asset_call():
+    txs = RecordingTxManager()
+    flags = FlagAggregator(txs, CONTRACT, window=0)
+    flags.flag(asset(1), "spike")
+    flags.clear(asset(2))
+    assert [(name, args) for name, args, *_ in txs.sent] == [
+        ("flagAnomaly", (asset(1), "spike")), ("clearAnomaly", (asset(2),))]
+
+
+def test_last_request_for_an_asset_wins_and_batches_are_capped():
+    txs = RecordingTxManager()
+    flags = FlagAggregator(txs, CONTRACT, window=60, max_batch=2)
+    flags.flag(asset(1), "spike")
+    flags.clear(asset(1))
+    for n in range(2, 5):
+        flags.flag(asset(n), "spike")
+    flags.flush()
+    assert [(name, len(args[0]) if isinstance(args[0], list) else 1) for name, args, *_ in txs.sent] == [
+        ("flagAnomalies", 2), ("flagAnomaly", 1), ("clearAnomaly", 1)]
+    flags.stop()
+
+
+def test_in_flight_until_settled_and_callbacks_run_on_confirmation():
+    txs = RecordingTxManager()
+    flags = FlagAggregator(txs, CONTRACT, window=60)
+    confirmed = []
+    flags.flag(asset(1), "spike", on_confirmed=confirmed.append)
+    flags.flag(asset(2), "spike")
+    assert flags.pending(asset(1), "flag") and not flags.pending(asset(1), "clear")
+    flags.flush()
+    assert flags.pending(asset(2))
+
+    _, _, _, on_confirmed, on_failed = txs.sent[0]
+    on_confirmed({"status": 1})
+    assert confirmed == [{"status": 1}]
+    assert not flags.pending(asset(1)) and not flags.pending(asset(2))
+
+    flags.clear(asset(3))
+    flags.flush()
+    txs.sent[-1][4](None)  # Rejected by the node
+    assert not flags.pending(asset(3))
+    flags.stop()
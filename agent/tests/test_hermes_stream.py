@@ -0,0 +1,54 @@
+"""SSEParser fed the same stream in every possible split"""
+
+import pytest
+
+from hermes_stream import SSEEvent, SSEParser
+
+STREAM = (b"retry: 3000\n"
+          b": keepalive\n\n"
+          b"id: 41\nevent: price_update\ndata: {\"a\": 1}\n\n"
+          b"data: first line\r\ndata: second line\r\n\r\n"
+          b"id: 42\ndata:no space\n\n")
+
+EXPECTED = [
+    SSEEvent("price_update", '{"a": 1}', "41"),
+    SSEEvent("message", "first line\nsecond line", "41"),
+    SSEEvent("message", "no space", "42"),
+]
+
+
+def parse(chunks):
+    parser = SSEParser()
+    events = [event for chunk in chunks for event in parser.feed(chunk)]
+    return parser, events
+
+
+def test_whole_stream():
+    parser, events = parse([STREAM])
+    assert events == EXPECTED
+    assert parser.last_event_id == "42"
+    assert parser.retry == 3000
+
+
+@pytest.mark.parametrize("split", range(1, len(STREAM)))
+def test_events_split_across_two_chunks(split):
+    _, events = parse([STREAM[:split], STREAM[split:]])
+    assert events == EXPECTED
+
+
+def test_one_byte_at_a_time():
+    _, events = parse([STREAM[i:i + 1] for i in range(len(STREAM))])
+    assert events == EXPECTED
+
+
+def test_multibyte_character_split_across_chunks():
+    data = "data: €\n\n".encode()
+    split = data.index(b"\xe2") + 1
+    _, events = parse([data[:split], data[split:]])
+    assert events == [SSEEvent("message", "€", None)]
+
+
+def test_incomplete_event_waits_for_blank_line():
+    parser = SSEParser()
+    assert parser.feed(b"data: pending\n") == []
+    assert parser.feed(b"\n") == [SSEEvent("message", "pending", None)]
@@ -0,0 +1,149 @@
+"""Vectorized detectors: the same scores as per-asset detectors, and correlation breaks"""
+
+import numpy as np
+import pytest
+
+from detectors import create_detector
+from matrix_detector import CorrelationBreakDetector, MatrixAnomalyDetector, VectorEWMADetector
+
+ASSETS = ["BTC/USD", "ETH/USD", "SOL/USD", "LINK/USD"]
+
+
+def walks(ticks=300, seed=3):
+    """Random walks with a few spikes and gaps (NaN = no price that cycle)"""
+    rng = np.random.default_rng(seed)
+    values = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, (ticks, len(ASSETS))), axis=0))
+    values[rng.random(values.shape) < 0.01] *= 1.05
+    values[rng.random(values.shape) < 0.05] = np.nan
+    return values
+
+
+def assert_same_scores(batched, per_asset, cycles, elapsed=None):
+    for t, row in enumerate(cycles):
+        gaps = None if elapsed is None else np.full(len(ASSETS), elapsed)
+        z_scores, flags, _ = batched.ingest(row, gaps)
+        for i, asset in enumerate(ASSETS):
+            if np.isnan(row[i]):
+                continue
+            detector = per_asset[asset]
+            detector.add_price(row[i], elapsed)
+            expected = detector.calculate_z_score(row[i])
+            if expected is None:
+                assert np.isnan(z_scores[i]), (t, asset)
+            else:
+                assert z_scores[i] == pytest.approx(expected, rel=1e-6, abs=1e-6), (t, asset)
+                assert flags[i] == (abs(expected) > batched.threshold)
+
+
+def test_matrix_detector_matches_per_asset_zscore():
+    batched = MatrixAnomalyDetector(ASSETS, window_size=20, threshold=2.5, min_samples=5)
+    per_asset = {asset: create_detector("zscore", 20, 2.5, min_samples=5, ddof=1) for asset in ASSETS}
+    assert_same_scores(batched, per_asset, walks())
+
+
+@pytest.mark.parametrize("sample_interval, elapsed", [(None, None), (10.0, 25.0)])
+def test_vector_ewma_matches_per_asset_ewma(sample_interval, elapsed):
+    batched = VectorEWMADetector(ASSETS, half_life=8, threshold=2.5, min_samples=5,
+                                 sample_interval=sample_interval)
+    per_asset = {asset: create_detector("ewma", 16, 2.5, min_samples=5, half_life=8,
+                                        sample_interval=sample_interval) for asset in ASSETS}
+    assert_same_scores(batched, per_asset, walks(), elapsed)
+
+
+def test_added_assets_start_empty_and_state_follows_asset_order():
+    detector = MatrixAnomalyDetector(ASSETS[:2], window_size=10)
+    for row in walks(30)[:, :2]:
+        detector.ingest(np.nan_to_num(row, nan=100.0))
+    assert detector.add_assets(["SOL/USD", "BTC/USD"]) == ["SOL/USD"]
+    assert detector.count.tolist()[-1] == 0 and np.isnan(detector.last_price[-1])
+
+    restored = MatrixAnomalyDetector(["SOL/USD", "ETH/USD", "BTC/USD"], window_size=10)
+    assert restored.set_state(detector.get_state(), detector.assets)
+    np.testing.assert_array_equal(restored.mean()[[2, 1]], detector.mean()[:2])
+    assert not MatrixAnomalyDetector(ASSETS, window_size=5).set_state(detector.get_state(), detector.assets)
+
+
+def test_evaluate_reports_only_priced_assets():
+    detector = VectorEWMADetector(ASSETS, half_life=4, min_samples=2)
+    results = detector.evaluate({"BTC/USD": 1.0, "ETH/USD": None, "UNKNOWN": 5.0})
+    assert list(results) == ["BTC/USD"]
+    assert results["BTC/USD"] == (False, None, "Insufficient data")
+
+
+def market(rounds, seed=0):
+    """Prices of assets that all follow one common factor"""
+    rng = np.random.default_rng(seed)
+    common = rng.normal(0, 0.01, (rounds, 1))
+    own = rng.normal(0, 0.001, (rounds, len(ASSETS)))
+    return 100 * np.exp(np.cumsum(common + own, axis=0))
+
+
+def test_split_batches_make_the_same_rounds():
+    whole = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    split = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    for t, row in enumerate(market(50)):
+        prices = dict(zip(ASSETS, row.tolist()))
+        whole.evaluate(prices, when=10.0 * t)
+        split.evaluate(dict(list(prices.items())[:2]), when=10.0 * t)
+        split.evaluate(dict(list(prices.items())[2:]), when=10.0 * t + 1)
+    assert split.model.count == whole.model.count == 49
+    np.testing.assert_allclose(split.model.cov, whole.model.cov)
+
+
+def test_incomplete_round_is_not_scored_as_zero_returns():
+    detector = CorrelationBreakDetector(ASSETS, half_life=10)
+    for row in market(5):
+        detector.evaluate(dict(zip(ASSETS, row.tolist())))
+    count = detector.model.count
+    detector.evaluate({"BTC/USD": 1.0})
+    assert detector.model.count == count
+    assert np.isnan(detector.pending).sum() == len(ASSETS) - 1
+
+
+def test_decoupled_feed_is_flagged():
+    detector = CorrelationBreakDetector(ASSETS, threshold=3.0, half_life=30, sample_interval=10)
+    prices = market(200)
+    for t, row in enumerate(prices[:-1]):
+        assert not detector.evaluate(dict(zip(ASSETS, row.tolist())), when=10.0 * t)
+    last = prices[-1].copy()
+    last[2] *= 1.05
+    breaks = detector.evaluate(dict(zip(ASSETS, last.tolist())), when=10.0 * len(prices))
+    assert list(breaks) == ["SOL/USD"]
+
+
+def test_break_waits_for_the_asset_to_report():
+    detector = CorrelationBreakDetector(ASSETS, threshold=3.0, half_life=30, sample_interval=10)
+    prices = market(200)
+    for t, row in enumerate(prices[:-1]):
+        detector.evaluate(dict(zip(ASSETS, row.tolist())), when=10.0 * t)
+    last = dict(zip(ASSETS, prices[-1].tolist()))
+    last["SOL/USD"] *= 1.05
+    # SOL's price arrives first; the round completes with the others
+    assert detector.evaluate({"SOL/USD": last.pop("SOL/USD")}) == {}
+    assert detector.evaluate(last) == {}
+    assert list(detector.evaluate({"SOL/USD": prices[-1][2]})) == ["SOL/USD"]
+
+
+def test_longer_gaps_decay_more():
+    prices = market(3)
+    slow = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    fast = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    for t, row in enumerate(prices):
+        fast.evaluate(dict(zip(ASSETS, row.tolist())), when=10.0 * t)
+        slow.evaluate(dict(zip(ASSETS, row.tolist())), when=50.0 * t)
+    # Same moves over five times the span: smaller per-interval returns
+    assert np.trace(slow.model.cov) < np.trace(fast.model.cov)
+
+
+def test_state_round_trip_keeps_the_pending_round():
+    detector = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    for t, row in enumerate(market(20)):
+        detector.evaluate(dict(zip(ASSETS, row.tolist())), when=10.0 * t)
+    detector.evaluate({"BTC/USD": 123.0}, when=205.0)
+
+    restored = CorrelationBreakDetector(ASSETS, half_life=10, sample_interval=10)
+    assert restored.set_state(detector.get_state(), ASSETS)
+    np.testing.assert_array_equal(restored.pending, detector.pending)
+    assert (restored.last_round_time, restored.pending_time) == (190.0, 205.0)
+    np.testing.assert_array_equal(restored.model.cov, detector.model.cov)
+    assert not restored.set_state(detector.get_state(), ASSETS[::-1])
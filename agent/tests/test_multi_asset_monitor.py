@@ -0,0 +1,102 @@
+"""Monitor read gating: no reads without a new block, and each on-chain sample scored once"""
+
+import time
+
+import pytest
+
+from pipeline import PriceTick
+from price_source import PriceRecorder
+from stub_rpc import serve_in_background, server_url
+
+
+@pytest.fixture
+def env(monkeypatch):
+    for name in ("RPC_URLS", "PRICE_RECORD", "SIMULATE_PRICE_NOISE"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("SNAPSHOT_DIR", "")
+    monkeypatch.setenv("REGISTRY_REFRESH_INTERVAL", "0")
+    return monkeypatch
+
+
+@pytest.fixture
+def offline_monitor(env, tmp_path):
+    """A replay-mode monitor over BTC/USD and ETH/USD: no chain, no API"""
+    path = str(tmp_path / "ticks.rec")
+    recorder = PriceRecorder(path)
+    recorder.write([PriceTick("BTC/USD", 1.0, 0.0), PriceTick("ETH/USD", 1.0, 0.0)])
+    recorder.close()
+    env.setenv("PRICE_READS", "replay")
+    env.setenv("PRICE_REPLAY_FILE", path)
+    env.setenv("DETECTOR_MODE", "ewma")
+    env.setenv("CORRELATION_CHECK", "false")
+    import multi_asset_monitor
+    monitor = multi_asset_monitor.MultiAssetMonitor()
+    yield monitor
+    monitor.publisher.close(timeout=1.0)
+
+
+def test_rereads_of_a_scored_sample_are_dropped(offline_monitor):
+    first = [PriceTick("BTC/USD", 100.0, 1.0, timestamp=10.0), PriceTick("ETH/USD", 5.0, 1.0, timestamp=10.0)]
+    assert len(offline_monitor.detect(first)) == 2
+    again = [PriceTick("BTC/USD", 100.0, 2.0, timestamp=10.0), PriceTick("ETH/USD", 5.5, 2.0, timestamp=20.0)]
+    assert [result.asset for result in offline_monitor.detect(again)] == ["ETH/USD"]
+    assert offline_monitor.unchanged_samples == 1
+    assert offline_monitor.last_sample_time == {"BTC/USD": 10.0, "ETH/USD": 20.0}
+
+
+def test_logs_at_one_timestamp_are_distinct_unless_repeated(offline_monitor):
+    monitor = offline_monitor
+    monitor.detect([PriceTick("BTC/USD", 100.0, 1.0, (5, 0), 10.0)])
+    ticks = [PriceTick("BTC/USD", 101.0, 1.0, (5, 1), 10.0), PriceTick("BTC/USD", 101.0, 1.0, (5, 2), 10.0)]
+    assert [result.price for result in monitor.detect(ticks)] == [101.0]
+
+
+def test_ticks_without_a_timestamp_are_always_scored(offline_monitor):
+    ticks = [PriceTick("BTC/USD", 100.0, 1.0), PriceTick("BTC/USD", 100.0, 2.0)]
+    assert len(offline_monitor.detect(ticks)) == 2
+
+
+def test_detector_gets_the_time_between_samples(offline_monitor):
+    monitor = offline_monitor
+    detector = monitor.detector.asset_detectors["BTC/USD"]["detector"]
+    monitor.detect([PriceTick("BTC/USD", 100.0, 1.0, timestamp=10.0)])
+    monitor.detect([PriceTick("BTC/USD", 110.0, 2.0, timestamp=40.0)])
+    # Three sample intervals (SAMPLE_INTERVAL=10) of decay in one step
+    alpha = 1 - (1 - detector.stats.alpha) ** 3
+    assert detector.stats.mean == pytest.approx(100.0 + alpha * 10.0)
+
+
+@pytest.fixture
+def node():
+    server = serve_in_background(block_time=0.3)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_reads_wait_for_a_new_block(env, node):
+    env.setenv("ETH_RPC_URL", server_url(node))
+    env.setenv("SENTINEL_ORACLE_ADDRESS", "0x" + "11" * 20)
+    env.setenv("PRICE_READS", "batch")
+    import multi_asset_monitor
+    monitor = multi_asset_monitor.MultiAssetMonitor()
+    try:
+        chain = node.RequestHandlerClass.chain
+        # Wait for the start of a block so the next two polls land in it
+        block = chain.block_number()
+        while chain.block_number() == block:
+            time.sleep(0.01)
+        assert len(monitor.fetch_ticks()) == len(monitor.registry)
+        assert monitor.fetch_ticks() == [] and monitor.skipped_reads == 1
+
+        # A newly listed asset needs its first read without waiting for a block
+        monitor.registry._add([(chain.add_asset("XAU/USD"), "XAU/USD")])
+        assert monitor.new_block()
+
+        block = chain.block_number()
+        while chain.block_number() == block:
+            time.sleep(0.01)
+        assert monitor.new_block()
+    finally:
+        monitor.publisher.close(timeout=1.0)
+        monitor.price_reader.close()
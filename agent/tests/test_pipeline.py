@@ -0,0 +1,91 @@
+"""Pipeline stages: batching, ordering by key, backpressure and drops"""
+
+import threading
+import time
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def run(pipeline, items, *stages):
+    """Feed ``items`` to the first stage once and wait until every stage has seen them"""
+    fed = []
+    pipeline.source("feed", lambda: [] if fed else fed.append(1) or items, 0.01).to(stages[0])
+    pipeline.start()
+    try:
+        wait_for(lambda: all(stage.stats.received >= len(items) for stage in stages))
+    finally:
+        pipeline.stop()
+
+
+def test_items_flow_through_stages():
+    pipeline = Pipeline("test")
+    seen = []
+    double = pipeline.stage("double", lambda x: x * 2)
+    collect = pipeline.stage("collect", seen.append)
+    double.to(collect)
+    run(pipeline, [1, 2, 3], double, collect)
+    assert seen == [2, 4, 6]
+    assert pipeline.stats()["double"]["emitted"] == 3
+
+
+def test_batched_stage_gets_lists_even_for_one_item_batches():
+    pipeline = Pipeline("test")
+    batches = []
+    stage = pipeline.stage("detect", lambda items: batches.append(list(items)), batch_size=1, batched=True)
+    run(pipeline, ["a", "b"], stage)
+    assert batches and all(isinstance(batch, list) and len(batch) == 1 for batch in batches)
+
+
+def test_batch_size_collects_up_to_the_limit():
+    pipeline = Pipeline("test")
+    batches = []
+    stage = pipeline.stage("detect", lambda items: batches.append(len(items)), batch_size=3,
+                           batch_timeout=1.0)
+    run(pipeline, list(range(7)), stage)
+    assert sum(batches) == 7 and max(batches) <= 3
+
+
+def test_keyed_workers_keep_per_key_order():
+    pipeline = Pipeline("test")
+    seen = {}
+    lock = threading.Lock()
+
+    def record(item):
+        with lock:
+            seen.setdefault(item[0], []).append(item[1])
+
+    stage = pipeline.stage("keyed", record, workers=4, key=lambda item: item[0])
+    items = [(asset, i) for i in range(50) for asset in "abc"]
+    run(pipeline, items, stage)
+    assert all(order == list(range(50)) for order in seen.values())
+
+
+def test_failures_are_counted_and_do_not_stop_the_stage():
+    pipeline = Pipeline("test")
+    stage = pipeline.stage("flaky", lambda x: 1 / x)
+    run(pipeline, [0, 1, 2], stage)
+    stats = pipeline.stats()["flaky"]
+    assert stats["errors"] == 1 and stats["emitted"] == 2
+
+
+def test_drop_when_full_counts_drops():
+    stage = Stage("sink", lambda x: x, queue_size=2, drop_when_full=True)
+    stop = threading.Event()
+    for i in range(5):
+        stage.put(i, stop)
+    assert stage.queue_depth() == 2
+    assert stage.stats.dropped == 3
+
+
+def test_queue_size_must_be_bounded():
+    with pytest.raises(ValueError):
+        Stage("unbounded", lambda x: x, queue_size=0)
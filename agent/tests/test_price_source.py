@@ -0,0 +1,96 @@
+"""Price recordings: round trip, and recovery from a crash mid-write"""
+
+import os
+
+import numpy as np
+import pytest
+
+from pipeline import PriceTick
+from price_source import MAGIC, PriceRecorder, read_recording
+
+TICKS = [
+    PriceTick("BTC/USD", 110_000.5, 1_760_000_000.25, (100, 3), 1_760_000_000.0),
+    PriceTick("ETH/USD", 4_000.25, 1_760_000_000.5),
+    PriceTick("BTC/USD", 110_001.0, 1_760_000_001.0, None, 1_760_000_001.0),
+]
+
+
+def record(path, ticks, **kwargs):
+    recorder = PriceRecorder(str(path), **kwargs)
+    recorder.write(ticks)
+    recorder.close()
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "ticks.rec"
+    record(path, TICKS)
+    assets, rows, end = read_recording(str(path))
+
+    assert assets == ["BTC/USD", "ETH/USD"]
+    assert end == os.path.getsize(path)
+    assert [assets[i] for i in rows["asset"]] == [tick.asset for tick in TICKS]
+    np.testing.assert_array_equal(rows["price"], [tick.price for tick in TICKS])
+    np.testing.assert_array_equal(rows["received"], [tick.received for tick in TICKS])
+    np.testing.assert_array_equal(rows["timestamp"], [1_760_000_000.0, np.nan, 1_760_000_001.0])
+    assert rows["block"].tolist() == [100, -1, -1]
+    assert rows["log_index"].tolist() == [3, -1, -1]
+
+
+def test_reopened_recording_is_appended_to(tmp_path):
+    path = tmp_path / "ticks.rec"
+    record(path, TICKS[:1])
+    record(path, TICKS[1:])
+    assets, rows, _ = read_recording(str(path))
+    assert assets == ["BTC/USD", "ETH/USD"]
+    assert rows["price"].tolist() == [tick.price for tick in TICKS]
+
+
+@pytest.mark.parametrize("cut", [1, 3, 5, 20])
+def test_truncated_last_chunk_is_ignored(tmp_path, cut):
+    path = tmp_path / "ticks.rec"
+    record(path, TICKS[:2])
+    complete = os.path.getsize(path)
+    record(path, TICKS[2:])
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - cut)
+
+    assets, rows, end = read_recording(str(path))
+    assert len(rows) == 2
+    assert end == complete
+
+
+def test_appending_after_a_truncated_chunk(tmp_path):
+    path = tmp_path / "ticks.rec"
+    record(path, TICKS[:2])
+    with open(path, "ab") as f:
+        f.write(b"C\x09\x00\x00\x00" + b"\x00" * 10)  # A crash part way through a chunk
+    record(path, TICKS[2:])
+
+    assets, rows, end = read_recording(str(path))
+    assert rows["price"].tolist() == [tick.price for tick in TICKS]
+    assert end == os.path.getsize(path)
+
+
+def test_not_a_recording(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not " + MAGIC)
+    with pytest.raises(ValueError):
+        read_recording(str(path))
+
+
+def test_replay_monitor_needs_no_chain(tmp_path, monkeypatch):
+    path = tmp_path / "ticks.rec"
+    record(path, TICKS)
+    for name in ("RPC_URLS", "ETH_RPC_URL", "SENTINEL_ORACLE_ADDRESS", "PRICE_RECORD"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("PRICE_READS", "replay")
+    monkeypatch.setenv("PRICE_REPLAY_FILE", str(path))
+    monkeypatch.setenv("SNAPSHOT_DIR", "")
+    import multi_asset_monitor
+
+    monitor = multi_asset_monitor.MultiAssetMonitor()
+    try:
+        assert monitor.w3 is None and monitor.price_reader is None
+        assert monitor.detector_assets == ["BTC/USD", "ETH/USD"]
+    finally:
+        monitor.publisher.close(timeout=1.0)
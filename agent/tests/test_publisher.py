@@ -0,0 +1,131 @@
+"""Update publisher: coalescing, drop policy, and what counts as sent or rejected"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from publisher import UpdatePublisher
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    """Records every update; replies as configured on the server"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        server = self.server
+        server.gate.wait(5)
+        updates = body if self.path == "/api/update/batch" else [body]
+        status = server.batch_status if self.path == "/api/update/batch" else 200
+        if server.failures:
+            server.failures -= 1
+            status = 503
+        elif self.path == "/api/update" and body.get("price", 0) < 0:
+            status = 400
+        reply = {}
+        if status == 200:
+            server.received.extend(updates)
+            bad = sum(1 for update in updates if update.get("price", 0) < 0)
+            reply = {"accepted": len(updates) - bad, "rejected": bad}
+        data = json.dumps(reply).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), APIHandler)
+    server.received, server.batch_status, server.failures = [], 200, 0
+    server.gate = threading.Event()
+    server.gate.set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.gate.set()
+    server.shutdown()
+    server.server_close()
+
+
+def publisher_for(api, **options):
+    return UpdatePublisher(f"http://127.0.0.1:{api.server_port}", timeout=5, max_backoff=0.1, **options)
+
+
+def update(asset="BTC/USD", price=1.0, anomalous=False):
+    return {"asset": asset, "price": price, "is_anomalous": anomalous}
+
+
+def test_batch_counts_server_rejections(api):
+    publisher = publisher_for(api)
+    publisher.publish(update("BTC/USD"))
+    publisher.publish(update("ETH/USD", price=-1.0))
+    assert publisher.close()
+    assert (publisher.sent, publisher.rejected) == (1, 1)
+
+
+def test_refused_batch_is_rejected_not_sent(api):
+    api.batch_status = 422
+    publisher = publisher_for(api)
+    publisher.publish(update("BTC/USD"))
+    publisher.publish(update("ETH/USD"))
+    assert publisher.close()
+    assert (publisher.sent, publisher.rejected) == (0, 2)
+    assert publisher.stats()["pending"] == 0
+
+
+def test_one_by_one_fallback_counts_refusals(api):
+    api.batch_status = 404
+    publisher = publisher_for(api)
+    publisher.publish(update("BTC/USD"))
+    publisher.publish(update("ETH/USD", price=-1.0))
+    assert publisher.close()
+    assert not publisher.batch_supported
+    assert (publisher.sent, publisher.rejected) == (1, 1)
+
+
+def test_unavailable_server_is_retried(api):
+    api.failures = 2
+    publisher = publisher_for(api)
+    publisher.publish(update())
+    assert publisher.close()
+    assert publisher.failures == 2
+    assert publisher.sent == 1 and len(api.received) == 1
+
+
+def test_pending_updates_coalesce_per_asset_but_anomalies_do_not(api):
+    api.gate.clear()
+    publisher = publisher_for(api, linger=0)
+    publisher.publish(update("SOL/USD"))  # In flight, held by the gate
+    while publisher.pending:
+        time.sleep(0.001)
+    for price in (1.0, 2.0, 3.0):
+        publisher.publish(update("BTC/USD", price))
+    publisher.publish(update("BTC/USD", 9.0, anomalous=True))
+    publisher.publish(update("BTC/USD", 9.5, anomalous=True))
+    api.gate.set()
+    assert publisher.close()
+    assert publisher.coalesced == 2
+    assert [u["price"] for u in api.received if u["asset"] == "BTC/USD"] == [3.0, 9.0, 9.5]
+
+
+@pytest.mark.parametrize("policy, expected", [("oldest", [3.0, 9.0, 4.0]), ("newest", [2.0, 3.0, 9.0])])
+def test_drop_policy_when_full(api, policy, expected):
+    api.gate.clear()
+    publisher = publisher_for(api, linger=0, queue_size=3, drop_policy=policy)
+    publisher.publish(update("SOL/USD"))
+    while publisher.pending:
+        time.sleep(0.001)
+    publisher.publish(update("A", 2.0))
+    publisher.publish(update("B", 3.0))
+    publisher.publish(update("C", 9.0, anomalous=True))
+    publisher.publish(update("D", 4.0))
+    api.gate.set()
+    assert publisher.close()
+    assert publisher.dropped == 1
+    assert [u["price"] for u in api.received if u["asset"] != "SOL/USD"] == expected
@@ -0,0 +1,97 @@
+"""Rolling statistics against naive numpy over the same windows"""
+
+import numpy as np
+import pytest
+
+from rolling_stats import EWMoments, RollingMedian, RollingMoments, elapsed_to_weight, half_life_to_alpha
+
+
+def prices(n: int = 500, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return 100_000.0 + np.cumsum(rng.normal(0, 50, n))
+
+
+@pytest.mark.parametrize("window", [1, 2, 5, 30])
+def test_rolling_moments_match_numpy(window):
+    values = prices()
+    moments = RollingMoments(window)
+    for i, value in enumerate(values):
+        moments.push(value)
+        expected = values[max(0, i + 1 - window):i + 1]
+        assert moments.count == len(expected)
+        assert moments.mean == pytest.approx(expected.mean(), rel=1e-12)
+        assert moments.variance() == pytest.approx(expected.var(), rel=1e-6, abs=1e-6)
+        if len(expected) > 1:
+            assert moments.std(ddof=1) == pytest.approx(expected.std(ddof=1), rel=1e-6)
+
+
+def test_rolling_moments_constant_window_has_zero_variance():
+    moments = RollingMoments(10)
+    for _ in range(25):
+        moments.push(110_000.1)
+    assert moments.variance() == 0.0
+
+
+def test_rolling_moments_state_round_trip():
+    moments = RollingMoments(20)
+    for value in prices(50):
+        moments.push(value)
+    restored = RollingMoments(20)
+    restored.set_state(moments.get_state())
+    assert list(restored.values) == list(moments.values)
+    assert restored.variance() == pytest.approx(moments.variance())
+
+
+@pytest.mark.parametrize("window", [1, 4, 7, 30])
+def test_rolling_median_and_mad_match_numpy(window):
+    values = np.round(prices(300), 0)  # Rounded, so windows hold ties
+    median = RollingMedian(window)
+    for i, value in enumerate(values):
+        median.push(value)
+        expected = values[max(0, i + 1 - window):i + 1]
+        centre = np.median(expected)
+        assert median.median() == pytest.approx(centre)
+        assert median.mad() == pytest.approx(np.median(np.abs(expected - centre)))
+
+
+def test_rolling_median_rejects_nan():
+    with pytest.raises(ValueError):
+        RollingMedian(5).push(float("nan"))
+
+
+def test_ew_moments_match_explicit_weights():
+    half_life = 10.0
+    values = prices(200)
+    moments = EWMoments(half_life)
+    for value in values:
+        moments.push(value)
+
+    alpha = half_life_to_alpha(half_life)
+    mean, var = values[0], 0.0
+    for value in values[1:]:
+        delta = value - mean
+        mean += alpha * delta
+        var = (1 - alpha) * (var + alpha * delta * delta)
+    assert moments.mean == pytest.approx(mean, rel=1e-12)
+    assert moments.std() == pytest.approx(np.sqrt(var), rel=1e-9)
+
+
+def test_ew_moments_weight_is_repeated_decay():
+    # A sample pushed with weight 3 decays the history like three unit steps
+    alpha = half_life_to_alpha(5.0)
+    moments = EWMoments(5.0)
+    moments.push(1.0)
+    moments.push(2.0, weight=3.0)
+    assert moments.mean == pytest.approx(1.0 + (1 - (1 - alpha) ** 3))
+
+
+def test_half_life_to_alpha():
+    alpha = half_life_to_alpha(8.0)
+    assert (1 - alpha) ** 8 == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        half_life_to_alpha(0)
+
+
+def test_elapsed_to_weight_is_capped_at_one_half_life():
+    assert elapsed_to_weight(30.0, None, 10.0) == 1.0
+    np.testing.assert_allclose(elapsed_to_weight([5.0, 20.0, 1e6], 10.0, 10.0), [0.5, 2.0, 10.0])
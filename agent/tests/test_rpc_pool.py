@@ -0,0 +1,103 @@
+"""RPC pool against stub endpoints: failover, error classification, cooldown and hedging"""
+
+import socket
+import time
+
+import pytest
+
+from rpc_pool import EndpointUnavailable, RPCPool, RPCPoolError
+from stub_rpc import serve_in_background, server_url
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**options):
+        server = serve_in_background(**options)
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def closed_port_url() -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return f"http://127.0.0.1:{sock.getsockname()[1]}"
+
+
+def test_fails_over_from_unreachable_endpoint(servers):
+    good = server_url(servers())
+    pool = RPCPool([closed_port_url(), good], hedge=False, timeout=2)
+    pool.endpoints[0].latencies.append(0.0)  # Rank the dead endpoint first
+    pool.endpoints[1].latencies.append(1.0)
+
+    reply = pool.request("eth_chainId", [])
+    assert reply["result"] == hex(31337)
+    assert pool.endpoints[0].error_rate() == 1.0
+    pool.close()
+
+
+def test_server_errors_fail_over_and_count_against_the_endpoint(servers):
+    flaky, good = servers(error_rate=1.0), servers()
+    pool = RPCPool([server_url(flaky), server_url(good)], hedge=False, max_failures=2, cooldown=60)
+    pool.endpoints[1].latencies.append(1.0)  # Unmeasured flaky endpoint ranks first
+
+    for _ in range(2):
+        assert "result" in pool.request("eth_blockNumber", [])
+    assert pool.endpoints[0].error_rate() == 1.0
+    assert not pool.endpoints[0].healthy()  # Sitting out its cooldown
+    assert pool.ranked()[0] is pool.endpoints[1]
+    pool.close()
+
+
+def test_server_error_on_every_endpoint_is_a_pool_error(servers):
+    pool = RPCPool([server_url(servers(error_rate=1.0))], hedge=False)
+    with pytest.raises(RPCPoolError) as raised:
+        pool.request("eth_blockNumber", [])
+    assert "HTTP 503" in str(raised.value)
+    pool.close()
+
+
+def test_endpoint_unavailable_is_a_pool_error(servers):
+    pool = RPCPool([server_url(servers(error_rate=1.0))], hedge=False)
+    with pytest.raises(EndpointUnavailable):
+        pool._attempt(pool.endpoints[0], b'{"jsonrpc": "2.0", "id": 1, "method": "eth_chainId"}')
+    assert issubclass(EndpointUnavailable, RPCPoolError)
+    pool.close()
+
+
+def test_json_rpc_errors_are_answers(servers):
+    pool = RPCPool([server_url(servers())], hedge=False)
+    reply = pool.request("eth_noSuchMethod", [])
+    assert reply["error"]["code"] == -32601
+    assert pool.endpoints[0].error_rate() == 0.0
+    pool.close()
+
+
+def test_slow_read_is_hedged_to_the_next_endpoint(servers):
+    slow = servers(latency_ms=1, slow_rate=1.0, slow_latency_ms=1000)
+    fast = servers(latency_ms=1)
+    pool = RPCPool([server_url(slow), server_url(fast)], hedge_min_delay=0.02, timeout=5)
+    primary, other = pool.endpoints
+    primary.latencies.extend([0.001] * 20)  # Looks fast, so it is tried first
+    other.latencies.extend([0.01] * 20)
+
+    started = time.perf_counter()
+    assert "result" in pool.request("eth_blockNumber", [])
+    assert time.perf_counter() - started < 0.5
+    assert primary.hedges == 1
+    pool.close()
+
+
+def test_writes_are_not_hedged(servers):
+    pool = RPCPool([server_url(servers()), server_url(servers())])
+    pool.endpoints[0].latencies.extend([0.001] * 20)
+    reply = pool.request("eth_sendRawTransaction", ["0x00"])
+    assert "error" in reply
+    assert sum(endpoint.requests for endpoint in pool.endpoints) == 1
+    pool.close()
@@ -0,0 +1,90 @@
+"""Detector snapshots: file round trip, copy-on-write loading and warm restart"""
+
+import os
+
+import numpy as np
+import pytest
+
+from detectors import create_detector
+from matrix_detector import MatrixAnomalyDetector
+from snapshot import MAGIC, PeriodicSnapshot, load_snapshot, prefixed, save_snapshot, unprefixed
+
+
+def test_round_trip_keeps_dtypes_shapes_and_alignment(tmp_path):
+    path = str(tmp_path / "state.snap")
+    arrays = {
+        "window": np.arange(12, dtype=np.float64).reshape(3, 4),
+        "count": np.array([1, 2, 3], dtype=np.int64),
+        "flags": np.array([True, False, True]),
+        "empty": np.zeros((0, 5)),
+        "scalar": np.array(2.5),
+    }
+    save_snapshot(path, {"assets": ["A", "B", "C"]}, arrays)
+    meta, loaded, created = load_snapshot(path)
+
+    assert meta == {"assets": ["A", "B", "C"]} and created > 0
+    for name, array in arrays.items():
+        assert loaded[name].dtype == array.dtype and loaded[name].shape == array.shape
+        np.testing.assert_array_equal(loaded[name], array)
+    assert not os.path.exists(path + ".tmp")
+
+
+def test_loaded_arrays_are_copy_on_write(tmp_path):
+    path = str(tmp_path / "state.snap")
+    save_snapshot(path, {}, {"values": np.ones(1000)})
+    _, arrays, _ = load_snapshot(path)
+    arrays["values"][:] = 7.0
+    _, again, _ = load_snapshot(path)
+    assert again["values"].sum() == 1000
+
+
+def test_rejects_foreign_and_truncated_files(tmp_path):
+    path = tmp_path / "state.snap"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(ValueError):
+        load_snapshot(str(path))
+
+    save_snapshot(str(path), {}, {"values": np.ones(100)})
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 8)
+    with pytest.raises(ValueError, match="truncated"):
+        load_snapshot(str(path))
+    assert path.read_bytes().startswith(MAGIC)
+
+
+def test_prefixes_separate_components():
+    arrays = {**prefixed("detector", {"a": np.zeros(1)}), **prefixed("correlation", {"a": np.ones(1)})}
+    assert unprefixed("correlation", arrays)["a"][0] == 1.0
+    assert unprefixed("missing", arrays) == {}
+
+
+def test_warm_restart_resumes_scoring(tmp_path):
+    assets = ["BTC/USD", "ETH/USD"]
+    rng = np.random.default_rng(5)
+    detector = MatrixAnomalyDetector(assets, window_size=20)
+    for row in 100 + rng.normal(0, 1, (40, 2)):
+        detector.ingest(row)
+
+    path = str(tmp_path / "monitor.snap")
+    running = PeriodicSnapshot(path, 60, lambda: ({"assets": assets}, prefixed("detector", detector.get_state())),
+                               lambda meta, arrays: False)
+    running.save()
+
+    restarted = MatrixAnomalyDetector(assets, window_size=20)
+    snapshot = PeriodicSnapshot(path, 60, lambda: ({}, {}),
+                                lambda meta, arrays: restarted.set_state(unprefixed("detector", arrays),
+                                                                         meta["assets"]))
+    assert snapshot.restore()
+    probe = np.array([103.0, 97.0])
+    np.testing.assert_array_equal(restarted.ingest(probe)[0], detector.ingest(probe)[0])
+
+
+def test_stale_or_mismatched_snapshots_are_ignored(tmp_path):
+    path = str(tmp_path / "monitor.snap")
+    detector = create_detector("ewma", half_life=5.0)
+    save_snapshot(path, {"config": "ewma"}, detector.get_state())
+
+    assert not PeriodicSnapshot(path, 60, lambda: ({}, {}), lambda meta, arrays: False).restore()
+    assert not PeriodicSnapshot(path, 60, lambda: ({}, {}), lambda meta, arrays: True, max_age=-1).restore()
+    assert not PeriodicSnapshot("", 60, lambda: ({}, {}), lambda meta, arrays: True).restore()
+    assert PeriodicSnapshot(path, 60, lambda: ({}, {}), lambda meta, arrays: True).restore()
@@ -0,0 +1,92 @@
+"""Columnar price rings and OHLC rollups against brute force over the same samples"""
+
+import numpy as np
+import pytest
+
+from timeseries_store import ColumnRing, PriceSeries, TimeSeriesStore, parse_time
+
+ROLLUPS = {"10ms": (10, 8), "100ms": (100, 4)}
+
+
+def samples(n: int = 300, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    timestamps = np.cumsum(rng.integers(0, 7, n)) + 1_000
+    return timestamps, rng.uniform(90, 110, n)
+
+
+def filled(capacity: int = 64):
+    series = PriceSeries(capacity, ROLLUPS)
+    timestamps, prices = samples()
+    for ms, price in zip(timestamps.tolist(), prices.tolist()):
+        series.append(ms, price)
+    return series, timestamps, prices
+
+
+@pytest.mark.parametrize("start, end, limit", [
+    (0, 10**12, None), (1_200, 1_400, None), (1_200, 1_400, 5), (0, 10**12, 0), (5_000, 6_000, None),
+])
+def test_raw_query_matches_brute_force(start, end, limit):
+    series, timestamps, prices = filled()
+    kept_ts, kept_prices = timestamps[-64:], prices[-64:]
+    mask = (kept_ts >= start) & (kept_ts <= end)
+    expected_ts, expected_prices = kept_ts[mask], kept_prices[mask]
+    if limit is not None:
+        expected_ts, expected_prices = expected_ts[len(expected_ts) - limit:], expected_prices[len(expected_prices) - limit:]
+
+    columns = series.query(start, end, limit=limit)
+    np.testing.assert_array_equal(columns["timestamp"], expected_ts)
+    np.testing.assert_array_equal(columns["price"], expected_prices)
+
+
+@pytest.mark.parametrize("resolution", list(ROLLUPS))
+def test_rollups_match_brute_force(resolution):
+    series, timestamps, prices = filled()
+    width, buckets = ROLLUPS[resolution]
+    starts = timestamps - timestamps % width
+    expected = []
+    for bucket in np.unique(starts)[-buckets:]:
+        in_bucket = prices[starts == bucket]
+        expected.append((bucket, in_bucket[0], in_bucket.max(), in_bucket.min(), in_bucket[-1], len(in_bucket)))
+
+    columns = series.query(0, 10**12, resolution)
+    got = list(zip(*(columns[name].tolist() for name in ("timestamp", "open", "high", "low", "close", "samples"))))
+    assert got == [tuple(row) for row in np.array(expected, dtype=object).tolist()]
+
+
+def test_rollup_query_includes_the_bucket_covering_start():
+    series = PriceSeries(16, ROLLUPS)
+    for ms, price in [(1_000, 1.0), (1_050, 2.0), (1_120, 3.0)]:
+        series.append(ms, price)
+    assert series.query(1_060, 2_000, "100ms")["timestamp"].tolist() == [1_000, 1_100]
+
+
+def test_late_sample_is_stamped_as_the_newest():
+    series = PriceSeries(8, ROLLUPS)
+    series.append(2_000, 1.0)
+    series.append(1_500, 2.0)
+    assert series.latest(2)["timestamp"].tolist() == [2_000, 2_000]
+
+
+def test_ring_overwrites_oldest():
+    ring = ColumnRing(3, {"timestamp": np.int64})
+    for ms in range(10):
+        ring.append(timestamp=ms)
+    assert len(ring) == 3
+    assert ring.between("timestamp", 0, 100)["timestamp"].tolist() == [7, 8, 9]
+
+
+def test_store_creates_series_on_first_use():
+    store = TimeSeriesStore(capacity=4)
+    assert "BTC/USD" not in store
+    store["BTC/USD"].append(1, 1.0)
+    assert "BTC/USD" in store and len(store["BTC/USD"]) == 1
+
+
+def test_parse_time():
+    assert parse_time(None, 7) == 7
+    assert parse_time("", 7) == 7
+    assert parse_time("1760000000.5", 0) == 1_760_000_000_500
+    assert parse_time("1970-01-01T00:00:01Z", 0) == 1_000
+    for bad in ("inf", "-inf", "nan", "yesterday"):
+        with pytest.raises(ValueError):
+            parse_time(bad, 0)
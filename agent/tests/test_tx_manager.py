@@ -0,0 +1,110 @@
+"""Transaction manager against the stub node's mempool: nonces, receipts and replacement"""
+
+import time
+
+import pytest
+from eth_account import Account
+from web3 import Web3
+
+from stub_rpc import serve_in_background, server_url
+from tx_manager import FeeCache, TransactionManager
+
+KEY = "0x" + "42" * 32
+CONTRACT = "0x" + "11" * 20
+ABI = [{"type": "function", "name": "flagAnomaly", "stateMutability": "nonpayable", "outputs": [],
+        "inputs": [{"name": "assetId", "type": "bytes32"}, {"name": "reason", "type": "string"}]}]
+
+
+@pytest.fixture
+def node():
+    server = serve_in_background(block_time=0.1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def manager_for(node, **options):
+    w3 = Web3(Web3.HTTPProvider(server_url(node)))
+    # Tracker passes are driven by the tests
+    manager = TransactionManager(w3, Account.from_key(KEY), FeeCache(w3, interval=3600),
+                                 poll_interval=3600, **options)
+    return manager, w3.eth.contract(address=CONTRACT, abi=ABI)
+
+
+def flag(contract, n=0):
+    return contract.functions.flagAnomaly(bytes([n]) * 32, "test")
+
+
+def settle(manager, timeout=5.0):
+    deadline = time.time() + timeout
+    while manager.pending_count and time.time() < deadline:
+        manager.check_pending()
+        time.sleep(0.05)
+
+
+def test_nonces_come_from_a_local_counter(node):
+    manager, contract = manager_for(node)
+    confirmed = []
+    hashes = [manager.submit(flag(contract, n), 100000, f"flag {n}", on_confirmed=confirmed.append)
+              for n in range(3)]
+    assert all(hashes) and sorted(manager._pending) == [0, 1, 2]
+    assert manager.in_flight("flag 1")
+
+    settle(manager)
+    manager.stop()
+    assert manager.stats["confirmed"] == 3 and len(confirmed) == 3
+    assert [Web3.to_hex(receipt["transactionHash"]) for receipt in confirmed] == hashes
+
+
+def test_nonce_taken_elsewhere_is_re_read(node):
+    manager, contract = manager_for(node)
+    assert manager.submit(flag(contract), 100000, "first")
+    # Another process sends nonce 1 from the same account
+    other, other_contract = manager_for(node)
+    other._next_nonce = 1
+    assert other.submit(flag(other_contract, 9), 100000, "elsewhere")
+
+    failed = []
+    assert manager.submit(flag(contract, 1), 100000, "clash", on_failed=failed.append) is None
+    assert failed == [None] and manager._next_nonce is None
+    assert manager.submit(flag(contract, 2), 100000, "retry")
+    assert manager._pending.keys() == {0, 2}
+    manager.stop()
+    other.stop()
+
+
+def test_stuck_transaction_is_replaced_at_a_higher_gas_price(node):
+    chain = node.RequestHandlerClass.chain
+    manager, contract = manager_for(node, stuck_after=0.2)
+    confirmed = []
+    first = manager.submit(flag(contract), 100000, "stuck", on_confirmed=confirmed.append)
+    chain.gas_price *= 2  # The fee market moved on: nothing at the old price is mined
+
+    time.sleep(0.3)
+    manager.check_pending()
+    pending = manager._pending[0]
+    assert manager.stats["replaced"] == 1
+    assert pending.hashes[0] == first and len(pending.hashes) == 2
+    assert pending.tx["gasPrice"] == int(Web3.to_wei(1, "gwei") * manager.fee_bump)
+
+    # Still below the market: the next replacement catches up with the cached fee
+    manager.fees.refresh()
+    time.sleep(0.3)
+    manager.check_pending()
+    assert pending.tx["gasPrice"] == chain.gas_price
+
+    settle(manager)
+    manager.stop()
+    assert len(confirmed) == 1 and manager.stats["replaced"] == 2
+
+
+def test_replacement_is_capped(node):
+    chain = node.RequestHandlerClass.chain
+    manager, contract = manager_for(node, stuck_after=0.1, max_gas_price=Web3.to_wei(1, "gwei"))
+    manager.submit(flag(contract), 100000, "capped")
+    chain.gas_price *= 2
+    time.sleep(0.2)
+    manager.check_pending()
+    assert manager.stats["replaced"] == 0
+    assert manager._pending[0].tx["gasPrice"] == Web3.to_wei(1, "gwei")
+    manager.stop()
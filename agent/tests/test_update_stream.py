@@ -0,0 +1,104 @@
+"""Update stream: per-update events from the API, fan-out, filtering and Last-Event-ID replay"""
+
+import os
+import socket
+import time
+
+import pytest
+
+os.environ["RPC_URLS"] = ""
+os.environ["ETH_RPC_URL"] = ""
+
+import api_server  # noqa: E402
+from hermes_stream import SSEParser  # noqa: E402
+from update_stream import UpdateStream  # noqa: E402
+
+
+@pytest.fixture
+def stream():
+    stream = UpdateStream(host="127.0.0.1", port=0, keepalive=60)
+    stream.start()
+    yield stream
+    stream.stop()
+
+
+def subscribe(stream, query="", last_event_id=None):
+    sock = socket.create_connection(("127.0.0.1", stream.port), timeout=5)
+    headers = f"Last-Event-ID: {last_event_id}\r\n" if last_event_id is not None else ""
+    sock.sendall(f"GET /api/stream{query} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode())
+    head = b""
+    while b"\r\n\r\n" not in head:
+        head += sock.recv(1)
+    assert head.startswith(b"HTTP/1.1 200")
+    return sock
+
+
+def read_events(sock, count):
+    parser, events = SSEParser(), []
+    deadline = time.time() + 5
+    while len(events) < count and time.time() < deadline:
+        events.extend(parser.feed(sock.recv(65536)))
+    return events
+
+
+def wait_for_subscribers(stream, count):
+    deadline = time.time() + 5
+    while len(stream.subscribers) < count and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_each_batch_event_carries_the_state_its_update_left(monkeypatch):
+    events = []
+    monkeypatch.setattr(api_server.stream, "publish", lambda changes: events.extend(changes))
+    count = api_server.agent_state["assets"]["SOL/USD"]["anomaly_count"]
+    api_server.app.test_client().post("/api/update/batch", json=[
+        {"asset": "SOL/USD", "price": 150.0, "is_anomalous": True, "reason": "spike"},
+        {"asset": "SOL/USD", "price": 151.0, "reason": "Normal"},
+    ])
+
+    first, second = (state for _, state in events)
+    assert (first["last_price"], first["is_anomalous"], first["anomaly_count"]) == (150.0, True, count + 1)
+    assert (second["last_price"], second["is_anomalous"], second["anomaly_count"]) == (151.0, False, count + 1)
+    assert second["version"] > first["version"]
+
+
+def test_fan_out_and_asset_filter(stream):
+    everything = subscribe(stream)
+    eth_only = subscribe(stream, "?assets=ETH/USD")
+    wait_for_subscribers(stream, 2)
+
+    stream.publish([("BTC/USD", {"price": 1}), ("ETH/USD", {"price": 2}), ("BTC/USD", {"price": 3})])
+
+    assert [event.id for event in read_events(everything, 3)] == ["1", "2", "3"]
+    (only,) = read_events(eth_only, 1)
+    assert (only.event, only.data, only.id) == ("update", '{"price": 2}', "2")
+    everything.close()
+    eth_only.close()
+
+
+def test_reconnect_replays_missed_events(stream):
+    stream.publish([("BTC/USD", {"price": 1}), ("ETH/USD", {"price": 2}), ("BTC/USD", {"price": 3})])
+    time.sleep(0.1)
+    sock = subscribe(stream, "?assets=BTC/USD", last_event_id=1)
+    (missed,) = read_events(sock, 1)
+    assert (missed.id, missed.data) == ("3", '{"price": 3}')
+    sock.close()
+
+
+def test_slow_subscriber_is_evicted():
+    stream = UpdateStream(host="127.0.0.1", port=0, max_buffer=4096, keepalive=60)
+    stream.start()
+    try:
+        sock = subscribe(stream)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        wait_for_subscribers(stream, 1)
+        payload = {"blob": "x" * 2048}
+        deadline = time.time() + 5
+        while stream.evicted == 0 and time.time() < deadline:
+            stream.publish([("BTC/USD", payload)] * 50)
+            time.sleep(0.01)
+        assert stream.evicted == 1
+        assert not stream.subscribers
+        sock.close()
+    finally:
+        stream.stop()
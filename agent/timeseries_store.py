@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Time-Series Store for Sentinel Oracle
+Per-asset price history in fixed-size columnar rings, with OHLC rollups kept
+up to date as prices arrive
+
+Each asset keeps its raw samples (int64 epoch milliseconds, float64 prices)
+and one ring of OHLC buckets per resolution (1s, 1m, 1h). Rings are
+allocated at full size up front but only the pages written are ever resident,
+and once full they overwrite their oldest entry, so memory per asset is
+bounded however long the server runs. Queries slice the rings with
+``searchsorted``; no Python loop touches the samples.
+
+Default retention (PRICE_HISTORY_POINTS raw samples, then the rollups):
+    raw   20000 samples    (~2.3 days at one sample per 10s)
+    1s    3600 buckets     (1 hour)
+    1m    10080 buckets    (7 days)
+    1h    8760 buckets     (1 year)
+"""
+
+import os
+import math
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Union
+import numpy as np
+
+RAW = "raw"
+
+# Rollup name -> (bucket length in ms, buckets kept)
+ROLLUPS = {
+    "1s": (1_000, 3_600),
+    "1m": (60_000, 10_080),
+    "1h": (3_600_000, 8_760),
+}
+
+RESOLUTIONS = (RAW,) + tuple(ROLLUPS)
+
+
+class ColumnRing:
+    """Fixed-capacity ring of equally long numpy columns, oldest row first when read"""
+
+    def __init__(self, capacity: int, columns: Dict[str, np.dtype]):
+        self.capacity = capacity
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in columns.items()}
+        self.size = 0
+        self.head = 0  # Next row written
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, **row) -> None:
+        for name, value in row.items():
+            self.columns[name][self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    @property
+    def last(self) -> int:
+        """Index of the newest row"""
+        return (self.head - 1) % self.capacity
+
+    @property
+    def _oldest(self) -> int:
+        return self.head if self.size == self.capacity else 0
+
+    def _position(self, key: str, value: int, side: str) -> int:
+        """searchsorted over the column oldest first: the sum over the ring's two sorted runs"""
+        column = self.columns[key]
+        if self.size < self.capacity:
+            return int(np.searchsorted(column[:self.size], value, side=side))
+        return int(np.searchsorted(column[self.head:], value, side=side)
+                   + np.searchsorted(column[:self.head], value, side=side))
+
+    def between(self, key: str, start: int, end: int, limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Rows with ``start <= key <= end`` (the newest ``limit`` of them), every column oldest first"""
+        lo = self._position(key, start, "left")
+        hi = self._position(key, end, "right")
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        rows = (self._oldest + np.arange(lo, max(lo, hi))) % self.capacity
+        return {name: column[rows] for name, column in self.columns.items()}
+
+
+class PriceSeries:
+    """One asset's raw samples and OHLC rollups"""
+
+    def __init__(self, capacity: int, rollups: Dict[str, tuple] = ROLLUPS):
+        self.raw = ColumnRing(capacity, {"timestamp": np.int64, "price": np.float64})
+        self.rollups = {
+            name: (width, ColumnRing(buckets, {"timestamp": np.int64, "open": np.float64, "high": np.float64,
+                                               "low": np.float64, "close": np.float64, "samples": np.int64}))
+            for name, (width, buckets) in rollups.items()
+        }
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+    def append(self, timestamp_ms: int, price: float) -> None:
+        """Add a sample; a timestamp older than the newest is treated as the newest"""
+        with self._lock:
+            if len(self.raw):
+                timestamp_ms = max(timestamp_ms, int(self.raw.columns["timestamp"][self.raw.last]))
+            self.raw.append(timestamp=timestamp_ms, price=price)
+            for width, ring in self.rollups.values():
+                bucket = timestamp_ms - timestamp_ms % width
+                columns, last = ring.columns, ring.last
+                if len(ring) and columns["timestamp"][last] == bucket:
+                    columns["high"][last] = max(columns["high"][last], price)
+                    columns["low"][last] = min(columns["low"][last], price)
+                    columns["close"][last] = price
+                    columns["samples"][last] += 1
+                else:
+                    ring.append(timestamp=bucket, open=price, high=price, low=price, close=price, samples=1)
+
+    def query(self, start: int, end: int, resolution: str = RAW,
+              limit: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Columns for ``start <= timestamp <= end`` (epoch ms): timestamp and
+        price for raw samples, timestamp (bucket start), open, high, low,
+        close and samples for a rollup
+        """
+        with self._lock:
+            if resolution == RAW:
+                return self.raw.between("timestamp", start, end, limit)
+            width, ring = self.rollups[resolution]
+            # A bucket that started before ``start`` still covers it
+            return ring.between("timestamp", start - start % width, end, limit)
+
+    def latest(self, count: int) -> Dict[str, np.ndarray]:
+        """The newest ``count`` raw samples"""
+        with self._lock:
+            return self.raw.between("timestamp", np.iinfo(np.int64).min, np.iinfo(np.int64).max, count)
+
+
+class TimeSeriesStore:
+    """Price series by asset, created on first use"""
+
+    def __init__(self, capacity: Optional[int] = None):
+        self.capacity = capacity or int(os.getenv("PRICE_HISTORY_POINTS", "20000"))
+        self.series: Dict[str, PriceSeries] = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, asset: str) -> PriceSeries:
+        series = self.series.get(asset)
+        if series is None:
+            with self._lock:
+                series = self.series.setdefault(asset, PriceSeries(self.capacity))
+        return series
+
+    def __contains__(self, asset: str) -> bool:
+        return asset in self.series
+
+
+def parse_time(value: Union[str, float, None], default: int) -> int:
+    """
+    Epoch milliseconds from a query parameter: epoch seconds (``1760000000``,
+    ``1760000000.5``) or ISO 8601 (``2025-10-09T12:00:00``); ``default`` when
+    empty. Raises ValueError otherwise, including for ``inf`` and ``nan``.
+    """
+    if value is None or value == "":
+        return default
+    try:
+        seconds = float(value)
+    except ValueError:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp() * 1000)
+    if not math.isfinite(seconds):
+        raise ValueError(f"{value} is not a finite time")
+    return int(seconds * 1000)
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Transaction Manager for Sentinel Oracle
+Fire-and-forget contract transactions for the agent's on-chain actions
+
+``submit`` signs and broadcasts a transaction and returns as soon as the node
+has accepted it, so the detection pipeline never waits for a block. Nonces
+come from a local counter (one RPC at startup, then none), gas prices from a
+cache refreshed by a background thread, and a tracker thread polls receipts,
+runs the caller's callbacks, and re-broadcasts transactions that have been
+pending too long at a bumped gas price (replace-by-fee, same nonce).
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+from web3 import Web3
+from web3.exceptions import TransactionNotFound
+
+logger = logging.getLogger("TxManager")
+
+# Nodes reject a replacement unless it pays at least 10% more
+MIN_FEE_BUMP = 1.10
+
+_NONCE_ERRORS = ("nonce too low", "already known", "known transaction", "replacement transaction underpriced")
+
+
+def _is_nonce_error(error: Exception) -> bool:
+    message = str(error).lower()
+    return any(marker in message for marker in _NONCE_ERRORS)
+
+
+class FeeCache:
+    """Gas price refreshed every ``interval`` seconds (FEE_REFRESH_INTERVAL) on a daemon thread"""
+
+    def __init__(self, w3: Web3, interval: Optional[float] = None):
+        self.w3 = w3
+        self.interval = interval or float(os.getenv("FEE_REFRESH_INTERVAL", "15"))
+        self._gas_price: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def refresh(self) -> None:
+        try:
+            self._gas_price = self.w3.eth.gas_price
+        except Exception as e:
+            logger.warning(f"⚠️  Could not refresh gas price: {e}")
+
+    def gas_price(self) -> int:
+        """Latest cached gas price (fetched now if nothing is cached yet)"""
+        if self._gas_price is None:
+            self._gas_price = self.w3.eth.gas_price
+        return self._gas_price
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fee-cache", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+
+class PendingTransaction:
+    """A broadcast transaction and every replacement sent for its nonce"""
+
+    def __init__(self, label: str, tx: Dict, tx_hash: str,
+                 on_confirmed: Optional[Callable[[Dict], None]],
+                 on_failed: Optional[Callable[[Optional[Dict]], None]]):
+        self.label = label
+        self.tx = tx
+        self.hashes: List[str] = [tx_hash]
+        self.submitted = time.time()
+        self.last_broadcast = self.submitted
+        self.on_confirmed = on_confirmed
+        self.on_failed = on_failed
+
+    @property
+    def nonce(self) -> int:
+        return self.tx["nonce"]
+
+
+class TransactionManager:
+    """
+    Non-blocking transaction submission with receipt tracking
+
+    Transactions pending for ``stuck_after`` seconds (TX_STUCK_AFTER) are
+    replaced at ``fee_bump`` (TX_FEE_BUMP) times their gas price, capped at
+    TX_MAX_GAS_PRICE_GWEI; at the cap they are re-broadcast unchanged.
+    Callbacks run on the tracker thread.
+    """
+
+    def __init__(self, w3: Web3, account, fee_cache: Optional[FeeCache] = None,
+                 poll_interval: Optional[float] = None, stuck_after: Optional[float] = None,
+                 fee_bump: Optional[float] = None, max_gas_price: Optional[int] = None):
+        self.w3 = w3
+        self.account = account
+        self.fees = fee_cache or FeeCache(w3)
+        self.poll_interval = poll_interval or float(os.getenv("TX_POLL_INTERVAL", "2"))
+        self.stuck_after = stuck_after or float(os.getenv("TX_STUCK_AFTER", "60"))
+        self.fee_bump = max(MIN_FEE_BUMP, fee_bump or float(os.getenv("TX_FEE_BUMP", "1.125")))
+        self.max_gas_price = max_gas_price or Web3.to_wei(float(os.getenv("TX_MAX_GAS_PRICE_GWEI", "500")), "gwei")
+
+        self._chain_id: Optional[int] = None
+        self._next_nonce: Optional[int] = None
+        self._nonce_lock = threading.Lock()
+        self._pending: Dict[int, PendingTransaction] = {}
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._tracker: Optional[threading.Thread] = None
+        self.stats = {"submitted": 0, "confirmed": 0, "failed": 0, "replaced": 0}
+
+    def start(self) -> None:
+        """Start the fee refresher and receipt tracker threads"""
+        self.fees.start()
+        if self._tracker is None:
+            self._tracker = threading.Thread(target=self._track, name="tx-tracker", daemon=True)
+            self._tracker.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self.fees.stop()
+        if self._tracker:
+            self._tracker.join(timeout)
+        if self._pending:
+            logger.info(f"⏳ {len(self._pending)} transaction(s) still pending at shutdown")
+
+    def in_flight(self, label: str) -> bool:
+        """Whether a transaction with this label is still waiting for a receipt"""
+        with self._pending_lock:
+            return any(pending.label == label for pending in self._pending.values())
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def _send(self, tx: Dict) -> str:
+        signed = self.account.sign_transaction(tx)
+        return Web3.to_hex(self.w3.eth.send_raw_transaction(signed.rawTransaction))
+
+    def submit(self, function, gas: int, label: str,
+               on_confirmed: Optional[Callable[[Dict], None]] = None,
+               on_failed: Optional[Callable[[Optional[Dict]], None]] = None) -> Optional[str]:
+        """
+        Sign and broadcast a contract call; returns its hash without waiting for a receipt
+
+        ``function`` is a bound contract function, e.g.
+        ``contract.functions.flagAnomaly(asset_id, reason)``. Returns None if
+        the node rejected the transaction (on_failed is then called with None).
+        """
+        self.start()
+        with self._nonce_lock:
+            try:
+                if self._chain_id is None:
+                    self._chain_id = self.w3.eth.chain_id
+                if self._next_nonce is None:
+                    self._next_nonce = self.w3.eth.get_transaction_count(self.account.address, "pending")
+
+                tx = function.build_transaction({
+                    "from": self.account.address,
+                    "nonce": self._next_nonce,
+                    "gas": gas,
+                    "gasPrice": self.fees.gas_price(),
+                    "chainId": self._chain_id,
+                })
+                tx_hash = self._send(tx)
+            except Exception as e:
+                if _is_nonce_error(e):
+                    # Another sender used this account; re-read the nonce next time
+                    self._next_nonce = None
+                logger.error(f"❌ Could not submit {label}: {e}")
+                self.stats["failed"] += 1
+                if on_failed:
+                    on_failed(None)
+                return None
+            self._next_nonce += 1
+
+        with self._pending_lock:
+            self._pending[tx["nonce"]] = PendingTransaction(label, tx, tx_hash, on_confirmed, on_failed)
+        self.stats["submitted"] += 1
+        logger.info(f"📤 {label} sent: {tx_hash} (nonce {tx['nonce']})")
+        return tx_hash
+
+    def _receipt(self, pending: PendingTransaction) -> Optional[Dict]:
+        """Receipt for whichever broadcast of this nonce was mined, if any"""
+        for tx_hash in reversed(pending.hashes):
+            try:
+                return self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+        return None
+
+    def _replace(self, pending: PendingTransaction) -> None:
+        """Re-broadcast a stuck transaction at a higher gas price"""
+        gas_price = min(self.max_gas_price,
+                        max(self.fees.gas_price(), int(pending.tx["gasPrice"] * self.fee_bump)))
+        if gas_price <= pending.tx["gasPrice"]:
+            # At the cap: re-broadcast in case the node dropped it
+            gas_price = pending.tx["gasPrice"]
+
+        tx = {**pending.tx, "gasPrice": gas_price}
+        try:
+            tx_hash = self._send(tx)
+        except Exception as e:
+            if "already known" not in str(e).lower():
+                logger.warning(f"⚠️  Could not replace {pending.label} (nonce {pending.nonce}): {e}")
+            pending.last_broadcast = time.time()
+            return
+
+        pending.last_broadcast = time.time()
+        if tx_hash not in pending.hashes:
+            pending.tx = tx
+            pending.hashes.append(tx_hash)
+            self.stats["replaced"] += 1
+            logger.info(f"🔁 {pending.label} stuck, replaced at {Web3.from_wei(gas_price, 'gwei'):.2f} gwei: {tx_hash}")
+
+    def check_pending(self) -> None:
+        """One tracker pass: settle mined transactions and replace stuck ones"""
+        with self._pending_lock:
+            pending_list = sorted(self._pending.values(), key=lambda p: p.nonce)
+
+        for pending in pending_list:
+            try:
+                receipt = self._receipt(pending)
+            except Exception as e:
+                logger.debug(f"Receipt lookup failed for {pending.label}: {e}")
+                continue
+
+            if receipt is None:
+                if time.time() - pending.last_broadcast >= self.stuck_after:
+                    self._replace(pending)
+                continue
+
+            with self._pending_lock:
+                self._pending.pop(pending.nonce, None)
+            waited = time.time() - pending.submitted
+            if receipt["status"] == 1:
+                self.stats["confirmed"] += 1
+                logger.info(f"✅ {pending.label} confirmed in block {receipt['blockNumber']} ({waited:.1f}s)")
+                callback = pending.on_confirmed
+            else:
+                self.stats["failed"] += 1
+                logger.error(f"❌ {pending.label} reverted in block {receipt['blockNumber']}")
+                callback = pending.on_failed
+
+            if callback:
+                try:
+                    callback(receipt)
+                except Exception as e:
+                    logger.error(f"❌ Callback for {pending.label} failed: {e}")
+
+    def _track(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            if self._pending:
+                self.check_pending()
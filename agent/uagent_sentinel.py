@@ -12,6 +12,9 @@ from datetime import datetime
 from dotenv import load_dotenv
 import requests
 
+from async_chain_reader import AsyncPriceReader
+from rpc_pool import rpc_urls
+
 load_dotenv()
 
 # Setup logging
@@ -52,11 +55,33 @@ sentinel = Agent(
 # API server URL (where your current agent API runs)
 API_URL = os.getenv("API_SERVER_URL", "http://localhost:8080")
 
+# Direct on-chain reads for assets the API server does not track (optional).
+# Awaited on the agent's own event loop, so a slow RPC never blocks other handlers
+RPC_URLS = rpc_urls()
+CONTRACT_ADDRESS = os.getenv("SENTINEL_ORACLE_ADDRESS")
+chain_reader = AsyncPriceReader(RPC_URLS, CONTRACT_ADDRESS) if RPC_URLS and CONTRACT_ADDRESS else None
+
+# Last /api/status reply and its ETag: unchanged status comes back as 304 with no body
+_status_session = requests.Session()
+_status_cache = {"etag": None, "data": None}
+
+def fetch_status() -> dict:
+    """GET /api/status, revalidating the cached copy with If-None-Match"""
+    headers = {"If-None-Match": _status_cache["etag"]} if _status_cache["etag"] else {}
+    response = _status_session.get(f"{API_URL}/api/status", headers=headers, timeout=5)
+    if response.status_code == 304 and _status_cache["data"] is not None:
+        return _status_cache["data"]
+    data = response.json()
+    _status_cache.update(etag=response.headers.get("ETag"), data=data)
+    return data
+
 @sentinel.on_event("startup")
 async def startup(ctx: Context):
     """Agent startup event"""
     ctx.logger.info("🤖 Sentinel AI uAgent starting...")
     ctx.logger.info(f"📡 Connected to API server: {API_URL}")
+    if chain_reader:
+        ctx.logger.info(f"⛓️  On-chain fallback reads: {', '.join(RPC_URLS)}")
     ctx.logger.info(f"🆔 Agent address: {ctx.agent.address}")
     ctx.logger.info("✅ Sentinel AI ready for ASI:One queries!")
 
@@ -66,9 +91,8 @@ async def handle_price_query(ctx: Context, sender: str, msg: PriceQuery):
     ctx.logger.info(f"📊 Received price query from {sender} for {msg.asset}")
 
     try:
-        # Fetch status from API server
-        response = requests.get(f"{API_URL}/api/status", timeout=5)
-        data = response.json()
+        # Fetch status from API server (in a thread: requests would block the event loop)
+        data = await asyncio.to_thread(fetch_status)
         
         # Get asset data
         if msg.asset in data.get("assets", {}):
@@ -86,6 +110,20 @@ async def handle_price_query(ctx: Context, sender: str, msg: PriceQuery):
                 )
             )
             ctx.logger.info(f"✅ Sent price response for {msg.asset}")
+        elif chain_reader and (reading := (await chain_reader.fetch_prices([msg.asset]))[msg.asset]):
+            # Not tracked by the detectors, but the contract has a stored price
+            await ctx.send(
+                sender,
+                PriceResponse(
+                    asset=msg.asset,
+                    price=reading.price,
+                    is_anomalous=reading.is_anomalous,
+                    z_score=None,
+                    reason="On-chain price (not monitored by the detector)",
+                    timestamp=datetime.fromtimestamp(reading.timestamp).isoformat()
+                )
+            )
+            ctx.logger.info(f"✅ Sent on-chain price response for {msg.asset}")
         else:
             # Asset not found
             await ctx.send(
@@ -122,7 +160,8 @@ async def handle_anomaly_query(ctx: Context, sender: str, msg: AnomalyQuery):
 
     try:
         # Send question to chat API
-        response = requests.post(
+        response = await asyncio.to_thread(
+            requests.post,
             f"{API_URL}/api/chat",
             json={"message": msg.question},
             timeout=5
@@ -225,7 +264,7 @@ def generate_metta_explanation(chat_data: dict) -> str:
 async def periodic_health_check(ctx: Context):
     """Periodic health check to ensure API server is responsive"""
     try:
-        response = requests.get(f"{API_URL}/health", timeout=2)
+        response = await asyncio.to_thread(requests.get, f"{API_URL}/health", timeout=2)
         if response.status_code == 200:
             ctx.logger.debug("💚 Health check passed")
         else:
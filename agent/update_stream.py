@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Update Stream for Sentinel Oracle
+Pushes every API state change to subscribers as server-sent events, so the
+dashboard sees new prices and anomalies as they arrive instead of polling
+
+The stream is served on its own port (STREAM_PORT, default 8081) by one
+asyncio event loop in a background thread: a subscriber is a socket, not a
+thread, so one process holds thousands of them.
+
+    GET /api/stream                              every asset
+    GET /api/stream?assets=BTC/USD,ETH/USD       only these assets
+
+Each change is one ``update`` event whose data is the asset's new state and
+whose id is a sequence number. A client reconnecting with Last-Event-ID is
+sent the events it missed, as long as they are among the last STREAM_REPLAY.
+
+Every subscriber's unsent output is bounded by STREAM_MAX_BUFFER bytes: a
+client that falls that far behind is disconnected rather than buffered
+without limit, and (EventSource being what it is) reconnects and resumes.
+Idle streams get a keepalive comment every STREAM_KEEPALIVE seconds.
+
+Usage:
+    stream = UpdateStream(port=8081)
+    stream.start()
+    stream.publish([("BTC/USD", {"price": 110000.0, ...})])   # from any thread
+"""
+
+import os
+import json
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, FrozenSet, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+logger = logging.getLogger("UpdateStream")
+
+STREAM_PATHS = ("/api/stream", "/stream")
+
+# Sent before any event: EventSource waits this long (ms) before reconnecting
+RETRY_MS = 2000
+
+
+class Subscriber:
+    """One connected client"""
+
+    def __init__(self, writer: asyncio.StreamWriter, assets: Optional[FrozenSet[str]]):
+        self.writer = writer
+        self.assets = assets  # None = every asset
+
+    def wants(self, asset: str) -> bool:
+        return self.assets is None or asset in self.assets
+
+    @property
+    def buffered(self) -> int:
+        return self.writer.transport.get_write_buffer_size()
+
+
+class UpdateStream:
+    """Server-sent event fan-out of API state changes"""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 max_buffer: Optional[int] = None, replay: Optional[int] = None,
+                 keepalive: Optional[float] = None, max_subscribers: Optional[int] = None):
+        self.host = host or os.getenv("STREAM_HOST", "0.0.0.0")
+        self.port = int(os.getenv("STREAM_PORT", "8081")) if port is None else port
+        self.max_buffer = max_buffer or int(os.getenv("STREAM_MAX_BUFFER", str(1024 * 1024)))
+        self.keepalive = keepalive or float(os.getenv("STREAM_KEEPALIVE", "15"))
+        self.max_subscribers = max_subscribers or int(os.getenv("STREAM_MAX_SUBSCRIBERS", "10000"))
+        replay = int(os.getenv("STREAM_REPLAY", "1000")) if replay is None else replay
+
+        self.subscribers: Dict[asyncio.StreamWriter, Subscriber] = {}
+        self.recent: Deque[Tuple[int, str, bytes]] = deque(maxlen=replay)  # (id, asset, encoded event)
+        self.sequence = 0
+        self.published = 0
+        self.evicted = 0
+        self.connections = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    # Lifecycle (called from other threads)
+
+    def start(self) -> None:
+        """Serve on a daemon thread; returns once listening"""
+        if self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="update-stream", daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        if self._server is None:
+            raise RuntimeError(f"Update stream could not listen on {self.host}:{self.port}")
+
+    def stop(self) -> None:
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port, backlog=1024))
+            self.port = self._server.sockets[0].getsockname()[1]
+        except OSError as e:
+            logger.error(f"❌ Update stream: {e}")
+            self._ready.set()
+            return
+        self._ready.set()
+        self._loop.create_task(self._keepalive())
+        logger.info(f"📡 Update stream on http://{self.host}:{self.port}{STREAM_PATHS[0]}")
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for writer in list(self.subscribers):
+                writer.transport.abort()
+            tasks = asyncio.all_tasks(self._loop)
+            for task in tasks:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self._loop.close()
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}{STREAM_PATHS[0]}"
+
+    # Publishing (any thread)
+
+    def publish(self, changes: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """Queue (asset, state) changes for every subscriber of those assets"""
+        changes = list(changes)
+        if changes and self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._fan_out, changes)
+
+    def _fan_out(self, changes: List[Tuple[str, Dict[str, Any]]]) -> None:
+        # Each event is encoded once, and every subscriber gets one write per publish
+        events = []
+        for asset, state in changes:
+            self.sequence += 1
+            event = (self.sequence, asset,
+                     f"id: {self.sequence}\nevent: update\ndata: {json.dumps(state)}\n\n".encode())
+            events.append(event)
+            self.recent.append(event)
+        self.published += len(events)
+        everything = b"".join(data for _, _, data in events)
+        for subscriber in list(self.subscribers.values()):
+            if subscriber.assets is None:
+                self._send(subscriber, everything)
+            else:
+                data = b"".join(data for _, asset, data in events if asset in subscriber.assets)
+                if data:
+                    self._send(subscriber, data)
+
+    def _send(self, subscriber: Subscriber, data: bytes) -> None:
+        if subscriber.buffered + len(data) > self.max_buffer:
+            # Too far behind: drop it and let it reconnect from Last-Event-ID
+            self.evicted += 1
+            self._drop(subscriber.writer)
+            return
+        subscriber.writer.write(data)
+
+    def _drop(self, writer: asyncio.StreamWriter) -> None:
+        if self.subscribers.pop(writer, None) is not None:
+            writer.transport.abort()
+
+    # Connections (event loop)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line, headers = await asyncio.wait_for(self._read_request(reader), 10)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ConnectionError, ValueError):
+            writer.close()
+            return
+        method = request_line[0]
+        url = urlparse(request_line[1] if len(request_line) > 1 else "/")
+
+        if method == "OPTIONS":
+            self._reply(writer, 204, b"")
+            return
+        if method != "GET" or url.path not in STREAM_PATHS:
+            self._reply(writer, 404, b'{"error": "Not found"}')
+            return
+        if len(self.subscribers) >= self.max_subscribers:
+            self._reply(writer, 503, b'{"error": "Too many stream subscribers"}')
+            return
+
+        query = parse_qs(url.query)
+        assets = frozenset(asset.strip() for value in query.get("assets", []) + query.get("asset", [])
+                           for asset in value.split(",") if asset.strip()) or None
+        subscriber = Subscriber(writer, assets)
+        writer.write(b"HTTP/1.1 200 OK\r\n"
+                     b"Content-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n"
+                     b"Access-Control-Allow-Origin: *\r\n"
+                     b"X-Accel-Buffering: no\r\n\r\n"
+                     + f"retry: {RETRY_MS}\n\n".encode())
+
+        last_id = headers.get("last-event-id", "")
+        if last_id.isdigit():
+            missed = b"".join(data for event_id, asset, data in self.recent
+                              if event_id > int(last_id) and subscriber.wants(asset))
+            if missed:
+                writer.write(missed)
+
+        self.subscribers[writer] = subscriber
+        self.connections += 1
+        try:
+            # Nothing more is expected from the client: wait for it to go away
+            while await reader.read(1024):
+                pass
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self._drop(writer)
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Tuple[List[str], Dict[str, str]]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+        request_line = lines[0].split()
+        if not request_line:
+            raise ValueError("Empty request line")
+        return request_line, headers
+
+    @staticmethod
+    def _reply(writer: asyncio.StreamWriter, status: int, body: bytes) -> None:
+        reason = {204: "No Content", 404: "Not Found", 503: "Service Unavailable"}[status]
+        writer.write(f"HTTP/1.1 {status} {reason}\r\n"
+                     f"Content-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Access-Control-Allow-Origin: *\r\n"
+                     f"Access-Control-Allow-Headers: Last-Event-ID, Cache-Control\r\n"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        writer.close()
+
+    async def _keepalive(self) -> None:
+        while True:
+            await asyncio.sleep(self.keepalive)
+            for subscriber in list(self.subscribers.values()):
+                if subscriber.buffered == 0:
+                    subscriber.writer.write(b": keepalive\n\n")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "subscribers": len(self.subscribers),
+            "connections": self.connections,
+            "published": self.published,
+            "evicted": self.evicted,
+        }
@@ -281,7 +281,30 @@ contract SentinelOracle is Ownable, ReentrancyGuard {
         PriceData memory data = prices[assetId];
         return (data.price, data.timestamp, data.isAnomalous);
     }
-    
+
+    /**
+     * @notice Get stored prices for many assets in a single call
+     * @dev Lets off-chain monitors read every asset in one round trip
+     * @param assetIds Internal asset identifiers
+     */
+    function getLatestPrices(bytes32[] calldata assetIds)
+        external
+        view
+        returns (int64[] memory priceValues, uint64[] memory timestamps, bool[] memory anomalous)
+    {
+        uint256 count = assetIds.length;
+        priceValues = new int64[](count);
+        timestamps = new uint64[](count);
+        anomalous = new bool[](count);
+
+        for (uint256 i = 0; i < count; i++) {
+            PriceData memory data = prices[assetIds[i]];
+            priceValues[i] = data.price;
+            timestamps[i] = data.timestamp;
+            anomalous[i] = data.isAnomalous;
+        }
+    }
+
     // ============ Anomaly Detection Functions ============
     
     function flagAnomaly(
@@ -307,7 +330,45 @@ contract SentinelOracle is Ownable, ReentrancyGuard {
         
         emit AnomalyCleared(assetId, uint64(block.timestamp));
     }
-    
+
+    /**
+     * @notice Flag many assets in one transaction
+     * @dev Assets without a stored price are skipped so one bad ID cannot revert the batch
+     * @param assetIds Internal asset identifiers
+     * @param reasons Reason per asset, same order as assetIds
+     */
+    function flagAnomalies(
+        bytes32[] calldata assetIds,
+        string[] calldata reasons
+    ) external onlyAIAgent {
+        require(assetIds.length == reasons.length, "Length mismatch");
+
+        for (uint256 i = 0; i < assetIds.length; i++) {
+            PriceData storage data = prices[assetIds[i]];
+            if (data.timestamp == 0) continue;
+
+            data.isAnomalous = true;
+
+            emit AnomalyFlagged(assetIds[i], data.price, data.timestamp, reasons[i]);
+        }
+    }
+
+    /**
+     * @notice Clear the anomaly flag on many assets in one transaction
+     * @dev Assets without a stored price are skipped
+     * @param assetIds Internal asset identifiers
+     */
+    function clearAnomalies(bytes32[] calldata assetIds) external onlyAIAgent {
+        for (uint256 i = 0; i < assetIds.length; i++) {
+            PriceData storage data = prices[assetIds[i]];
+            if (data.timestamp == 0) continue;
+
+            data.isAnomalous = false;
+
+            emit AnomalyCleared(assetIds[i], uint64(block.timestamp));
+        }
+    }
+
     // ============ User Deposit Functions ============
     
     function deposit() external payable nonReentrant {
@@ -0,0 +1,5 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.20;
+
+// Compiles Pyth's MockPyth so local scripts can deploy SentinelOracle without a live Pyth contract
+import "@pythnetwork/pyth-sdk-solidity/MockPyth.sol";
@@ -0,0 +1,106 @@
+const hre = require("hardhat");
+
+/**
+ * Flagging Benchmark
+ * Compares gas and wall-clock time for flagging N assets with one
+ * flagAnomaly transaction each versus a single flagAnomalies batch
+ *
+ * Usage: npx hardhat run scripts/benchmark-flagging.js
+ * (runs on the in-process hardhat network against a MockPyth deployment)
+ */
+
+const ASSET_COUNTS = [1, 10, 100];
+
+async function main() {
+  console.log("\n⛽ Sentinel Oracle - Flagging Benchmark");
+  console.log("═".repeat(70), "\n");
+
+  const [signer] = await hre.ethers.getSigners();
+  const maxAssets = Math.max(...ASSET_COUNTS);
+
+  // Deploy MockPyth and the oracle, with the signer as AI agent
+  const MockPyth = await hre.ethers.getContractFactory("MockPyth");
+  const pyth = await MockPyth.deploy(60, 1);
+  await pyth.waitForDeployment();
+
+  const SentinelOracle = await hre.ethers.getContractFactory("SentinelOracle");
+  const oracle = await SentinelOracle.deploy(await pyth.getAddress());
+  await oracle.waitForDeployment();
+  await (await oracle.setAIAgent(signer.address)).wait();
+
+  // Register assets and store a price for each, so they can be flagged
+  console.log(`📋 Registering ${maxAssets} assets...`);
+  const assetIds = [];
+  const updateData = [];
+  const now = (await hre.ethers.provider.getBlock("latest")).timestamp;
+  for (let i = 0; i < maxAssets; i++) {
+    const symbol = `ASSET${i}/USD`;
+    const assetId = hre.ethers.id(symbol);
+    const pythId = hre.ethers.id(`pyth:${symbol}`);
+    assetIds.push(assetId);
+
+    await (await oracle.addSupportedAsset(assetId, pythId, symbol)).wait();
+    updateData.push(
+      await pyth.createPriceFeedUpdateData(pythId, 100n * 10n ** 8n, 10n ** 6n, -8, 100n * 10n ** 8n, 10n ** 6n, now, now)
+    );
+  }
+
+  const fee = await pyth.getUpdateFee(updateData);
+  await (await oracle.updatePriceFeeds(updateData, { value: fee })).wait();
+  await (await oracle.updateAllStoredPrices()).wait();
+  console.log("✅ Prices stored\n");
+
+  const results = [];
+  for (const count of ASSET_COUNTS) {
+    const ids = assetIds.slice(0, count);
+    const reasons = ids.map(() => "Z-score 4.20 exceeds threshold");
+
+    // One transaction per asset: send all, then wait for every receipt
+    await (await oracle.clearAnomalies(ids)).wait();
+    let started = Date.now();
+    const txs = [];
+    for (const id of ids) {
+      txs.push(await oracle.flagAnomaly(id, reasons[0]));
+    }
+    const receipts = await Promise.all(txs.map((tx) => tx.wait()));
+    const singleMs = Date.now() - started;
+    const singleGas = receipts.reduce((sum, r) => sum + r.gasUsed, 0n);
+
+    // One batched transaction
+    await (await oracle.clearAnomalies(ids)).wait();
+    started = Date.now();
+    const receipt = await (await oracle.flagAnomalies(ids, reasons)).wait();
+    const batchMs = Date.now() - started;
+    const batchGas = receipt.gasUsed;
+
+    for (const id of ids) {
+      const [, , isAnomalous] = await oracle.getLatestPrice(id);
+      if (!isAnomalous) throw new Error(`Asset ${id} was not flagged by the batch`);
+    }
+
+    results.push({ count, singleGas, batchGas, singleMs, batchMs, transactions: receipts.length });
+  }
+
+  console.log("Assets | flagAnomaly x N (gas / ms / txs) | flagAnomalies (gas / ms) | gas saved");
+  console.log("-".repeat(86));
+  for (const r of results) {
+    const saved = 100 - Number((r.batchGas * 10000n) / r.singleGas) / 100;
+    console.log(
+      `${String(r.count).padStart(6)} | ` +
+        `${r.singleGas.toString().padStart(10)} / ${String(r.singleMs).padStart(6)} / ${String(r.transactions).padStart(4)} | ` +
+        `${r.batchGas.toString().padStart(10)} / ${String(r.batchMs).padStart(6)}   | ` +
+        `${saved.toFixed(1)}%`
+    );
+  }
+  console.log(
+    "\n💡 On a live network each transaction also waits for its own inclusion, so the" +
+      "\n   wall-clock gap grows with block time and mempool contention."
+  );
+}
+
+main()
+  .then(() => process.exit(0))
+  .catch((error) => {
+    console.error(error);
+    process.exit(1);
+  });
@@ -12,6 +12,7 @@ import PriceCard from "./PriceCard";
 import StatsPanel from "./StatsPanel";
 import AnomalyAlert from "./AnomalyAlert";
 import AgentChat from "./AgentChat";
+import { subscribeToUpdates } from "../lib/api";
 
 // Asset mapping for display
 const ASSET_MAPPING = {
@@ -22,12 +23,38 @@ const ASSET_MAPPING = {
   "LINK/USD": { name: "Chainlink", symbol: "LINK" },
 };
 
+// Turn one asset's API state into the shape the cards use
+const toAsset = (assetId, assetData) => {
+  const mapping = ASSET_MAPPING[assetId] || {
+    name: assetId,
+    symbol: assetId.split("/")[0],
+  };
+  return {
+    id: assetId,
+    name: mapping.name,
+    symbol: mapping.symbol,
+    price: assetData.last_price,
+    zScore:
+      assetData.last_z_score !== null && assetData.last_z_score !== undefined
+        ? assetData.last_z_score
+        : null,
+    isAnomalous: assetData.is_anomalous,
+    lastUpdate: assetData.last_update
+      ? new Date(assetData.last_update).getTime()
+      : Date.now(),
+    reason: assetData.last_reason,
+    anomalyCount: assetData.anomaly_count,
+    timeframes: assetData.timeframe_z_scores || {},
+  };
+};
+
 export default function MultiAssetDashboard({ agentStatus }) {
   const [assets, setAssets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [lastRefresh, setLastRefresh] = useState(Date.now());
   const [anomalies, setAnomalies] = useState([]);
   const [error, setError] = useState(null);
+  const [streaming, setStreaming] = useState(false);
 
   // Fetch real data from API
   const fetchAssetData = async () => {
@@ -45,29 +72,7 @@ export default function MultiAssetDashboard({ agentStatus }) {
 
       // Transform API data to match our component structure
       const transformedAssets = Object.entries(data.assets).map(
-        ([assetId, assetData]) => {
-          const mapping = ASSET_MAPPING[assetId] || {
-            name: assetId,
-            symbol: assetId.split("/")[0],
-          };
-          return {
-            id: assetId,
-            name: mapping.name,
-            symbol: mapping.symbol,
-            price: assetData.last_price,
-            zScore:
-              assetData.last_z_score !== null &&
-              assetData.last_z_score !== undefined
-                ? assetData.last_z_score
-                : null,
-            isAnomalous: assetData.is_anomalous,
-            lastUpdate: assetData.last_update
-              ? new Date(assetData.last_update).getTime()
-              : Date.now(),
-            reason: assetData.last_reason,
-            anomalyCount: assetData.anomaly_count,
-          };
-        }
+        ([assetId, assetData]) => toAsset(assetId, assetData)
       );
 
       console.log("Transformed assets:", transformedAssets);
@@ -86,12 +91,30 @@ export default function MultiAssetDashboard({ agentStatus }) {
     fetchAssetData();
   }, []);
 
-  // Auto-refresh every 10 seconds
+  // Live updates pushed by the API server as they happen
   useEffect(() => {
-    const interval = setInterval(fetchAssetData, 10000);
-    return () => clearInterval(interval);
+    return subscribeToUpdates(
+      (update) => {
+        setAssets((current) => {
+          const next = toAsset(update.asset, update);
+          const index = current.findIndex((asset) => asset.id === update.asset);
+          if (index === -1) return [...current, next];
+          const updated = [...current];
+          updated[index] = next;
+          return updated;
+        });
+        setLastRefresh(Date.now());
+      },
+      { onStatus: (status) => setStreaming(status === "open") }
+    );
   }, []);
 
+  // Poll every 10 seconds while the stream is down, resync every minute otherwise
+  useEffect(() => {
+    const interval = setInterval(fetchAssetData, streaming ? 60000 : 10000);
+    return () => clearInterval(interval);
+  }, [streaming]);
+
   // Update anomalies when assets change
   useEffect(() => {
     const newAnomalies = assets.filter((asset) => asset.isAnomalous);
@@ -208,6 +231,7 @@ export default function MultiAssetDashboard({ agentStatus }) {
                     asset={asset.name}
                     price={asset.price}
                     zScore={asset.zScore}
+                    timeframes={asset.timeframes}
                     isAnomalous={asset.isAnomalous}
                     lastUpdate={asset.lastUpdate}
                     loading={loading}
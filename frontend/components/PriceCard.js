@@ -7,6 +7,7 @@ export default function PriceCard({
   asset,
   price,
   zScore,
+  timeframes,
   isAnomalous,
   lastUpdate,
   loading,
@@ -39,6 +40,18 @@ export default function PriceCard({
     return "Low";
   };
 
+  // Per-horizon z-scores keyed by window length (samples), shortest first
+  const horizons = Object.entries(timeframes || {})
+    .filter(([, z]) => z !== null && z !== undefined)
+    .sort(([a], [b]) => Number(a) - Number(b));
+
+  const getHorizonColor = (z) => {
+    const absZ = Math.abs(z);
+    if (absZ > 2) return "z-score-danger";
+    if (absZ > 1.5) return "z-score-caution";
+    return "z-score-safe";
+  };
+
   const getStatusIcon = () => {
     if (isAnomalous) return <TrendingDown className="w-8 h-8 text-red-400" />;
     if (zScore > 0) return <TrendingUp className="w-8 h-8 text-accent-green" />;
@@ -131,6 +144,23 @@ export default function PriceCard({
           </div>
         </div>
 
+        {/* Z-Score per detection horizon */}
+        {horizons.length > 1 && (
+          <div className="flex flex-wrap gap-3 mt-4">
+            {horizons.map(([window, z]) => (
+              <div
+                key={window}
+                className="px-2 py-1 rounded-md border border-primary/20 text-xs"
+              >
+                <span className="text-[#F0F0F0]/50">{window} samples: </span>
+                <span className={`font-semibold ${getHorizonColor(z)}`}>
+                  {z.toFixed(2)}
+                </span>
+              </div>
+            ))}
+          </div>
+        )}
+
         {/* Live indicator with Enhanced Pulse */}
         <div className="flex items-center space-x-2 mt-6 pt-6 border-t border-primary/20">
           <div className="w-2 h-2 bg-primary rounded-full live-pulse shadow-[0_0_8px] shadow-primary"></div>
@@ -3,6 +3,9 @@ import axios from "axios";
 const API_BASE_URL =
   process.env.NEXT_PUBLIC_AGENT_API_URL || "http://localhost:5000";
 
+const STREAM_URL =
+  process.env.NEXT_PUBLIC_AGENT_STREAM_URL || "http://localhost:8081/api/stream";
+
 /**
  * Fetch agent status
  */
@@ -29,11 +32,32 @@ export async function fetchAgentStatus() {
 
 /**
  * Fetch price history
+ *
+ * Options: asset, from / to (epoch seconds or ISO 8601), resolution
+ * ("raw", "1s", "1m", "1h") and limit. The API answers with columns; raw
+ * prices come back as [{ price, timestamp }], rollups as
+ * [{ timestamp, open, high, low, close, samples }].
  */
-export async function fetchPriceHistory() {
+export async function fetchPriceHistory(options = {}) {
   try {
-    const response = await axios.get(`${API_BASE_URL}/api/price-history`);
-    return response.data.prices || [];
+    const response = await axios.get(`${API_BASE_URL}/api/price-history`, {
+      params: options,
+    });
+    const { timestamp = [], ...columns } = response.data;
+    if ((response.data.resolution || "raw") === "raw") {
+      return timestamp.map((ms, i) => ({
+        price: columns.price[i],
+        timestamp: new Date(ms).toISOString(),
+      }));
+    }
+    return timestamp.map((ms, i) => ({
+      timestamp: new Date(ms).toISOString(),
+      open: columns.open[i],
+      high: columns.high[i],
+      low: columns.low[i],
+      close: columns.close[i],
+      samples: columns.samples[i],
+    }));
   } catch (error) {
     console.error("Error fetching price history:", error);
     // Return mock data for development
@@ -45,6 +69,38 @@ export async function fetchPriceHistory() {
   }
 }
 
+/**
+ * Subscribe to live asset updates (server-sent events)
+ *
+ * onUpdate receives each changed asset's state ({ asset, last_price,
+ * last_z_score, is_anomalous, last_reason, last_update, anomaly_count,
+ * timeframe_z_scores, version }) as it happens. Pass { assets: [...] } to
+ * follow only some assets, and onStatus to hear "open" / "reconnecting".
+ * The browser reconnects by itself and resumes from the last event seen.
+ * Returns a function that closes the subscription.
+ */
+export function subscribeToUpdates(onUpdate, { assets, onStatus } = {}) {
+  if (typeof window === "undefined" || !window.EventSource) {
+    return () => {};
+  }
+  const url = assets && assets.length
+    ? `${STREAM_URL}?assets=${encodeURIComponent(assets.join(","))}`
+    : STREAM_URL;
+  const source = new EventSource(url);
+
+  source.addEventListener("update", (event) => {
+    try {
+      onUpdate(JSON.parse(event.data));
+    } catch (error) {
+      console.error("Bad update event:", error);
+    }
+  });
+  source.onopen = () => onStatus && onStatus("open");
+  source.onerror = () => onStatus && onStatus("reconnecting");
+
+  return () => source.close();
+}
+
 /**
  * Send chat message to agent
  */